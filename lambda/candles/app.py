@@ -1,9 +1,12 @@
-from symphony.client import BinanceClient
+from symphony.client import BinanceClient, CandleCache
 import pandas as pd
 from symphony.data_classes import PriceHistory, Instrument
 from symphony.enum import Timeframe, string_to_timeframe
 import json
 
+# /tmp survives between invocations of a warm container, so repeat requests only fetch new bars
+candle_cache = CandleCache("/tmp/candle_cache/")
+
 
 def handler(event, context):
     try:
@@ -32,7 +35,7 @@ def handler(event, context):
     else:
         num_bars = int(event["num_bars"])
 
-    ph = BinanceClient.anon_get(instrument, timeframe, num_bars_or_start_time=num_bars)
+    ph = BinanceClient.anon_get(instrument, timeframe, num_bars_or_start_time=num_bars, candle_cache=candle_cache)
     result = ph.price_history.to_json()
     parsed = json.loads(result)
     return parsed
\ No newline at end of file
@@ -1,10 +1,17 @@
 from abc import ABC, abstractmethod
-from typing import List, Union
+from typing import List, Union, Sequence
 from symphony.data_classes import Instrument
-from symphony.enum import Exchange
+from symphony.enum import Exchange, Column
 from .client_abc import ClientABC
 from typing import Optional
+from symphony.config import USE_MODIN
 from .client_abc import ClientABC
+import numpy as np
+
+if USE_MODIN:
+    import modin.pandas as pd
+else:
+    import pandas as pd
 
 
 class RealTimeQuoter(ABC):
@@ -42,9 +49,70 @@ class RealTimeQuoter(ABC):
     def get_liquidity(self, symbol_or_instrument: Union[Instrument, str], fall_back_to_api: Optional[bool] = False) -> float:
         pass
 
+    @abstractmethod
+    def wait_for_quote(self,
+                       symbols_or_instruments: Union[List[Union[Instrument, str]], Instrument, str],
+                       timeout: Optional[float] = None,
+                       fall_back_to_api: Optional[bool] = False) -> List[str]:
+        pass
+
+    @abstractmethod
+    def quote_sequence(self, symbol_or_instrument: Union[Instrument, str]) -> Optional[int]:
+        pass
+
+    @abstractmethod
+    def get_quotes(self, symbols_or_instruments: Sequence[Union[Instrument, str]]) -> np.ndarray:
+        pass
+
+    @abstractmethod
+    def liquidity_snapshot(self,
+                           symbols_or_instruments: Sequence[Union[Instrument, str]],
+                           fall_back_to_api: Optional[bool] = True) -> pd.DataFrame:
+        pass
+
 
 class HistoricalQuoter(ABC):
 
     def __init__(self, log_level: Optional[int] = 0):
         self.instruments: List[Instrument]
-        self.exchange: Exchange
\ No newline at end of file
+        self.exchange: Exchange
+        self.timestamp: Optional[pd.Timestamp]
+
+    @abstractmethod
+    def set_timestamp(self, timestamp: pd.Timestamp) -> None:
+        pass
+
+    @abstractmethod
+    def get_bid(self,
+                symbol_or_instrument: Union[Instrument, str],
+                fall_back_to_api: Optional[bool] = False,
+                timestamp: Optional[pd.Timestamp] = None) -> float:
+        pass
+
+    @abstractmethod
+    def get_ask(self,
+                symbol_or_instrument: Union[Instrument, str],
+                fall_back_to_api: Optional[bool] = False,
+                timestamp: Optional[pd.Timestamp] = None) -> float:
+        pass
+
+    @abstractmethod
+    def get_midpoint(self,
+                     symbol_or_instrument: Union[Instrument, str],
+                     fall_back_to_api: Optional[bool] = False,
+                     timestamp: Optional[pd.Timestamp] = None) -> float:
+        pass
+
+    @abstractmethod
+    def get_liquidity(self,
+                      symbol_or_instrument: Union[Instrument, str],
+                      fall_back_to_api: Optional[bool] = False,
+                      timestamp: Optional[pd.Timestamp] = None) -> float:
+        pass
+
+    @abstractmethod
+    def get_prices(self,
+                   symbols_or_instruments: Sequence[Union[Instrument, str]],
+                   timestamps: Union[Sequence[pd.Timestamp], pd.DatetimeIndex, np.ndarray],
+                   column: Optional[str] = Column.MIDPOINT) -> np.ndarray:
+        pass
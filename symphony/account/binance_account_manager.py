@@ -90,6 +90,9 @@ class BinanceAccountManager(Borg):
         self.__user_isolated_margin_pairs: List[str] = []  # Pairs we are listening on
         self.__isolated_margin_conn_keys: Dict[str, str] = {}
 
+        # Chains valuing the account by id of their quoter, built on first use and kept for their cached rates
+        self.__conversion_chains: Dict[int, ConversionChain] = {}
+
         # Callbacks
         self.__order_callbacks: List[Callable] = []
         self.__balance_update_callbacks: List[Callable] = []
@@ -441,8 +444,16 @@ class BinanceAccountManager(Borg):
         if denomination not in all_assets:
             raise AccountException(f"Denomination {denomination} is not a valid asset")
 
-        conv_chain = ConversionChain(quoter)
-        total_balance: float = 0.0
+        # The chain keeps its quoter alive, so the id is not reused while it is in the dict
+        conv_chain = self.__conversion_chains.get(id(quoter))
+        if conv_chain is None:
+            conv_chain = self.__conversion_chains[id(quoter)] = ConversionChain(quoter)
+        # Amount of each asset, valued in one pass over the quotes at the end
+        balances: Dict[str, float] = {}
+
+        def add_balance(balance_asset: str, balance: float) -> None:
+            balances[balance_asset] = balances.get(balance_asset, 0.0) + balance
+
         spot_assets = self.__extract_assets(allowed_spot_assets) if allowed_spot_assets else []
         margin_assets = self.__extract_assets(allowed_margin_assets) if allowed_margin_assets else []
         isolated_margin_symbols = self.__extract_pairs(allowed_isolated_margin_symbols_or_instruments) \
@@ -456,10 +467,7 @@ class BinanceAccountManager(Borg):
                 balance = self.get_balance(AccountType.SPOT, BalanceType.FREE, spot_asset)
                 if not balance:
                     continue
-                if spot_asset == denomination:
-                    total_balance += balance
-                else:
-                    total_balance += conv_chain.convert(spot_asset, denomination, amount=balance)
+                add_balance(spot_asset, balance)
         else:
             for asset in self.spot_balances.keys():
 
@@ -471,26 +479,17 @@ class BinanceAccountManager(Borg):
 
                 if not balance:
                     continue
-                if asset == denomination:
-                    total_balance += balance
-                else:
-                    total_balance += conv_chain.convert(asset, denomination, amount=balance)
+                add_balance(asset, balance)
 
         if margin_assets:
             for margin_asset in margin_assets:
                 balance = self.get_balance(AccountType.MARGIN, BalanceType.NET, margin_asset)
                 if not balance:
                     continue
-                if margin_asset == denomination:
-                    total_balance += balance
-                else:
-                    total_balance += conv_chain.convert(margin_asset, denomination, amount=balance)
+                add_balance(margin_asset, balance)
         else:
             btc_balance = float(self.__sub_client.get_margin_account()["totalNetAssetOfBtc"])
-            if denomination == "BTC":
-                total_balance += btc_balance
-            else:
-                total_balance += conv_chain.convert("BTC", denomination, amount=btc_balance)
+            add_balance("BTC", btc_balance)
 
         if isolated_margin_symbols:
             for iso_symbol in isolated_margin_symbols:
@@ -499,11 +498,10 @@ class BinanceAccountManager(Borg):
                         net_btc_balance = self.isolated_margin_balances[iso_symbol][asset][BalanceType.NET_BTC]
                         if not net_btc_balance:
                             continue
-                        if denomination == "BTC":
-                            total_balance += net_btc_balance
-                        else:
-                            total_balance += conv_chain.convert("BTC", denomination, amount=net_btc_balance)
+                        add_balance("BTC", net_btc_balance)
 
+        total_balance: float = balances.pop(denomination, 0.0)
+        total_balance += conv_chain.value_in(balances, denomination)
         return total_balance
 
     def register_order_callback(self, callback: Callable[[Order], None]) -> None:
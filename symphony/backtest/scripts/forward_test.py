@@ -1,4 +1,4 @@
-from symphony.client import BinanceClient
+from symphony.client import BinanceClient, CandleCache
 from symphony.notification import SlackNotifier
 from symphony.ml import DemarkBuySetupClassifier
 from symphony.enum import Timeframe, timeframe_to_numpy_string
@@ -29,6 +29,7 @@ timeframes = [Timeframe.H1, Timeframe.H4]
 threshold = 0.55
 start_timestamp = pd.Timestamp("2021-05-01 00:00:00", tz='utc')
 num_bars = get_num_bars_timestamp_to_present(start_timestamp, Timeframe.H1)
+candle_cache = CandleCache()
 
 def apply_indicators(ph: PriceHistory) -> PriceHistory:
     bearish_price_flip(ph)
@@ -37,7 +38,7 @@ def apply_indicators(ph: PriceHistory) -> PriceHistory:
     return ph
 
 def get_candles(instrument: Instrument, timeframe: Timeframe) -> PriceHistory:
-    return BinanceClient.anon_get(instrument, timeframe, start_timestamp)
+    return BinanceClient.anon_get(instrument, timeframe, start_timestamp, candle_cache=candle_cache)
 
 def apply_indicators(ph: PriceHistory) -> PriceHistory:
     bearish_price_flip(ph)
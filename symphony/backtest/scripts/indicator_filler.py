@@ -3,7 +3,7 @@ import numpy as np
 from symphony.config import config, BACKTEST_DIR, USE_MODIN, USE_S3
 from symphony.enum.timeframe import Timeframe, timeframe_to_string, string_to_timeframe, integer_to_timeframe
 from symphony.enum import Column
-from symphony.data_classes import Instrument, PriceHistory
+from symphony.data_classes import Instrument, PriceHistory, map_price_histories
 from symphony.backtest.results.results_helper import ResultsHelper
 from symphony.data.archivers import BinanceArchiver
 from symphony.indicator_v2.demark import td_buy_setup, td_sell_setup, bullish_price_flip, bearish_price_flip, td_differential, td_anti_differential, td_reverse_differential, td_trap, td_open, td_clop, td_camouflage, td_clopwin, td_buy_countdown
@@ -11,7 +11,7 @@ from symphony.indicator_v2.volatility import bollinger_bands
 from symphony.indicator_v2.trend import sma
 from symphony.indicator_v2.oscillators import zig_zag, get_closest_harmonic
 from symphony.indicator_v2 import IndicatorRegistry
-from symphony.data.archivers import BinanceArchiver
+from symphony.utils.resample import finest_timeframe, resample_price_histories
 
 from concurrent.futures._base import ALL_COMPLETED
 import concurrent.futures
@@ -99,33 +99,34 @@ def apply_indicators(price_history: PriceHistory, indicator=None) -> PriceHistor
 
 
 def fetch_histories(symbols):
-    def fetch_symbol(symbol = "", timeframe = None):
-        symbol_phistory = archiver.read(symbol, timeframe)
-        symbol_phistory.price_history = symbol_phistory.price_history.loc[abs_start_ts:]
-        histories[symbol][timeframe] = symbol_phistory
-        print(f"Fetching {symbol} {timeframe}")
+    def fetch_symbol(symbol = ""):
+        # Read only the finest timeframe and derive the others locally
+        base_phistory = archiver.read(symbol, finest_timeframe(timeframes))
+        base_phistory.price_history = base_phistory.price_history.loc[abs_start_ts:]
+        for symbol_phistory in resample_price_histories(base_phistory, timeframes):
+            histories[symbol][symbol_phistory.timeframe] = symbol_phistory
+        print(f"Fetching {symbol} {timeframes}")
         return
 
     futures = []
     with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
 
         for symbol in symbols:
+            if symbol not in histories.keys():
+                histories[symbol] = {}
             for timeframe in timeframes:
-                if symbol not in histories.keys():
-                    histories[symbol] = {}
                 if timeframe not in histories[symbol].keys():
                     histories[symbol][timeframe] = None
-                futures.append(executor.submit(fetch_symbol, symbol=symbol, timeframe=timeframe))
+            futures.append(executor.submit(fetch_symbol, symbol=symbol))
 
         concurrent.futures.wait(futures, timeout=None, return_when=ALL_COMPLETED)
 
-    futures = []
-    with concurrent.futures.ProcessPoolExecutor(cpu_count() - 1) as executor:
-        for symbol in histories.keys():
-            for timeframe in histories[symbol].keys():
-                futures.append(executor.submit(apply_indicators, histories[symbol][timeframe]))
-        concurrent.futures.wait(futures, timeout=None, return_when=ALL_COMPLETED)
-        results = [future.result() for future in futures]
+    # Histories go to the worker processes through shared memory instead of being pickled
+    results = map_price_histories(
+        apply_indicators,
+        [histories[symbol][timeframe] for symbol in histories.keys() for timeframe in histories[symbol].keys()],
+        max_workers=cpu_count() - 1
+    )
 
     for result in results:
         result: PriceHistory
@@ -4,6 +4,10 @@ into standard objects
 """
 
 
+from .rate_limiter import WeightRateLimiter
+from .candle_cache import CandleCache
+from .stream_multiplexer import CombinedStreamMultiplexer
+from .bar_builder import LocalBarBuilder
 from .iex_client import IEXClient
 from .binance_client import BinanceClient
 from .client_factory import ClientFactory
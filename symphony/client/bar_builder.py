@@ -0,0 +1,255 @@
+from symphony.enum import Timeframe
+from symphony.exceptions import ClientClassException
+from symphony.config import USE_MODIN
+from typing import List, Dict, Tuple, Optional, Final
+from bisect import bisect_right
+from time import time
+import math
+
+if USE_MODIN:
+    import modin.pandas as pd
+else:
+    import pandas as pd
+
+# Trades still in flight at the boundary are waited for this long before a bar is closed on the timer
+LOCAL_BAR_CLOSE_GRACE_MS: Final[int] = 100
+# Lower edges of the latency histogram buckets, local close to exchange close, in ms
+LATENCY_BUCKET_EDGES_MS: Final[List[int]] = [0, 10, 50, 100, 250, 500, 1000, 2500]
+# Closed bars kept per symbol and timeframe for reconciling with the exchange kline
+RECONCILE_WINDOW_BARS: Final[int] = 4
+
+Row = Dict[pd.Timestamp, Dict[str, float]]
+
+
+class _OpenBar:
+    """
+    Bar being built for one symbol and timeframe, updated in place on every trade
+    """
+    __slots__ = ("timeframe", "bar_ms", "open_ms", "open", "high", "low", "close", "volume", "num_trades", "partial")
+
+    def __init__(self, timeframe: Timeframe):
+        self.timeframe: Timeframe = timeframe
+        self.bar_ms: int = timeframe.value * 60000
+        self.open_ms: Optional[int] = None
+        self.open = self.high = self.low = self.close = self.volume = 0.0
+        self.num_trades: int = 0
+        # The bar trades were first seen in started before the builder did, it is never emitted
+        self.partial: bool = True
+
+    def start(self, open_ms: int, previous_close: float, partial: bool) -> None:
+        self.open_ms = open_ms
+        self.open = self.high = self.low = self.close = previous_close
+        self.volume = 0.0
+        self.num_trades = 0
+        self.partial = partial
+        return
+
+
+class LocalBarBuilder:
+    """
+    Builds OHLCV bars from the trade stream of each symbol and closes them at the timeframe boundary, when the
+    first trade of the next bar arrives or, on a timer, `close_grace_ms` after the boundary, whichever is first.
+    The exchange kline of the bar arrives later and is reconciled against the local bar, the delay between the
+    two is recorded in a latency histogram.
+
+    Not thread safe, all calls are expected from the thread handling the streams. Boundaries are in exchange
+    time while the timer runs on the local clock, so the local clock should be synced.
+    """
+
+    def __init__(self, close_grace_ms: Optional[int] = LOCAL_BAR_CLOSE_GRACE_MS):
+        """
+        :param close_grace_ms: Wait for trades in flight this long past the boundary before closing on the timer
+        """
+        self.close_grace_ms: int = close_grace_ms
+        self.__bars: Dict[str, List[_OpenBar]] = {}
+        self.__closed: Dict[Tuple[str, Timeframe], Dict[int, Tuple[float, float, float, float, float, float]]] = {}
+        self.__latency_counts: List[int] = [0] * (len(LATENCY_BUCKET_EDGES_MS) + 1)
+        self.__stats: Dict[str, int] = {
+            "trades": 0,
+            "late_trades": 0,
+            "bars_closed": 0,
+            "reconciled": 0,
+            "mismatched": 0
+        }
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """
+        Trades aggregated, trades that arrived after their bar was closed, bars closed locally, bars reconciled
+        with the exchange kline and reconciled bars that differed from it
+        """
+        return dict(self.__stats)
+
+    def add(self, symbol: str, timeframe: Timeframe) -> None:
+        """
+        Starts building bars of a symbol and timeframe. The first bar is only emitted once a full one has been seen.
+
+        :param symbol: Symbol
+        :param timeframe: Timeframe
+        :return: None
+        """
+        bars = self.__bars.setdefault(symbol, [])
+        if not any(bar.timeframe == timeframe for bar in bars):
+            bars.append(_OpenBar(timeframe))
+            self.__closed[(symbol, timeframe)] = {}
+        return
+
+    def remove(self, symbol: str, timeframe: Timeframe) -> None:
+        """
+        Stops building bars of a symbol and timeframe
+
+        :param symbol: Symbol
+        :param timeframe: Timeframe
+        :return: None
+        """
+        bars = [bar for bar in self.__bars.get(symbol, []) if bar.timeframe != timeframe]
+        if bars:
+            self.__bars[symbol] = bars
+        else:
+            self.__bars.pop(symbol, None)
+        self.__closed.pop((symbol, timeframe), None)
+        return
+
+    def timeframes(self, symbol: str) -> List[Timeframe]:
+        """
+        :param symbol: Symbol
+        :return: Timeframes bars are built on for the symbol
+        """
+        return [bar.timeframe for bar in self.__bars.get(symbol, [])]
+
+    def on_trade(self,
+                 symbol: str,
+                 price: float,
+                 quantity: float,
+                 trade_ms: int,
+                 now_ms: Optional[int] = None
+                 ) -> List[Tuple[str, Timeframe, Row]]:
+        """
+        Adds a trade to the open bars of its symbol
+
+        :param symbol: Symbol
+        :param price: Trade price
+        :param quantity: Trade quantity
+        :param trade_ms: Trade time, UNIX ms
+        :param now_ms: Local time, UNIX ms, defaults to now
+        :return: Bars closed by the trade, as tuples of (symbol, timeframe, row for PriceHistory.append)
+        """
+        bars = self.__bars.get(symbol)
+        if not bars:
+            return []
+        self.__stats["trades"] += 1
+        closed: List[Tuple[str, Timeframe, Row]] = []
+        for bar in bars:
+            if bar.open_ms is None:
+                bar.start(trade_ms - trade_ms % bar.bar_ms, price, partial=True)
+            elif trade_ms < bar.open_ms:
+                # Its bar was closed on the timer already, reconciliation picks it up
+                self.__stats["late_trades"] += 1
+                continue
+            elif trade_ms >= bar.open_ms + bar.bar_ms:
+                self.__close(symbol, bar, trade_ms - trade_ms % bar.bar_ms, now_ms, closed)
+            if bar.num_trades == 0:
+                bar.open = bar.high = bar.low = price
+            elif price > bar.high:
+                bar.high = price
+            elif price < bar.low:
+                bar.low = price
+            bar.close = price
+            bar.volume += quantity
+            bar.num_trades += 1
+        return closed
+
+    def close_due(self, now_ms: Optional[int] = None) -> List[Tuple[str, Timeframe, Row]]:
+        """
+        Closes the bars whose boundary passed more than `close_grace_ms` ago
+
+        :param now_ms: Local time, UNIX ms, defaults to now
+        :return: Bars closed, as tuples of (symbol, timeframe, row for PriceHistory.append)
+        """
+        now_ms = now_ms if now_ms is not None else int(time() * 1000)
+        due_ms = now_ms - self.close_grace_ms
+        closed: List[Tuple[str, Timeframe, Row]] = []
+        for symbol, bars in self.__bars.items():
+            for bar in bars:
+                if bar.open_ms is not None and bar.open_ms + bar.bar_ms <= due_ms:
+                    self.__close(symbol, bar, due_ms - due_ms % bar.bar_ms, now_ms, closed)
+        return closed
+
+    def next_close_ms(self) -> Optional[int]:
+        """
+        :return: Local time the next bar closes on the timer, UNIX ms, None if no bar is open
+        """
+        boundaries = [bar.open_ms + bar.bar_ms for bars in self.__bars.values() for bar in bars
+                      if bar.open_ms is not None]
+        return min(boundaries) + self.close_grace_ms if boundaries else None
+
+    def reconcile(self,
+                  symbol: str,
+                  timeframe: Timeframe,
+                  kline: Dict[str, str],
+                  arrival_ms: Optional[int] = None
+                  ) -> Optional[bool]:
+        """
+        Compares the exchange's closed kline with the local bar and records the latency between the two closes
+
+        :param symbol: Symbol
+        :param timeframe: Timeframe
+        :param kline: The `k` payload of the kline message
+        :param arrival_ms: Local time the kline arrived, UNIX ms, defaults to now
+        :return: True if the local bar matches, False if it differs, None if there is no local bar to compare with
+        """
+        local = self.__closed.get((symbol, timeframe), {}).pop(kline["t"], None)
+        if local is None:
+            return None
+        arrival_ms = arrival_ms if arrival_ms is not None else int(time() * 1000)
+        latency_ms = arrival_ms - local[5]
+        self.__latency_counts[bisect_right(LATENCY_BUCKET_EDGES_MS, latency_ms)] += 1
+        self.__stats["reconciled"] += 1
+        matches = float(kline["o"]) == local[0] and float(kline["h"]) == local[1] and \
+            float(kline["l"]) == local[2] and float(kline["c"]) == local[3] and \
+            math.isclose(float(kline["v"]), local[4], rel_tol=1e-9, abs_tol=1e-12)
+        if not matches:
+            self.__stats["mismatched"] += 1
+        return matches
+
+    def latency_histogram(self) -> Dict[str, int]:
+        """
+        How much earlier bars closed locally than on the exchange
+
+        :return: Bars by latency bucket, e.g. {"<0ms": 0, "0-10ms": 3, ..., ">=2500ms": 0}. Negative latencies
+                 are bars the exchange closed first.
+        """
+        labels = ["<0ms"] + [f"{low}-{high}ms" for low, high in zip(LATENCY_BUCKET_EDGES_MS,
+                                                                    LATENCY_BUCKET_EDGES_MS[1:])] + \
+            [f">={LATENCY_BUCKET_EDGES_MS[-1]}ms"]
+        return dict(zip(labels, self.__latency_counts))
+
+    def __close(self,
+                symbol: str,
+                bar: _OpenBar,
+                next_open_ms: int,
+                now_ms: Optional[int],
+                closed: List[Tuple[str, Timeframe, Row]]) -> None:
+        """
+        Closes the open bar and the bars without trades up to `next_open_ms`, then opens the bar at `next_open_ms`
+        """
+        now_ms = now_ms if now_ms is not None else int(time() * 1000)
+        local_bars = self.__closed[(symbol, bar.timeframe)]
+        open_ms, partial = bar.open_ms, bar.partial
+        values = (bar.open, bar.high, bar.low, bar.close, bar.volume)
+        while open_ms < next_open_ms:
+            if not partial:
+                local_bars[open_ms] = values + (now_ms,)
+                closed.append((symbol, bar.timeframe, {
+                    pd.Timestamp(open_ms, unit="ms", tz="UTC"): {
+                        "open": values[0], "high": values[1], "low": values[2], "close": values[3], "volume": values[4]
+                    }
+                }))
+                self.__stats["bars_closed"] += 1
+            # Bars without trades are flat at the last close
+            open_ms, partial = open_ms + bar.bar_ms, False
+            values = (bar.close, bar.close, bar.close, bar.close, 0.0)
+        for stale_ms in [t for t in local_bars if t < next_open_ms - RECONCILE_WINDOW_BARS * bar.bar_ms]:
+            del local_bars[stale_ms]
+        bar.start(next_open_ms, bar.close, partial=False)
+        return
@@ -5,24 +5,37 @@ from symphony.borg import Borg
 from typing import List, Union, Generator, Optional, Dict, Any, Callable, Tuple
 import concurrent.futures
 import itertools
-import cachetools.func
+import asyncio
+import aiohttp
 from functools import lru_cache
-from time import sleep
+from time import sleep, time
+import threading
 import logging
 from binance.client import Client
-from binance.streams import ThreadedWebsocketManager
 from concurrent.futures._base import ALL_COMPLETED
 import requests
+import numpy as np
 import json
 import ccxt
 from symphony.enum import Exchange
 from symphony.utils.time import get_last_complete_bar_time, get_timestamp_of_num_bars_back, get_current_bar_open_time, \
-    round_to_timeframe, get_num_bars_timestamp_to_present, get_num_bars_timestamp_to_timestamp, to_unix_time
+    round_to_timeframe, get_num_bars_timestamp_to_present, get_num_bars_timestamp_to_timestamp, to_unix_time, \
+    get_page_ranges
 from symphony.parser import BinanceParser, CCXTParser
 from symphony.exceptions import ClientClassException
-from symphony.config import config, LOG_LEVEL, USE_MODIN
+from symphony.config import config, LOG_LEVEL, USE_MODIN, INSTRUMENT_SNAPSHOT_DIR
 from symphony.utils.misc import cartesian_product, grouper, chunker
 from symphony.utils.instruments import get_instrument
+from symphony.utils.resample import finest_timeframe, resample_price_histories
+from symphony.client.rate_limiter import WeightRateLimiter, BINANCE_ENDPOINT_WEIGHTS, binance_kline_weight
+from symphony.client.candle_cache import CandleCache
+from symphony.client.instrument_snapshot import instrument_snapshot_path, read_instrument_snapshot, \
+    write_instrument_snapshot, INSTRUMENT_SNAPSHOT_TTL_SECS
+from symphony.client.session import DEFAULT_POOL_SIZE, create_pooled_session, mount_pool, get_pool_size, \
+    connection_stats
+from symphony.client.stream_multiplexer import CombinedStreamMultiplexer, binance_kline_stream, \
+    binance_agg_trade_stream, BINANCE_COMBINED_STREAM_URL
+from symphony.client.bar_builder import LocalBarBuilder
 
 if USE_MODIN:
     import modin.pandas as pd
@@ -30,7 +43,16 @@ else:
     import pandas as pd
 
 logger = logging.getLogger(__name__)
-anon_client = ccxt.binance()
+anon_client = ccxt.binance({'session': create_pooled_session()})
+anon_rate_limiter = WeightRateLimiter()
+
+BINANCE_API_URL = "https://api.binance.com/api"
+# Max bars per klines request
+BINANCE_KLINES_LIMIT = 1000
+# Bars per page of `anon_get`
+ANON_PAGE_SIZE = 500
+# Max open connections of an async session
+BINANCE_ASYNC_MAX_CONNECTIONS = 100
 
 
 class BinanceClient(ClientABC, Borg):
@@ -42,7 +64,9 @@ class BinanceClient(ClientABC, Borg):
                  websocket_symbols: Union[str, Instrument, List[Union[str, Instrument]]] = None,
                  websocket_timeframes: Union[Timeframe, List[Timeframe]] = None,
                  price_history_seed: int = 100,
-                 log_level: int = LOG_LEVEL
+                 log_level: int = LOG_LEVEL,
+                 pool_size: int = DEFAULT_POOL_SIZE,
+                 candle_cache: Optional[CandleCache] = None
                  ):
         Borg.__init__(self)
 
@@ -52,8 +76,23 @@ class BinanceClient(ClientABC, Borg):
         self.api_key: str = config["client.binance"]["api_key"]
         self.secret_key: str = config["client.binance"]["api_secret"]
         self.binance_client = Client(self.api_key, self.secret_key)
+        # One keep-alive pool shared by python-binance, ccxt and the direct REST calls
+        self.session: requests.Session = mount_pool(self.binance_client.session, pool_size)
+        # Shared by every thread and instance, request weight is counted per IP
+        if not isinstance(getattr(self, "rate_limiter", None), WeightRateLimiter):
+            self.rate_limiter: WeightRateLimiter = WeightRateLimiter()
+        # Read-through cache of closed bars for `get`, None to always fetch
+        self.candle_cache: Optional[CandleCache] = candle_cache
         self.price_histories: Dict[str, Dict[Timeframe, PriceHistory]] = {}
         self.conn_keys: Dict[str, Dict[Timeframe, str]] = {}
+        # Symbol and timeframe of each kline stream, and the open time (UNIX ms) of its last closed bar
+        self.__kline_stream_keys: Dict[str, Tuple[str, Timeframe]] = {}
+        self.__last_closed_bars: Dict[str, int] = {}
+        # Bars built from the trade streams, for websockets started with local_bars
+        self.bar_builder: LocalBarBuilder = LocalBarBuilder()
+        self.__local_bar_close_at: Optional[int] = None
+        # Appends come from the stream thread and from backfills
+        self.__price_history_lock = threading.RLock()
         self.__websocket_settings: Dict[str, Dict[Timeframe, Dict[str, Any]]] = {}
         self.candle_websocket_callbacks: List[Callable] = []
         self.ccxt_client = ccxt.binance({
@@ -61,15 +100,27 @@ class BinanceClient(ClientABC, Borg):
             'secret': self.secret_key,
             'timeout': 30000,
             'enableRateLimit': True,
+            'session': self.session
         })
         self.ccxt_client.options["warnOnFetchOpenOrdersWithoutSymbol"] = False
         self.ccxt_client.load_markets()
         self.__headers = {'X-MBX-APIKEY': self.api_key}
         self.exchange = Exchange.BINANCE
-        self.non_tradeable_assets: List[str] = []
-
-        self.socket_manager = ThreadedWebsocketManager(api_key=self.api_key, api_secret=self.secret_key)
-        self.socket_manager.start()
+        self.non_tradeable_assets: List[str] = getattr(self, "non_tradeable_assets", [])
+        # Instruments are kept across Borg instances, see get_all_symbols
+        self.instrument_snapshot_path: str = instrument_snapshot_path(INSTRUMENT_SNAPSHOT_DIR, self.exchange,
+                                                                      self.api_key)
+        if not hasattr(self, "instruments_lock"):
+            self.instruments_lock = threading.RLock()
+            self.instruments_loaded_at: float = 0.0
+            self.__instruments: Optional[List[Instrument]] = None
+            self.__instruments_refreshing: bool = False
+
+        # All kline websockets share a few combined-stream connections, kept across Borg instances
+        if not isinstance(getattr(self, "kline_streams", None), CombinedStreamMultiplexer):
+            self.kline_streams: CombinedStreamMultiplexer = CombinedStreamMultiplexer(BINANCE_COMBINED_STREAM_URL)
+            self.kline_streams.add_connect_callback(self.__backfill_kline_streams)
+        self.kline_streams.start()
 
         self.websocket_instruments: List[Instrument] = []
         self.websocket_timeframes: Dict[str, List[Timeframe]] = {}
@@ -126,12 +177,6 @@ class BinanceClient(ClientABC, Borg):
             for instrument in self.websocket_instruments:
                 for timeframe in self.websocket_timeframes[instrument.symbol]:
                     self.start_candle_websocket(instrument, timeframe, price_history_seed=0)
-
-            try:
-                self.socket_manager.start()
-            except RuntimeError:
-                self.__socket_manager_initialized = True
-            self.__socket_manager_initialized = True
         return
 
     def stop(self) -> None:
@@ -148,59 +193,81 @@ class BinanceClient(ClientABC, Borg):
                  timeframe: Timeframe,
                  num_bars_or_start_time: Union[int, pd.Timestamp],
                  incomplete_bar: Optional[bool] = False,
-                 end: Optional[pd.Timestamp] = None
+                 end: Optional[pd.Timestamp] = None,
+                 max_workers: Optional[int] = 4,
+                 candle_cache: Optional[CandleCache] = None
                  ) -> PriceHistory:
         """
-        Gets OHCLV bars without using Binance API keys
+        Gets OHCLV bars without using Binance API keys. Page boundaries are computed up front, pages are
+        fetched in parallel and written into one preallocated array, the DataFrame is built once at the end.
 
         :param instrument: Instrument to fetch
         :param timeframe: Timeframe to fetch
         :param num_bars_or_start_time: Either the number of bars or the starting timestamp
         :param incomplete_bar: Whether or not to fetch the latest incomplete bar
         :param end: Optional desired end time
+        :param max_workers: Pages fetched in parallel, defaults to [4]
+        :param candle_cache: Optional cache, only bars missing from it are fetched
         :return: The PriceHistory object
         """
-        start_bar_time, last_comp_bar_time = BinanceClient.__get_start_bar_time(timeframe, num_bars_or_start_time=num_bars_or_start_time, incomplete_bar=incomplete_bar, end=end)
-        numpy_timeframe = timeframe_to_numpy_string(timeframe)
-        if not isinstance(end, type(None)):
-            num_bars = get_num_bars_timestamp_to_timestamp(start_bar_time, end, timeframe)
-        else:
-            num_bars = get_num_bars_timestamp_to_present(start_bar_time, timeframe, incomplete_bar=incomplete_bar)
+        start_bar_time, last_bar_time = BinanceClient.__get_start_bar_time(timeframe, num_bars_or_start_time=num_bars_or_start_time, incomplete_bar=incomplete_bar, end=end)
+        last_bar_time = round_to_timeframe(last_bar_time, timeframe)
 
-        def get_df(ts: int) -> pd.DataFrame:
-            candles = anon_client.fetch_ohlcv(instrument.base_asset + "/" + instrument.quote_asset, numpy_timeframe,
-                                              since=ts)
-            candles_df = CCXTParser.parse(candles)
-            return candles_df
+        def fetch(start: pd.Timestamp, last: pd.Timestamp) -> pd.DataFrame:
+            return BinanceClient.__anon_fetch(instrument, timeframe, start, last, max_workers)
 
-        def set_candles(candles: pd.DataFrame, candles_df: pd.DataFrame) -> pd.DataFrame:
-            if isinstance(candles, type(None)):
-                candles = candles_df
-            else:
-                candles = candles.append(candles_df)
-            return candles
-
-        full_cycles = num_bars // 500 # CCXT only fetches 500 bars at a time
-        # timestamp in ms
-        ts = to_unix_time(start_bar_time, resolution='ms')
-        candles = None
-        for cycle in range(full_cycles):
-            candles_df = get_df(ts)
-            candles = set_candles(candles, candles_df)
-            ts = to_unix_time(candles.index[-1] + pd.Timedelta(numpy_timeframe), resolution='ms')
-
-        leftover_bars = num_bars - (500 * full_cycles)
-        if leftover_bars:
-            candles_df = get_df(ts)
-            candles = set_candles(candles, candles_df)
-
-
-        if not incomplete_bar:
-            candles = candles[:len(candles) - 1]
+        if candle_cache is not None:
+            candles = candle_cache.get(instrument.symbol, timeframe, start_bar_time, last_bar_time, fetch)
+        else:
+            candles = fetch(start_bar_time, last_bar_time)
 
         return PriceHistory(instrument=instrument, timeframe=timeframe, price_history=candles)
 
+    @staticmethod
+    def __anon_fetch(instrument: Instrument,
+                     timeframe: Timeframe,
+                     start: pd.Timestamp,
+                     last: pd.Timestamp,
+                     max_workers: int
+                     ) -> pd.DataFrame:
+        """
+        Fetches bars through the key-less ccxt client
 
+        :param instrument: Instrument to fetch
+        :param timeframe: Timeframe to fetch
+        :param start: Open time of the first bar
+        :param last: Open time of the last bar, inclusive
+        :param max_workers: Pages fetched in parallel
+        :return: The parsed candles
+        """
+        numpy_timeframe = timeframe_to_numpy_string(timeframe)
+        ccxt_symbol = instrument.base_asset + "/" + instrument.quote_asset
+        start_ms = to_unix_time(start, resolution='ms')
+        last_ms = to_unix_time(last, resolution='ms')
+        bar_ms = timeframe.value * 60 * 1000
+        num_bars = (last_ms - start_ms) // bar_ms + 1
+
+        def fetch_page(page_start_ms: int, page_end_ms: int) -> List[List[float]]:
+            return anon_rate_limiter.call(anon_client.fetch_ohlcv, binance_kline_weight(ANON_PAGE_SIZE),
+                                          ccxt_symbol, numpy_timeframe, since=page_start_ms,
+                                          limit=(page_end_ms - page_start_ms) // bar_ms + 1)
+
+        pages = get_page_ranges(start_ms, last_ms, timeframe, ANON_PAGE_SIZE)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(pages)))) as executor:
+            results = executor.map(lambda page: fetch_page(*page), pages)
+
+            # One row slot per bar. Bars missing from the exchange stay NaN and are dropped
+            candles = np.full((num_bars, 6), np.nan)
+            for result in results:
+                if not len(result):
+                    continue
+                page = np.asarray(result, dtype=np.float64)
+                slots = (page[:, 0].astype(np.int64) - start_ms) // bar_ms
+                in_range = (slots >= 0) & (slots < num_bars)
+                candles[slots[in_range]] = page[in_range]
+        candles = candles[~np.isnan(candles[:, 0])]
+
+        return CCXTParser.parse(candles)
 
     def get(self,
             instrument: Instrument,
@@ -225,29 +292,221 @@ class BinanceClient(ClientABC, Borg):
         start_bar_time, last_comp_bar_time = BinanceClient.__get_start_bar_time(timeframe,
                                                                                 num_bars_or_start_time=num_bars_or_start_time,
                                                                                 incomplete_bar=incomplete_bar, end=end)
-        candles = self.binance_client.get_historical_klines(
+        if self.candle_cache is not None:
+            binance_df = self.candle_cache.get(
+                instrument.symbol, timeframe, start_bar_time, last_comp_bar_time,
+                lambda range_start, range_last: self.__fetch(instrument, timeframe, range_start, range_last)
+            )
+        else:
+            binance_df = self.__fetch(instrument, timeframe, start_bar_time, last_comp_bar_time)
+
+        return PriceHistory(instrument=instrument, timeframe=timeframe, price_history=binance_df)
+
+    def __fetch(self, instrument: Instrument, timeframe: Timeframe, start: pd.Timestamp,
+                last: pd.Timestamp) -> pd.DataFrame:
+        """
+        Fetches bars from the exchange
+
+        :param instrument: The trading instrument
+        :param timeframe: The timeframe
+        :param start: Open time of the first bar
+        :param last: Open time of the last bar, inclusive
+        :return: The parsed candles
+        """
+        candles = BinanceClient.get_klines(
             instrument.symbol,
             get_binance_client_timeframe(timeframe),
-            str(start_bar_time),
-            end_str=str(last_comp_bar_time)
+            to_unix_time(start, resolution='ms'),
+            to_unix_time(last, resolution='ms'),
+            self.rate_limiter,
+            api_url=self.binance_client.API_URL,
+            session=self.session
         )
+        return BinanceParser.parse(candles)
 
-        binance_df = BinanceParser.parse(candles)
+    @staticmethod
+    def get_klines(symbol: str,
+                   interval: str,
+                   start_time_ms: int,
+                   end_time_ms: int,
+                   rate_limiter: WeightRateLimiter,
+                   api_url: Optional[str] = BINANCE_API_URL,
+                   session: Optional[requests.Session] = None,
+                   limit: Optional[int] = BINANCE_KLINES_LIMIT
+                   ) -> List[List]:
+        """
+        Fetches raw klines page by page, each page going through the rate limiter
+
+        :param symbol: Binance symbol
+        :param interval: Binance interval, e.g. '1h'
+        :param start_time_ms: Open time of the first bar, UNIX ms
+        :param end_time_ms: Open time of the last bar, UNIX ms, inclusive
+        :param rate_limiter: Rate limiter to spend weight on
+        :param api_url: REST API base URL
+        :param session: Optional HTTP session
+        :param limit: Bars per page
+        :return: Raw klines, as returned by the REST API
+        :raises ClientClassException: If a request fails after retries
+        """
+        klines: List[List] = []
+        weight = binance_kline_weight(limit)
+        next_start_ms = start_time_ms
+        while next_start_ms <= end_time_ms:
+            response = rate_limiter.request(
+                "GET",
+                api_url + "/v3/klines",
+                weight,
+                session=session,
+                params={
+                    "symbol": symbol,
+                    "interval": interval,
+                    "startTime": next_start_ms,
+                    "endTime": end_time_ms,
+                    "limit": limit
+                }
+            )
+            page: List[List] = response.json()
+            if not page:
+                break
+            klines.extend(page)
+            if len(page) < limit:
+                break
+            # Next page starts after the close of the last bar
+            next_start_ms = page[-1][6] + 1
+        return klines
 
-        return PriceHistory(instrument=instrument, timeframe=timeframe, price_history=binance_df)
+    @staticmethod
+    async def aget_klines(session: aiohttp.ClientSession,
+                          symbol: str,
+                          timeframe: Timeframe,
+                          start_time_ms: int,
+                          end_time_ms: int,
+                          rate_limiter: WeightRateLimiter,
+                          api_url: Optional[str] = BINANCE_API_URL,
+                          limit: Optional[int] = BINANCE_KLINES_LIMIT
+                          ) -> List[List]:
+        """
+        Async `get_klines`. Every page's time range is computed up front and all pages are requested
+        concurrently, each going through the rate limiter.
+
+        :param session: The aiohttp session
+        :param symbol: Binance symbol
+        :param timeframe: Timeframe of the bars
+        :param start_time_ms: Open time of the first bar, UNIX ms
+        :param end_time_ms: Open time of the last bar, UNIX ms, inclusive
+        :param rate_limiter: Rate limiter to spend weight on
+        :param api_url: REST API base URL
+        :param limit: Bars per page
+        :return: Raw klines, as returned by the REST API
+        :raises ClientClassException: If a page fails after retries, the other pages are cancelled
+        """
+        weight = binance_kline_weight(limit)
+        interval = get_binance_client_timeframe(timeframe)
+        tasks: List[asyncio.Task] = [
+            asyncio.ensure_future(rate_limiter.arequest(
+                session,
+                "GET",
+                api_url + "/v3/klines",
+                weight,
+                params={
+                    "symbol": symbol,
+                    "interval": interval,
+                    "startTime": page_start_ms,
+                    "endTime": page_end_ms,
+                    "limit": limit
+                }
+            ))
+            for page_start_ms, page_end_ms in get_page_ranges(start_time_ms, end_time_ms, timeframe, limit)
+        ]
+        try:
+            pages: List[List[List]] = await asyncio.gather(*tasks)
+        except BaseException:
+            # gather leaves the other pages running, they would outlive the caller's session
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        return list(itertools.chain.from_iterable(pages))
 
     # TODO Deprecate or change in favor of get_all_instruments
-    @cachetools.func.ttl_cache(maxsize=128, ttl=43200)
     def get_all_symbols(self) -> List[Instrument]:
         """
-        Fetches a list of all assets from this datasource
+        Fetches a list of all assets from this datasource. Loaded from the on-disk snapshot if there is one,
+        otherwise from the REST API. Once older than the TTL, instruments are refreshed in the background and
+        the current ones are returned meanwhile.
 
         :return: List of instrument objects
         :rtype: List[Instrument]
         """
+        with self.instruments_lock:
+            if self.__instruments is None:
+                snapshot = read_instrument_snapshot(self.instrument_snapshot_path)
+                if snapshot is not None:
+                    self.__set_instruments(snapshot["instruments"], snapshot["non_tradeable_assets"],
+                                           snapshot["created"])
+                else:
+                    self.refresh_instruments()
+            if time() - self.instruments_loaded_at > INSTRUMENT_SNAPSHOT_TTL_SECS:
+                self.__refresh_instruments_in_background()
+            return self.__instruments
+
+    def refresh_instruments(self) -> List[Instrument]:
+        """
+        Fetches instruments from the REST API and rewrites the snapshot
+
+        :return: List of instrument objects
+        :raises ClientClassException: If the API requests fail
+        """
+        instruments, non_tradeable_assets = self.__fetch_all_symbols()
+        try:
+            write_instrument_snapshot(self.instrument_snapshot_path, instruments, non_tradeable_assets)
+        except OSError as e:
+            logger.warning(f"Could not write instrument snapshot {self.instrument_snapshot_path}: {e}")
+        with self.instruments_lock:
+            self.__set_instruments(instruments, non_tradeable_assets, time())
+        return instruments
+
+    def __set_instruments(self, instruments: List[Instrument], non_tradeable_assets: List[str],
+                          loaded_at: float) -> None:
+        self.__instruments = instruments
+        self.non_tradeable_assets = non_tradeable_assets
+        self.instruments_loaded_at = loaded_at
+        return
+
+    def __refresh_instruments_in_background(self) -> None:
+        """
+        Starts a refresh unless one is running. On failure the current instruments are kept.
+
+        :return: None
+        """
+        if self.__instruments_refreshing:
+            return
+        self.__instruments_refreshing = True
+
+        def refresh():
+            try:
+                self.refresh_instruments()
+            except Exception as e:
+                logger.warning(f"Instrument refresh failed, keeping instruments from "
+                               f"{pd.Timestamp(self.instruments_loaded_at, unit='s', tz='UTC')}: {e}")
+            finally:
+                with self.instruments_lock:
+                    self.__instruments_refreshing = False
+
+        threading.Thread(target=refresh, name="instrument-refresh", daemon=True).start()
+        return
+
+    def __fetch_all_symbols(self) -> Tuple[List[Instrument], List[str]]:
+        """
+        Builds instruments from the exchange info and margin endpoints
+
+        :return: Instruments, and assets listed but not tradeable
+        """
         futures = []
         with concurrent.futures.ThreadPoolExecutor(max_workers=3) as executor:
-            futures.append(executor.submit(self.binance_client.get_exchange_info))
+            futures.append(executor.submit(self.rate_limiter.call, self.binance_client.get_exchange_info,
+                                           BINANCE_ENDPOINT_WEIGHTS["exchangeInfo"],
+                                           headers_func=self.__last_response_headers))
             futures.append(executor.submit(self.__get_all_margin_pairs))
             futures.append(executor.submit(self.__get_all_isolated_margin_pairs))
             futures.append(executor.submit(self.__get_isolated_margin_ratios_and_borrow_enabled))
@@ -302,11 +561,12 @@ class BinanceClient(ClientABC, Borg):
             all_assets.append(instrument.quote_asset)
         all_assets = list(set(all_assets))
 
+        non_tradeable_assets = []
         for pnta in potential_non_ta:
-            if pnta not in all_assets:
-                self.non_tradeable_assets.append(pnta)
+            if pnta not in all_assets and pnta not in non_tradeable_assets:
+                non_tradeable_assets.append(pnta)
 
-        return instruments
+        return instruments, non_tradeable_assets
 
     def get_all_instruments(self) -> List[Instrument]:
         """
@@ -352,7 +612,8 @@ class BinanceClient(ClientABC, Borg):
                      filter_exchange: Optional[bool] = True,
                      fail_on_exception: Optional[bool] = False,
                      max_workers: Optional[int] = 10,
-                     sleep_time_secs: Optional[int] = 1.5
+                     sleep_time_secs: Optional[int] = 1.5,
+                     derive_timeframes: Optional[bool] = False
                      ) -> List[PriceHistory]:
         """
         Fetch multiple instruments in a parallel manner
@@ -366,63 +627,266 @@ class BinanceClient(ClientABC, Borg):
         :param filter_exchange: Optionally filter the instruments by exchange
         :param fail_on_exception: If True, raise an error if API exceptions are detected.
                                     Otherwise exclude from return results
-        :param max_workers: Worker threads, as well as chunk size, defaults to [10]
-        :param sleep_time_secs: Sleep time inbetween API calls of chunk size. Default is Pretuned [1.5s].
+        :param max_workers: Worker threads, defaults to [10]. Requests in flight are further bounded by the
+                            rate limiter's adaptive concurrency
+        :param sleep_time_secs: Deprecated, throttling is done by the rate limiter
+        :param derive_timeframes: Only fetch the finest of `timeframes` and derive the others from it locally,
+                                    defaults to [False]
         :return: List of PriceHistory objects
         :raises ClientClassException: If we want to fail on exception, if no data was able to be obtained
         """
         if filter_exchange:
             instruments = list(filter(lambda instrument: instrument.exchange == Exchange.BINANCE, instruments))
 
+        if derive_timeframes and isinstance(timeframes, list) and len(timeframes) > 1:
+            return self.__get_multiple_derived(instruments, timeframes, num_bars_or_start_time,
+                                               incomplete_bar=incomplete_bar, end=end,
+                                               fail_on_exception=fail_on_exception, max_workers=max_workers,
+                                               sleep_time_secs=sleep_time_secs)
+
         combinations: List[tuple] = cartesian_product(instruments, timeframes)
-        chunks: Generator[List[tuple], None, None] = chunker(combinations, max_workers)
+        # Connections beyond the pool size would be opened and closed on every request
+        if get_pool_size(self.session) < max_workers:
+            self.set_pool_size(max_workers)
 
-        # Could get 817 symbols before exceptions
+        # Throttling, retries and backoff are handled by the shared rate limiter
         with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-            all_futures: List[concurrent.Future] = []
-            for chunk in chunks:
-                chunk_futures = [
-                    executor.submit(
-                        self.get,
-                        instrument,
-                        timeframe,
-                        num_bars_or_start_time,
-                        incomplete_bar=incomplete_bar,
-                        end=end)
-                    for instrument, timeframe in chunk
-                ]
-                all_futures.append(chunk_futures)
-                sleep(sleep_time_secs)
-            futures: List[concurrent.Future] = list(itertools.chain.from_iterable(all_futures))
+            futures: List[concurrent.Future] = [
+                executor.submit(
+                    self.get,
+                    instrument,
+                    timeframe,
+                    num_bars_or_start_time,
+                    incomplete_bar=incomplete_bar,
+                    end=end)
+                for instrument, timeframe in combinations
+            ]
+            concurrent.futures.wait(futures, timeout=None, return_when=ALL_COMPLETED)
         price_histories: List[PriceHistory] = [
             future.result() for future in futures if isinstance(future.exception(), type(None))
         ]
-        exceptions: List[Exception] = [
-            future.exception() for future in futures if not isinstance(future.exception(), type(None))
+        failed: List[Tuple[tuple, Exception]] = [
+            (combination, future.exception()) for combination, future in zip(combinations, futures)
+            if not isinstance(future.exception(), type(None))
         ]
 
-        if len(exceptions):
+        if len(failed):
             if fail_on_exception:
                 raise ClientClassException(f"Exceptions were detected. "
-                                           f"Detected {len(exceptions)}/{len(combinations)} as exceptions. "
-                                           f"Example exception: {exceptions[0]}")
-            logger.info(__name__ + f" [-] Detected {len(exceptions)}/{len(combinations)} as exceptions")
+                                           f"Detected {len(failed)}/{len(combinations)} as exceptions. "
+                                           f"Example exception: {failed[0][1]}")
+            logger.warning(__name__ + f" [-] Detected {len(failed)}/{len(combinations)} as exceptions: " +
+                           ", ".join(f"{instrument.symbol} {timeframe}: {e}" for (instrument, timeframe), e in failed))
 
         if not (len(price_histories)):
             raise ClientClassException(f"Failed to retrieve any data")
 
         return price_histories
 
+    async def aget(self,
+                   instrument: Instrument,
+                   timeframe: Timeframe,
+                   num_bars_or_start_time: Union[int, pd.Timestamp],
+                   incomplete_bar: Optional[bool] = False,
+                   end: Optional[pd.Timestamp] = None,
+                   session: Optional[aiohttp.ClientSession] = None
+                   ) -> PriceHistory:
+        """
+        Async `get`. All pages are requested concurrently, under the shared rate limiter.
+
+        :param instrument: The trading instrument
+        :param timeframe: The timeframe we are trading
+        :param num_bars_or_start_time: Look back `num_bars` or start from a certain start time
+        :param incomplete_bar: True if we want to include the most recent uncompleted bar. Do not use with [end]
+        :param end: The last bar we want in the series. Do not use with [incomplete_bar]
+        :param session: Optional aiohttp session, one is opened for the call if not supplied
+        :return: Price History
+        :raises ClientClassException: If a page cannot be fetched
+        """
+        if not session:
+            async with aiohttp.ClientSession() as session:
+                return await self.aget(instrument, timeframe, num_bars_or_start_time,
+                                       incomplete_bar=incomplete_bar, end=end, session=session)
+
+        start_bar_time, last_comp_bar_time = BinanceClient.__get_start_bar_time(timeframe,
+                                                                                num_bars_or_start_time=num_bars_or_start_time,
+                                                                                incomplete_bar=incomplete_bar, end=end)
+        candles = await BinanceClient.aget_klines(
+            session,
+            instrument.symbol,
+            timeframe,
+            to_unix_time(start_bar_time, resolution='ms'),
+            to_unix_time(last_comp_bar_time, resolution='ms'),
+            self.rate_limiter,
+            api_url=self.binance_client.API_URL
+        )
+
+        binance_df = BinanceParser.parse(candles)
+
+        return PriceHistory(instrument=instrument, timeframe=timeframe, price_history=binance_df)
+
+    async def aget_multiple(self,
+                            instruments: List[Instrument],
+                            timeframes: Union[Timeframe, List[Timeframe]],
+                            num_bars_or_start_time: Union[int, pd.Timestamp],
+                            incomplete_bar: Optional[bool] = False,
+                            end: pd.Timestamp = None,
+                            filter_exchange: Optional[bool] = True,
+                            fail_on_exception: Optional[bool] = False,
+                            max_connections: Optional[int] = BINANCE_ASYNC_MAX_CONNECTIONS
+                            ) -> List[PriceHistory]:
+        """
+        Async `get_multiple`. Every page of every instrument and timeframe is scheduled on one event loop,
+        requests in flight are bounded by the shared rate limiter.
+        From synchronous code: asyncio.run(client.aget_multiple(...))
+
+        :param instruments: List of Instruments to fetch
+        :param timeframes: Single or list of timeframes
+        :param num_bars_or_start_time: Look back `num_bars` or start from a certain start time
+        :param incomplete_bar: Whether or not to get the most recent (incomplete) bar. Do not use with `end`.
+                                Defaults to [False]
+        :param end: Optional end index. Do not use with `incomplete_bar`. Defaults to [None]
+        :param filter_exchange: Optionally filter the instruments by exchange
+        :param fail_on_exception: If True, raise an error if API exceptions are detected.
+                                    Otherwise exclude from return results
+        :param max_connections: Max open connections of the session, defaults to [100]
+        :return: List of PriceHistory objects
+        :raises ClientClassException: If we want to fail on exception, if no data was able to be obtained
+        """
+        if filter_exchange:
+            instruments = list(filter(lambda instrument: instrument.exchange == Exchange.BINANCE, instruments))
+
+        combinations: List[tuple] = cartesian_product(instruments, timeframes)
+
+        connector = aiohttp.TCPConnector(limit=max_connections)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            results: List[Union[PriceHistory, BaseException]] = await asyncio.gather(*[
+                self.aget(instrument, timeframe, num_bars_or_start_time,
+                          incomplete_bar=incomplete_bar, end=end, session=session)
+                for instrument, timeframe in combinations
+            ], return_exceptions=True)
+
+        price_histories: List[PriceHistory] = [
+            result for result in results if not isinstance(result, BaseException)
+        ]
+        failed: List[Tuple[tuple, BaseException]] = [
+            (combination, result) for combination, result in zip(combinations, results)
+            if isinstance(result, BaseException)
+        ]
+
+        if len(failed):
+            if fail_on_exception:
+                raise ClientClassException(f"Exceptions were detected. "
+                                           f"Detected {len(failed)}/{len(combinations)} as exceptions. "
+                                           f"Example exception: {failed[0][1]}")
+            logger.warning(__name__ + f" [-] Detected {len(failed)}/{len(combinations)} as exceptions: " +
+                           ", ".join(f"{instrument.symbol} {timeframe}: {e}" for (instrument, timeframe), e in failed))
+
+        if not (len(price_histories)):
+            raise ClientClassException(f"Failed to retrieve any data")
+
+        return price_histories
+
+    def __get_multiple_derived(self,
+                               instruments: List[Instrument],
+                               timeframes: List[Timeframe],
+                               num_bars_or_start_time: Union[int, pd.Timestamp],
+                               incomplete_bar: Optional[bool] = False,
+                               end: pd.Timestamp = None,
+                               fail_on_exception: Optional[bool] = False,
+                               max_workers: Optional[int] = 10,
+                               sleep_time_secs: Optional[int] = 1.5
+                               ) -> List[PriceHistory]:
+        """
+        Fetches the finest of `timeframes` once per instrument and derives the rest locally.
+        Saves the API weight and latency of fetching e.g. H1 and H4 separately.
+
+        :param instruments: List of Instruments to fetch
+        :param timeframes: List of timeframes
+        :param num_bars_or_start_time: Look back `num_bars` or start from a certain start time
+        :param incomplete_bar: Whether or not to get the most recent (incomplete) bar
+        :param end: Optional end index
+        :param fail_on_exception: Passed to get_multiple
+        :param max_workers: Passed to get_multiple
+        :param sleep_time_secs: Passed to get_multiple
+        :return: List of PriceHistory objects
+        :raises ClientClassException: If a timeframe cannot be derived from the finest
+        """
+        try:
+            base_timeframe: Timeframe = finest_timeframe(timeframes)
+        except Exception as e:
+            raise ClientClassException(f"Cannot derive timeframes locally: {str(e)}")
+
+        # Start and last bar for every timeframe, and the base bars needed to build them
+        bar_ranges: Dict[Timeframe, Tuple[pd.Timestamp, pd.Timestamp]] = {}
+        for timeframe in timeframes:
+            bar_ranges[timeframe] = BinanceClient.__get_start_bar_time(timeframe,
+                                                                       num_bars_or_start_time=num_bars_or_start_time,
+                                                                       incomplete_bar=incomplete_bar, end=end)
+        base_start: pd.Timestamp = min(start for start, _ in bar_ranges.values())
+        base_end: pd.Timestamp = max(
+            last + pd.Timedelta(minutes=timeframe.value - base_timeframe.value)
+            for timeframe, (_, last) in bar_ranges.items()
+        )
+
+        base_histories: List[PriceHistory] = self.get_multiple(instruments, base_timeframe, base_start,
+                                                               incomplete_bar=incomplete_bar,
+                                                               end=None if incomplete_bar else base_end,
+                                                               filter_exchange=False,
+                                                               fail_on_exception=fail_on_exception,
+                                                               max_workers=max_workers,
+                                                               sleep_time_secs=sleep_time_secs)
+        price_histories: List[PriceHistory] = []
+        for base_history in base_histories:
+            for history in resample_price_histories(base_history, timeframes, incomplete_bar=incomplete_bar):
+                start, last = bar_ranges[history.timeframe]
+                history.price_history = history.price_history.loc[start:last]
+                price_histories.append(history)
+        return price_histories
+
+    def set_pool_size(self, size: int) -> None:
+        """
+        Resizes the connection pool shared by python-binance, ccxt and the direct REST calls
+
+        :param size: Max connections kept open per host
+        :return: None
+        """
+        mount_pool(self.session, size)
+        return
+
+    def connection_stats(self) -> Dict[str, int]:
+        """
+        Connection reuse of the shared session
+
+        :return: Hosts pooled, connections opened, requests made, requests on reused connections, idle connections
+        """
+        return connection_stats(self.session)
+
     @property
     def instruments(self) -> List[Instrument]:
         return self.get_all_instruments()
 
+    def memory_usage(self) -> Dict[str, Dict[Timeframe, int]]:
+        """
+        Bytes held by each price history kept for the websockets
+
+        :return: Bytes, by symbol and timeframe
+        """
+        return {
+            symbol: {
+                timeframe: price_history.memory_usage() if price_history is not None else 0
+                for timeframe, price_history in histories.items()
+            }
+            for symbol, histories in self.price_histories.items()
+        }
+
     def start_candle_websocket(self,
                                symbol_or_instrument: Union[str, Instrument],
                                timeframe: Timeframe,
                                incomplete_bars: Optional[bool] = False,
                                websocket_callback: Optional[Callable] = None,
-                               price_history_seed: Optional[int] = 100
+                               price_history_seed: Optional[int] = 100,
+                               local_bars: Optional[bool] = False
                                ) -> None:
         """
         Start the handler for a kline websocket
@@ -432,6 +896,9 @@ class BinanceClient(ClientABC, Borg):
         :param incomplete_bars: Whether to process and append partial bars to price history
         :param websocket_callback: Optional callback to register. Can also use register_websocket_callback
         :param price_history_seed: Seed PriceHistory with this number of bars. Also passes incomplete_bars.
+        :param local_bars: Build bars from the trade stream and close them at the boundary, without waiting for
+            the exchange kline. The kline is reconciled afterwards, callbacks run again only if it differs.
+            See bar_builder for the latency histogram.
         :return: None
         """
         instrument = get_instrument(self.instruments, symbol_or_instrument)
@@ -446,7 +913,8 @@ class BinanceClient(ClientABC, Borg):
             self.price_histories[instrument.symbol][timeframe] = None
 
         self.__websocket_settings[instrument.symbol][timeframe] = {
-            "incomplete": incomplete_bars
+            "incomplete": incomplete_bars,
+            "local": local_bars
         }
 
         if websocket_callback and websocket_callback not in self.candle_websocket_callbacks:
@@ -460,13 +928,21 @@ class BinanceClient(ClientABC, Borg):
         else:
             self.websocket_timeframes[instrument.symbol] = [timeframe]
 
-        handler: Callable = self.__kline_function_template(instrument.symbol, timeframe)
-        binance_tf = get_binance_client_timeframe(timeframe)
-
-        if timeframe in self.conn_keys[instrument.symbol] and self.conn_keys[instrument.symbol][timeframe]:
-            pass
+        stream = binance_kline_stream(instrument.symbol, get_binance_client_timeframe(timeframe))
+        handler: Callable = self.__kline_function_template(stream, instrument.symbol, timeframe, incomplete_bars,
+                                                           local_bars)
+        self.__kline_stream_keys[stream] = (instrument.symbol, timeframe)
+        subscribed = bool(self.conn_keys[instrument.symbol].get(timeframe))
+        # Replaces the handler of an existing subscription
+        self.kline_streams.subscribe(stream, handler)
+        if local_bars:
+            self.bar_builder.add(instrument.symbol, timeframe)
+            self.kline_streams.subscribe(binance_agg_trade_stream(instrument.symbol),
+                                         self.__trade_function_template(instrument.symbol))
         else:
-            self.conn_keys[instrument.symbol][timeframe] = self.socket_manager.start_kline_socket(handler, instrument.symbol, interval=binance_tf)
+            self.__stop_local_bars(instrument.symbol, timeframe)
+        if not subscribed:
+            self.conn_keys[instrument.symbol][timeframe] = stream
             if price_history_seed:
                 self.price_histories[instrument.symbol][timeframe] = self.get(instrument, timeframe,
                                                                               num_bars_or_start_time=price_history_seed,
@@ -485,7 +961,11 @@ class BinanceClient(ClientABC, Borg):
         instrument = get_instrument(self.instruments, symbol_or_instrument)
         if instrument.symbol in self.conn_keys.keys():
             if timeframe in self.conn_keys[instrument.symbol].keys():
-                self.socket_manager.stop_socket(self.conn_keys[instrument.symbol][timeframe])
+                stream = self.conn_keys[instrument.symbol][timeframe]
+                self.kline_streams.unsubscribe(stream)
+                self.__kline_stream_keys.pop(stream, None)
+                self.__last_closed_bars.pop(stream, None)
+                self.__stop_local_bars(instrument.symbol, timeframe)
                 del self.conn_keys[instrument.symbol][timeframe]
                 del self.__websocket_settings[instrument.symbol][timeframe]
                 if self.websocket_timeframes[instrument.symbol]:
@@ -567,51 +1047,198 @@ class BinanceClient(ClientABC, Borg):
             raise ClientClassException(f"Unknown type: {type(num_bars_or_start_time)}")
         return start_bar_time, last_comp_bar_time
 
-    def __handle_kline_event(self, msg: Dict[str, Dict[str, str]], symbol: str, timeframe: Timeframe) -> None:
+    def __handle_kline_event(self,
+                             msg: Dict[str, Dict[str, str]],
+                             stream: str,
+                             symbol: str,
+                             timeframe: Timeframe,
+                             incomplete: bool,
+                             local: bool
+                             ) -> None:
         """
-        Handler for kline events
+        Handler for kline events. Only called for subscribed streams, so symbol and timeframe need no checks.
 
         :param msg: Websocket message
+        :param stream: Stream of the message
         :param symbol: For symbol
         :param timeframe: For timeframe
+        :param incomplete: Whether partial bars are appended
+        :param local: Whether closed bars are built locally, the closed kline is then only reconciled
         :return: None
         """
-        instrument = get_instrument(self.instruments, symbol)
-        if instrument not in self.websocket_instruments:
-            raise ClientClassException(f"Symbol {symbol} not configured for websocket")
-        if timeframe not in self.websocket_timeframes[symbol]:
-            raise ClientClassException(f"Timeframe {timeframe} not configured for {symbol} websocket")
+        closed = msg["k"]["x"]
+        if closed:
+            self.__last_closed_bars[stream] = msg["k"]["t"]
+            if local and self.bar_builder.reconcile(symbol, timeframe, msg["k"]):
+                # Appended when it closed locally
+                return
+        elif not incomplete:
+            return
+        self.__append_bar(symbol, timeframe, BinanceParser.parse_websocket_message(msg))
+        return
 
-        if symbol not in self.price_histories.keys():
-            raise ClientClassException(f"Symbol {symbol} not configured for price history")
+    def __append_bar(self, symbol: str, timeframe: Timeframe, row: Dict[pd.Timestamp, Dict[str, float]]) -> None:
+        """
+        Appends a bar to a websocket price history and runs the callbacks
 
-        def call_callbacks(price_history: PriceHistory) -> None:
+        :param symbol: Symbol
+        :param timeframe: Timeframe
+        :param row: Row for PriceHistory.append
+        :return: None
+        """
+        with self.__price_history_lock:
+            price_history: Optional[PriceHistory] = self.price_histories[symbol][timeframe]
+            if price_history is None:
+                # Still seeding
+                return
+            price_history.append(row)
             for callback in self.candle_websocket_callbacks:
                 callback(price_history)
+            # Callbacks have read what they need, keep only the columns consumers registered
+            price_history.project()
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"{symbol} / {timeframe} price history: {price_history.memory_usage()} bytes")
+        return
+
+    def __kline_function_template(self,
+                                  stream: str,
+                                  symbol: str,
+                                  timeframe: Timeframe,
+                                  incomplete: bool,
+                                  local: bool) -> Callable:
+        def kline_handler(msg):
+            self.__handle_kline_event(msg, stream, symbol, timeframe, incomplete, local)
             return
 
-        row = {}
-        if self.__websocket_settings[symbol][timeframe]["incomplete"]:
-            row = BinanceParser.parse_websocket_message(msg)
-        elif msg["k"]["x"]:
-            row = BinanceParser.parse_websocket_message(msg)
-        else:
-            pass
+        kline_handler.__name__ = f"__kline_handler_{symbol}{str(timeframe.value)}"
+        return kline_handler
 
-        if row:
-            print(f"{symbol} / {timeframe} {row}")
-            self.price_histories[symbol][timeframe].append(row)
-            call_callbacks(self.price_histories[symbol][timeframe])
+    def __handle_trade_event(self, msg: Dict[str, Any], symbol: str) -> None:
+        """
+        Handler for aggregate trade events, feeds the local bar builder
 
+        :param msg: Websocket message
+        :param symbol: For symbol
+        :return: None
+        """
+        closed = self.bar_builder.on_trade(symbol, float(msg["p"]), float(msg["q"]), msg["T"])
+        for _, timeframe, row in closed:
+            self.__append_bar(symbol, timeframe, row)
+        if closed or self.__local_bar_close_at is None:
+            self.__schedule_local_bar_close()
         return
 
-    def __kline_function_template(self, symbol: str, timeframe: Timeframe) -> Callable:
-        def kline_handler(msg):
-            self.__handle_kline_event(msg, symbol, timeframe)
+    def __trade_function_template(self, symbol: str) -> Callable:
+        def trade_handler(msg):
+            self.__handle_trade_event(msg, symbol)
             return
 
-        kline_handler.__name__ = f"__kline_handler_{symbol}{str(timeframe.value)}"
-        return kline_handler
+        trade_handler.__name__ = f"__trade_handler_{symbol}"
+        return trade_handler
+
+    def __schedule_local_bar_close(self) -> None:
+        """
+        Schedules closing the local bars at the next boundary, on the stream thread
+
+        :return: None
+        """
+        next_close_ms = self.bar_builder.next_close_ms()
+        if next_close_ms is None or (self.__local_bar_close_at is not None
+                                     and self.__local_bar_close_at <= next_close_ms):
+            return
+        self.__local_bar_close_at = next_close_ms
+        self.kline_streams.call_later(next_close_ms / 1000 - time(), lambda: self.__close_local_bars(next_close_ms))
+        return
+
+    def __close_local_bars(self, scheduled_ms: int) -> None:
+        """
+        Closes the local bars whose boundary passed and schedules the next close
+
+        :param scheduled_ms: Close time it was scheduled for, superseded schedules do nothing
+        :return: None
+        """
+        if scheduled_ms != self.__local_bar_close_at:
+            return
+        self.__local_bar_close_at = None
+        for symbol, timeframe, row in self.bar_builder.close_due():
+            self.__append_bar(symbol, timeframe, row)
+        self.__schedule_local_bar_close()
+        return
+
+    def __stop_local_bars(self, symbol: str, timeframe: Timeframe) -> None:
+        """
+        Stops building local bars of a symbol and timeframe, and the trade stream once no timeframe needs it
+
+        :param symbol: Symbol
+        :param timeframe: Timeframe
+        :return: None
+        """
+        if timeframe not in self.bar_builder.timeframes(symbol):
+            return
+        self.bar_builder.remove(symbol, timeframe)
+        if not self.bar_builder.timeframes(symbol):
+            self.kline_streams.unsubscribe(binance_agg_trade_stream(symbol))
+        return
+
+    def __backfill_kline_streams(self, streams: List[str]) -> None:
+        """
+        Connect callback of the kline streams. Fetches the bars each stream missed after its last closed bar with
+        one ranged klines request per stream and appends them, before the connection resumes live appends.
+        The requests of all streams run in parallel on the shared rate limiter.
+
+        :param streams: Streams of the (re)connected connection
+        :return: None
+        """
+        gaps: List[Tuple[str, str, Timeframe, int, int]] = []
+        for stream in streams:
+            if stream not in self.__kline_stream_keys:
+                continue
+            symbol, timeframe = self.__kline_stream_keys[stream]
+            price_history: Optional[PriceHistory] = self.price_histories.get(symbol, {}).get(timeframe)
+            if price_history is None:
+                # Still seeding
+                continue
+            if stream in self.__last_closed_bars:
+                start_ms = self.__last_closed_bars[stream] + timeframe.value * 60000
+            elif len(price_history.price_history):
+                # The last bar may be partial, fetch it again
+                start_ms = to_unix_time(price_history.price_history.index[-1], resolution='ms')
+            else:
+                continue
+            end_ms = to_unix_time(get_last_complete_bar_time(timeframe), resolution='ms')
+            if start_ms <= end_ms:
+                gaps.append((stream, symbol, timeframe, start_ms, end_ms))
+        if not gaps:
+            return
+
+        def fetch(symbol: str, timeframe: Timeframe, start_ms: int, end_ms: int) -> List[List]:
+            num_bars = (end_ms - start_ms) // (timeframe.value * 60000) + 1
+            return BinanceClient.get_klines(symbol, get_binance_client_timeframe(timeframe), start_ms, end_ms,
+                                            self.rate_limiter, session=self.session,
+                                            limit=min(num_bars, BINANCE_KLINES_LIMIT))
+
+        logger.info(f"Backfilling {len(gaps)} kline streams")
+        max_workers = max(1, min(len(gaps), get_pool_size(self.session)))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(fetch, *gap[1:]): gap for gap in gaps}
+            for future in concurrent.futures.as_completed(futures):
+                stream, symbol, timeframe, _, _ = futures[future]
+                try:
+                    klines = future.result()
+                except Exception as e:
+                    logger.warning(f"Backfill of {symbol} / {timeframe} failed: {e}")
+                    continue
+                if not klines:
+                    continue
+                with self.__price_history_lock:
+                    price_history = self.price_histories[symbol][timeframe]
+                    price_history.append(BinanceParser.parse(klines).to_dict("index"))
+                    self.__last_closed_bars[stream] = klines[-1][0]
+                    for callback in self.candle_websocket_callbacks:
+                        callback(price_history)
+                    price_history.project()
+                logger.info(f"Backfilled {len(klines)} bars of {symbol} / {timeframe}")
+        return
 
     def __get_all_margin_pairs(self) -> List[str]:
         """
@@ -620,12 +1247,11 @@ class BinanceClient(ClientABC, Borg):
         :return: List of margin symbols
         :raises ClientClassException: For API error
         """
-        resp = requests.get(self.binance_client.MARGIN_API_URL + "/v1/margin/allPairs", headers=self.__headers)
-        if resp.status_code == 200:
-            data = json.loads(resp.text)
-            return [pair["symbol"] for pair in data]
-        else:
-            raise ClientClassException(f"Failed to request all margin pairs. Resp: [{resp.status_code}] {resp.text}")
+        resp = self.rate_limiter.request("GET", self.binance_client.MARGIN_API_URL + "/v1/margin/allPairs",
+                                         BINANCE_ENDPOINT_WEIGHTS["margin/allPairs"], session=self.session,
+                                         headers=self.__headers)
+        data = json.loads(resp.text)
+        return [pair["symbol"] for pair in data]
 
     def __get_all_isolated_margin_pairs(self) -> List[str]:
         """
@@ -633,7 +1259,9 @@ class BinanceClient(ClientABC, Borg):
 
         :return: List of pairs
         """
-        return [i["symbol"] for i in self.binance_client.get_all_isolated_margin_symbols()]
+        return [i["symbol"] for i in self.rate_limiter.call(self.binance_client.get_all_isolated_margin_symbols,
+                                                            BINANCE_ENDPOINT_WEIGHTS["margin/isolated/allPairs"],
+                                                            headers_func=self.__last_response_headers)]
 
     def __get_isolated_margin_ratios_and_borrow_enabled(self) -> Tuple[Dict[str, int], Dict[str, bool]]:
         """
@@ -641,7 +1269,9 @@ class BinanceClient(ClientABC, Borg):
 
         :return: Mapping of symbols to margin ratio
         """
-        iso_acct = self.binance_client.get_isolated_margin_account()
+        iso_acct = self.rate_limiter.call(self.binance_client.get_isolated_margin_account,
+                                          BINANCE_ENDPOINT_WEIGHTS["margin/isolated/account"],
+                                          headers_func=self.__last_response_headers)
         ratios: Dict[str, int] = {}
         borrow_enabled: Dict[str, int] = {}
         assets = iso_acct['assets']
@@ -650,11 +1280,20 @@ class BinanceClient(ClientABC, Borg):
             borrow_enabled[asset['symbol']] = asset['baseAsset']['borrowEnabled'] | asset['quoteAsset']['borrowEnabled']
         return ratios, borrow_enabled
 
+    def __last_response_headers(self) -> Optional[Dict[str, str]]:
+        """
+        Headers of python-binance's last response. Used weight is per IP, so any recent response will do.
+
+        :return: Headers or None
+        """
+        response = getattr(self.binance_client, "response", None)
+        return getattr(response, "headers", None)
+
     def __stop_all(self) -> None:
         """
-        This can only be called once!
+        Closes the kline stream connections. Subscriptions are kept.
 
         :return: None
         """
-        self.socket_manager.close()
+        self.kline_streams.stop()
         return
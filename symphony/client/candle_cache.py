@@ -0,0 +1,291 @@
+from symphony.enum import Timeframe
+from symphony.exceptions import DataArchiverException
+from symphony.config import CANDLE_CACHE_DIR, USE_MODIN
+from symphony.utils.time import get_last_complete_bar_time
+from symphony.utils.archive import archive_exists, write_archive, read_archive, read_archive_meta
+from typing import List, Tuple, Dict, Optional, Callable
+import threading
+import tempfile
+import pathlib
+import logging
+import shutil
+import json
+import time
+import os
+import re
+
+if USE_MODIN:
+    import modin.pandas as pd
+else:
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+CANDLE_CACHE_ARCHIVE: str = "candles"
+CANDLE_CACHE_COVERAGE_FILE: str = "coverage.json"
+# Segments appended to a key before they are compacted into one archive
+CANDLE_CACHE_MAX_SEGMENTS: int = 16
+# Matches the main archive and appended segments, but not staging directories
+CANDLE_CACHE_SEGMENT_PATTERN: re.Pattern = re.compile(rf"^{CANDLE_CACHE_ARCHIVE}(\.\d{{20}}-\d+)?$")
+
+
+class CandleCache:
+    """
+    Read-through cache of closed candles on local disk, keyed on (symbol, timeframe). Alongside the candles,
+    each key records which bar ranges have been fetched, so only the missing ranges of a request go to the
+    exchange, and bars the exchange never had are not requested again. Incomplete bars are never stored.
+    Fetched bars are appended as segments of their own, which are compacted into one archive once there are
+    more than CANDLE_CACHE_MAX_SEGMENTS of them.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = CANDLE_CACHE_DIR, namespace: Optional[str] = "binance"):
+        """
+        :param cache_dir: Root directory of the cache
+        :param namespace: Subdirectory, e.g. the exchange the candles come from
+        """
+        self.cache_dir: pathlib.Path = pathlib.Path(cache_dir, namespace)
+        self.__locks: Dict[Tuple[str, Timeframe], threading.Lock] = {}
+        self.__locks_lock = threading.Lock()
+        self.__stats: Dict[str, int] = {
+            "requests": 0,
+            "ranges_fetched": 0,
+            "bars_fetched": 0,
+            "bars_served": 0
+        }
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        with self.__locks_lock:
+            return dict(self.__stats)
+
+    def get(self,
+            symbol: str,
+            timeframe: Timeframe,
+            start: pd.Timestamp,
+            last: pd.Timestamp,
+            fetch: Callable[[pd.Timestamp, pd.Timestamp], pd.DataFrame]
+            ) -> pd.DataFrame:
+        """
+        Candles from `start` to `last`. Ranges not in the cache are fetched with `fetch` and stored,
+        bars past the last complete bar are fetched every time.
+
+        :param symbol: Symbol
+        :param timeframe: Timeframe
+        :param start: Open time of the first bar
+        :param last: Open time of the last bar, inclusive
+        :param fetch: Fetches the bars from a start to a last open time, inclusive, from the exchange
+        :return: The candles
+        """
+        bar = pd.Timedelta(minutes=timeframe.value)
+        last_closed: pd.Timestamp = get_last_complete_bar_time(timeframe)
+        with self.__lock(symbol, timeframe):
+            missing = self.missing_ranges(symbol, timeframe, start, min(last, last_closed))
+            fetched: List[Tuple[pd.Timestamp, pd.Timestamp, pd.DataFrame]] = [
+                (range_start, range_end, fetch(range_start, range_end)) for range_start, range_end in missing
+            ]
+            if fetched:
+                self.store(symbol, timeframe, fetched)
+            candles = self.read(symbol, timeframe, start, last) if start <= last_closed else None
+
+        open_bars = None
+        if last > last_closed:
+            open_bars = fetch(max(start, last_closed + bar), last)
+            fetched.append((last_closed + bar, last, open_bars))
+        if candles is None:
+            # Nothing cached, nor open, e.g. the symbol was not listed yet. Fall back to what was fetched
+            candles = open_bars if open_bars is not None else \
+                next((frame for _, _, frame in fetched if frame is not None), None)
+            if candles is None:
+                candles = fetch(start, last)
+        elif open_bars is not None and len(open_bars):
+            candles = pd.concat([candles, open_bars[candles.columns]])
+
+        with self.__locks_lock:
+            self.__stats["requests"] += 1
+            self.__stats["ranges_fetched"] += len(fetched)
+            self.__stats["bars_fetched"] += sum(len(frame) for _, _, frame in fetched)
+            self.__stats["bars_served"] += len(candles)
+        return candles
+
+    def missing_ranges(self,
+                       symbol: str,
+                       timeframe: Timeframe,
+                       start: pd.Timestamp,
+                       last: pd.Timestamp
+                       ) -> List[Tuple[pd.Timestamp, pd.Timestamp]]:
+        """
+        Bar ranges from `start` to `last` that have not been fetched yet
+
+        :param symbol: Symbol
+        :param timeframe: Timeframe
+        :param start: Open time of the first bar
+        :param last: Open time of the last bar, inclusive
+        :return: List of tuples [(range_start, range_last), ...], both inclusive
+        """
+        if start > last:
+            return []
+        bar = pd.Timedelta(minutes=timeframe.value)
+        missing: List[Tuple[pd.Timestamp, pd.Timestamp]] = []
+        current = start
+        for covered_start, covered_last in self.__read_coverage(symbol, timeframe):
+            if covered_last < current:
+                continue
+            if covered_start > last:
+                break
+            if covered_start > current:
+                missing.append((current, covered_start - bar))
+            current = covered_last + bar
+            if current > last:
+                break
+        if current <= last:
+            missing.append((current, last))
+        return missing
+
+    def read(self,
+             symbol: str,
+             timeframe: Timeframe,
+             start: Optional[pd.Timestamp] = None,
+             end: Optional[pd.Timestamp] = None
+             ) -> Optional[pd.DataFrame]:
+        """
+        Cached candles, copied out of the archive
+
+        :param symbol: Symbol
+        :param timeframe: Timeframe
+        :param start: Optional first open time, inclusive
+        :param end: Optional last open time, inclusive
+        :return: The candles, None if nothing is cached
+        """
+        segments = self.__segments(symbol, timeframe)
+        if not segments:
+            return None
+        try:
+            return self.__read_segments(segments, start, end)
+        except DataArchiverException as e:
+            logger.warning(f"Dropping unreadable cache of {symbol} {timeframe}: {e}")
+            self.clear(symbol, timeframe)
+            return None
+
+    def store(self,
+              symbol: str,
+              timeframe: Timeframe,
+              fetched: List[Tuple[pd.Timestamp, pd.Timestamp, pd.DataFrame]]
+              ) -> None:
+        """
+        Adds fetched candles to the cache as a new segment. Only closed bars are stored, and only the closed part
+        of each range is marked as fetched.
+
+        :param symbol: Symbol
+        :param timeframe: Timeframe
+        :param fetched: List of tuples [(range_start, range_last, candles), ...]
+        :return: None
+        """
+        last_closed: pd.Timestamp = get_last_complete_bar_time(timeframe)
+        frames = [frame[frame.index <= last_closed] for _, _, frame in fetched if frame is not None and len(frame)]
+        frames = [frame for frame in frames if len(frame)]
+        if frames:
+            candles = pd.concat(frames)
+            candles = candles[~candles.index.duplicated(keep="last")].sort_index()
+            segments = self.__segments(symbol, timeframe)
+            if segments:
+                candles = candles[read_archive_meta(str(segments[0]))["columns"]]
+            # Named by write time and pid, so segments sort in the order they were written and never collide
+            segment_name = f"{CANDLE_CACHE_ARCHIVE}.{time.time_ns():020d}-{os.getpid()}"
+            write_archive([candles], str(self.__key_dir(symbol, timeframe) / segment_name))
+            if len(segments) + 1 > CANDLE_CACHE_MAX_SEGMENTS:
+                self.__compact(symbol, timeframe)
+
+        coverage = self.__read_coverage(symbol, timeframe) + [
+            (range_start, min(range_last, last_closed)) for range_start, range_last, _ in fetched
+            if range_start <= last_closed
+        ]
+        self.__write_coverage(symbol, timeframe, coverage)
+        return
+
+    def clear(self, symbol: Optional[str] = None, timeframe: Optional[Timeframe] = None) -> None:
+        """
+        Deletes cached candles of a symbol and timeframe, of every timeframe of a symbol, or everything
+
+        :param symbol: Optional symbol
+        :param timeframe: Optional timeframe, requires `symbol`
+        :return: None
+        """
+        if symbol is None:
+            path = self.cache_dir
+        elif timeframe is None:
+            path = self.cache_dir / symbol
+        else:
+            path = self.__key_dir(symbol, timeframe)
+        if path.exists():
+            shutil.rmtree(path)
+        return
+
+    def __lock(self, symbol: str, timeframe: Timeframe) -> threading.Lock:
+        with self.__locks_lock:
+            return self.__locks.setdefault((symbol, timeframe), threading.Lock())
+
+    def __key_dir(self, symbol: str, timeframe: Timeframe) -> pathlib.Path:
+        return self.cache_dir / symbol / timeframe.name
+
+    def __archive_dir(self, symbol: str, timeframe: Timeframe) -> pathlib.Path:
+        return self.__key_dir(symbol, timeframe) / CANDLE_CACHE_ARCHIVE
+
+    def __segments(self, symbol: str, timeframe: Timeframe) -> List[pathlib.Path]:
+        """
+        Archive directories of a key, the main archive first, then appended segments in the order they were written
+        """
+        key_dir = self.__key_dir(symbol, timeframe)
+        if not key_dir.is_dir():
+            return []
+        return sorted(path for path in key_dir.iterdir()
+                      if CANDLE_CACHE_SEGMENT_PATTERN.match(path.name) and archive_exists(str(path)))
+
+    @staticmethod
+    def __read_segments(segments: List[pathlib.Path],
+                        start: Optional[pd.Timestamp] = None,
+                        end: Optional[pd.Timestamp] = None
+                        ) -> pd.DataFrame:
+        frames = [read_archive(str(segment), start=start, end=end) for segment in segments]
+        if len(frames) == 1:
+            return frames[0].copy()
+        candles = pd.concat([frame[frames[0].columns] for frame in frames])
+        return candles[~candles.index.duplicated(keep="last")].sort_index()
+
+    def __compact(self, symbol: str, timeframe: Timeframe) -> None:
+        """
+        Merges the segments of a key into the main archive. Segments another process appends meanwhile are kept.
+        """
+        segments = self.__segments(symbol, timeframe)
+        write_archive([self.__read_segments(segments)], str(self.__archive_dir(symbol, timeframe)))
+        for segment in segments:
+            if segment.name != CANDLE_CACHE_ARCHIVE:
+                shutil.rmtree(segment, ignore_errors=True)
+        return
+
+    def __read_coverage(self, symbol: str, timeframe: Timeframe) -> List[Tuple[pd.Timestamp, pd.Timestamp]]:
+        coverage_file = self.__key_dir(symbol, timeframe) / CANDLE_CACHE_COVERAGE_FILE
+        if not coverage_file.exists():
+            return []
+        with open(coverage_file, "r") as f:
+            return [(pd.Timestamp(start, unit="ms", tz="UTC"), pd.Timestamp(last, unit="ms", tz="UTC"))
+                    for start, last in json.load(f)]
+
+    def __write_coverage(self,
+                         symbol: str,
+                         timeframe: Timeframe,
+                         coverage: List[Tuple[pd.Timestamp, pd.Timestamp]]) -> None:
+        bar = pd.Timedelta(minutes=timeframe.value)
+        merged: List[List[pd.Timestamp]] = []
+        for start, last in sorted(coverage):
+            if merged and start <= merged[-1][1] + bar:
+                merged[-1][1] = max(merged[-1][1], last)
+            else:
+                merged.append([start, last])
+        key_dir = self.__key_dir(symbol, timeframe)
+        key_dir.mkdir(parents=True, exist_ok=True)
+        # Each writer stages in a file of its own, so concurrent writers never replace each other's partial files
+        with tempfile.NamedTemporaryFile("w", dir=key_dir, prefix=CANDLE_CACHE_COVERAGE_FILE + ".", suffix=".tmp",
+                                         delete=False) as f:
+            json.dump([[start.value // 10 ** 6, last.value // 10 ** 6] for start, last in merged], f)
+        os.replace(f.name, key_dir / CANDLE_CACHE_COVERAGE_FILE)
+        return
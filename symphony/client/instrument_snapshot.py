@@ -0,0 +1,132 @@
+from symphony.data_classes import Instrument
+from symphony.enum import Exchange
+from typing import List, Dict, Any, Optional, Final
+from time import time
+import tempfile
+import pathlib
+import hashlib
+import logging
+import json
+import os
+
+logger = logging.getLogger(__name__)
+
+# Bump when the fields or their meaning change, older snapshots are then ignored
+INSTRUMENT_SNAPSHOT_VERSION: Final[int] = 1
+# Matches the former in-memory cache of get_all_symbols
+INSTRUMENT_SNAPSHOT_TTL_SECS: Final[int] = 43200
+INSTRUMENT_SNAPSHOT_FIELDS: Final[List[str]] = [
+    "symbol",
+    "digits",
+    "exchange",
+    "is_currency",
+    "base_asset",
+    "quote_asset",
+    "margin_allowed",
+    "isolated_margin_allowed",
+    "isolated_margin_account_created",
+    "isolated_margin_ratio",
+    "oco_allowed",
+    "min_quantity",
+    "max_quantity",
+    "step_size"
+]
+
+
+def instrument_snapshot_path(snapshot_dir: str, exchange: Exchange, api_key: Optional[str] = None) -> str:
+    """
+    Snapshot file of an exchange. Margin fields depend on the account, so snapshots are per API key.
+    Only a hash of the key is used.
+
+    :param snapshot_dir: Directory of the snapshots
+    :param exchange: Exchange
+    :param api_key: Optional API key
+    :return: Path of the snapshot
+    """
+    name = exchange.name.lower()
+    if api_key:
+        name += "-" + hashlib.sha256(api_key.encode()).hexdigest()[:12]
+    return str(pathlib.Path(snapshot_dir, name + ".json"))
+
+
+def write_instrument_snapshot(path: str,
+                              instruments: List[Instrument],
+                              non_tradeable_assets: Optional[List[str]] = None) -> None:
+    """
+    Writes instruments as one row of values per instrument. Replaces the file atomically, so concurrent
+    readers see the old or the new snapshot, never a partial one.
+
+    :param path: Snapshot file
+    :param instruments: Instruments
+    :param non_tradeable_assets: Assets listed but not tradeable
+    :return: None
+    """
+    rows = []
+    for instrument in instruments:
+        row = [getattr(instrument, field) for field in INSTRUMENT_SNAPSHOT_FIELDS]
+        row[INSTRUMENT_SNAPSHOT_FIELDS.index("exchange")] = instrument.exchange.name if instrument.exchange else None
+        rows.append(row)
+    snapshot_path = pathlib.Path(path)
+    snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+    # Each writer stages in a file of its own, concurrent cold starts share the snapshot directory
+    staging_file = tempfile.NamedTemporaryFile("w", dir=snapshot_path.parent, prefix=snapshot_path.name + ".",
+                                               suffix=".tmp", delete=False)
+    try:
+        with staging_file:
+            json.dump({
+                "version": INSTRUMENT_SNAPSHOT_VERSION,
+                "created": time(),
+                "fields": INSTRUMENT_SNAPSHOT_FIELDS,
+                "instruments": rows,
+                "non_tradeable_assets": list(non_tradeable_assets or [])
+            }, staging_file, separators=(",", ":"))
+        os.replace(staging_file.name, snapshot_path)
+    except BaseException:
+        os.remove(staging_file.name)
+        raise
+    return
+
+
+def read_instrument_snapshot(path: str) -> Optional[Dict[str, Any]]:
+    """
+    Reads a snapshot
+
+    :param path: Snapshot file
+    :return: Dict of 'instruments', 'non_tradeable_assets' and 'created' (UNIX seconds), None if there is no
+             usable snapshot
+    """
+    snapshot_path = pathlib.Path(path)
+    if not snapshot_path.exists():
+        return None
+    try:
+        with open(snapshot_path, "r") as f:
+            snapshot = json.load(f)
+        if snapshot.get("version") != INSTRUMENT_SNAPSHOT_VERSION or snapshot.get("fields") != INSTRUMENT_SNAPSHOT_FIELDS:
+            logger.info(f"Ignoring instrument snapshot {path} of version {snapshot.get('version')}")
+            return None
+        exchanges = {exchange.name: exchange for exchange in Exchange}
+        exchange_position = INSTRUMENT_SNAPSHOT_FIELDS.index("exchange")
+        instruments = []
+        for row in snapshot["instruments"]:
+            fields = dict(zip(INSTRUMENT_SNAPSHOT_FIELDS, row))
+            fields["exchange"] = exchanges[row[exchange_position]] if row[exchange_position] else None
+            instruments.append(Instrument(**fields))
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable instrument snapshot {path}: {e}")
+        return None
+    return {
+        "instruments": instruments,
+        "non_tradeable_assets": snapshot["non_tradeable_assets"],
+        "created": snapshot["created"]
+    }
+
+
+def instrument_snapshot_is_stale(snapshot: Dict[str, Any], ttl_secs: Optional[int] = INSTRUMENT_SNAPSHOT_TTL_SECS) -> bool:
+    """
+    Whether a snapshot is older than `ttl_secs`
+
+    :param snapshot: As returned by `read_instrument_snapshot`
+    :param ttl_secs: Time to live
+    :return: True or False
+    """
+    return time() - snapshot["created"] > ttl_secs
@@ -0,0 +1,357 @@
+from typing import Dict, Optional, Callable, Any, Mapping, Final
+from symphony.exceptions import ClientClassException
+from time import monotonic, sleep
+import threading
+import asyncio
+import logging
+import random
+import aiohttp
+import requests
+
+logger = logging.getLogger(__name__)
+
+# Binance REQUEST_WEIGHT limit per minute, per IP
+BINANCE_WEIGHT_LIMIT: Final[int] = 1200
+# Request weights of the endpoints used by BinanceClient. Klines depend on `limit`, see `binance_kline_weight`
+BINANCE_ENDPOINT_WEIGHTS: Final[Dict[str, int]] = {
+    "exchangeInfo": 10,
+    "margin/allPairs": 1,
+    "margin/isolated/allPairs": 10,
+    "margin/isolated/account": 10,
+    "ticker/bookTicker": 2,
+    "depth": 10
+}
+# Response header with the weight used in the current minute
+BINANCE_USED_WEIGHT_HEADER: Final[str] = "X-MBX-USED-WEIGHT-1M"
+# 429 is a rate limit warning, 418 an IP ban for ignoring it
+RATE_LIMIT_STATUS_CODES: Final[tuple] = (418, 429)
+# Coroutines cannot wait on the condition, they poll for a free concurrency slot at this interval
+ASYNC_POLL_SECS: Final[float] = 0.01
+
+
+def binance_kline_weight(limit: int) -> int:
+    """
+    Request weight of a klines call
+
+    :param limit: Number of bars requested
+    :return: The weight
+    """
+    if limit < 100:
+        return 1
+    if limit < 500:
+        return 2
+    if limit <= 1000:
+        return 5
+    return 10
+
+
+class WeightRateLimiter:
+    """
+    Token bucket over request weight, shared by every thread making requests. The bucket refills at
+    `weight_limit` per minute and is corrected by the used weight the exchange reports in response headers.
+    Concurrency adapts: it is halved when the exchange throttles, and grows back by one after a run of
+    successful requests while there is weight headroom. Throttled or failed requests are retried with
+    exponential backoff, honouring Retry-After.
+    """
+
+    def __init__(self,
+                 weight_limit: Optional[int] = BINANCE_WEIGHT_LIMIT,
+                 safety_margin: Optional[float] = 0.9,
+                 max_concurrency: Optional[int] = 10,
+                 min_concurrency: Optional[int] = 1,
+                 max_retries: Optional[int] = 5,
+                 backoff_base_secs: Optional[float] = 0.5,
+                 backoff_max_secs: Optional[float] = 60.0,
+                 used_weight_header: Optional[str] = BINANCE_USED_WEIGHT_HEADER):
+        """
+        :param weight_limit: Weight allowed per minute
+        :param safety_margin: Fraction of `weight_limit` to use
+        :param max_concurrency: Upper bound of requests in flight
+        :param min_concurrency: Lower bound of requests in flight
+        :param max_retries: Retries before giving up on a request
+        :param backoff_base_secs: First backoff, doubled every retry
+        :param backoff_max_secs: Cap on a single backoff
+        :param used_weight_header: Header reporting used weight
+        """
+        self.capacity: float = weight_limit * safety_margin
+        self.refill_rate: float = self.capacity / 60.0
+        self.max_concurrency: int = max_concurrency
+        self.min_concurrency: int = min_concurrency
+        self.max_retries: int = max_retries
+        self.backoff_base_secs: float = backoff_base_secs
+        self.backoff_max_secs: float = backoff_max_secs
+        self.used_weight_header: str = used_weight_header
+
+        self.__condition = threading.Condition()
+        self.__tokens: float = self.capacity
+        self.__last_refill: float = monotonic()
+        self.__blocked_until: float = 0.0
+        self.__in_flight: int = 0
+        self.__concurrency: int = max_concurrency
+        self.__successes: int = 0
+        self.__stats: Dict[str, float] = {
+            "requests": 0,
+            "weight": 0,
+            "retries": 0,
+            "throttled": 0,
+            "wait_secs": 0.0,
+            "used_weight": 0
+        }
+
+    @property
+    def concurrency(self) -> int:
+        return self.__concurrency
+
+    @property
+    def tokens(self) -> float:
+        with self.__condition:
+            self.__refill()
+            return self.__tokens
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        with self.__condition:
+            return dict(self.__stats, concurrency=self.__concurrency)
+
+    def acquire(self, weight: int) -> None:
+        """
+        Blocks until `weight` can be spent and a concurrency slot is free
+
+        :param weight: Request weight
+        :return: None
+        """
+        start = monotonic()
+        with self.__condition:
+            while True:
+                wait_secs = self.__try_take(weight, start)
+                if wait_secs == 0.0:
+                    return
+                self.__condition.wait(wait_secs)
+
+    async def aacquire(self, weight: int) -> None:
+        """
+        Async `acquire`. Shares the bucket and concurrency slots with threads using `acquire`.
+
+        :param weight: Request weight
+        :return: None
+        """
+        start = monotonic()
+        while True:
+            with self.__condition:
+                wait_secs = self.__try_take(weight, start)
+            if wait_secs == 0.0:
+                return
+            await asyncio.sleep(wait_secs if wait_secs is not None else ASYNC_POLL_SECS)
+
+    def release(self, headers: Optional[Mapping[str, str]] = None, throttled: Optional[bool] = False,
+                retry_after: Optional[float] = None) -> None:
+        """
+        Frees the concurrency slot taken by `acquire` and feeds back the outcome of the request
+
+        :param headers: Response headers, used weight is read from them
+        :param throttled: Whether the exchange rate limited the request
+        :param retry_after: Seconds to pause every request for, if throttled
+        :return: None
+        """
+        with self.__condition:
+            self.__in_flight -= 1
+            if headers:
+                self.__update_used_weight(headers)
+            if throttled:
+                self.__stats["throttled"] += 1
+                self.__tokens = 0.0
+                self.__successes = 0
+                self.__concurrency = max(self.min_concurrency, self.__concurrency // 2)
+                if retry_after:
+                    self.__blocked_until = max(self.__blocked_until, monotonic() + retry_after)
+                logger.info(f"Rate limited, concurrency now {self.__concurrency}, pausing {retry_after}s")
+            elif self.__stats["used_weight"] < self.capacity / 2:
+                self.__successes += 1
+                if self.__successes >= self.__concurrency and self.__concurrency < self.max_concurrency:
+                    self.__concurrency += 1
+                    self.__successes = 0
+            self.__condition.notify_all()
+        return
+
+    def call(self, func: Callable, weight: int, *args,
+             headers_func: Optional[Callable[[], Optional[Mapping[str, str]]]] = None, **kwargs) -> Any:
+        """
+        Calls an API function (e.g. of python-binance) under the rate limit, retrying throttled and
+        failed calls with backoff
+
+        :param func: The function
+        :param weight: Request weight of one call
+        :param args: Passed to `func`
+        :param headers_func: Optional callable returning the headers of the last response, e.g. the client's
+        :param kwargs: Passed to `func`
+        :return: Result of `func`
+        :raises ClientClassException: If retries are exhausted, with the last exception as cause
+        """
+        attempt = 0
+        while True:
+            self.acquire(weight)
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                status = getattr(e, "status_code", None)
+                response = getattr(e, "response", None)
+                headers = getattr(response, "headers", None)
+                throttled = status in RATE_LIMIT_STATUS_CODES
+                retry_after = self.__retry_after(headers, attempt) if throttled else None
+                self.release(headers, throttled=throttled, retry_after=retry_after)
+                if not self.__retryable(e, status) or attempt >= self.max_retries:
+                    raise ClientClassException(f"Request failed after {attempt + 1} attempts: {e}") from e
+                self.__backoff(attempt, retry_after)
+                attempt += 1
+                continue
+            except BaseException:
+                self.release()
+                raise
+            self.release(headers_func() if headers_func else None)
+            return result
+
+    def request(self, method: str, url: str, weight: int,
+                session: Optional[requests.Session] = None, **kwargs) -> requests.Response:
+        """
+        Makes an HTTP request under the rate limit, retrying throttled and failed requests with backoff
+
+        :param method: HTTP method
+        :param url: URL
+        :param weight: Request weight
+        :param session: Optional session, defaults to a one-off connection
+        :param kwargs: Passed to `requests`
+        :return: The response
+        :raises ClientClassException: If the request fails with a non-retryable status, or retries are exhausted
+        """
+        attempt = 0
+        requester = session if session else requests
+        while True:
+            self.acquire(weight)
+            try:
+                response = requester.request(method, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                self.release()
+                if attempt >= self.max_retries:
+                    raise ClientClassException(f"Request to {url} failed after {attempt + 1} attempts: {e}") from e
+                self.__backoff(attempt)
+                attempt += 1
+                continue
+            except BaseException:
+                # Any other failure is not retried, but must not keep the concurrency slot
+                self.release()
+                raise
+
+            throttled = response.status_code in RATE_LIMIT_STATUS_CODES
+            retry_after = self.__retry_after(response.headers, attempt) if throttled else None
+            self.release(response.headers, throttled=throttled, retry_after=retry_after)
+            if response.status_code < 400:
+                return response
+            if not self.__retryable(None, response.status_code) or attempt >= self.max_retries:
+                raise ClientClassException(f"Request to {url} failed. Resp: [{response.status_code}] {response.text}")
+            self.__backoff(attempt, retry_after)
+            attempt += 1
+
+    async def arequest(self, session: aiohttp.ClientSession, method: str, url: str, weight: int, **kwargs) -> Any:
+        """
+        Async `request`. Makes an HTTP request under the rate limit, retrying throttled and failed requests
+        with backoff
+
+        :param session: The aiohttp session
+        :param method: HTTP method
+        :param url: URL
+        :param weight: Request weight
+        :param kwargs: Passed to `session.request`
+        :return: The decoded JSON body
+        :raises ClientClassException: If the request fails with a non-retryable status, or retries are exhausted
+        """
+        attempt = 0
+        while True:
+            await self.aacquire(weight)
+            try:
+                async with session.request(method, url, **kwargs) as response:
+                    status = response.status
+                    headers = response.headers
+                    body = await response.json(content_type=None) if status < 400 else await response.text()
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                self.release()
+                if attempt >= self.max_retries:
+                    raise ClientClassException(f"Request to {url} failed after {attempt + 1} attempts: {e}") from e
+                await asyncio.sleep(self.__backoff_secs(attempt))
+                attempt += 1
+                continue
+            except BaseException:
+                # Any other failure, cancellation included, is not retried, but must not keep the concurrency slot
+                self.release()
+                raise
+
+            throttled = status in RATE_LIMIT_STATUS_CODES
+            retry_after = self.__retry_after(headers, attempt) if throttled else None
+            self.release(headers, throttled=throttled, retry_after=retry_after)
+            if status < 400:
+                return body
+            if not self.__retryable(None, status) or attempt >= self.max_retries:
+                raise ClientClassException(f"Request to {url} failed. Resp: [{status}] {body}")
+            await asyncio.sleep(self.__backoff_secs(attempt, retry_after))
+            attempt += 1
+
+    def __try_take(self, weight: int, start: float) -> Optional[float]:
+        """
+        Takes `weight` and a concurrency slot if available. Caller must hold the condition.
+
+        :return: 0.0 if taken, otherwise seconds to wait, None if waiting on a concurrency slot
+        """
+        weight = min(weight, self.capacity)
+        self.__refill()
+        now = monotonic()
+        if now < self.__blocked_until:
+            return self.__blocked_until - now
+        if self.__in_flight >= self.__concurrency:
+            return None
+        if self.__tokens < weight:
+            return (weight - self.__tokens) / self.refill_rate
+        self.__tokens -= weight
+        self.__in_flight += 1
+        self.__stats["requests"] += 1
+        self.__stats["weight"] += weight
+        self.__stats["wait_secs"] += now - start
+        return 0.0
+
+    def __refill(self) -> None:
+        now = monotonic()
+        self.__tokens = min(self.capacity, self.__tokens + (now - self.__last_refill) * self.refill_rate)
+        self.__last_refill = now
+
+    def __update_used_weight(self, headers: Mapping[str, str]) -> None:
+        used_weight = headers.get(self.used_weight_header)
+        if used_weight is None:
+            used_weight = headers.get(self.used_weight_header.lower())
+        if used_weight is None:
+            return
+        self.__stats["used_weight"] = int(used_weight)
+        # The exchange's count is authoritative, only ever lowers our estimate
+        self.__tokens = max(0.0, min(self.__tokens, self.capacity - int(used_weight)))
+
+    def __retry_after(self, headers: Optional[Mapping[str, str]], attempt: int) -> float:
+        if headers:
+            retry_after = headers.get("Retry-After", headers.get("retry-after"))
+            if retry_after is not None:
+                return float(retry_after)
+        return min(self.backoff_max_secs, self.backoff_base_secs * 2 ** attempt)
+
+    @staticmethod
+    def __retryable(exception: Optional[Exception], status: Optional[int]) -> bool:
+        if status is not None:
+            return status in RATE_LIMIT_STATUS_CODES or status >= 500
+        return isinstance(exception, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+
+    def __backoff(self, attempt: int, retry_after: Optional[float] = None) -> None:
+        sleep(self.__backoff_secs(attempt, retry_after))
+        return
+
+    def __backoff_secs(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        delay = retry_after if retry_after is not None else \
+            min(self.backoff_max_secs, self.backoff_base_secs * 2 ** attempt)
+        with self.__condition:
+            self.__stats["retries"] += 1
+        # Jitter so requests throttled together do not retry together
+        return delay * (1 + random.random() * 0.1)
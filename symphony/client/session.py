@@ -0,0 +1,73 @@
+from typing import Dict, Final
+from requests.adapters import HTTPAdapter
+import requests
+
+# Matches the default worker count of BinanceClient.get_multiple
+DEFAULT_POOL_SIZE: Final[int] = 10
+
+
+def mount_pool(session: requests.Session, pool_size: int = DEFAULT_POOL_SIZE) -> requests.Session:
+    """
+    Mounts a keep-alive connection pool of `pool_size` connections per host on an existing session.
+    Existing pooled connections of the session are dropped.
+
+    :param session: The session, e.g. python-binance's
+    :param pool_size: Max connections kept open per host, should match the number of threads sharing the session
+    :return: The same session
+    """
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    for prefix in ("https://", "http://"):
+        old_adapter = session.adapters.get(prefix)
+        session.mount(prefix, adapter)
+        if old_adapter is not None and old_adapter is not adapter:
+            old_adapter.close()
+    return session
+
+
+def create_pooled_session(pool_size: int = DEFAULT_POOL_SIZE) -> requests.Session:
+    """
+    New keep-alive session with a connection pool of `pool_size` connections per host
+
+    :param pool_size: Max connections kept open per host
+    :return: The session
+    """
+    return mount_pool(requests.Session(), pool_size)
+
+
+def get_pool_size(session: requests.Session) -> int:
+    """
+    Connections kept open per host by the session's https adapter
+
+    :param session: The session
+    :return: Pool size
+    """
+    adapter = session.get_adapter("https://")
+    return getattr(adapter, "_pool_maxsize", 0)
+
+
+def connection_stats(session: requests.Session) -> Dict[str, int]:
+    """
+    Connection reuse of a session. A request served on a kept-alive connection skips the TCP and TLS handshakes.
+
+    :param session: The session
+    :return: Hosts pooled, connections opened, requests made, requests on reused connections, idle connections
+    """
+    stats: Dict[str, int] = {"hosts": 0, "connections_opened": 0, "requests": 0, "reused": 0, "idle": 0}
+    adapters = {id(adapter): adapter for adapter in session.adapters.values()}
+    for adapter in adapters.values():
+        pools = getattr(getattr(adapter, "poolmanager", None), "pools", None)
+        if pools is None:
+            continue
+        for key in pools.keys():
+            try:
+                pool = pools[key]
+            except KeyError:
+                # Evicted in the meantime
+                continue
+            stats["hosts"] += 1
+            stats["connections_opened"] += pool.num_connections
+            stats["requests"] += pool.num_requests
+            # The queue is padded with None up to the pool size
+            stats["idle"] += sum(conn is not None for conn in list(pool.pool.queue)) if pool.pool is not None else 0
+    stats["reused"] = max(0, stats["requests"] - stats["connections_opened"])
+    return stats
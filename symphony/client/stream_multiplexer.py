@@ -0,0 +1,350 @@
+from typing import Dict, List, Set, Optional, Callable, Any, Final
+from time import monotonic
+import itertools
+import threading
+import asyncio
+import logging
+import json
+import websockets
+
+logger = logging.getLogger(__name__)
+
+BINANCE_COMBINED_STREAM_URL: Final[str] = "wss://stream.binance.com:9443/stream"
+# Binance allows 1024 streams per connection, shards stay well below
+BINANCE_MAX_STREAMS_PER_CONNECTION: Final[int] = 200
+# Binance allows 5 incoming control messages per second per connection
+CONTROL_MESSAGE_INTERVAL_SECS: Final[float] = 0.25
+
+
+def binance_kline_stream(symbol: str, interval: str) -> str:
+    """
+    Combined stream name of a kline stream
+
+    :param symbol: Symbol, e.g. ETHBTC
+    :param interval: Binance interval, e.g. 1m
+    :return: The stream name, e.g. ethbtc@kline_1m
+    """
+    return f"{symbol.lower()}@kline_{interval}"
+
+
+def binance_agg_trade_stream(symbol: str) -> str:
+    """
+    Combined stream name of an aggregate trade stream
+
+    :param symbol: Symbol, e.g. ETHBTC
+    :return: The stream name, e.g. ethbtc@aggTrade
+    """
+    return f"{symbol.lower()}@aggTrade"
+
+
+def binance_depth_stream(symbol: str, update_speed_ms: Optional[int] = 100) -> str:
+    """
+    Combined stream name of a diff depth stream
+
+    :param symbol: Symbol, e.g. ETHBTC
+    :param update_speed_ms: 100 or 1000
+    :return: The stream name, e.g. ethbtc@depth@100ms
+    """
+    return f"{symbol.lower()}@depth@{update_speed_ms}ms"
+
+
+class CombinedStreamMultiplexer:
+    """
+    Multiplexes many streams over a few combined-stream websocket connections. Streams are assigned to
+    shards of at most `max_streams_per_connection`, each shard is one connection. All connections run on one
+    event loop in one background thread. Incoming messages are dispatched on the stream name through a dict
+    of handlers. Dropped connections are reconnected with backoff and resubscribed. Connect callbacks run
+    before a (re)connected shard dispatches again, e.g. to backfill what was missed while it was down.
+    """
+
+    def __init__(self,
+                 url: Optional[str] = BINANCE_COMBINED_STREAM_URL,
+                 max_streams_per_connection: Optional[int] = BINANCE_MAX_STREAMS_PER_CONNECTION,
+                 reconnect_secs: Optional[float] = 1.0,
+                 max_reconnect_secs: Optional[float] = 60.0
+                 ):
+        """
+        :param url: Combined stream endpoint
+        :param max_streams_per_connection: Streams per connection
+        :param reconnect_secs: First reconnect delay, doubled on every failed attempt
+        :param max_reconnect_secs: Max reconnect delay
+        """
+        self.url: str = url
+        self.max_streams_per_connection: int = max_streams_per_connection
+        self.reconnect_secs: float = reconnect_secs
+        self.max_reconnect_secs: float = max_reconnect_secs
+        self.__handlers: Dict[str, Callable[[Dict[str, Any]], None]] = {}
+        self.__connect_callbacks: List[Callable[[List[str]], None]] = []
+        self.__shards: List[Set[str]] = []
+        self.__shard_of: Dict[str, int] = {}
+        self.__pending_subscribe: List[Set[str]] = []
+        self.__pending_unsubscribe: List[Set[str]] = []
+        self.__connections: Dict[int, Any] = {}
+        self.__tasks: Dict[int, asyncio.Task] = {}
+        self.__last_control: Dict[int, float] = {}
+        self.__request_ids = itertools.count(1)
+        self.__lock = threading.Lock()
+        self.__loop: Optional[asyncio.AbstractEventLoop] = None
+        self.__thread: Optional[threading.Thread] = None
+        self.__running: bool = False
+        self.__stats: Dict[str, int] = {
+            "messages": 0,
+            "unhandled": 0,
+            "handler_errors": 0,
+            "connects": 0
+        }
+
+    @property
+    def streams(self) -> List[str]:
+        with self.__lock:
+            return list(self.__handlers.keys())
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """
+        Messages dispatched, messages without a handler, handler exceptions, connections made and
+        connections currently open
+        """
+        with self.__lock:
+            stats = dict(self.__stats)
+            stats["connections"] = len(self.__connections)
+            stats["shards"] = len(self.__shards)
+        return stats
+
+    def start(self) -> None:
+        """
+        Starts the event loop thread and connects the shards. Does nothing if already started.
+
+        :return: None
+        """
+        with self.__lock:
+            if self.__running:
+                return
+            self.__running = True
+            self.__loop = asyncio.new_event_loop()
+            self.__thread = threading.Thread(target=self.__run_loop, name="CombinedStreamMultiplexer", daemon=True)
+            self.__thread.start()
+            shards = range(len(self.__shards))
+        for shard in shards:
+            self.__schedule(shard)
+        return
+
+    def stop(self, timeout: Optional[float] = 10.0) -> None:
+        """
+        Closes the connections and stops the event loop thread. Subscriptions are kept, `start` reconnects them.
+
+        :param timeout: Seconds to wait for the connections to close
+        :return: None
+        """
+        with self.__lock:
+            if not self.__running:
+                return
+            self.__running = False
+            loop, thread = self.__loop, self.__thread
+        try:
+            asyncio.run_coroutine_threadsafe(self.__close_all(), loop).result(timeout)
+        except Exception as e:
+            logger.warning(f"Closing stream connections: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout)
+        if not thread.is_alive():
+            loop.close()
+        return
+
+    def subscribe(self, stream: str, handler: Callable[[Dict[str, Any]], None]) -> None:
+        """
+        Subscribes to a stream. Subscribing again replaces the handler without touching the connection.
+
+        :param stream: Stream name, e.g. ethbtc@kline_1m
+        :param handler: Called with the `data` of each message on the stream, on the event loop thread
+        :return: None
+        """
+        with self.__lock:
+            self.__handlers[stream] = handler
+            if stream in self.__shard_of:
+                return
+            shard = next((i for i, streams in enumerate(self.__shards)
+                          if len(streams) < self.max_streams_per_connection), None)
+            if shard is None:
+                shard = len(self.__shards)
+                self.__shards.append(set())
+                self.__pending_subscribe.append(set())
+                self.__pending_unsubscribe.append(set())
+            self.__shards[shard].add(stream)
+            self.__shard_of[stream] = shard
+            self.__pending_unsubscribe[shard].discard(stream)
+            self.__pending_subscribe[shard].add(stream)
+        self.__schedule(shard)
+        return
+
+    def unsubscribe(self, stream: str) -> None:
+        """
+        Unsubscribes from a stream
+
+        :param stream: Stream name
+        :return: None
+        """
+        with self.__lock:
+            self.__handlers.pop(stream, None)
+            shard = self.__shard_of.pop(stream, None)
+            if shard is None:
+                return
+            self.__shards[shard].discard(stream)
+            self.__pending_subscribe[shard].discard(stream)
+            self.__pending_unsubscribe[shard].add(stream)
+        self.__schedule(shard)
+        return
+
+    def add_connect_callback(self, callback: Callable[[List[str]], None]) -> None:
+        """
+        Registers a callback run on every connect of a shard, including reconnects. It is called with the
+        shard's streams in a worker thread, and messages of the shard are held back until it returns.
+
+        :param callback: Callback, receives the list of stream names
+        :return: None
+        """
+        with self.__lock:
+            if callback not in self.__connect_callbacks:
+                self.__connect_callbacks.append(callback)
+        return
+
+    def call_later(self, delay_secs: float, callback: Callable[[], None]) -> None:
+        """
+        Runs a callback on the event loop thread, where the handlers run, after a delay. Does nothing if stopped.
+
+        :param delay_secs: Delay
+        :param callback: Callback
+        :return: None
+        """
+        with self.__lock:
+            if not self.__running:
+                return
+            loop = self.__loop
+        loop.call_soon_threadsafe(loop.call_later, max(delay_secs, 0.0), callback)
+        return
+
+    def __run_connect_callbacks(self, streams: List[str]) -> None:
+        with self.__lock:
+            callbacks = list(self.__connect_callbacks)
+        for callback in callbacks:
+            try:
+                callback(streams)
+            except Exception as e:
+                logger.exception(f"Connect callback {callback} failed: {e}")
+        return
+
+    def __run_loop(self) -> None:
+        asyncio.set_event_loop(self.__loop)
+        self.__loop.run_forever()
+        return
+
+    def __schedule(self, shard: int) -> None:
+        """
+        Connects a shard, or sends its pending control messages if it is connected. Calls made in quick
+        succession are sent as one message.
+        """
+        with self.__lock:
+            if not self.__running:
+                return
+            loop = self.__loop
+        loop.call_soon_threadsafe(self.__ensure_shard, shard)
+        return
+
+    def __ensure_shard(self, shard: int) -> None:
+        task = self.__tasks.get(shard)
+        if task is None or task.done():
+            self.__tasks[shard] = self.__loop.create_task(self.__run_shard(shard))
+        elif shard in self.__connections:
+            self.__loop.create_task(self.__flush(shard))
+        return
+
+    async def __run_shard(self, shard: int) -> None:
+        """
+        Keeps one shard connected. On every (re)connect, all streams of the shard are subscribed in one message.
+        """
+        delay = self.reconnect_secs
+        while self.__running:
+            try:
+                async with websockets.connect(self.url, close_timeout=1) as connection:
+                    with self.__lock:
+                        streams = sorted(self.__shards[shard])
+                        self.__pending_subscribe[shard].clear()
+                        self.__pending_unsubscribe[shard].clear()
+                        self.__connections[shard] = connection
+                        self.__stats["connects"] += 1
+                    if streams:
+                        await self.__send_control(shard, connection, "SUBSCRIBE", streams)
+                    delay = self.reconnect_secs
+                    logger.info(f"Stream connection {shard} open with {len(streams)} streams")
+                    if streams and self.__connect_callbacks:
+                        # Incoming messages queue up on the connection meanwhile
+                        await self.__loop.run_in_executor(None, self.__run_connect_callbacks, streams)
+                    async for raw in connection:
+                        self.__dispatch(raw)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Stream connection {shard} dropped: {e}")
+            finally:
+                self.__connections.pop(shard, None)
+            if not self.__running:
+                break
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_reconnect_secs)
+        return
+
+    async def __flush(self, shard: int) -> None:
+        connection = self.__connections.get(shard)
+        if connection is None:
+            # Subscribed on connect
+            return
+        with self.__lock:
+            unsubscribe = sorted(self.__pending_unsubscribe[shard])
+            subscribe = sorted(self.__pending_subscribe[shard])
+            self.__pending_unsubscribe[shard].clear()
+            self.__pending_subscribe[shard].clear()
+        try:
+            if unsubscribe:
+                await self.__send_control(shard, connection, "UNSUBSCRIBE", unsubscribe)
+            if subscribe:
+                await self.__send_control(shard, connection, "SUBSCRIBE", subscribe)
+        except Exception as e:
+            # The reconnect subscribes the shard's current streams
+            logger.warning(f"Stream connection {shard} control message failed: {e}")
+        return
+
+    async def __send_control(self, shard: int, connection: Any, method: str, streams: List[str]) -> None:
+        wait = self.__last_control.get(shard, 0.0) + CONTROL_MESSAGE_INTERVAL_SECS - monotonic()
+        self.__last_control[shard] = monotonic() + max(wait, 0.0)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        await connection.send(json.dumps({"method": method, "params": streams, "id": next(self.__request_ids)}))
+        return
+
+    def __dispatch(self, raw: str) -> None:
+        """
+        Calls the handler of the message's stream. Replies to control messages have no stream and are dropped.
+        """
+        message = json.loads(raw)
+        handler = self.__handlers.get(message.get("stream"))
+        if handler is None:
+            if "stream" in message:
+                self.__stats["unhandled"] += 1
+            return
+        self.__stats["messages"] += 1
+        try:
+            handler(message["data"])
+        except Exception as e:
+            self.__stats["handler_errors"] += 1
+            logger.exception(f"Handler of {message['stream']} failed: {e}")
+        return
+
+    async def __close_all(self) -> None:
+        await asyncio.gather(*[connection.close() for connection in list(self.__connections.values())],
+                             return_exceptions=True)
+        tasks = list(self.__tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.__tasks.clear()
+        return
@@ -1,3 +1,4 @@
 from .config import LOG_LEVEL, config, USE_MODIN, TRADING_LIB_DIR, CRYPTO_DATA_PATH, HISTORICAL_DATA_START, USE_S3, \
     PROXY_USER, PROXY_PASS, AWS_REGION, DYNAMODB_HOST, DYNAMODB_ORDERS_TABLE, S3_BUCKET, AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY, HISTORICAL_DATA_DIR, \
-    BACKTEST_DIR, SLACK_WORKSPACE, SLACK_WEBHOOK_URL, SLACK_CHANNEL, SLACK_TOKEN, ML_S3_BUCKET, BACKTEST_S3_FOLDER, SYMPHONY_DIR, ML_LOCAL_PATH
+    BACKTEST_DIR, SLACK_WORKSPACE, SLACK_WEBHOOK_URL, SLACK_CHANNEL, SLACK_TOKEN, ML_S3_BUCKET, BACKTEST_S3_FOLDER, SYMPHONY_DIR, ML_LOCAL_PATH, \
+    CANDLE_CACHE_DIR, INSTRUMENT_SNAPSHOT_DIR
@@ -46,6 +46,10 @@ CRYPTO_DATA_PATH: str = "Crypto/"
 HISTORICAL_DATA_START: str = "2017-01-01 00:00:00"
 USE_S3 = bool(strtobool(config["archive"]["use_s3"]))
 S3_BUCKET = config["archive"]["s3_bucket"]
+# Closed candles kept locally by CandleCache. Overridable, e.g. to /tmp on Lambda
+CANDLE_CACHE_DIR: str = os.environ.get("SYMPHONY_CANDLE_CACHE_DIR", HISTORICAL_DATA_DIR + "candle_cache/")
+# Instrument snapshots loaded by clients at startup
+INSTRUMENT_SNAPSHOT_DIR: str = os.environ.get("SYMPHONY_INSTRUMENT_SNAPSHOT_DIR", HISTORICAL_DATA_DIR + "instruments/")
 
 # Proxy Settings
 # I use https://github.com/dan-v/awslambdaproxy, 3 instances
@@ -1,8 +1,9 @@
 from .candle import Candle
-from .price_history import PriceHistory, copy_price_history
+from .price_history import PriceHistory, copy_price_history, price_histories_memory_usage
 from .instrument import Instrument, filter_instruments
 from .conversion_chain import ConversionChain, CurrencyConversionGraph, ConversionChainType
 from .order import Order
 from .account import MarginAccount
 from .signal import Signal
+from .shared_price_history import SharedPriceHistory, SharedPriceHistoryDescriptor, map_price_histories
 from .position import Position
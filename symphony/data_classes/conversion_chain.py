@@ -1,14 +1,33 @@
-from symphony.enum import Market, Exchange
+from symphony.enum import Market, Exchange, Column
 from symphony.abc import RealTimeQuoter, HistoricalQuoter
-from symphony.exceptions import DataClassException, UtilsException
-from .instrument import Instrument, filter_instruments
-from typing import Union, List, Final, Optional
+from symphony.config import USE_MODIN
+from symphony.exceptions import DataClassException, QuoterException
+from .instrument import Instrument
+from typing import Union, List, Final, Optional, Dict, Tuple, TYPE_CHECKING
 from symphony.utils.graph import bidirectional_conversion_chain, build_graph, verify_chain, \
     CurrencyConversionGraph, ConversionChainType, get_execution_chain, get_instrument_chain, shortest_conversion_chains, \
-    find_shortest_path, path_to_conversion_chain
+    ConversionGraph, get_conversion_graph
+from symphony.utils.routing import ConversionRouter, ConversionRoute, get_conversion_router
 from symphony.utils.instruments import get_instrument
 from dataclasses import dataclass
 from functools import lru_cache
+import numpy as np
+
+if USE_MODIN:
+    import modin.pandas as pd
+else:
+    import pandas as pd
+
+if TYPE_CHECKING:
+    from symphony.quoter import DepthCache
+
+# Longest chain set_chain builds, the target instrument included
+MAX_CHAIN_LENGTH: Final[int] = 4
+
+# (start, end, order type, highest liquidity chain) to (rate, quote sequence of each symbol the rate was computed from)
+RateCacheType = Dict[Tuple[str, str, Optional[Market], bool], Tuple[float, Tuple[Tuple[str, int], ...]]]
+RateTreeType = Tuple[np.ndarray, np.ndarray, np.ndarray, List[int]]
+RatePlanType = Tuple[Dict[str, int], List[str], RateTreeType, RateTreeType, np.ndarray, np.ndarray]
 
 
 @dataclass
@@ -22,34 +41,43 @@ class ConversionChain:
                  start_asset: Optional[str] = "",
                  target_instrument: Optional[Instrument] = None,
                  order_type: Optional[Market] = Market.BUY,
-                 highest_liquidity_chain: Optional[bool] = False):
+                 highest_liquidity_chain: Optional[bool] = False,
+                 depth_cache: Optional["DepthCache"] = None):
         """
         Initialize the ConversionChain
 
-        :param quoter: A quoter, either RealTime or Historical
+        :param quoter: A quoter, either RealTime or Historical. A HistoricalQuoter quotes at its current timestamp
         :param start_asset: The starting asset (e.g. 'EUR', 'USDT')
         :param target_instrument: First target instrument
         :param order_type: First order type
         :param highest_liquidity_chain: Whether to attempt to find the highest liquidity chain
+        :param depth_cache: Optional local order books, preferred over the quoter for liquidity where synced
         :raises DataClassException: If interface not implemented, start_asset invalid
         """
 
         self.symphony_client = None
         self.__quoter_set = False
+        self.depth_cache: Optional["DepthCache"] = depth_cache
         self.quoter: Final[Union[RealTimeQuoter, HistoricalQuoter]] = quoter
-        if isinstance(self.quoter, HistoricalQuoter):
-            raise DataClassException(f"Not implemented historical quoter")
 
         self.instruments: List[Instrument] = self.quoter.instruments
+        self.__instruments_by_symbol: Dict[str, Instrument] = {instrument.symbol: instrument for instrument in self.instruments}
         self.target_instrument: Instrument = target_instrument
         self.order_type = order_type
         self.graph = build_graph(self.instruments)
+        # Shared by every ConversionChain of the same instruments, as are its cached shortest paths
+        self.conversion_graph: ConversionGraph = get_conversion_graph(self.instruments)
+        self.router: ConversionRouter = get_conversion_router(self.instruments)
         self.highest_liquidity_chain = highest_liquidity_chain
         self.conversion_chain: ConversionChainType = None
         self.instrument_chain = None
         self.execution_chain = None
         self.start_asset: str = start_asset
         self.all_assets: List[str] = []
+        # Rates of a RealTimeQuoter, valid while none of the quotes they were computed from changed
+        self.__rates: RateCacheType = {}
+        # Target to the arrays `conversion_rates` walks
+        self.__rate_plans: Dict[str, RatePlanType] = {}
 
         if not self.start_asset:
             return
@@ -79,7 +107,7 @@ class ConversionChain:
 
     @start_asset.setter
     def start_asset(self, start_asset: str):
-        if len(filter_instruments(self.instruments, start_asset)):
+        if start_asset in self.__instruments_by_symbol:
             raise DataClassException(f"The asset {start_asset} should not be an Instrument")
         self.__start_asset = start_asset
 
@@ -125,19 +153,26 @@ class ConversionChain:
                   target_instrument_or_asset: Union[Instrument, str],
                   start_asset: Optional[str] = "",
                   order_type: Optional[Market] = Market.BUY,
-                  highest_liquidity_chain: Optional[bool] = True) -> ConversionChainType:
+                  highest_liquidity_chain: Optional[bool] = True,
+                  amount: Optional[float] = None) -> ConversionChainType:
         """
         Calculate and verify the conversion chain. Set all instance properties
 
         :param target_instrument_or_asset: The target Instrument or asset
         :param start_asset: The start asset (e.g. 'EUR', 'BTC')
         :param order_type: The Market order type
-        :param highest_liquidity_chain: Attempts to find the chain with the best liquidity level.
-                                            Does not work if the quoter is a HistoricalQuoter. Only tries after attempting
-                                            to find the shortest chain, and multiple are found.
+        :param highest_liquidity_chain: With a RealTimeQuoter, takes the chain with the best effective rate, spread
+                                            and commission included, see `cheapest_route`. Otherwise, and if no
+                                            route is quoted, attempts to find the chain with the best liquidity level
+                                            among the shortest chains. Not used if the quoter is a HistoricalQuoter.
+        :param amount: Optional amount of the start asset, for the depth cache to price the fills of
         :return: The conversion chain.
         :raises DataClassException: If no chains are found, if chains did not verify
         """
+        real_time = isinstance(self.quoter, RealTimeQuoter)
+        # One liquidity snapshot of every symbol serves the instrument, route and chain selection, so choosing
+        # a chain makes at most one API request
+        snapshot: Optional[pd.DataFrame] = None
         if start_asset:
             self.start_asset = start_asset
         if order_type:
@@ -146,7 +181,7 @@ class ConversionChain:
         if isinstance(target_instrument_or_asset, Instrument):
             self.target_instrument = target_instrument_or_asset
         elif isinstance(target_instrument_or_asset, str):
-            if target_instrument_or_asset in self.quoter.symphony_client.get_all_assets():
+            if target_instrument_or_asset in self.get_all_assets():
                 try:
                     # Potentially a symbol that has both assets
                     potential_single: Instrument = self.__get_asset_pair(start_asset, target_instrument_or_asset)
@@ -159,7 +194,10 @@ class ConversionChain:
                         self.instrument_chain = instrument_chain
                         return potential_single_chain
                     # Otherwise find most liquid asset with the target asset
-                    self.target_instrument = self.__most_liquid_instrument_for_asset(target_instrument_or_asset)
+                    if real_time:
+                        snapshot = self.quoter.liquidity_snapshot(self.router.symbols)
+                    self.target_instrument = self.__most_liquid_instrument_for_asset(
+                        target_instrument_or_asset, None if snapshot is None else snapshot[Column.LIQUIDITY])
                 except DataClassException:
                     pass
             if not self.target_instrument:
@@ -167,33 +205,44 @@ class ConversionChain:
         else:
             raise DataClassException(f"Unknown type for target_instrument_or_asset: {type(target_instrument_or_asset)}")
 
-        chains: List[ConversionChainType] = bidirectional_conversion_chain(self.graph, self.start_asset,
-                                                                           self.target_instrument)
+        chain: Optional[ConversionChainType] = None
+        if highest_liquidity_chain and real_time:
+            if self.start_asset in [self.target_instrument.base_asset, self.target_instrument.quote_asset]:
+                chain = [self.target_instrument.symbol]
+            else:
+                if snapshot is None:
+                    snapshot = self.quoter.liquidity_snapshot(self.router.symbols)
+                chain = self.__cheapest_chain(self.target_instrument, snapshot, amount)
+
+        if chain is None:
+            chains: List[ConversionChainType] = bidirectional_conversion_chain(self.graph, self.start_asset,
+                                                                               self.target_instrument)
 
-        for chain in chains:
-            if not verify_chain(chain, self.start_asset, self.instruments):
-                raise DataClassException(f"Chain {chain} failed to verify")
+            for chain in chains:
+                if not verify_chain(chain, self.start_asset, self.instruments):
+                    raise DataClassException(f"Chain {chain} failed to verify")
 
-        chains: List[ConversionChainType] = shortest_conversion_chains(chains)
+            chains: List[ConversionChainType] = shortest_conversion_chains(chains)
 
-        if highest_liquidity_chain and len(chains) > 1 and not isinstance(self.quoter, HistoricalQuoter):
-            chain: ConversionChainType = self.__most_liquid_chain(chains)
-        elif not len(chains):
-            raise DataClassException(f"No chains found for {self.start_asset} and {self.target_instrument.symbol}!")
-        else:
-            chain: ConversionChainType = chains[0]
+            if highest_liquidity_chain and len(chains) > 1 and not isinstance(self.quoter, HistoricalQuoter):
+                chain: ConversionChainType = self.__most_liquid_chain(
+                    chains, None if snapshot is None else snapshot[Column.LIQUIDITY])
+            elif not len(chains):
+                raise DataClassException(f"No chains found for {self.start_asset} and {self.target_instrument.symbol}!")
+            else:
+                chain: ConversionChainType = chains[0]
 
         # Final sanity check. See if target is in any intermediate pairs
         if len(chain) > 2:
             for i, symbol in enumerate(chain[:-1]):
-                intermediate_instrument = get_instrument(self.instruments, symbol)
+                intermediate_instrument = self.__instruments_by_symbol[symbol]
                 if target_instrument_or_asset == intermediate_instrument.base_asset or target_instrument_or_asset == intermediate_instrument.quote_asset:
                     print(f"Abnormal chain {chain}. Setting chain to {chain[:i + 1]}")
                     chain = chain[:i + 1]
                     break
 
-        execution_chain: List[Market] = get_execution_chain(chain, self.start_asset, self.instruments)
-        instrument_chain: List[Instrument] = get_instrument_chain(chain, self.instruments)
+        instrument_chain: List[Instrument] = [self.__instruments_by_symbol[symbol] for symbol in chain]
+        execution_chain: List[Market] = get_execution_chain(chain, self.start_asset, instrument_chain)
         self.conversion_chain: ConversionChainType = chain
         self.execution_chain = execution_chain
         self.instrument_chain = instrument_chain
@@ -219,33 +268,93 @@ class ConversionChain:
                 max_min_cost = cost_in_start_asset
         return max_min_cost
 
-    def __most_liquid_chain(self, chains: List[ConversionChainType]) -> ConversionChainType:
+    def cheapest_route(self,
+                       start: str,
+                       end: str,
+                       amount: Optional[float] = None,
+                       excluded: Optional[List[str]] = None,
+                       max_hops: Optional[int] = None,
+                       snapshot: Optional[pd.DataFrame] = None) -> Optional[ConversionRoute]:
+        """
+        Conversion with the best effective rate at the current top of book, spread and taker commission included.
+        With an amount, the symbols the depth cache has books of are priced at the average fill of what reaches them.
+        Symbols the websocket has not quoted are quoted by at most one API request.
+
+        :param start: The asset to convert
+        :param end: The asset to convert into
+        :param amount: Optional amount of the start asset
+        :param excluded: Assets the route must not pass through
+        :param max_hops: Longest route, defaults to the router's
+        :param snapshot: Liquidity snapshot of the router's symbols, taken from the quoter if not given
+        :return: The route, None if no quoted route reaches end, or the cheapest would trade round crossed quotes
+        :raises DataClassException: If the quoter is not a RealTimeQuoter
+        """
+        if not isinstance(self.quoter, RealTimeQuoter):
+            raise DataClassException(f"Routing needs a RealTimeQuoter, got {type(self.quoter)}")
+        if snapshot is None:
+            snapshot = self.quoter.liquidity_snapshot(self.router.symbols)
+        weights = self.router.edge_weights(snapshot[Column.BID].to_numpy(), snapshot[Column.ASK].to_numpy())
+        fill_symbols = self.depth_cache.symbols if self.depth_cache is not None and amount else None
+        return self.router.route(start, end, weights, amount=amount, fill_price=self.__fill_price,
+                                 fill_symbols=fill_symbols, excluded=excluded, max_hops=max_hops)
+
+    def __cheapest_chain(self,
+                         target_instrument: Instrument,
+                         snapshot: pd.DataFrame,
+                         amount: Optional[float] = None) -> Optional[ConversionChainType]:
+        """
+        Cheapest chain into the quote asset of the target instrument, then the target instrument itself
+
+        :param target_instrument: Target instrument, without the start asset
+        :param snapshot: Liquidity snapshot of the router's symbols
+        :param amount: Optional amount of the start asset
+        :return: The chain, None if no quoted route reaches the target or the quotes are crossed on the way
+        """
+        route = self.cheapest_route(self.start_asset, target_instrument.quote_asset, amount=amount,
+                                    excluded=[target_instrument.base_asset], max_hops=MAX_CHAIN_LENGTH - 1,
+                                    snapshot=snapshot)
+        if route is None:
+            return None
+        return route.conversion_chain + [target_instrument.symbol]
+
+    def __fill_price(self, symbol: str, quantity: float, order_side: Market) -> Optional[float]:
+        """
+        :return: Average price of filling the quantity from the depth cache, None if its book cannot tell
+        """
+        cost = self.depth_cache.cost_to_fill(symbol, quantity, order_side)
+        return None if cost is None else cost[0]
+
+    def __most_liquid_chain(self,
+                            chains: List[ConversionChainType],
+                            liquidity: Optional[pd.Series] = None) -> ConversionChainType:
         """
         Attempts to identify the most liquid conversion chain by taking the average liquidity along the chain
         and returning the chain with the lowest.
 
         :param chains: Conversion chains
+        :param liquidity: Liquidity of the chains' symbols from a RealTimeQuoter
         :return: Best chain
         """
-        # TODO: Mock for historical quoter
         best_chain_index = -1
         lowest_liquidity = 0
+        symbols = list(dict.fromkeys(symbol for chain in chains for symbol in chain[:-1]))
+        liquidities = dict(zip(symbols, self.__get_liquidities(symbols, liquidity)))
         for i, chain in enumerate(chains):
             liquidity_total = 0
             for symbol in chain[:-1]:
-                liquidity = self.quoter.get_liquidity(symbol, fall_back_to_api=True)
-                liquidity_total += liquidity
+                liquidity_total += liquidities[symbol]
             liquidity_avg = liquidity_total / len(chain[:-1])
             if not lowest_liquidity or liquidity_avg < lowest_liquidity:
                 lowest_liquidity = liquidity_avg
                 best_chain_index = i
         return chains[best_chain_index]
 
-    def __most_liquid_instrument_for_asset(self, asset: str) -> Instrument:
+    def __most_liquid_instrument_for_asset(self, asset: str, liquidity: Optional[pd.Series] = None) -> Instrument:
         """
         Finds the most liquid pair for a particular asset
 
         :param asset: Target asset
+        :param liquidity: Liquidity of the asset's pairs from a RealTimeQuoter
         :return: Most liquid Instrument
         :raises DataClassException: If asset unknown, if instrument could not be identified
         """
@@ -259,9 +368,35 @@ class ConversionChain:
         if not valid_pairs:
             raise DataClassException(f"Could not identify liquid instrument for asset {asset}")
 
-        liquidities = [self.quoter.get_liquidity(pair, fall_back_to_api=True) for pair in valid_pairs]
-        min_index = liquidities.index(min(liquidities))
-        return valid_pairs[min_index]
+        liquidities = self.__get_liquidities([pair.symbol for pair in valid_pairs], liquidity)
+        return valid_pairs[int(np.argmin(liquidities))]
+
+    def __get_liquidities(self, symbols: List[str], liquidity: Optional[pd.Series] = None) -> np.ndarray:
+        """
+        Top of book liquidity from the depth cache where its book of the symbol is synced, else from the quoter.
+        A RealTimeQuoter answers for all the other symbols with one liquidity snapshot.
+
+        :param symbols: Symbols, without duplicates
+        :param liquidity: Liquidity of the symbols from a RealTimeQuoter, from a snapshot taken if not given
+        :return: The liquidity of each symbol, lower is better, infinite where a RealTimeQuoter has no quote
+        """
+        liquidities = np.full(len(symbols), np.nan)
+        unsynced: List[int] = []
+        for i, symbol in enumerate(symbols):
+            depth_liquidity = self.depth_cache.get_liquidity(symbol) if self.depth_cache is not None else None
+            if depth_liquidity is not None:
+                liquidities[i] = depth_liquidity
+            else:
+                unsynced.append(i)
+        if unsynced and isinstance(self.quoter, RealTimeQuoter):
+            unsynced_symbols = [symbols[i] for i in unsynced]
+            if liquidity is None:
+                liquidity = self.quoter.liquidity_snapshot(unsynced_symbols)[Column.LIQUIDITY]
+            liquidities[unsynced] = liquidity.reindex(unsynced_symbols).to_numpy()
+        else:
+            for i in unsynced:
+                liquidities[i] = self.quoter.get_liquidity(symbols[i], fall_back_to_api=True)
+        return np.where(np.isnan(liquidities), np.inf, liquidities)
 
     @staticmethod
     def verify_start_asset(start_asset: str, all_instruments: List[Instrument]) -> bool:
@@ -308,18 +443,10 @@ class ConversionChain:
         :param end_asset: Target asset
         :return: The instrument, or None
         """
-        try:
-            instrument = get_instrument(self.instruments, start_asset + end_asset)
-            return instrument
-        except UtilsException:
-            pass
-
-        try:
-            instrument = get_instrument(self.instruments, end_asset + start_asset)
-            return instrument
-        except UtilsException:
-            pass
-        return None
+        instrument = self.__instruments_by_symbol.get(start_asset + end_asset)
+        if instrument is None:
+            instrument = self.__instruments_by_symbol.get(end_asset + start_asset)
+        return instrument
 
     def convert(self,
                 start: str,
@@ -341,64 +468,269 @@ class ConversionChain:
         :return: The converted amount
         :raises DataClassException:
         """
-        if not ConversionChain.verify_start_asset(start, self.instruments):
+        if start not in self.conversion_graph:
             #raise DataClassException(f"Asset {start} is not valid")
             return 0.0
 
         if not amount:
             return 0.0
 
+        # A cached rate is served as long as the quoter reports the same sequence for each quote it was computed from
+        real_time = isinstance(self.quoter, RealTimeQuoter)
+        # Picking by liquidity may take another chain, and rate, than taking the first
+        key = (start, end, order_type, bool(self.highest_liquidity_chain))
+        if real_time and (cached := self.__rates.get(key)) is not None:
+            if all(self.quoter.quote_sequence(symbol) == sequence for symbol, sequence in cached[1]):
+                return cached[0] * amount
+
         potential_single_instrument = self.__get_asset_pair(start, end)
         if potential_single_instrument:
-            market_price = self.__get_market_price(potential_single_instrument.symbol, order_type=order_type, fall_back_to_api=fall_back_to_api)
-            if potential_single_instrument.quote_asset == end:
-                return market_price * amount
+            symbol = potential_single_instrument.symbol
+            sequences = self.__quote_sequences([symbol]) if real_time else None
+            if real_time:
+                quote = self.__get_quotes([symbol], fall_back_to_api=fall_back_to_api)[0]
+                market_price = self.__get_quote_price(quote, symbol, order_type=order_type)
             else:
-                return amount / market_price
-
-        shortest_path = find_shortest_path(self.graph, start, end)
-        if shortest_path:
+                market_price = self.__get_market_price(symbol, order_type=order_type, fall_back_to_api=fall_back_to_api)
+            rate = market_price if potential_single_instrument.quote_asset == end else 1 / market_price
+            if sequences is not None:
+                self.__rates[key] = (rate, sequences)
+            return rate * amount
+
+        # Forward chains (buys only) are preferred, then the shortest chain mixing buys and sells
+        paths = [path] if (path := self.conversion_graph.shortest_path(start, end, buy_only=True)) else \
+            self.conversion_graph.shortest_paths(start, end)
+        if not paths:
+            raise DataClassException(f"Error, could not find any chains for {start} to {end}!")
+        chains = {}
+        for path in paths:
+            chain, execution_chain = self.conversion_graph.conversion_chain(path)
+            chains[tuple(chain)] = execution_chain
+        # A chain picked by liquidity stays valid only while none of the candidates' quotes changed
+        symbols = list(dict.fromkeys(symbol for chain in chains for symbol in chain))
+        sequences = self.__quote_sequences(symbols) if real_time else None
+        # One read of every candidate's symbols both picks the chain and prices it
+        quotes = self.__get_quotes(symbols, fall_back_to_api=fall_back_to_api) if real_time else None
+        if len(chains) > 1 and self.highest_liquidity_chain:
+            liquidity = pd.Series((quotes[:, 1] - quotes[:, 0]) / quotes[:, 1], index=symbols) if real_time else None
+            chain = self.__most_liquid_chain([list(chain) for chain in chains.keys()], liquidity)
+        else:
+            chain = next(iter(chains.keys()))
 
-            shortest_chain = path_to_conversion_chain(shortest_path)
-            rate = 1
-            for symbol in shortest_chain:
+        positions = {symbol: i for i, symbol in enumerate(symbols)}
+        rate = 1
+        for symbol, side in zip(chain, chains[tuple(chain)]):
+            if real_time:
+                market_price = self.__get_quote_price(quotes[positions[symbol]], symbol, order_type=order_type)
+            else:
                 market_price = self.__get_market_price(symbol, order_type=order_type, fall_back_to_api=fall_back_to_api)
+            if side == Market.BUY:
                 rate = (rate / market_price)
-        else:
-            all_pairs_with: List[Instrument] = self.get_all_pairs_with(end)
-            chains = []
-            for instrument in all_pairs_with:
-                for bichain in bidirectional_conversion_chain(self.graph, start, instrument):
-                    chains.append(bichain)
-
-            chains = shortest_conversion_chains(chains)
-
-            if not len(chains):
-                raise DataClassException(f"Error, could not find any chains for {start} to {end}!")
-            if len(chains) == 1:
-                chain = chains[0]
             else:
-                if self.highest_liquidity_chain:
-                    chain = self.__most_liquid_chain(chains)
-                else:
-                    chain = chains[0]
-
-            rate = 1
-            next_conversion: str = instrument.base_asset if instrument.base_asset != start else instrument.quote_asset
-
-            for symbol in chain:
-                instrument = filter_instruments(self.instruments, symbol)[0]
-                market_price = self.__get_market_price(instrument, order_type=order_type,
-                                                       fall_back_to_api=fall_back_to_api)
-                if instrument.base_asset == next_conversion:
-                    rate = (rate / market_price)
-                    next_conversion = instrument.quote_asset
-                else:
-                    rate = market_price * rate
-                    next_conversion = instrument.base_asset
+                rate = market_price * rate
 
+        if sequences is not None:
+            self.__rates[key] = (rate, sequences)
         return rate * amount
 
+    def conversion_rates(self, target: str, order_type: Optional[Market] = None) -> pd.Series:
+        """
+        Rates of every asset into the target, in one pass over the quotes: each asset's rate is the rate of the
+        edge to its next asset towards the target times that asset's rate. The chains are those `convert` takes,
+        except that ties between chains are not broken by liquidity.
+
+        :param target: The asset to convert into
+        :param order_type: Market order type. Dictates if we take the Bid or the Ask, defaults to the midpoint
+        :return: Series of the rate of each asset reaching the target, NaN where a quote on its chain is missing
+        :raises DataClassException: If the target has no pairs or the order type is invalid
+        """
+        positions, rates = self.__conversion_rates(target, order_type)
+        return pd.Series(rates, index=list(positions.keys()))
+
+    def value_in(self,
+                 balances: Dict[str, float],
+                 denomination: str,
+                 order_type: Optional[Market] = None,
+                 fall_back_to_api: Optional[bool] = True) -> float:
+        """
+        Total value of balances of many assets, the dot product of the balances and `conversion_rates`. Assets
+        whose rate is missing a quote are converted one by one.
+
+        :param balances: Amount of each asset
+        :param denomination: The asset to value the balances in
+        :param order_type: Market order type. Dictates if we take the Bid or the Ask
+        :param fall_back_to_api: For quoter, if we should fall back to the api for assets without real time quotes
+        :return: The total value
+        :raises DataClassException: If the denomination has no pairs
+        """
+        assets = [asset for asset, amount in balances.items() if amount]
+        if not assets:
+            return 0.0
+        positions, all_rates = self.__conversion_rates(denomination, order_type)
+        rates = np.append(all_rates, np.nan)[[positions.get(asset, -1) for asset in assets]]
+        amounts = np.array([balances[asset] for asset in assets], dtype=np.float64)
+        quoted = ~np.isnan(rates)
+        value = float(np.dot(rates[quoted], amounts[quoted]))
+        for i in np.flatnonzero(~quoted):
+            value += self.convert(assets[i], denomination, amount=float(amounts[i]), order_type=order_type,
+                                  fall_back_to_api=fall_back_to_api)
+        return value
+
+    def __quote_sequences(self, symbols: List[str]) -> Optional[Tuple[Tuple[str, int], ...]]:
+        """
+        :param symbols: Symbols a rate is about to be computed from
+        :return: The quoter's sequence of each, None if any is missing a fresh quote and the rate cannot be cached
+        """
+        sequences = tuple((symbol, self.quoter.quote_sequence(symbol)) for symbol in symbols)
+        if any(sequence is None for symbol, sequence in sequences):
+            return None
+        return sequences
+
+    def __conversion_rates(self, target: str, order_type: Optional[Market] = None) -> Tuple[Dict[str, int], np.ndarray]:
+        """
+        Rates of every asset into the target, see `conversion_rates`
+
+        :param target: The asset to convert into
+        :param order_type: The order type
+        :return: Tuple of (position of each asset, rates)
+        :raises DataClassException: If the target has no pairs or the order type is invalid
+        """
+        if target not in self.conversion_graph:
+            raise DataClassException(f"Asset {target} is not valid")
+        if order_type and order_type != Market.BUY and order_type != Market.SELL:
+            raise DataClassException(f"{order_type} is not a valid order type of BUY or SELL")
+        rate_plan = self.__rate_plans.get(target)
+        if rate_plan is None:
+            rate_plan = self.__rate_plan(target)
+        positions, symbols, mixed_tree, buy_tree, overridden, overriding = rate_plan
+        prices = self.__get_market_prices(symbols, order_type)
+        rates = self.__walk_rate_tree(mixed_tree, prices)
+        # As in `convert`, a buys only chain wins over mixed ones unless a single pair converts directly
+        rates[overridden] = self.__walk_rate_tree(buy_tree, prices)[overriding]
+        return positions, rates
+
+    def __rate_plan(self, target: str) -> RatePlanType:
+        """
+        The shortest path trees to the target as arrays, cached per target
+
+        :param target: Target asset
+        :return: Tuple of (position of each asset, the target first, symbols to quote, mixed tree, buys only tree,
+                 positions of the assets whose mixed rate the buys only one replaces, their positions in the buy tree)
+        """
+        mixed_hops, mixed_next_hops = self.conversion_graph.shortest_path_tree(target)
+        buy_hops, buy_next_hops = self.conversion_graph.shortest_path_tree(target, buy_only=True)
+        symbols = list(dict.fromkeys(self.conversion_graph.edge(asset, next_hops[asset])[0]
+                                     for next_hops in [mixed_next_hops, buy_next_hops] for asset in next_hops))
+        symbol_positions = {symbol: i for i, symbol in enumerate(symbols)}
+        positions = {asset: i for i, asset in enumerate(mixed_hops.keys())}
+        buy_assets = list(buy_hops.keys())
+        replaced = [i for i, asset in enumerate(buy_assets) if mixed_hops[asset] > 1]
+        rate_plan = (positions, symbols,
+                     self.__rate_tree(mixed_hops, mixed_next_hops, symbol_positions),
+                     self.__rate_tree(buy_hops, buy_next_hops, symbol_positions),
+                     np.array([positions[buy_assets[i]] for i in replaced], dtype=np.int64),
+                     np.array(replaced, dtype=np.int64))
+        self.__rate_plans[target] = rate_plan
+        return rate_plan
+
+    def __rate_tree(self,
+                    hops: Dict[str, int],
+                    next_hops: Dict[str, str],
+                    symbol_positions: Dict[str, int]) -> RateTreeType:
+        """
+        :param hops: Hops to the target of every asset reaching it, in breadth first order
+        :param next_hops: Next asset towards the target
+        :param symbol_positions: Position of each symbol in the prices the tree will be walked with
+        :return: Tuple of (position of each asset's edge symbol in the prices, position of each asset's next asset,
+                 whether each edge is a buy, position where each number of hops starts), the target excluded
+        """
+        assets = list(hops.keys())
+        positions = {asset: i for i, asset in enumerate(assets)}
+        edges = [self.conversion_graph.edge(asset, next_hops[asset]) for asset in assets[1:]]
+        price_positions = np.array([symbol_positions[symbol] for symbol, side in edges], dtype=np.int64)
+        next_positions = np.array([positions[next_hops[asset]] for asset in assets[1:]], dtype=np.int64)
+        buys = np.array([side == Market.BUY for symbol, side in edges], dtype=bool)
+        levels = [i for i in range(1, len(assets)) if hops[assets[i]] != hops[assets[i - 1]]] + [len(assets)]
+        return price_positions, next_positions, buys, levels
+
+    @staticmethod
+    def __walk_rate_tree(rate_tree: RateTreeType, prices: np.ndarray) -> np.ndarray:
+        """
+        Rates of every asset of a tree, one vectorized step per number of hops
+
+        :param rate_tree: A tree from `__rate_tree`
+        :param prices: Prices of the symbols
+        :return: Rate of each asset of the tree into its target, the target first
+        """
+        price_positions, next_positions, buys, levels = rate_tree
+        edge_prices = prices[price_positions]
+        # Buying converts the quote asset into the base asset at 1 / price, selling back at price
+        factors = np.where(buys, 1 / edge_prices, edge_prices)
+        rates = np.empty(len(price_positions) + 1)
+        rates[0] = 1.0
+        for start, stop in zip(levels, levels[1:]):
+            rates[start:stop] = factors[start - 1:stop - 1] * rates[next_positions[start - 1:stop - 1]]
+        return rates
+
+    def __get_market_prices(self, symbols: List[str], order_type: Optional[Market] = None) -> np.ndarray:
+        """
+        Market prices of many symbols, in one read of the quote book for a RealTimeQuoter
+
+        :param symbols: Symbols
+        :param order_type: The order type
+        :return: The market prices, NaN where the quoter has no quote
+        """
+        if isinstance(self.quoter, RealTimeQuoter):
+            quotes = self.quoter.get_quotes(symbols)
+            if order_type == Market.BUY:
+                return quotes[:, 0]
+            if order_type == Market.SELL:
+                return quotes[:, 1]
+            return (quotes[:, 0] + quotes[:, 1]) / 2
+        prices = np.full(len(symbols), np.nan)
+        for i, symbol in enumerate(symbols):
+            try:
+                prices[i] = self.__get_market_price(symbol, order_type=order_type)
+            except QuoterException:
+                pass
+        return prices
+
+    def __get_quotes(self, symbols: List[str], fall_back_to_api: Optional[bool] = True) -> np.ndarray:
+        """
+        Quotes of many symbols from one read of the quote book. If the websocket has not quoted them all, one
+        liquidity snapshot fills the rest, with at most one API request.
+
+        :param symbols: Symbols
+        :param fall_back_to_api: Whether to fetch the quotes the websocket does not have
+        :return: Array of rows starting with bid, ask, bid quantity and ask quantity, NaN where there is no quote
+        """
+        quotes = self.quoter.get_quotes(symbols)
+        if fall_back_to_api and np.isnan(quotes[:, 0]).any():
+            quotes = self.quoter.liquidity_snapshot(symbols).to_numpy()
+        return quotes
+
+    def __get_quote_price(self, quote: np.ndarray, symbol: str, order_type: Optional[Market] = None) -> float:
+        """
+        Market price of a symbol from its quote, as `__get_market_price` quotes it
+
+        :param quote: Bid, ask, bid quantity and ask quantity of the symbol
+        :param symbol: The symbol
+        :param order_type: The order type
+        :return: The market price
+        :raises DataClassException: If bad order type
+        :raises QuoterException: If there is no quote of the symbol
+        """
+        if order_type and order_type != Market.BUY and order_type != Market.SELL:
+            raise DataClassException(f"{order_type} is not a valid order type of BUY or SELL")
+        bid, ask = float(quote[0]), float(quote[1])
+        if np.isnan(bid) or np.isnan(ask):
+            raise QuoterException(f"No quote for {symbol}")
+        if order_type == Market.BUY:
+            return bid
+        if order_type == Market.SELL:
+            return ask
+        return round((bid + ask) / 2, self.__instruments_by_symbol[symbol].digits)
+
     def __get_market_price(self,
                            symbol_or_instrument: Union[str, Instrument],
                            order_type: Optional[Market] = None,
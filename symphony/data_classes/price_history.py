@@ -1,16 +1,34 @@
-from typing import List, Dict, Union
+from typing import List, Dict, Union, Optional, Tuple, Final
 from collections import OrderedDict
 from dataclasses import dataclass
-from symphony.enum import Timeframe
+from enum import Enum
+import tempfile
+import shutil
+import os
+from symphony.enum import Timeframe, Column
+from symphony.exceptions import DataClassException
 from .instrument import Instrument
 from copy import deepcopy
 from symphony.config import USE_MODIN
+import numpy as np
 
 if USE_MODIN:
     import modin.pandas as pd
 else:
     import pandas as pd
 
+# Column layout of jesse candle arrays
+JESSE_CANDLE_COLUMNS: Final[List[str]] = [Column.TIMESTAMP, Column.OPEN, Column.CLOSE, Column.HIGH, Column.LOW,
+                                          Column.VOLUME]
+# Columns a price history keeps regardless of the declared projection
+BASE_COLUMNS: Final[List[str]] = [Column.TIMESTAMP, Column.OPEN, Column.HIGH, Column.LOW, Column.CLOSE, Column.VOLUME]
+# Number of candle buffers to keep converted timestamps for
+NUMPY_TIMESTAMP_CACHE_SIZE: Final[int] = 64
+
+# Buffer address -> (first row, unix ms timestamps, datetime64[ns] timestamps)
+__numpy_timestamp_cache: OrderedDict[int, Tuple[int, np.ndarray, np.ndarray]] = OrderedDict()
+
+
 @dataclass
 class PriceHistory:
     """
@@ -32,6 +50,34 @@ class PriceHistory:
         self.timeframe: Timeframe = timeframe
         self.__internal_price_history_rep: OrderedDict[int, Dict[str, Union[float, pd.Timestamp]]] = {}
         self.price_history: pd.DataFrame = price_history
+        self.__projections: Dict[str, List[str]] = {}
+        # Spilled column to its file, in a directory of this instance removed once nothing is spilled
+        self.__spilled: Dict[str, str] = {}
+        self.__spill_dir: Optional[str] = None
+
+    def __del__(self):
+        self.__remove_spill_dir()
+
+    def __deepcopy__(self, memo: Dict) -> "PriceHistory":
+        """
+        Deep copy, with copies of the spilled columns' files of its own
+        """
+        price_history_copy = type(self).__new__(type(self))
+        memo[id(self)] = price_history_copy
+        for key, value in self.__dict__.items():
+            setattr(price_history_copy, key, deepcopy(value, memo))
+        price_history_copy.__spilled, price_history_copy.__spill_dir = {}, None
+        for column, path in self.__spilled.items():
+            shutil.copyfile(path, price_history_copy.__spill_path(column))
+        return price_history_copy
+
+    def __getstate__(self) -> Dict:
+        """
+        Spilled columns stay with this instance, an unpickled one must not remove their files
+        """
+        state = self.__dict__.copy()
+        state["_PriceHistory__spilled"], state["_PriceHistory__spill_dir"] = {}, None
+        return state
 
     @property
     def instrument(self) -> Instrument:
@@ -59,6 +105,188 @@ class PriceHistory:
         #self.__internal_price_history_rep = OrderedDict(price_history.to_dict("index"))
         self.__price_history = price_history
 
+    @staticmethod
+    def from_numpy_candles(candles: np.ndarray,
+                           instrument: Optional[Instrument] = None,
+                           timeframe: Optional[Timeframe] = None,
+                           columns: Optional[List[str]] = JESSE_CANDLE_COLUMNS
+                           ) -> "PriceHistory":
+        """
+        Wraps a (N x 6) numpy candle array (e.g. jesse's `self.candles`) as a PriceHistory without copying.
+        OHLCV columns are views into `candles`. Timestamps are converted once per candle buffer and cached, so
+        repeated calls on a growing or sliding window only convert the new rows.
+
+        :param candles: Numpy candle array, first column is UNIX ms timestamps
+        :param instrument: Optional instrument
+        :param timeframe: Optional timeframe
+        :param columns: Column layout of `candles`, defaults to jesse's layout
+        :return: The PriceHistory
+        :raises DataClassException: If the array is the wrong shape
+        """
+        price_history = PriceHistory(instrument=instrument, timeframe=timeframe)
+        price_history.extend_numpy_candles(candles, columns=columns)
+        return price_history
+
+    def extend_numpy_candles(self, candles: np.ndarray, columns: Optional[List[str]] = JESSE_CANDLE_COLUMNS) -> None:
+        """
+        Points this price history at the (usually grown) candle buffer. Only timestamps of rows not seen
+        before are converted; OHLCV columns are views into `candles`. Derived (indicator) columns are dropped,
+        as they need to be recalculated for the new bars anyway.
+
+        :param candles: Numpy candle array, first column is UNIX ms timestamps
+        :param columns: Column layout of `candles`, defaults to jesse's layout
+        :return: None
+        :raises DataClassException: If the array is the wrong shape
+        """
+        if candles.ndim != 2 or candles.shape[1] != len(columns):
+            raise DataClassException(f"Candles must be of shape (N, {len(columns)}), got {candles.shape}")
+        timestamp_position = columns.index(Column.TIMESTAMP)
+        timestamps = _numpy_candle_timestamps(candles, timestamp_position)
+        index = pd.DatetimeIndex(timestamps)
+
+        value_columns = [column for column in columns if column != Column.TIMESTAMP]
+        if timestamp_position == 0:
+            values = candles[:, 1:]
+        elif timestamp_position == len(columns) - 1:
+            values = candles[:, :-1]
+        else:
+            values = np.delete(candles, timestamp_position, axis=1)
+        df = pd.DataFrame(values, index=index, columns=value_columns, copy=False)
+        df.insert(0, Column.TIMESTAMP, timestamps)
+        self.price_history = df
+        return
+
+    @property
+    def projection(self) -> Optional[List[str]]:
+        """
+        Columns this price history needs to carry: the base OHLCV columns plus every column registered by
+        a consumer. None if no consumer has registered, in which case nothing is dropped.
+
+        :return: List of column names or None
+        """
+        if not self.__projections:
+            return None
+        projection: List[str] = list(BASE_COLUMNS)
+        for columns in self.__projections.values():
+            projection += [column for column in columns if column not in projection]
+        return projection
+
+    def register_columns(self, consumer: str, columns: List[Union[Enum, str]]) -> None:
+        """
+        Declares the columns a consumer (e.g. a signal or screener) reads from this price history.
+        Registering again for the same consumer replaces its columns.
+
+        :param consumer: Name of the consumer
+        :param columns: IndicatorRegistry members or column names
+        :return: None
+        """
+        self.__projections[consumer] = [column.value if isinstance(column, Enum) else column for column in columns]
+        return
+
+    def deregister_columns(self, consumer: str) -> None:
+        """
+        Removes a consumer's declared columns
+
+        :param consumer: Name of the consumer
+        :return: None
+        """
+        if consumer in self.__projections.keys():
+            del self.__projections[consumer]
+        return
+
+    def project(self, spill: Optional[bool] = False) -> List[str]:
+        """
+        Drops every column outside the declared projection, e.g. intermediate indicator columns
+        such as price flips once the setups have been calculated. Does nothing if no consumer registered.
+
+        :param spill: Spill the columns to disk instead of discarding them, see `restore_columns`
+        :return: The dropped columns
+        """
+        projection = self.projection
+        if projection is None:
+            return []
+        return self.drop_columns([column for column in self.price_history.columns if column not in projection],
+                                 spill=spill)
+
+    def drop_columns(self, columns: List[Union[Enum, str]], spill: Optional[bool] = False) -> List[str]:
+        """
+        Drops columns in place, optionally spilling them to a temporary file first
+
+        :param columns: IndicatorRegistry members or column names, missing columns are ignored
+        :param spill: Spill the columns to disk instead of discarding them
+        :return: The dropped columns
+        """
+        columns = [column.value if isinstance(column, Enum) else column for column in columns]
+        columns = [column for column in columns if column in self.price_history.columns]
+        if not columns:
+            return []
+        if spill:
+            for column in columns:
+                self.price_history[column].to_pickle(self.__spill_path(column))
+        self.price_history = self.price_history.drop(columns=columns)
+        return columns
+
+    def restore_columns(self, columns: Optional[List[Union[Enum, str]]] = None) -> List[str]:
+        """
+        Restores spilled columns. Bars appended since spilling are left as NaN.
+
+        :param columns: Columns to restore, defaults to all spilled columns
+        :return: The restored columns
+        :raises DataClassException: If a column was not spilled
+        """
+        if columns is None:
+            columns = list(self.__spilled.keys())
+        columns = [column.value if isinstance(column, Enum) else column for column in columns]
+        for column in columns:
+            if column not in self.__spilled.keys():
+                raise DataClassException(f"Column {column} was not spilled")
+            path = self.__spilled.pop(column)
+            self.price_history[column] = pd.read_pickle(path).reindex(self.price_history.index)
+            os.remove(path)
+        if not self.__spilled:
+            self.__remove_spill_dir()
+        return columns
+
+    def __spill_path(self, column: str) -> str:
+        """
+        Creates the file a column is spilled to, replacing the one of an earlier spill of it
+
+        :param column: Column name
+        :return: Path of the file
+        """
+        if column in self.__spilled:
+            os.remove(self.__spilled.pop(column))
+        if not self.__spill_dir:
+            self.__spill_dir = tempfile.mkdtemp(prefix="price_history_")
+        fd, path = tempfile.mkstemp(suffix=".pkl", dir=self.__spill_dir)
+        os.close(fd)
+        self.__spilled[column] = path
+        return path
+
+    def __remove_spill_dir(self) -> None:
+        """
+        Removes the spill directory and any files left in it
+
+        :return: None
+        """
+        spill_dir = getattr(self, "_PriceHistory__spill_dir", None)
+        if spill_dir:
+            shutil.rmtree(spill_dir, ignore_errors=True)
+            self.__spill_dir = None
+            self.__spilled = {}
+        return
+
+    def memory_usage(self, deep: Optional[bool] = True) -> int:
+        """
+        Bytes held by the price history's dataframe, index included
+
+        :param deep: Include memory of object (e.g. string) columns
+        :return: Bytes
+        """
+        if not isinstance(self.price_history, pd.DataFrame):
+            return 0
+        return int(self.price_history.memory_usage(index=True, deep=deep).sum())
+
     def append(self, bar: Dict[pd.Timestamp, Dict[str, float]]) -> None:
         """
         Append a bar to the price history. Holds bars internally as OrderedDicts and creates DataFrames
@@ -80,6 +308,69 @@ class PriceHistory:
         return
 
 
+def _numpy_candle_timestamps(candles: np.ndarray, timestamp_position: int = 0) -> np.ndarray:
+    """
+    Returns the datetime64[ns] timestamps of a numpy candle array. Conversions are cached per underlying
+    buffer, keyed on the buffer address, and only rows outside the cached range are converted.
+
+    :param candles: Numpy candle array
+    :param timestamp_position: Column of the UNIX ms timestamps
+    :return: Timestamps, possibly a view into the cache
+    """
+    base = candles
+    while isinstance(base.base, np.ndarray):
+        base = base.base
+    address = base.__array_interface__["data"][0]
+    row_bytes = candles.strides[0]
+    offset = (candles.__array_interface__["data"][0] - address) // row_bytes if row_bytes > 0 else 0
+    unix_ms = candles[:, timestamp_position]
+    num_rows = len(unix_ms)
+
+    def convert(raw: np.ndarray) -> np.ndarray:
+        return raw.astype(np.int64).astype("datetime64[ms]").astype("datetime64[ns]")
+
+    cache = __numpy_timestamp_cache
+    if address in cache:
+        start, cached_ms, cached_dt = cache[address]
+        begin = offset - start
+        end = begin + num_rows
+        # Validate against the cached raw values in case the buffer was reused
+        if 0 <= begin <= len(cached_ms) and num_rows and \
+                (begin == len(cached_ms) or cached_ms[begin] == unix_ms[0]):
+            if end <= len(cached_ms):
+                if cached_ms[end - 1] == unix_ms[-1]:
+                    cache.move_to_end(address)
+                    return cached_dt[begin:end]
+            else:
+                overlap = len(cached_ms) - begin
+                if not overlap or cached_ms[-1] == unix_ms[overlap - 1]:
+                    new_ms = np.array(unix_ms[overlap:], dtype=np.float64)
+                    cached_ms = np.concatenate([cached_ms, new_ms])
+                    cached_dt = np.concatenate([cached_dt, convert(new_ms)])
+                    cache[address] = (start, cached_ms, cached_dt)
+                    cache.move_to_end(address)
+                    return cached_dt[begin:end]
+
+    cached_ms = np.array(unix_ms, dtype=np.float64)
+    cached_dt = convert(cached_ms)
+    cache[address] = (offset, cached_ms, cached_dt)
+    cache.move_to_end(address)
+    while len(cache) > NUMPY_TIMESTAMP_CACHE_SIZE:
+        cache.popitem(last=False)
+    return cached_dt
+
+
+def price_histories_memory_usage(price_histories: List[PriceHistory], deep: Optional[bool] = True) -> int:
+    """
+    Total bytes held by a list of price histories
+
+    :param price_histories: List of price histories
+    :param deep: Include memory of object (e.g. string) columns
+    :return: Bytes
+    """
+    return sum(price_history.memory_usage(deep=deep) for price_history in price_histories if price_history is not None)
+
+
 def copy_price_history(price_history: PriceHistory) -> PriceHistory:
     """
     Returns a deep copy of the price history
@@ -0,0 +1,363 @@
+from typing import List, Dict, Optional, Callable, Any, Final
+from dataclasses import dataclass
+from multiprocessing import shared_memory, cpu_count
+import concurrent.futures
+import pickle
+import sys
+import gc
+import logging
+from symphony.enum import Timeframe
+from symphony.exceptions import DataClassException
+from .instrument import Instrument
+from .price_history import PriceHistory
+from symphony.config import USE_MODIN
+import numpy as np
+
+if USE_MODIN:
+    import modin.pandas as pd
+else:
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Bytes reserved at the start of a segment for the pickled column metadata
+SHARED_METADATA_BYTES: Final[int] = 64 * 1024
+# Number of free column slots reserved for indicators written back by workers
+SHARED_SPARE_COLUMNS: Final[int] = 64
+
+# Column kinds. Float columns are shared as-is, other numeric columns are stored as raw 64 bit integers and
+# anything else (e.g. strings) as integer codes into a list of categories kept in the metadata
+_FLOAT: Final[str] = "float"
+_INTEGER: Final[str] = "integer"
+_CODES: Final[str] = "codes"
+
+
+@dataclass(frozen=True)
+class SharedPriceHistoryDescriptor:
+    """
+    Small picklable handle to a price history held in shared memory. Pass this to worker processes
+    instead of the PriceHistory itself.
+    """
+    name: str
+    num_rows: int
+    column_capacity: int
+    metadata_bytes: int
+    instrument: Optional[Instrument] = None
+    timeframe: Optional[Timeframe] = None
+
+
+class SharedPriceHistory:
+    """
+    PriceHistory backed by a `multiprocessing.shared_memory` segment. The owning process creates the segment
+    with `create`, worker processes `attach` to it with the descriptor and get a PriceHistory whose float
+    columns are views into the segment. Indicator columns added by workers are written back in place with
+    `write_back`, into the spare column slots reserved at creation.
+
+    Segment layout:
+        [metadata (pickled, `metadata_bytes`)][index (int64 ns, num_rows)][values (float64, column_capacity x num_rows)]
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, descriptor: SharedPriceHistoryDescriptor, owner: bool):
+        self.__shm: shared_memory.SharedMemory = shm
+        self.__descriptor: SharedPriceHistoryDescriptor = descriptor
+        self.__owner: bool = owner
+        index_offset = descriptor.metadata_bytes
+        values_offset = index_offset + descriptor.num_rows * 8
+        self.__index: np.ndarray = np.ndarray((descriptor.num_rows,), dtype=np.int64, buffer=shm.buf,
+                                              offset=index_offset)
+        self.__values: np.ndarray = np.ndarray((descriptor.column_capacity, descriptor.num_rows), dtype=np.float64,
+                                               buffer=shm.buf, offset=values_offset)
+
+    @property
+    def descriptor(self) -> SharedPriceHistoryDescriptor:
+        return self.__descriptor
+
+    @property
+    def columns(self) -> List[str]:
+        return [column["name"] for column in self.__read_metadata()["columns"]]
+
+    @staticmethod
+    def create(price_history: PriceHistory,
+               spare_columns: Optional[int] = SHARED_SPARE_COLUMNS,
+               metadata_bytes: Optional[int] = SHARED_METADATA_BYTES) -> "SharedPriceHistory":
+        """
+        Copies a price history into a new shared memory segment. The caller owns the segment and
+        must `close` and `unlink` it.
+
+        :param price_history: The price history, must have a DatetimeIndex
+        :param spare_columns: Number of free column slots for indicators written back by workers
+        :param metadata_bytes: Bytes reserved for column metadata
+        :return: The SharedPriceHistory
+        :raises DataClassException: If the price history has no DatetimeIndex
+        """
+        df = price_history.price_history
+        if not isinstance(df, pd.DataFrame) or not isinstance(df.index, pd.DatetimeIndex):
+            raise DataClassException(f"Price history must be a DataFrame with a DatetimeIndex to be shared")
+        metadata_bytes = -(-metadata_bytes // 8) * 8
+        num_rows = len(df)
+        column_capacity = len(df.columns) + spare_columns
+        size = metadata_bytes + num_rows * 8 * (1 + column_capacity)
+        shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        descriptor = SharedPriceHistoryDescriptor(
+            name=shm.name,
+            num_rows=num_rows,
+            column_capacity=column_capacity,
+            metadata_bytes=metadata_bytes,
+            instrument=price_history.instrument,
+            timeframe=price_history.timeframe
+        )
+        shared = SharedPriceHistory(shm, descriptor, owner=True)
+        try:
+            index = df.index.tz_convert("UTC") if df.index.tz is not None else df.index
+            shared.__index[:] = index.asi8
+            shared.__write_metadata({
+                "index_name": df.index.name,
+                "index_tz": df.index.tz,
+                "columns": []
+            })
+            shared.write_back(price_history)
+        except Exception:
+            shared.close()
+            shared.unlink()
+            raise
+        return shared
+
+    @staticmethod
+    def attach(descriptor: SharedPriceHistoryDescriptor) -> "SharedPriceHistory":
+        """
+        Attaches to an existing segment, e.g. in a worker process
+
+        :param descriptor: Descriptor from the owning process
+        :return: The SharedPriceHistory
+        """
+        if sys.version_info >= (3, 13):
+            shm = shared_memory.SharedMemory(name=descriptor.name, track=False)
+        else:
+            shm = shared_memory.SharedMemory(name=descriptor.name)
+        return SharedPriceHistory(shm, descriptor, owner=False)
+
+    @property
+    def price_history(self) -> PriceHistory:
+        """
+        Zero-copy PriceHistory over the segment. Float columns are views, so in place modification is
+        visible to every process. New or replaced columns only reach the segment through `write_back`.
+
+        :return: The PriceHistory
+        """
+        return PriceHistory(
+            instrument=self.__descriptor.instrument,
+            timeframe=self.__descriptor.timeframe,
+            price_history=self.__build_dataframe(copy=False)
+        )
+
+    def to_price_history(self) -> PriceHistory:
+        """
+        Copies the segment out to a regular PriceHistory, e.g. before the segment is unlinked
+
+        :return: The PriceHistory
+        """
+        return PriceHistory(
+            instrument=self.__descriptor.instrument,
+            timeframe=self.__descriptor.timeframe,
+            price_history=self.__build_dataframe(copy=True)
+        )
+
+    def write_back(self, price_history: PriceHistory) -> List[str]:
+        """
+        Writes the columns of `price_history` into the segment. Columns that are still views into the
+        segment are skipped, new columns are assigned a spare slot.
+
+        :param price_history: Price history with the same rows as the segment
+        :return: Names of the columns written
+        :raises DataClassException: If the rows do not match or the segment is out of column slots
+        """
+        df = price_history.price_history
+        if len(df) != self.__descriptor.num_rows:
+            raise DataClassException(f"Price history has {len(df)} rows, shared segment has "
+                                     f"{self.__descriptor.num_rows}")
+        metadata = self.__read_metadata()
+        slots: Dict[str, int] = {column["name"]: slot for slot, column in enumerate(metadata["columns"])}
+        written: List[str] = []
+        for name in df.columns:
+            values = df[name].values
+            slot = slots.get(name)
+            if slot is not None and metadata["columns"][slot]["kind"] == _FLOAT and \
+                    isinstance(values, np.ndarray) and np.shares_memory(values, self.__values[slot]):
+                continue
+            if slot is None:
+                slot = len(metadata["columns"])
+                if slot >= self.__descriptor.column_capacity:
+                    raise DataClassException(f"No spare column slots left for {name}, "
+                                             f"capacity: {self.__descriptor.column_capacity}")
+                metadata["columns"].append({"name": name})
+                slots[name] = slot
+            metadata["columns"][slot].update(self.__encode(df[name], self.__values[slot]))
+            metadata["columns"][slot]["name"] = name
+            written.append(name)
+        if written:
+            self.__write_metadata(metadata)
+        return written
+
+    def close(self) -> None:
+        """
+        Closes this process' view of the segment. Views handed out by `price_history` must not be used after.
+
+        :return: None
+        """
+        self.__index = None
+        self.__values = None
+        try:
+            self.__shm.close()
+        except BufferError:
+            # DataFrames still holding views, pandas keeps some reference cycles around
+            gc.collect()
+            try:
+                self.__shm.close()
+            except BufferError:
+                logger.debug(f"Views into shared segment {self.__descriptor.name} still alive, leaving it mapped")
+
+    def unlink(self) -> None:
+        """
+        Frees the segment. Only the owner should call this.
+
+        :return: None
+        """
+        if self.__owner:
+            self.__shm.unlink()
+
+    def __enter__(self) -> "SharedPriceHistory":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        self.unlink()
+
+    @staticmethod
+    def __encode(values: pd.Series, slot: np.ndarray) -> Dict[str, Any]:
+        if isinstance(values.dtype, pd.DatetimeTZDtype):
+            slot.view(np.int64)[:] = pd.DatetimeIndex(values).asi8
+            return {"kind": _INTEGER, "dtype": values.dtype, "categories": None}
+        values = values.values
+        if isinstance(values, np.ndarray) and values.dtype.kind == "f":
+            slot[:] = values
+            return {"kind": _FLOAT, "dtype": values.dtype, "categories": None}
+        if isinstance(values, np.ndarray) and values.dtype.kind in "iubMm":
+            slot.view(np.int64)[:] = values.view(np.int64) if values.dtype.kind in "Mm" else values
+            return {"kind": _INTEGER, "dtype": values.dtype, "categories": None}
+        codes, categories = pd.factorize(values)
+        slot.view(np.int64)[:] = codes
+        return {"kind": _CODES, "dtype": None, "categories": list(categories)}
+
+    @staticmethod
+    def __decode(column: Dict[str, Any], slot: np.ndarray, copy: bool) -> Any:
+        kind, dtype = column["kind"], column["dtype"]
+        if kind == _FLOAT:
+            return slot.astype(dtype) if copy or dtype != np.float64 else slot
+        raw = slot.view(np.int64)
+        if kind == _CODES:
+            return pd.Categorical.from_codes(raw, categories=column["categories"]).astype(object)
+        if isinstance(dtype, pd.DatetimeTZDtype):
+            return pd.DatetimeIndex(raw.view("datetime64[ns]")).tz_localize("UTC").tz_convert(dtype.tz)
+        if dtype.kind in "Mm":
+            return raw.view(dtype).copy()
+        return raw.astype(dtype)
+
+    def __build_dataframe(self, copy: bool) -> pd.DataFrame:
+        metadata = self.__read_metadata()
+        index = pd.DatetimeIndex(self.__index.view("datetime64[ns]"), name=metadata["index_name"])
+        if metadata["index_tz"] is not None:
+            index = index.tz_localize("UTC").tz_convert(metadata["index_tz"])
+        columns = metadata["columns"]
+
+        # Runs of plain float64 columns are wrapped as one 2D block, which pandas keeps as a view
+        frames: List[pd.DataFrame] = []
+        start = 0
+        while start < len(columns):
+            end = start
+            while end < len(columns) and columns[end]["kind"] == _FLOAT and \
+                    columns[end]["dtype"] == np.float64:
+                end += 1
+            if end > start:
+                block = self.__values[start:end]
+                frames.append(pd.DataFrame(block.T.copy() if copy else block.T, index=index,
+                                           columns=[column["name"] for column in columns[start:end]], copy=False))
+                start = end
+            else:
+                frames.append(pd.DataFrame({columns[start]["name"]:
+                                            self.__decode(columns[start], self.__values[start], copy)},
+                                           index=index))
+                start += 1
+
+        if not frames:
+            return pd.DataFrame(index=index)
+        if len(frames) == 1:
+            return frames[0]
+        return pd.concat(frames, axis=1, copy=False)
+
+    def __read_metadata(self) -> Dict[str, Any]:
+        buf = self.__shm.buf
+        length = int.from_bytes(bytes(buf[:8]), "little")
+        return pickle.loads(bytes(buf[8:8 + length]))
+
+    def __write_metadata(self, metadata: Dict[str, Any]) -> None:
+        payload = pickle.dumps(metadata, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(payload) + 8 > self.__descriptor.metadata_bytes:
+            raise DataClassException(f"Shared price history metadata too large: {len(payload)} bytes, "
+                                     f"{self.__descriptor.metadata_bytes} reserved")
+        buf = self.__shm.buf
+        buf[8:8 + len(payload)] = payload
+        buf[:8] = len(payload).to_bytes(8, "little")
+        return
+
+
+def _apply_shared(func: Callable[[PriceHistory], Optional[PriceHistory]],
+                  descriptor: SharedPriceHistoryDescriptor) -> List[str]:
+    """
+    Worker side of `map_price_histories`
+
+    :param func: Function to apply
+    :param descriptor: Segment to apply it to
+    :return: Names of the columns written back
+    """
+    shared = SharedPriceHistory.attach(descriptor)
+    try:
+        price_history = shared.price_history
+        result = func(price_history)
+        written = shared.write_back(result if isinstance(result, PriceHistory) else price_history)
+        # Views must be released before the segment can be closed
+        del price_history, result
+        return written
+    finally:
+        shared.close()
+
+
+def map_price_histories(func: Callable[[PriceHistory], Optional[PriceHistory]],
+                        price_histories: List[PriceHistory],
+                        max_workers: Optional[int] = None,
+                        spare_columns: Optional[int] = SHARED_SPARE_COLUMNS
+                        ) -> List[PriceHistory]:
+    """
+    Applies `func` (e.g. a set of indicators) to each price history in a process pool. Price histories are
+    passed through shared memory rather than pickled, and columns added by `func` are written back in place.
+
+    :param func: Module level (picklable) function taking and optionally returning a PriceHistory
+    :param price_histories: List of price histories
+    :param max_workers: Number of processes, defaults to cpu count - 1
+    :param spare_columns: Column slots reserved per price history for new indicators
+    :return: New price histories, in the same order
+    """
+    if not max_workers:
+        max_workers = max(cpu_count() - 1, 1)
+    shared_histories: List[SharedPriceHistory] = []
+    try:
+        for price_history in price_histories:
+            shared_histories.append(SharedPriceHistory.create(price_history, spare_columns=spare_columns))
+        with concurrent.futures.ProcessPoolExecutor(max_workers) as executor:
+            futures = [executor.submit(_apply_shared, func, shared.descriptor) for shared in shared_histories]
+            for future in futures:
+                future.result()
+        return [shared.to_price_history() for shared in shared_histories]
+    finally:
+        for shared in shared_histories:
+            shared.close()
+            shared.unlink()
@@ -1063,8 +1063,15 @@ class BinanceTrader(ExchangeTraderABC):
         asset_amount_already_present: float = 0.0
         already_present_balances: List[List[Union[AccountType, str, float]]] = []
 
+        # Rates of every asset into the target from one pass over the quotes, missing ones are converted one by one
+        conversion_rates = self.conversion_chain.conversion_rates(target_asset).dropna() \
+            if not return_already_present_balances and return_converted_balances else None
+
         def get_value(val_asset, val_target_asset, val_asset_balance) -> float:
             if not return_already_present_balances and return_converted_balances:
+                rate = conversion_rates.get(val_asset) if val_target_asset == target_asset else None
+                if rate is not None:
+                    return rate * val_asset_balance
                 return self.conversion_chain.convert(val_asset, val_target_asset, amount=val_asset_balance)
             if not return_converted_balances:
                 return val_asset_balance
@@ -1,9 +1,12 @@
 from symphony.parser import ParserBaseClass
+from symphony.parser.parser_base_class import parse_kline_rows
 from symphony.exceptions import ParserClassException
 from symphony.utils.time import to_unix_time
 from symphony.abc import ParserABC
 from symphony.enum import Column
-from typing import List, Dict
+from typing import List, Dict, Union
+from functools import lru_cache
+import numpy as np
 from symphony.config import USE_MODIN
 if USE_MODIN:
     import modin.pandas as pd
@@ -11,6 +14,34 @@ else:
     import pandas as pd
 
 
+# Fields of a kline row returned by the REST API
+BINANCE_KLINE_COLUMNS = [
+    "timestamp",
+    "open",
+    "high",
+    "low",
+    "close",
+    "volume",
+    "closetime",
+    "quote_asset_volume",
+    "num_trades",
+    "taker_buy_base",
+    "take_buy_quote",
+    "ignore"
+]
+
+
+@lru_cache(maxsize=1024)
+def _utc_timestamp(unix_ms: int) -> pd.Timestamp:
+    """
+    Every update of a bar carries the same open time, so its Timestamp is only created once
+
+    :param unix_ms: UNIX ms
+    :return: UTC Timestamp
+    """
+    return pd.Timestamp(unix_ms, unit='ms', tz='UTC')
+
+
 class BinanceParser(ParserABC, ParserBaseClass):
 
     def __init__(self):
@@ -19,42 +50,19 @@ class BinanceParser(ParserABC, ParserBaseClass):
     #TODO: Accept mapping of response column to Column
     @staticmethod
     def parse(
-              binance_client_response: List[List],
+              binance_client_response: Union[List[List], np.ndarray],
               columns_to_keep: List[str] =["timestamp", "open", "high", "low", "close", "volume"]
               ) -> pd.DataFrame:
         """
-        Parses the response from the binance client
+        Parses the response from the binance client. Prices arrive as strings and are decoded straight into
+        float64, times into UTC datetimes, `num_trades` into int64. Columns not kept are never decoded.
 
-        :param binance_client_response: (`List[List]`) Raw response from binance client
+        :param binance_client_response: (`List[List]`) Raw response from binance client, or a numpy array of it
         :param columns_to_keep: (`List[str]`) Columns we are interested in
         :return:
         """
-        columns = [
-            "timestamp",
-            "open",
-            "high",
-            "low",
-            "close",
-            "volume",
-            "closetime",
-            "quote_asset_volume",
-            "num_trades",
-            "taker_buy_base",
-            "take_buy_quote",
-            "ignore"
-        ]
-        df = pd.DataFrame(binance_client_response, columns=columns)
-        # Convert UNIX time to datetime and set as index
-        df[Column.TIMESTAMP] = pd.to_datetime(df["timestamp"], unit='ms', utc=True)
-        df["closetime"] = pd.to_datetime(df["closetime"], unit='ms', utc=True)
-        df = df.set_index(Column.TIMESTAMP)
-        df[[Column.OPEN, Column.HIGH, Column.LOW, Column.CLOSE, Column.VOLUME]] = \
-            df[[Column.OPEN, Column.HIGH, Column.LOW, Column.CLOSE, Column.VOLUME]].apply(pd.to_numeric)
-
-        # Remove unwanted columns
-        diff = list(set(columns) - set(columns_to_keep))
-        df = df.drop(diff, axis=1)
-        return df
+        return parse_kline_rows(binance_client_response, BINANCE_KLINE_COLUMNS, columns_to_keep,
+                                integer_columns=["num_trades"], datetime_columns=["closetime"])
 
     @staticmethod
     def parse_websocket_message(msg: Dict[str, Dict[str, str]]) -> Dict[pd.Timestamp, Dict[str, str]]:
@@ -70,7 +78,7 @@ class BinanceParser(ParserABC, ParserBaseClass):
         :return: Row for PriceHistory.append
         """
         row = {}
-        timestamp = pd.Timestamp(msg["k"]["t"], unit='ms', tz='UTC')
+        timestamp = _utc_timestamp(msg["k"]["t"])
         row[timestamp] = {
             "open": float(msg["k"]["o"]),
             "high": float(msg["k"]["h"]),
@@ -1,9 +1,11 @@
 from symphony.parser import ParserBaseClass
+from symphony.parser.parser_base_class import parse_kline_rows
 from symphony.exceptions import ParserClassException
 from symphony.utils.time import to_unix_time
 from symphony.abc import ParserABC
 from symphony.enum import Column
-from typing import List, Dict
+from typing import List, Dict, Union
+import numpy as np
 from symphony.config import USE_MODIN
 if USE_MODIN:
     import modin.pandas as pd
@@ -17,16 +19,12 @@ class CCXTParser(ParserABC, ParserBaseClass):
         super().__init__()
 
     @staticmethod
-    def parse(ccxt_client_response: List[List[float]]) -> pd.DataFrame:
+    def parse(ccxt_client_response: Union[List[List[float]], np.ndarray]) -> pd.DataFrame:
         """
-        Parser for results from ccxt_client.fetch_ohlcv()
+        Parser for results from ccxt_client.fetch_ohlcv(). Decoded straight into float64 columns.
 
-        :param ccxt_client_response: CCXT output
+        :param ccxt_client_response: CCXT output, or a numpy array of it
         :return: Dataframe for PriceHistory
         """
         column_headers = [Column.TIMESTAMP, Column.OPEN, Column.HIGH, Column.LOW, Column.CLOSE, Column.VOLUME]
-        df = pd.DataFrame(ccxt_client_response, columns=column_headers)
-        df[Column.TIMESTAMP] = pd.to_datetime(df["timestamp"], unit='ms', utc=True)
-        df = df.set_index(Column.TIMESTAMP)
-        return df
-
+        return parse_kline_rows(ccxt_client_response, column_headers, column_headers)
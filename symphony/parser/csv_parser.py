@@ -1,9 +1,10 @@
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 from symphony.data_classes import Candle
 from symphony.parser import ParserBaseClass
 from symphony.exceptions import ParserClassException
 from symphony.abc import ParserABC
+from symphony.utils.archive import read_csv_archived, ARCHIVE_CHUNK_SIZE
 from symphony.config import USE_MODIN
 if USE_MODIN:
     import modin.pandas as pd
@@ -19,7 +20,9 @@ class CSVParser(ParserABC, ParserBaseClass):
     def parse(self,
               filename: str,
               datetime_column: str = "datetime",
-              column_names: List[str] = ["datetime", "open", "high", "low", "close", "volume"]
+              column_names: List[str] = ["datetime", "open", "high", "low", "close", "volume"],
+              archive: Optional[bool] = False,
+              chunksize: Optional[int] = ARCHIVE_CHUNK_SIZE
               ) -> pd.DataFrame:
 
         """
@@ -28,6 +31,9 @@ class CSVParser(ParserABC, ParserBaseClass):
         :param filename: CSV file path
         :param datetime_column: Column containing dates or UNIX timestamps
         :param column_names: All column names
+        :param archive: Stream the file into a columnar archive next to it on first use and return a
+            memory-mapped dataframe. For files too large to load at once.
+        :param chunksize: Rows read at a time when archiving
         :return: (pd.DataFrame)
         """
 
@@ -35,6 +41,10 @@ class CSVParser(ParserABC, ParserBaseClass):
         if not file.is_file():
             raise ParserClassException(f"Cannot find file with path {filename}")
 
+        if archive:
+            return read_csv_archived(str(file.resolve()), datetime_column, unit='s', index_name="timestamp",
+                                     chunksize=chunksize)
+
         df = pd.read_csv(file.resolve())
         df[datetime_column] = pd.to_datetime(df[datetime_column], unit='s')
         df.rename(columns={datetime_column: "timestamp"})
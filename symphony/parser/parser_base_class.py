@@ -1,5 +1,12 @@
 from symphony.data_classes import Candle
-from typing import List
+from symphony.enum import Column
+from symphony.config import USE_MODIN
+from typing import List, Union, Sequence, Iterable, Any
+import numpy as np
+if USE_MODIN:
+    import modin.pandas as pd
+else:
+    import pandas as pd
 
 
 class ParserBaseClass:
@@ -16,3 +23,51 @@ class ParserBaseClass:
 
     def __next__(self):
         pass
+
+
+def parse_kline_rows(rows: Union[Sequence[Sequence[Any]], np.ndarray],
+                     columns: List[str],
+                     columns_to_keep: Iterable[str],
+                     integer_columns: Iterable[str] = (),
+                     datetime_columns: Iterable[str] = ()) -> pd.DataFrame:
+    """
+    Decodes kline rows (lists of numbers or numeric strings, as returned by exchange APIs) straight into typed
+    columns. Only kept columns are decoded. The UNIX ms `timestamp` column becomes a UTC DatetimeIndex in one
+    vectorized conversion.
+
+    :param rows: List of rows, or a 2D numpy array
+    :param columns: Name of every position in a row, must include `timestamp`
+    :param columns_to_keep: Columns to return
+    :param integer_columns: Columns decoded as int64, others are float64
+    :param datetime_columns: Columns holding UNIX ms timestamps, decoded as UTC datetimes
+    :return: DataFrame indexed by timestamp, kept columns in the order of `columns`
+    """
+    num_rows = len(rows)
+    columns_to_keep, integer_columns, datetime_columns = set(columns_to_keep), set(integer_columns), \
+        set(datetime_columns)
+
+    def decode(position: int, dtype: type) -> np.ndarray:
+        if isinstance(rows, np.ndarray):
+            return rows[:, position].astype(dtype)
+        try:
+            return np.fromiter((row[position] for row in rows), dtype=dtype, count=num_rows)
+        except TypeError:
+            # None in the column, e.g. missing volume. Slower path, becomes NaN
+            return np.array([row[position] for row in rows], dtype=np.float64).astype(dtype)
+
+    def to_datetime(unix_ms: np.ndarray) -> pd.DatetimeIndex:
+        return pd.DatetimeIndex(unix_ms.astype("datetime64[ms]").astype("datetime64[ns]")).tz_localize("UTC")
+
+    index = to_datetime(decode(columns.index(Column.TIMESTAMP), np.int64))
+    index.name = Column.TIMESTAMP
+    data = {}
+    for position, column in enumerate(columns):
+        if column == Column.TIMESTAMP or column not in columns_to_keep:
+            continue
+        if column in datetime_columns:
+            data[column] = to_datetime(decode(position, np.int64))
+        elif column in integer_columns:
+            data[column] = decode(position, np.int64)
+        else:
+            data[column] = decode(position, np.float64)
+    return pd.DataFrame(data, index=index, columns=[column for column in columns if column in data])
@@ -1 +1,6 @@
 from .real_time.binance_real_time_quoter import BinanceRealTimeQuoter
+from .real_time.quote_book import QuoteBook
+from .real_time.tick_recorder import TickRecorder, TickReplayer
+from .real_time.depth_cache import DepthCache
+from .real_time.shared_memory_quoter import SharedMemoryQuoter, SharedQuotePublisher
+from .historical.archive_historical_quoter import ArchiveHistoricalQuoter
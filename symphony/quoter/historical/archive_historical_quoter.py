@@ -0,0 +1,279 @@
+from symphony.abc import HistoricalQuoter
+from symphony.data_classes import Instrument
+from symphony.enum import Column, Exchange, Market, Timeframe
+from symphony.exceptions import QuoterException
+from symphony.utils.archive import archive_exists, read_archive_meta, ARCHIVE_INDEX_FILE, ARCHIVE_VALUES_FILE
+from symphony.config import LOG_LEVEL, USE_MODIN
+from typing import Dict, List, Optional, Union, Sequence, Tuple
+import numpy as np
+import pathlib
+import logging
+
+if USE_MODIN:
+    import modin.pandas as pd
+else:
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+Timestamps = Union[Sequence[pd.Timestamp], pd.DatetimeIndex, np.ndarray]
+
+
+class ArchiveHistoricalQuoter(HistoricalQuoter):
+
+    def __init__(self,
+                 instruments: List[Instrument],
+                 archive_dirs: Dict[str, str],
+                 timeframe: Optional[Timeframe] = Timeframe.M1,
+                 price_column: Optional[str] = Column.CLOSE,
+                 spread: Optional[float] = 0.0,
+                 spreads: Optional[Dict[str, float]] = None,
+                 max_age: Optional[pd.Timedelta] = None,
+                 exchange: Optional[Exchange] = Exchange.BINANCE,
+                 log_level: Optional[int] = LOG_LEVEL):
+        """
+        Quotes at past timestamps from candle archives, without network. The quote at a timestamp is the close of
+        the last candle that had closed by then, bid and ask are placed half the spread around it.
+
+        Getters quote at `timestamp` unless given one, so ConversionChain and CryptoPositionSizer can use it in
+        place of a RealTimeQuoter while a backtest moves `timestamp` along.
+
+        :param instruments: Instruments of the exchange, only those with an archive are quoted
+        :param archive_dirs: Archive directory by symbol, see symphony.utils.archive
+        :param timeframe: Timeframe of the archived candles, whose index is their open time
+        :param price_column: Archive column to quote
+        :param spread: Spread as a fraction of the price, for symbols not in `spreads`
+        :param spreads: Spread by symbol
+        :param max_age: Candles older than this at the quoted timestamp are treated as missing, defaults to any age
+        :param exchange: Exchange
+        :param log_level: Optional log level
+        :raises QuoterException: If an archive does not exist or lacks the price column
+        """
+        self.exchange: Exchange = exchange
+        self.timeframe: Timeframe = timeframe
+        self.price_column: str = price_column
+        self.spread: float = spread
+        self.spreads: Dict[str, float] = spreads if spreads else {}
+        self.max_age: Optional[pd.Timedelta] = max_age
+        self.timestamp: Optional[pd.Timestamp] = None
+        self.__bar_nanos: int = timeframe.value * 60 * 10 ** 9
+        self.__open_times: Dict[str, np.ndarray] = {}
+        self.__prices: Dict[str, np.ndarray] = {}
+        for symbol, archive_dir in archive_dirs.items():
+            self.__open_times[symbol], self.__prices[symbol] = self.__map_archive(archive_dir)
+        self.instruments: List[Instrument] = [instrument for instrument in instruments
+                                              if instrument.symbol in self.__prices]
+        self.__digits: Dict[str, int] = {instrument.symbol: instrument.digits for instrument in self.instruments}
+        logger.setLevel(log_level)
+
+    @classmethod
+    def from_directory(cls, instruments: List[Instrument], directory: str, **kwargs) -> "ArchiveHistoricalQuoter":
+        """
+        Quoter over the archives in a directory named after their symbol, e.g. ETHBTC.archive or ETHBTC
+
+        :param instruments: Instruments of the exchange
+        :param directory: Directory holding the archives
+        :param kwargs: Other arguments of the constructor
+        :return: The quoter
+        """
+        archive_dirs: Dict[str, str] = {}
+        for instrument in instruments:
+            for name in (instrument.symbol + ".archive", instrument.symbol):
+                archive_dir = str(pathlib.Path(directory, name))
+                if archive_exists(archive_dir):
+                    archive_dirs[instrument.symbol] = archive_dir
+                    break
+        return cls(instruments, archive_dirs, **kwargs)
+
+    def set_timestamp(self, timestamp: pd.Timestamp) -> None:
+        """
+        Sets the timestamp getters quote at by default
+
+        :param timestamp: Timestamp, UTC if naive
+        :return: None
+        """
+        self.timestamp = timestamp
+        return
+
+    def contains(self, symbol_or_instrument: Union[Instrument, str]) -> bool:
+        return self.__get_symbol(symbol_or_instrument) in self.__prices
+
+    def get_bid(self,
+                symbol_or_instrument: Union[Instrument, str],
+                fall_back_to_api: Optional[bool] = False,
+                timestamp: Optional[pd.Timestamp] = None) -> float:
+        """
+        Bid at a timestamp
+
+        :param symbol_or_instrument: Either instrument or symbol
+        :param fall_back_to_api: Ignored, there is no API to fall back to
+        :param timestamp: Timestamp, defaults to `timestamp`
+        :return: The bid
+        :raises QuoterException: If the symbol has no archive, or no candle by then
+        """
+        return self.__get(symbol_or_instrument, Column.BID, timestamp)
+
+    def get_ask(self,
+                symbol_or_instrument: Union[Instrument, str],
+                fall_back_to_api: Optional[bool] = False,
+                timestamp: Optional[pd.Timestamp] = None) -> float:
+        """
+        Ask at a timestamp
+
+        :param symbol_or_instrument: Either instrument or symbol
+        :param fall_back_to_api: Ignored, there is no API to fall back to
+        :param timestamp: Timestamp, defaults to `timestamp`
+        :return: The ask
+        :raises QuoterException: If the symbol has no archive, or no candle by then
+        """
+        return self.__get(symbol_or_instrument, Column.ASK, timestamp)
+
+    def get_midpoint(self,
+                     symbol_or_instrument: Union[Instrument, str],
+                     fall_back_to_api: Optional[bool] = False,
+                     timestamp: Optional[pd.Timestamp] = None) -> float:
+        """
+        Midpoint at a timestamp, i.e. the archived price
+
+        :param symbol_or_instrument: Either instrument or symbol
+        :param fall_back_to_api: Ignored, there is no API to fall back to
+        :param timestamp: Timestamp, defaults to `timestamp`
+        :return: The midpoint
+        :raises QuoterException: If the symbol has no archive, or no candle by then
+        """
+        return self.__get(symbol_or_instrument, Column.MIDPOINT, timestamp)
+
+    def get_liquidity(self,
+                      symbol_or_instrument: Union[Instrument, str],
+                      fall_back_to_api: Optional[bool] = False,
+                      timestamp: Optional[pd.Timestamp] = None) -> float:
+        """
+        Crude liquidity at a timestamp. Ask - Bid / Ask
+
+        :param symbol_or_instrument: Either instrument or symbol
+        :param fall_back_to_api: Ignored, there is no API to fall back to
+        :param timestamp: Timestamp, defaults to `timestamp`
+        :return: Spread over price ratio
+        :raises QuoterException: If the symbol has no archive, or no candle by then
+        """
+        return self.__get(symbol_or_instrument, Column.LIQUIDITY, timestamp)
+
+    def get_price(self,
+                  symbol_or_instrument: Union[Instrument, str],
+                  order_side: Market,
+                  fall_back_to_api: Optional[bool] = False,
+                  timestamp: Optional[pd.Timestamp] = None) -> float:
+        """
+        Gets the right price, either BID or ASK, for the Market type
+
+        :param symbol_or_instrument: Either instrument or symbol
+        :param order_side: BUY or SELL
+        :param fall_back_to_api: Ignored, there is no API to fall back to
+        :param timestamp: Timestamp, defaults to `timestamp`
+        :return: price
+        :raises QuoterException: If order_side is unknown, if the symbol has no archive, or no candle by then
+        """
+        if order_side not in [Market.BUY, Market.SELL]:
+            raise QuoterException(f"Unknown order side: {order_side}")
+        return self.__get(symbol_or_instrument, Column.ASK if order_side == Market.BUY else Column.BID, timestamp)
+
+    def get_prices(self,
+                   symbols_or_instruments: Sequence[Union[Instrument, str]],
+                   timestamps: Timestamps,
+                   column: Optional[str] = Column.MIDPOINT) -> np.ndarray:
+        """
+        Quotes many (symbol, timestamp) pairs in one call, one binary search per symbol
+
+        :param symbols_or_instruments: Symbol of each query, a numpy array of strings is fastest
+        :param timestamps: Timestamp of each query, UTC if naive, or int64 UTC ns
+        :param column: BID, ASK, MIDPOINT or LIQUIDITY
+        :return: float64 array of the quotes, NaN where a symbol has no candle by then
+        :raises QuoterException: If the lengths differ, a symbol has no archive, or the column is unknown
+        """
+        if isinstance(symbols_or_instruments, np.ndarray) and symbols_or_instruments.dtype.kind in "US":
+            symbols = symbols_or_instruments
+        else:
+            symbols = np.asarray([self.__get_symbol(symbol_or_instrument)
+                                  for symbol_or_instrument in symbols_or_instruments], dtype=object)
+        query_times = self.__to_nanos(timestamps)
+        if len(symbols) != len(query_times):
+            raise QuoterException(f"Got {len(symbols)} symbols and {len(query_times)} timestamps")
+        codes, uniques = pd.factorize(symbols)
+        quotes = np.full(len(symbols), np.nan)
+        for code, symbol in enumerate(uniques):
+            queries = np.flatnonzero(codes == code)
+            quotes[queries] = self.__lookup(symbol, query_times[queries], column)
+        return quotes
+
+    def __get(self, symbol_or_instrument: Union[Instrument, str], column: str,
+              timestamp: Optional[pd.Timestamp]) -> float:
+        timestamp = timestamp if timestamp is not None else self.timestamp
+        if timestamp is None:
+            raise QuoterException(f"No timestamp to quote at, call set_timestamp first")
+        symbol = self.__get_symbol(symbol_or_instrument)
+        quote = float(self.__lookup(symbol, self.__to_nanos([timestamp]), column)[0])
+        if np.isnan(quote):
+            raise QuoterException(f"No quote for {symbol} at {timestamp}")
+        if column == Column.MIDPOINT and self.__digits.get(symbol, -1) >= 0:
+            return round(quote, self.__digits[symbol])
+        return quote
+
+    def __lookup(self, symbol: str, query_times: np.ndarray, column: str) -> np.ndarray:
+        """
+        As-of lookup of one symbol
+
+        :param symbol: Symbol
+        :param query_times: UTC ns timestamps
+        :param column: BID, ASK, MIDPOINT or LIQUIDITY
+        :return: Quotes, NaN where there was no candle
+        """
+        if symbol not in self.__prices:
+            raise QuoterException(f"No archive for {symbol}")
+        open_times, prices = self.__open_times[symbol], self.__prices[symbol]
+        # Last candle open at least a bar before, i.e. closed by then
+        positions = np.searchsorted(open_times, query_times - self.__bar_nanos, side="right") - 1
+        found = positions >= 0
+        if self.max_age is not None:
+            found &= query_times - self.__bar_nanos - open_times[np.maximum(positions, 0)] <= self.max_age.value
+        quotes = np.where(found, prices[np.maximum(positions, 0)], np.nan)
+        half_spread = self.spreads.get(symbol, self.spread) / 2
+        if column == Column.MIDPOINT:
+            return quotes
+        if column == Column.BID:
+            return quotes * (1 - half_spread)
+        if column == Column.ASK:
+            return quotes * (1 + half_spread)
+        if column == Column.LIQUIDITY:
+            return np.where(found, 2 * half_spread / (1 + half_spread), np.nan)
+        raise QuoterException(f"Cannot quote column {column}")
+
+    def __map_archive(self, archive_dir: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Memory maps the open times and prices of an archive
+
+        :param archive_dir: Archive directory
+        :return: Tuple of (int64 UTC ns open times, float64 prices)
+        """
+        if not archive_exists(archive_dir):
+            raise QuoterException(f"No archive in {archive_dir}")
+        meta = read_archive_meta(archive_dir)
+        if self.price_column not in meta["columns"]:
+            raise QuoterException(f"Column {self.price_column} not in archive {archive_dir}")
+        open_times = np.load(pathlib.Path(archive_dir, ARCHIVE_INDEX_FILE), mmap_mode="r")
+        values = np.load(pathlib.Path(archive_dir, ARCHIVE_VALUES_FILE), mmap_mode="r")
+        return open_times, values[meta["columns"].index(self.price_column)]
+
+    @staticmethod
+    def __to_nanos(timestamps: Timestamps) -> np.ndarray:
+        index = pd.DatetimeIndex(timestamps)
+        if index.tz is not None:
+            index = index.tz_convert("UTC")
+        return index.asi8
+
+    @staticmethod
+    def __get_symbol(symbol_or_instrument: Union[Instrument, str]) -> str:
+        if isinstance(symbol_or_instrument, str):
+            return symbol_or_instrument
+        elif isinstance(symbol_or_instrument, Instrument):
+            return symbol_or_instrument.symbol
+        raise QuoterException(f"Unrecognized type: {type(symbol_or_instrument)} ")
@@ -4,40 +4,71 @@ from binance.streams import ThreadedWebsocketManager
 from symphony.borg import Borg
 from symphony.data_classes import Instrument, PriceHistory
 from symphony.utils.instruments import filter_instruments
-from symphony.abc import RealTimeQuoter
 from symphony.config import LOG_LEVEL
 from symphony.utils.instruments import get_instrument
-from symphony.enum import Column, Exchange, Timeframe, Market
+from symphony.enum import Exchange, Timeframe
 from typing import Dict, List, Optional, Union
 from symphony.exceptions import QuoterException
+from symphony.quoter.real_time.quote_book import QuoteBook
+from symphony.quoter.real_time.quote_book_quoter import QuoteBookQuoter, QUOTE_COLUMNS, API_FALLBACK_DEADLINE_SECS, \
+    BOOK_TICKER_MAX_SYMBOLS
+from symphony.quoter.real_time.tick_recorder import TickRecorder
+from symphony.quoter.real_time.shared_memory_quoter import SharedQuotePublisher
 from twisted.internet import reactor
+from threading import Condition
+from time import monotonic
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-# TODO: Save tick data
-# https://arctic.readthedocs.io/en/latest/
-class BinanceRealTimeQuoter(RealTimeQuoter, Borg):
+class BinanceRealTimeQuoter(QuoteBookQuoter, Borg):
 
-    def __init__(self, binance_client: BinanceClient, log_level: Optional[int] = LOG_LEVEL):
+    def __init__(self,
+                 binance_client: BinanceClient,
+                 log_level: Optional[int] = LOG_LEVEL,
+                 max_quote_age_secs: Optional[float] = None,
+                 api_fallback_deadline_secs: Optional[float] = API_FALLBACK_DEADLINE_SECS,
+                 tick_record_dir: Optional[str] = None,
+                 shared_memory_name: Optional[str] = None):
         """
         A class for providing real time quotes from Binance. Manages websockets
 
         :param binance_client: Binance client instance
         :param log_level: Optional log level
+        :param max_quote_age_secs: Quotes older than this are stale and treated as missing, defaults to never.
+                                   Can be set per symbol with `set_max_quote_age`
+        :param api_fallback_deadline_secs: Getters falling back to the API wait this long for the websocket first
+        :param tick_record_dir: Record every book ticker update to this directory, see TickReplayer
+        :param shared_memory_name: Publish the quote book in a shared memory segment of this name, for
+                                   SharedMemoryQuoters in other processes
         """
         Borg.__init__(self)
         self.symphony_client: BinanceClient = binance_client
         self.client: Client = self.symphony_client.binance_client
         self.price_histories: Dict[Instrument, Dict[Timeframe, PriceHistory]] = {}
         self.__kline_conn_keys: Dict[Instrument, Dict[Timeframe, str]] = {}
-        self.instruments: List[Instrument] = binance_client.get_all_instruments()
-        self.all_symbols: List[str] = [instrument.symbol for instrument in self.instruments]
+        instruments: List[Instrument] = binance_client.get_all_instruments()
+        self.all_symbols: List[str] = [instrument.symbol for instrument in instruments]
+        # Quotes of symbols not defined in the client are dropped
+        self.shared_quotes: Optional[SharedQuotePublisher] = None
+        if shared_memory_name:
+            self.shared_quotes = SharedQuotePublisher(self.all_symbols, shared_memory_name)
+            quote_book = self.shared_quotes.quote_book
+        else:
+            quote_book = QuoteBook(self.all_symbols)
+        QuoteBookQuoter.__init__(self, instruments, quote_book, max_quote_age_secs=max_quote_age_secs,
+                                 api_fallback_deadline_secs=api_fallback_deadline_secs)
+        # Signalled by the websocket when a symbol somebody waits for is quoted
+        self.__quote_received: Condition = Condition()
+        self.__awaited: Dict[str, int] = {}
+        self.tick_recorder: Optional[TickRecorder] = None
+        if tick_record_dir:
+            self.tick_recorder = TickRecorder(tick_record_dir, self.quote_book)
+            self.tick_recorder.start()
         self.socket_manager: ThreadedWebsocketManager = ThreadedWebsocketManager(api_key=self.symphony_client.api_key, api_secret=self.symphony_client.secret_key)
         self.socket_manager.start()
         self.__book_ticker_conn_key = self.__start_book_ticker()
-        self.quotes: Dict[str, Dict[Column.BID, Column.ASK, Column.BID_QUANTITY, Column.ASK_QUANTITY]] = {}
         self.exchange: Exchange = Exchange.BINANCE
         logger.setLevel(log_level)
 
@@ -59,8 +90,9 @@ class BinanceRealTimeQuoter(RealTimeQuoter, Borg):
 
         :return: True or False
         """
-        logger.info(f"Quotes contains {len(self.quotes.keys())}/{len(self.all_symbols)} symbols")
-        return all(symbol in self.quotes.keys() for symbol in self.all_symbols)
+        num_quoted = self.quote_book.num_quoted()
+        logger.info(f"Quotes contains {num_quoted}/{len(self.all_symbols)} symbols")
+        return num_quoted >= len(self.all_symbols)
 
     def add_kline_websocket(self, symbol_or_instrument: Union[str, Instrument], timeframe: Timeframe, seed_bars: int = 100) -> None:
         """
@@ -73,134 +105,61 @@ class BinanceRealTimeQuoter(RealTimeQuoter, Borg):
         """
         pass
 
-    def get_bid(self, symbol_or_instrument: Union[Instrument, str], fall_back_to_api: Optional[bool] = False) -> float:
-        """
-        Get the bid price for a specific instrument or symbol
-
-        :param symbol_or_instrument: Either instrument or symbol
-        :param fall_back_to_api: If the websocket has not received a quote, fallback to querying API, defaults to [False]
-        :return: The bid
-        :raises QuoterException: If the symbol is not present and `fallback_to_api` is False
-        """
-        return self.__get(symbol_or_instrument, Column.BID, fall_back_to_api=fall_back_to_api)
-
-    def get_ask(self, symbol_or_instrument: Union[Instrument, str], fall_back_to_api: Optional[bool] = False) -> float:
-        """
-        Get the ask price for a specific instrument or symbol
-
-        :param symbol_or_instrument: Either instrument or symbol
-        :param fall_back_to_api: If the websocket has not received a quote, fallback to querying API, defaults to [False]
-        :return: The Ask
-        :raises QuoterException: If the symbol is not present and `fallback_to_api` is False
-        """
-        return self.__get(symbol_or_instrument, Column.ASK, fall_back_to_api=fall_back_to_api)
-
-    def get_bid_quantity(self, symbol_or_instrument: Union[Instrument, str], fall_back_to_api: Optional[bool] = False) -> float:
-        """
-        Get the bid quantity price for a specific instrument or symbol
-
-        :param symbol_or_instrument: Either instrument or symbol
-        :param fall_back_to_api: If the websocket has not received a quote, fallback to querying API, defaults to [False]
-        :return: The bid quantity
-        :raises QuoterException: If the symbol is not present and `fallback_to_api` is False
-        """
-        return self.__get(symbol_or_instrument, Column.BID_QUANTITY, fall_back_to_api=fall_back_to_api)
-
-    def get_ask_quantity(self, symbol_or_instrument: Union[Instrument, str], fall_back_to_api: Optional[bool] = False) -> float:
-        """
-        Get the ask quantity for a specific instrument or symbol
-
-        :param symbol_or_instrument: Either instrument or symbol
-        :param fall_back_to_api: If the websocket has not received a quote, fallback to querying API, defaults to [False]
-        :return: The Ask quantity
-        :raises QuoterException: If the symbol is not present and `fallback_to_api` is False
-        """
-        return self.__get(symbol_or_instrument, Column.ASK_QUANTITY, fall_back_to_api=fall_back_to_api)
-
-    def get_midpoint(self, symbol_or_instrument: Union[Instrument, str], fall_back_to_api: Optional[bool] = False) -> float:
-        """
-        Get the ask quantity for a specific instrument or symbol
-
-        :param symbol_or_instrument: Either instrument or symbol
-        :param fall_back_to_api: If the websocket has not received a quote, fallback to querying API, defaults to [False]
-        :return: The Ask quantity
-        :raises QuoterException: If the symbol is not present and `fallback_to_api` is False
-        """
-        return self.__get(symbol_or_instrument, Column.MIDPOINT, fall_back_to_api=fall_back_to_api)
-
-    def get_liquidity(self, symbol_or_instrument: Union[Instrument, str], fall_back_to_api: Optional[bool] = False) -> float:
-        """
-        Gets crude liquidity. Ask - Bid / Ask
-
-        :param symbol_or_instrument: Either instrument or symbol
-        :param fall_back_to_api: If the websocket has not received a quote, fallback to querying API, defaults to [False]
-        :return: Spread over price ratio
-        :raises QuoterException: If the symbol is not present and `fallback_to_api` is False
-        """
-        return self.__get(symbol_or_instrument, Column.LIQUIDITY, fall_back_to_api=fall_back_to_api)
-
-    def get_price(self, symbol_or_instrument: Union[Instrument, str], order_side: Market, fall_back_to_api: Optional[bool] = False) -> float:
-        """
-        Gets the right price, either BID or ASK, for the Market type
-
-        :param symbol_or_instrument: Either instrument or symbol
-        :param order_side: BUY or SELL
-        :param fall_back_to_api: Optionally fall back to api
-        :return: price
-        :raises QuoterException: If the symbol is not present and `fallback_to_api` is False, if order_side is unknown
-        """
-        if order_side not in [Market.BUY, Market.SELL]:
-            raise QuoterException(f"Unknown order side: {order_side}")
-
-        if order_side == Market.BUY:
-            return self.__get(symbol_or_instrument, Column.ASK, fall_back_to_api=fall_back_to_api)
-        else:
-            return self.__get(symbol_or_instrument, Column.BID, fall_back_to_api=fall_back_to_api)
-
-    def __get_symbol(self, symbol_or_instrument: Union[Instrument, str]) -> str:
-        """
-        Helper method to extract a symbol
-
-        :param symbol_or_instrument: Either instrument or symbol
-        :return: The string representation
-        """
-        if isinstance(symbol_or_instrument, str):
-            return symbol_or_instrument
-        elif isinstance(symbol_or_instrument, Instrument):
-            return symbol_or_instrument.symbol
-        else:
-            raise QuoterException(f"Unrecognized type: {type(symbol_or_instrument)} ")
-
-    def __get(self, symbol_or_instrument: Union[Instrument, str], column: Column, fall_back_to_api: Optional[bool] = False) -> float:
-        """
-        Generic get for ASK, BID, ASK_QUANTITY, BID_QUANTITY, MIDPOINT, or LIQUIDITY
-
-        :param symbol_or_instrument: Symbol or instrument
-        :param column: Column
-        :param fall_back_to_api: If the websocket has not received a quote, fallback to querying API, defaults to [False]
-        :return: The quantity or price
+    def _wait(self, symbols: List[str], timeout: Optional[float]) -> List[str]:
+        """
+        Waits on the websocket for fresh quotes. Wakes up on the websocket messages of the symbols, it does not poll.
+
+        :param symbols: Symbols
+        :param timeout: Seconds to wait at most, None for no limit
+        :return: The symbols still without a fresh quote
+        """
+        missing = [symbol for symbol in symbols if self._get_quote(symbol) is None]
+        if not missing or (timeout is not None and timeout <= 0):
+            return missing
+        deadline = None if timeout is None else monotonic() + timeout
+        awaited = missing
+        with self.__quote_received:
+            for symbol in awaited:
+                self.__awaited[symbol] = self.__awaited.get(symbol, 0) + 1
+            try:
+                while True:
+                    # Checked again under the lock, a quote may have arrived before the symbol was awaited
+                    missing = [symbol for symbol in missing if self._get_quote(symbol) is None]
+                    remaining = None if deadline is None else deadline - monotonic()
+                    if not missing or (remaining is not None and remaining <= 0):
+                        return missing
+                    self.__quote_received.wait(remaining)
+            finally:
+                for symbol in awaited:
+                    if self.__awaited[symbol] == 1:
+                        del self.__awaited[symbol]
+                    else:
+                        self.__awaited[symbol] -= 1
+
+    def push_quote(self,
+                   symbol: str,
+                   bid: float,
+                   ask: float,
+                   bid_quantity: float,
+                   ask_quantity: float,
+                   timestamp: Optional[float] = None) -> None:
+        """
+        Feeds a quote from another source than the websocket, e.g. a TickReplayer. Must not be mixed with a
+        running book ticker, the quote book has a single writer.
+
+        :param symbol: Symbol
+        :param bid: Bid
+        :param ask: Ask
+        :param bid_quantity: Bid quantity
+        :param ask_quantity: Ask quantity
+        :param timestamp: Time of the quote, UNIX seconds, defaults to now. Staleness is judged against now.
+        :return: None
         """
-        instrument = get_instrument(self.instruments, symbol_or_instrument)
-
-        symbol = instrument.symbol
-        if symbol in self.quotes.keys():
-            if column == Column.MIDPOINT:
-                return round(
-                    (self.quotes[symbol][Column.BID] + self.quotes[symbol][Column.ASK]) / 2, instrument.digits)
-            elif column == Column.LIQUIDITY:
-                return (self.quotes[symbol][Column.ASK] - self.quotes[symbol][Column.BID]) / self.quotes[symbol][Column.ASK]
-            else:
-                return self.quotes[symbol][column]
-        elif fall_back_to_api:
-            order_book = self.symphony_client.binance_client.get_order_book(symbol=symbol, limit=5)
-            self.quotes[symbol] = {}
-            self.quotes[symbol][Column.BID] = float(order_book["bids"][0][0])
-            self.quotes[symbol][Column.BID_QUANTITY] = float(order_book["bids"][0][1])
-            self.quotes[symbol][Column.ASK] = float(order_book["asks"][0][0])
-            self.quotes[symbol][Column.ASK_QUANTITY] = float(order_book["asks"][0][1])
-            return self.__get(symbol_or_instrument, column, fall_back_to_api=fall_back_to_api)
-        else:
-            raise QuoterException(f"Symbol {symbol} not present")
+        self.quote_book.update(symbol, bid, ask, bid_quantity, ask_quantity, timestamp)
+        if symbol in self.__awaited:
+            with self.__quote_received:
+                self.__quote_received.notify_all()
+        return
 
     def __start_book_ticker(self) -> str:
         """
@@ -226,6 +185,12 @@ class BinanceRealTimeQuoter(RealTimeQuoter, Borg):
 
         :return: None
         """
+        tick_recorder = getattr(self, "tick_recorder", None)
+        if tick_recorder is not None:
+            tick_recorder.stop()
+        shared_quotes = getattr(self, "shared_quotes", None)
+        if shared_quotes is not None:
+            shared_quotes.close()
         self.socket_manager.stop()
         reactor.stop()
 
@@ -236,24 +201,24 @@ class BinanceRealTimeQuoter(RealTimeQuoter, Borg):
         :param message: The message
         :return: None
         """
-        if "e" in message.keys() and message["e"] == "error":
+        symbol = message.get("s")
+        if symbol is not None:
+            bid, ask, bid_quantity, ask_quantity = float(message["b"]), float(message["a"]), \
+                float(message["B"]), float(message["A"])
+            self.quote_book.update(symbol, bid, ask, bid_quantity, ask_quantity)
+            if self.tick_recorder is not None:
+                self.tick_recorder.record(symbol, bid, ask, bid_quantity, ask_quantity)
+            if symbol in self.__awaited:
+                with self.__quote_received:
+                    self.__quote_received.notify_all()
+            return
+
+        if message.get("e") == "error":
             if "m" in message.keys():
                 logger.error(f"Binance book ticker error'd, restarting. Msg: {message['m']}")
             else:
                 logger.error(f"Binance book ticker error'd, restarting.")
             self.__stop_book_ticker()
-            self.__book_ticket_conn_key = self.__start_book_ticker()
-
-        if "s" not in message.keys():
-            raise QuoterException(f"Could not parse message: {message}")
-
-        symbol = message["s"]
-        if symbol not in self.quotes.keys():
-            self.quotes[symbol] = {}
-        # May not want all symbols. Use what is defined in client
-        if symbol in self.all_symbols:
-            self.quotes[symbol][Column.BID] = float(message["b"])
-            self.quotes[symbol][Column.ASK] = float(message["a"])
-            self.quotes[symbol][Column.BID_QUANTITY] = float(message["B"])
-            self.quotes[symbol][Column.ASK_QUANTITY] = float(message["A"])
-        return
+            self.__book_ticker_conn_key = self.__start_book_ticker()
+            return
+        raise QuoterException(f"Could not parse message: {message}")
@@ -0,0 +1,407 @@
+from symphony.client import BinanceClient, CombinedStreamMultiplexer
+from symphony.client.stream_multiplexer import BINANCE_COMBINED_STREAM_URL, binance_depth_stream
+from symphony.client.rate_limiter import BINANCE_ENDPOINT_WEIGHTS
+from symphony.data_classes import Instrument
+from symphony.enum import Market
+from symphony.exceptions import QuoterException
+from typing import Dict, List, Optional, Tuple, Union, Any, Final
+from concurrent.futures import ThreadPoolExecutor
+from time import monotonic
+import numpy as np
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Levels of the snapshot a book is synced from
+DEPTH_LEVELS: Final[int] = 100
+# 100 or 1000
+DEPTH_UPDATE_SPEED_MS: Final[int] = 100
+# Diff events buffered per book while its snapshot is fetched, older ones are dropped
+MAX_BUFFERED_DEPTH_EVENTS: Final[int] = 1000
+# Snapshots fetched at once
+SNAPSHOT_WORKERS: Final[int] = 4
+
+# Levels of one side, best first: prices, cumulative quantities and cumulative cost
+SideLevels = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+class DepthBook:
+    """
+    Order book of one symbol, quantity by price on each side, kept in sync by applying diff depth events on top
+    of a REST snapshot. Callers hold `lock`.
+    """
+
+    def __init__(self, levels: int):
+        """
+        :param levels: Levels kept per side, levels beyond twice this are pruned
+        """
+        self.levels: int = levels
+        self.lock: threading.Lock = threading.Lock()
+        self.bids: Dict[float, float] = {}
+        self.asks: Dict[float, float] = {}
+        # None until synced from a snapshot
+        self.last_update_id: Optional[int] = None
+        self.buffer: List[Dict[str, Any]] = []
+        self.snapshot_pending: bool = False
+        self.__version: int = 0
+        self.__side_levels: Dict[Market, Tuple[int, SideLevels]] = {}
+
+    @property
+    def synced(self) -> bool:
+        return self.last_update_id is not None
+
+    def reset(self) -> None:
+        """
+        Forgets the book, it is synced again from the next snapshot
+        """
+        self.bids.clear()
+        self.asks.clear()
+        self.last_update_id = None
+        self.buffer.clear()
+        self.__version += 1
+        return
+
+    def apply_snapshot(self, snapshot: Dict[str, Any]) -> bool:
+        """
+        Replaces the book with a REST snapshot and applies the buffered events that are newer
+
+        :param snapshot: Response of the depth endpoint
+        :return: False if the buffered events start after the snapshot, i.e. it is too old
+        """
+        buffer, self.buffer = self.buffer, []
+        self.reset()
+        self.bids.update((float(price), float(quantity)) for price, quantity in snapshot["bids"])
+        self.asks.update((float(price), float(quantity)) for price, quantity in snapshot["asks"])
+        self.last_update_id = snapshot["lastUpdateId"]
+        for event in buffer:
+            if not self.apply(event):
+                self.reset()
+                return False
+        return True
+
+    def apply(self, event: Dict[str, Any]) -> bool:
+        """
+        Applies a diff depth event. Events the book already contains are skipped.
+
+        :param event: Event, with first and final update ids `U` and `u`
+        :return: False if events were missed between the book and this event
+        """
+        if event["u"] <= self.last_update_id:
+            return True
+        if event["U"] > self.last_update_id + 1:
+            return False
+        for side, updates in ((self.bids, event["b"]), (self.asks, event["a"])):
+            for price, quantity in updates:
+                quantity = float(quantity)
+                if quantity:
+                    side[float(price)] = quantity
+                else:
+                    side.pop(float(price), None)
+        self.last_update_id = event["u"]
+        self.__version += 1
+        if len(self.bids) > 2 * self.levels:
+            self.__prune(self.bids, reverse=True)
+        if len(self.asks) > 2 * self.levels:
+            self.__prune(self.asks, reverse=False)
+        return True
+
+    def best_bid_ask(self) -> Optional[Tuple[float, float]]:
+        if not self.bids or not self.asks:
+            return None
+        return max(self.bids), min(self.asks)
+
+    def cost_to_fill(self, quantity: float, order_side: Market) -> Optional[Tuple[float, float]]:
+        """
+        Walks the book to fill a market order
+
+        :param quantity: Quantity of the base asset
+        :param order_side: BUY takes the asks, SELL the bids
+        :return: Tuple of (average price, cost in the quote asset), None if the book is not deep enough
+        """
+        prices, cumulative_quantities, cumulative_costs = self.__levels(order_side)
+        level = int(np.searchsorted(cumulative_quantities, quantity, side="left"))
+        if level >= len(prices) or quantity <= 0:
+            return None
+        filled = cumulative_quantities[level - 1] if level else 0.0
+        cost = (cumulative_costs[level - 1] if level else 0.0) + (quantity - filled) * prices[level]
+        return float(cost / quantity), float(cost)
+
+    def __levels(self, order_side: Market) -> SideLevels:
+        """
+        Sorted levels of the side a market order takes, rebuilt only when the book changed
+        """
+        cached = self.__side_levels.get(order_side)
+        if cached is not None and cached[0] == self.__version:
+            return cached[1]
+        if order_side == Market.BUY:
+            prices = np.sort(np.fromiter(self.asks.keys(), dtype=np.float64, count=len(self.asks)))
+            quantities = np.array([self.asks[price] for price in prices.tolist()], dtype=np.float64)
+        else:
+            prices = np.sort(np.fromiter(self.bids.keys(), dtype=np.float64, count=len(self.bids)))[::-1]
+            quantities = np.array([self.bids[price] for price in prices.tolist()], dtype=np.float64)
+        side_levels = (prices, np.cumsum(quantities), np.cumsum(prices * quantities))
+        self.__side_levels[order_side] = (self.__version, side_levels)
+        return side_levels
+
+    def __prune(self, side: Dict[float, float], reverse: bool) -> None:
+        for price in sorted(side, reverse=reverse)[self.levels:]:
+            del side[price]
+        return
+
+
+class DepthCache:
+    """
+    Local order books of watched symbols, synced from a REST snapshot and kept current from the diff depth
+    streams. Answers cost-to-fill and liquidity queries without network round trips.
+
+    Follows Binance's procedure: events are buffered until the snapshot arrives, events older than the snapshot
+    are skipped, and a gap in update ids (or a reconnect) resyncs the book from a new snapshot.
+    """
+
+    def __init__(self,
+                 binance_client: BinanceClient,
+                 levels: Optional[int] = DEPTH_LEVELS,
+                 update_speed_ms: Optional[int] = DEPTH_UPDATE_SPEED_MS,
+                 multiplexer: Optional[CombinedStreamMultiplexer] = None):
+        """
+        :param binance_client: Client the snapshots are fetched with, under its rate limiter
+        :param levels: Levels of the snapshots
+        :param update_speed_ms: Update speed of the depth streams, 100 or 1000
+        :param multiplexer: Multiplexer to subscribe the depth streams on, defaults to a new one
+        """
+        self.symphony_client: BinanceClient = binance_client
+        self.levels: int = levels
+        self.update_speed_ms: int = update_speed_ms
+        self.__own_multiplexer: bool = multiplexer is None
+        self.multiplexer: CombinedStreamMultiplexer = multiplexer if multiplexer else \
+            CombinedStreamMultiplexer(BINANCE_COMBINED_STREAM_URL)
+        self.multiplexer.add_connect_callback(self.__resync_streams)
+        self.__books: Dict[str, DepthBook] = {}
+        self.__stream_symbols: Dict[str, str] = {}
+        self.__executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=SNAPSHOT_WORKERS,
+                                                                 thread_name_prefix="DepthSnapshot")
+        self.__synced: threading.Condition = threading.Condition()
+        self.__stats: Dict[str, int] = {
+            "events": 0,
+            "snapshots": 0,
+            "resyncs": 0,
+            "dropped_events": 0
+        }
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """
+        Events applied, snapshots fetched, books resynced after a gap or reconnect, and events dropped from full
+        buffers
+        """
+        return dict(self.__stats)
+
+    @property
+    def symbols(self) -> List[str]:
+        return list(self.__books.keys())
+
+    def start(self) -> None:
+        """
+        Connects the depth streams
+
+        :return: None
+        """
+        self.multiplexer.start()
+        return
+
+    def stop(self) -> None:
+        """
+        Disconnects the depth streams. A multiplexer passed in is only unsubscribed from.
+
+        :return: None
+        """
+        if self.__own_multiplexer:
+            self.multiplexer.stop()
+        else:
+            for stream in list(self.__stream_symbols.keys()):
+                self.multiplexer.unsubscribe(stream)
+        self.__executor.shutdown(wait=False)
+        return
+
+    def watch(self, symbol_or_instrument: Union[Instrument, str]) -> None:
+        """
+        Starts maintaining the book of a symbol
+
+        :param symbol_or_instrument: Either instrument or symbol
+        :return: None
+        """
+        symbol = self.__get_symbol(symbol_or_instrument)
+        if symbol in self.__books:
+            return
+        self.__books[symbol] = DepthBook(self.levels)
+        stream = binance_depth_stream(symbol, self.update_speed_ms)
+        self.__stream_symbols[stream] = symbol
+        self.multiplexer.subscribe(stream, lambda event: self.__handle_depth_event(symbol, event))
+        return
+
+    def unwatch(self, symbol_or_instrument: Union[Instrument, str]) -> None:
+        """
+        Stops maintaining the book of a symbol
+
+        :param symbol_or_instrument: Either instrument or symbol
+        :return: None
+        """
+        symbol = self.__get_symbol(symbol_or_instrument)
+        if self.__books.pop(symbol, None) is None:
+            return
+        stream = binance_depth_stream(symbol, self.update_speed_ms)
+        self.__stream_symbols.pop(stream, None)
+        self.multiplexer.unsubscribe(stream)
+        return
+
+    def is_synced(self, symbol_or_instrument: Union[Instrument, str]) -> bool:
+        book = self.__books.get(self.__get_symbol(symbol_or_instrument))
+        return book is not None and book.synced
+
+    def wait_synced(self, symbols_or_instruments: List[Union[Instrument, str]], timeout: Optional[float] = None) -> bool:
+        """
+        Blocks until the books of the symbols are synced
+
+        :param symbols_or_instruments: Instruments or symbols
+        :param timeout: Seconds to wait at most, defaults to no limit
+        :return: True if all are synced
+        """
+        deadline = None if timeout is None else monotonic() + timeout
+        with self.__synced:
+            while not all(self.is_synced(symbol) for symbol in symbols_or_instruments):
+                remaining = None if deadline is None else deadline - monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self.__synced.wait(remaining)
+        return True
+
+    def best_bid_ask(self, symbol_or_instrument: Union[Instrument, str]) -> Optional[Tuple[float, float]]:
+        """
+        :param symbol_or_instrument: Either instrument or symbol
+        :return: Tuple of (bid, ask), None if the book is not synced
+        """
+        book = self.__get_synced_book(symbol_or_instrument)
+        if book is None:
+            return None
+        with book.lock:
+            return book.best_bid_ask() if book.synced else None
+
+    def cost_to_fill(self,
+                     symbol_or_instrument: Union[Instrument, str],
+                     quantity: float,
+                     order_side: Market) -> Optional[Tuple[float, float]]:
+        """
+        Cost of filling a market order against the local book
+
+        :param symbol_or_instrument: Either instrument or symbol
+        :param quantity: Quantity of the base asset
+        :param order_side: BUY or SELL
+        :return: Tuple of (average price, cost in the quote asset), None if the book is not synced or not deep
+                 enough
+        :raises QuoterException: If order_side is unknown
+        """
+        if order_side not in [Market.BUY, Market.SELL]:
+            raise QuoterException(f"Unknown order side: {order_side}")
+        book = self.__get_synced_book(symbol_or_instrument)
+        if book is None:
+            return None
+        with book.lock:
+            return book.cost_to_fill(quantity, order_side) if book.synced else None
+
+    def get_liquidity(self,
+                      symbol_or_instrument: Union[Instrument, str],
+                      quantity: Optional[float] = None) -> Optional[float]:
+        """
+        Liquidity from the local book, lower is better. Without a quantity it is the top of book spread over the
+        ask, as RealTimeQuoter.get_liquidity. With one it is the round trip cost of buying and selling the
+        quantity, over the buy price.
+
+        :param symbol_or_instrument: Either instrument or symbol
+        :param quantity: Optional quantity of the base asset
+        :return: The liquidity, None if the book is not synced or not deep enough
+        """
+        if quantity is None:
+            top = self.best_bid_ask(symbol_or_instrument)
+            return None if top is None else (top[1] - top[0]) / top[1]
+        buy = self.cost_to_fill(symbol_or_instrument, quantity, Market.BUY)
+        sell = self.cost_to_fill(symbol_or_instrument, quantity, Market.SELL)
+        if buy is None or sell is None:
+            return None
+        return (buy[0] - sell[0]) / buy[0]
+
+    def __get_synced_book(self, symbol_or_instrument: Union[Instrument, str]) -> Optional[DepthBook]:
+        book = self.__books.get(self.__get_symbol(symbol_or_instrument))
+        return book if book is not None and book.synced else None
+
+    def __handle_depth_event(self, symbol: str, event: Dict[str, Any]) -> None:
+        """
+        Applies a diff depth event, on the stream thread. Unsynced books buffer it and fetch a snapshot.
+        """
+        book = self.__books.get(symbol)
+        if book is None:
+            return
+        with book.lock:
+            if book.synced:
+                if book.apply(event):
+                    self.__stats["events"] += 1
+                    return
+                logger.warning(f"Depth events of {symbol} missed, resyncing")
+                self.__stats["resyncs"] += 1
+                book.reset()
+            if len(book.buffer) >= MAX_BUFFERED_DEPTH_EVENTS:
+                book.buffer.pop(0)
+                self.__stats["dropped_events"] += 1
+            book.buffer.append(event)
+            if not book.snapshot_pending:
+                book.snapshot_pending = True
+                self.__executor.submit(self.__sync, symbol, book)
+        return
+
+    def __sync(self, symbol: str, book: DepthBook) -> None:
+        """
+        Fetches a snapshot and syncs the book from it, on a snapshot worker
+        """
+        try:
+            snapshot = self.symphony_client.rate_limiter.call(
+                self.symphony_client.binance_client.get_order_book, BINANCE_ENDPOINT_WEIGHTS["depth"],
+                symbol=symbol, limit=self.levels
+            )
+        except Exception as e:
+            logger.error(f"Depth snapshot of {symbol} failed, retrying on the next event: {e}")
+            with book.lock:
+                book.snapshot_pending = False
+            return
+        with book.lock:
+            book.snapshot_pending = False
+            self.__stats["snapshots"] += 1
+            if self.__books.get(symbol) is not book:
+                return
+            if not book.apply_snapshot(snapshot):
+                # Older than the first buffered event, the next event fetches a newer one
+                logger.info(f"Depth snapshot of {symbol} is older than its stream, fetching again")
+                return
+        with self.__synced:
+            self.__synced.notify_all()
+        return
+
+    def __resync_streams(self, streams: List[str]) -> None:
+        """
+        Connect callback: events were missed while the connection was down
+        """
+        for stream in streams:
+            book = self.__books.get(self.__stream_symbols.get(stream))
+            if book is not None:
+                with book.lock:
+                    if book.synced:
+                        self.__stats["resyncs"] += 1
+                    book.reset()
+        return
+
+    @staticmethod
+    def __get_symbol(symbol_or_instrument: Union[Instrument, str]) -> str:
+        if isinstance(symbol_or_instrument, str):
+            return symbol_or_instrument
+        elif isinstance(symbol_or_instrument, Instrument):
+            return symbol_or_instrument.symbol
+        raise QuoterException(f"Unrecognized type: {type(symbol_or_instrument)} ")
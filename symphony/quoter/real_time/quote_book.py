@@ -0,0 +1,260 @@
+from typing import Dict, List, Optional, Tuple, Final
+from symphony.config import USE_MODIN
+from symphony.enum import Column
+from symphony.exceptions import QuoterException
+from time import time, sleep
+import numpy as np
+
+if USE_MODIN:
+    import modin.pandas as pd
+else:
+    import pandas as pd
+
+# Columns of the quote array
+BID: Final[int] = 0
+ASK: Final[int] = 1
+BID_QUANTITY: Final[int] = 2
+ASK_QUANTITY: Final[int] = 3
+# Slots preallocated for symbols listed after the book was created
+SLOT_HEADROOM: Final[int] = 64
+# Columns of a liquidity snapshot: the quote columns, then the spread over the ask
+LIQUIDITY_SNAPSHOT_COLUMNS: Final[List[str]] = [Column.BID, Column.ASK, Column.BID_QUANTITY, Column.ASK_QUANTITY,
+                                                Column.LIQUIDITY]
+
+Quote = Tuple[float, float, float, float]
+
+
+def snapshot_frame(symbols: List[str], quotes: np.ndarray) -> pd.DataFrame:
+    """
+    Liquidity snapshot of quotes
+
+    :param symbols: Symbol of each quote
+    :param quotes: float64 array of bid, ask, bid quantity and ask quantity rows
+    :return: DataFrame indexed by symbol with the LIQUIDITY_SNAPSHOT_COLUMNS
+    """
+    liquidity = (quotes[:, ASK] - quotes[:, BID]) / quotes[:, ASK]
+    # Built indexes skip pandas' dtype inference, most of the cost of a small frame
+    return pd.DataFrame(np.column_stack([quotes, liquidity]), index=pd.Index(symbols, dtype=object),
+                        columns=pd.Index(LIQUIDITY_SNAPSHOT_COLUMNS, dtype=object))
+
+
+class QuoteBook:
+    """
+    Top of book of many symbols in preallocated numpy arrays. Each symbol has a fixed slot, a row of
+    bid, ask, bid quantity and ask quantity, plus an update sequence number and the time of the last update.
+
+    A single writer updates slots, any number of threads read without locks. The sequence number works as a
+    seqlock: it is odd while a slot is being written, and readers retry until they saw the same even number
+    before and after reading the row. The number of updates of a slot is half its sequence number.
+
+    The arrays can be placed in a caller's buffer, e.g. shared memory, so that readers in other processes map
+    the same slots. Such a book has a fixed capacity.
+    """
+
+    def __init__(self, symbols: List[str], capacity: Optional[int] = None, buffer: Optional[memoryview] = None):
+        """
+        :param symbols: Symbols to keep quotes for, updates of other symbols are ignored
+        :param capacity: Slots to preallocate, defaults to the number of symbols plus some headroom. Required with
+                         a buffer.
+        :param buffer: Optional buffer of at least `QuoteBook.nbytes(capacity)` bytes to place the arrays in, read
+                       only for a book that is only read. Its contents are kept, a zeroed buffer is an empty book.
+        :raises QuoterException: If the buffer is too small
+        """
+        self.__slots: Dict[str, int] = {}
+        self.__symbols: List[str] = []
+        self.__fixed_capacity: bool = buffer is not None
+        if buffer is None:
+            capacity = max(capacity or 0, len(symbols) + SLOT_HEADROOM)
+            self.__quotes: np.ndarray = np.full((capacity, 4), np.nan, dtype=np.float64)
+            self.__sequences: np.ndarray = np.zeros(capacity, dtype=np.int64)
+            self.__updated: np.ndarray = np.zeros(capacity, dtype=np.float64)
+        else:
+            if not capacity or len(buffer) < QuoteBook.nbytes(capacity):
+                raise QuoterException(f"Buffer of {len(buffer)} bytes cannot hold {capacity} slots")
+            self.__sequences = np.frombuffer(buffer, dtype=np.int64, count=capacity)
+            self.__updated = np.frombuffer(buffer, dtype=np.float64, count=capacity, offset=8 * capacity)
+            self.__quotes = np.frombuffer(buffer, dtype=np.float64, count=4 * capacity,
+                                          offset=16 * capacity).reshape(capacity, 4)
+        for symbol in symbols:
+            self.add_symbol(symbol)
+
+    @staticmethod
+    def nbytes(capacity: int) -> int:
+        """
+        :param capacity: Slots
+        :return: Bytes of the buffer a book of this capacity needs
+        """
+        return 48 * capacity
+
+    def __len__(self) -> int:
+        return len(self.__symbols)
+
+    def __contains__(self, symbol: str) -> bool:
+        """
+        Whether the symbol has a quote
+        """
+        slot = self.__slots.get(symbol)
+        return slot is not None and self.__sequences[slot] > 0
+
+    @property
+    def symbols(self) -> List[str]:
+        return list(self.__symbols)
+
+    def slot(self, symbol: str) -> Optional[int]:
+        """
+        :param symbol: Symbol
+        :return: Slot of the symbol, None if it has none
+        """
+        return self.__slots.get(symbol)
+
+    def add_symbol(self, symbol: str) -> int:
+        """
+        Assigns a slot to a symbol. Only to be called from the writer.
+
+        :param symbol: Symbol
+        :return: The slot
+        :raises QuoterException: If the book is placed in a buffer and full
+        """
+        slot = self.__slots.get(symbol)
+        if slot is not None:
+            return slot
+        slot = len(self.__symbols)
+        if slot == len(self.__sequences):
+            if self.__fixed_capacity:
+                raise QuoterException(f"Quote book is full, {slot} slots")
+            self.__grow(2 * slot)
+        self.__symbols.append(symbol)
+        self.__slots[symbol] = slot
+        return slot
+
+    def update(self,
+               symbol: str,
+               bid: float,
+               ask: float,
+               bid_quantity: float,
+               ask_quantity: float,
+               timestamp: Optional[float] = None
+               ) -> bool:
+        """
+        Writes a quote. Only to be called from the writer.
+
+        :param symbol: Symbol
+        :param bid: Bid
+        :param ask: Ask
+        :param bid_quantity: Bid quantity
+        :param ask_quantity: Ask quantity
+        :param timestamp: Time of the quote, UNIX seconds, defaults to now
+        :return: False if the symbol has no slot and the quote was ignored
+        """
+        slot = self.__slots.get(symbol)
+        if slot is None:
+            return False
+        sequences = self.__sequences
+        sequences[slot] += 1
+        self.__quotes[slot] = (bid, ask, bid_quantity, ask_quantity)
+        self.__updated[slot] = time() if timestamp is None else timestamp
+        sequences[slot] += 1
+        return True
+
+    def get(self, symbol: str, column: int) -> Optional[float]:
+        """
+        One value of a quote
+
+        :param symbol: Symbol
+        :param column: BID, ASK, BID_QUANTITY or ASK_QUANTITY
+        :return: The value, None if the symbol has no quote
+        """
+        slot = self.__slots.get(symbol)
+        if slot is None:
+            return None
+        quotes, sequences = self.__quotes, self.__sequences
+        while True:
+            sequence = sequences[slot]
+            if sequence & 1 == 0:
+                value = quotes[slot, column]
+                if sequences[slot] == sequence:
+                    return float(value) if sequence else None
+            # Mid-write, let the writer finish
+            sleep(0)
+
+    def snapshot(self, symbol: str) -> Optional[Tuple[Quote, int, float]]:
+        """
+        Consistent copy of a quote
+
+        :param symbol: Symbol
+        :return: Tuple of ((bid, ask, bid quantity, ask quantity), number of updates, time of the last update),
+                 None if the symbol has no quote
+        """
+        slot = self.__slots.get(symbol)
+        if slot is None:
+            return None
+        quotes, sequences = self.__quotes, self.__sequences
+        while True:
+            sequence = sequences[slot]
+            if sequence & 1 == 0:
+                bid, ask, bid_quantity, ask_quantity = quotes[slot].tolist()
+                updated = float(self.__updated[slot])
+                if sequences[slot] == sequence:
+                    if not sequence:
+                        return None
+                    return (bid, ask, bid_quantity, ask_quantity), int(sequence) // 2, updated
+            sleep(0)
+
+    def get_many(self, symbols: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Consistent copies of many quotes in one pass, read again if any was caught mid-write
+
+        :param symbols: Symbols
+        :return: Tuple of (float64 array of bid, ask, bid quantity, ask quantity rows, time of each last update),
+                 NaN where a symbol has no quote
+        """
+        slot = self.__slots.get
+        slots = np.fromiter((slot(symbol, -1) for symbol in symbols), dtype=np.int64, count=len(symbols))
+        known = slots >= 0
+        if not known.all():
+            if not known.any():
+                return np.full((len(symbols), 4), np.nan), np.full(len(symbols), np.nan)
+            slots = np.where(known, slots, 0)
+        while True:
+            quotes_array, updated_array, sequences = self.__quotes, self.__updated, self.__sequences
+            before = sequences[slots]
+            quotes = quotes_array[slots]
+            updated = updated_array[slots]
+            torn = (before != sequences[slots]) | (before & 1 == 1)
+            if not torn.any():
+                break
+            sleep(0)
+        unquoted = ~known | (before == 0)
+        quotes[unquoted], updated[unquoted] = np.nan, np.nan
+        return quotes, updated
+
+    def sequence(self, symbol: str) -> int:
+        """
+        :param symbol: Symbol
+        :return: Number of updates of the symbol, 0 if it has no slot
+        """
+        slot = self.__slots.get(symbol)
+        return 0 if slot is None else int(self.__sequences[slot]) // 2
+
+    @property
+    def capacity(self) -> int:
+        return len(self.__sequences)
+
+    def num_quoted(self) -> int:
+        """
+        :return: Number of symbols with a quote
+        """
+        return int(np.count_nonzero(self.__sequences[:len(self.__symbols)]))
+
+    def __grow(self, capacity: int) -> None:
+        """
+        Reallocates the arrays. Readers holding the old arrays see no updates until their next read.
+        """
+        quotes = np.full((capacity, 4), np.nan, dtype=np.float64)
+        sequences = np.zeros(capacity, dtype=np.int64)
+        updated = np.zeros(capacity, dtype=np.float64)
+        size = len(self.__sequences)
+        quotes[:size], sequences[:size], updated[:size] = self.__quotes, self.__sequences, self.__updated
+        self.__quotes, self.__updated = quotes, updated
+        self.__sequences = sequences
+        return
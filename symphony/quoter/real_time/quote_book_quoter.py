@@ -0,0 +1,391 @@
+from abc import abstractmethod
+from symphony.abc import RealTimeQuoter
+from symphony.config import USE_MODIN
+from symphony.data_classes import Instrument
+from symphony.enum import Column, Market
+from symphony.exceptions import QuoterException
+from symphony.quoter.real_time.quote_book import QuoteBook, Quote, BID, ASK, BID_QUANTITY, ASK_QUANTITY, snapshot_frame
+from typing import Dict, List, Optional, Union, Tuple, Final, Sequence
+from time import time
+import numpy as np
+import json
+
+if USE_MODIN:
+    import modin.pandas as pd
+else:
+    import pandas as pd
+
+# Position of each quote Column in a Quote
+QUOTE_COLUMNS: Final[Dict[Column, int]] = {
+    Column.BID: BID,
+    Column.ASK: ASK,
+    Column.BID_QUANTITY: BID_QUANTITY,
+    Column.ASK_QUANTITY: ASK_QUANTITY
+}
+# How long getters falling back to the API wait for a quote from the quote book before querying it
+API_FALLBACK_DEADLINE_SECS: Final[float] = 1.0
+# Above this many symbols one book ticker request fetches all symbols instead of listing them
+BOOK_TICKER_MAX_SYMBOLS: Final[int] = 100
+
+
+class QuoteBookQuoter(RealTimeQuoter):
+    """
+    Binance quoter reading a QuoteBook, with staleness thresholds and book ticker API fallbacks. Subclasses fill
+    the book, or map one filled elsewhere, and tell how to wait for it.
+    """
+
+    def __init__(self,
+                 instruments: List[Instrument],
+                 quote_book: QuoteBook,
+                 max_quote_age_secs: Optional[float] = None,
+                 api_fallback_deadline_secs: Optional[float] = API_FALLBACK_DEADLINE_SECS):
+        """
+        :param instruments: Instruments of the client
+        :param quote_book: Quote book read
+        :param max_quote_age_secs: Quotes older than this are stale and treated as missing, defaults to never.
+                                   Can be set per symbol with `set_max_quote_age`
+        :param api_fallback_deadline_secs: Getters falling back to the API wait this long for the quote book first
+        """
+        self.instruments: List[Instrument] = instruments
+        self.quote_book: QuoteBook = quote_book
+        self.__digits: Dict[str, int] = {instrument.symbol: instrument.digits for instrument in instruments}
+        # Quotes fetched from the API and when, until the quote book has the symbol
+        self.__api_quotes: Dict[str, Tuple[Quote, float]] = {}
+        self.max_quote_age_secs: Optional[float] = max_quote_age_secs
+        self.__max_quote_ages: Dict[str, float] = {}
+        self.api_fallback_deadline_secs: float = api_fallback_deadline_secs
+
+    @abstractmethod
+    def _wait(self, symbols: List[str], timeout: Optional[float]) -> List[str]:
+        """
+        Waits for fresh quotes in the quote book
+
+        :param symbols: Symbols
+        :param timeout: Seconds to wait at most, None for no limit
+        :return: The symbols still without a fresh quote
+        """
+        pass
+
+    def _refresh_symbols(self) -> None:
+        """
+        Picks up the symbols added to the quote book by another writer, called when a symbol has no slot
+        """
+        return
+
+    @property
+    def quotes(self) -> Dict[str, Dict[Column, float]]:
+        """
+        Copy of all quotes in the quote book, by symbol. Use the getters for single values.
+        """
+        self._refresh_symbols()
+        quotes: Dict[str, Dict[Column, float]] = {}
+        for symbol in self.quote_book.symbols:
+            snapshot = self.quote_book.snapshot(symbol)
+            if snapshot:
+                quotes[symbol] = dict(zip([Column.BID, Column.ASK, Column.BID_QUANTITY, Column.ASK_QUANTITY],
+                                          snapshot[0]))
+        return quotes
+
+    def get_bid(self, symbol_or_instrument: Union[Instrument, str], fall_back_to_api: Optional[bool] = False) -> float:
+        """
+        Get the bid price for a specific instrument or symbol
+
+        :param symbol_or_instrument: Either instrument or symbol
+        :param fall_back_to_api: If the quote book has no fresh quote, fallback to querying API, defaults to [False]
+        :return: The bid
+        :raises QuoterException: If the symbol is not present and `fallback_to_api` is False
+        """
+        return self.__get(symbol_or_instrument, Column.BID, fall_back_to_api=fall_back_to_api)
+
+    def get_ask(self, symbol_or_instrument: Union[Instrument, str], fall_back_to_api: Optional[bool] = False) -> float:
+        """
+        Get the ask price for a specific instrument or symbol
+
+        :param symbol_or_instrument: Either instrument or symbol
+        :param fall_back_to_api: If the quote book has no fresh quote, fallback to querying API, defaults to [False]
+        :return: The Ask
+        :raises QuoterException: If the symbol is not present and `fallback_to_api` is False
+        """
+        return self.__get(symbol_or_instrument, Column.ASK, fall_back_to_api=fall_back_to_api)
+
+    def get_bid_quantity(self, symbol_or_instrument: Union[Instrument, str], fall_back_to_api: Optional[bool] = False) -> float:
+        """
+        Get the bid quantity price for a specific instrument or symbol
+
+        :param symbol_or_instrument: Either instrument or symbol
+        :param fall_back_to_api: If the quote book has no fresh quote, fallback to querying API, defaults to [False]
+        :return: The bid quantity
+        :raises QuoterException: If the symbol is not present and `fallback_to_api` is False
+        """
+        return self.__get(symbol_or_instrument, Column.BID_QUANTITY, fall_back_to_api=fall_back_to_api)
+
+    def get_ask_quantity(self, symbol_or_instrument: Union[Instrument, str], fall_back_to_api: Optional[bool] = False) -> float:
+        """
+        Get the ask quantity for a specific instrument or symbol
+
+        :param symbol_or_instrument: Either instrument or symbol
+        :param fall_back_to_api: If the quote book has no fresh quote, fallback to querying API, defaults to [False]
+        :return: The Ask quantity
+        :raises QuoterException: If the symbol is not present and `fallback_to_api` is False
+        """
+        return self.__get(symbol_or_instrument, Column.ASK_QUANTITY, fall_back_to_api=fall_back_to_api)
+
+    def get_midpoint(self, symbol_or_instrument: Union[Instrument, str], fall_back_to_api: Optional[bool] = False) -> float:
+        """
+        Get the midpoint, rounded to the digits of the instrument
+
+        :param symbol_or_instrument: Either instrument or symbol
+        :param fall_back_to_api: If the quote book has no fresh quote, fallback to querying API, defaults to [False]
+        :return: The midpoint
+        :raises QuoterException: If the symbol is not present and `fallback_to_api` is False
+        """
+        return self.__get(symbol_or_instrument, Column.MIDPOINT, fall_back_to_api=fall_back_to_api)
+
+    def get_liquidity(self, symbol_or_instrument: Union[Instrument, str], fall_back_to_api: Optional[bool] = False) -> float:
+        """
+        Gets crude liquidity. Ask - Bid / Ask
+
+        :param symbol_or_instrument: Either instrument or symbol
+        :param fall_back_to_api: If the quote book has no fresh quote, fallback to querying API, defaults to [False]
+        :return: Spread over price ratio
+        :raises QuoterException: If the symbol is not present and `fallback_to_api` is False
+        """
+        return self.__get(symbol_or_instrument, Column.LIQUIDITY, fall_back_to_api=fall_back_to_api)
+
+    def get_price(self, symbol_or_instrument: Union[Instrument, str], order_side: Market, fall_back_to_api: Optional[bool] = False) -> float:
+        """
+        Gets the right price, either BID or ASK, for the Market type
+
+        :param symbol_or_instrument: Either instrument or symbol
+        :param order_side: BUY or SELL
+        :param fall_back_to_api: Optionally fall back to api
+        :return: price
+        :raises QuoterException: If the symbol is not present and `fallback_to_api` is False, if order_side is unknown
+        """
+        if order_side not in [Market.BUY, Market.SELL]:
+            raise QuoterException(f"Unknown order side: {order_side}")
+
+        if order_side == Market.BUY:
+            return self.__get(symbol_or_instrument, Column.ASK, fall_back_to_api=fall_back_to_api)
+        else:
+            return self.__get(symbol_or_instrument, Column.BID, fall_back_to_api=fall_back_to_api)
+
+    def set_max_quote_age(self, symbol_or_instrument: Union[Instrument, str], max_age_secs: Optional[float]) -> None:
+        """
+        Sets the staleness threshold of one symbol, overriding `max_quote_age_secs`
+
+        :param symbol_or_instrument: Either instrument or symbol
+        :param max_age_secs: Quotes older than this are treated as missing, None to use the default again
+        :return: None
+        """
+        symbol = self.__get_symbol(symbol_or_instrument)
+        if max_age_secs is None:
+            self.__max_quote_ages.pop(symbol, None)
+        else:
+            self.__max_quote_ages[symbol] = max_age_secs
+        return
+
+    def wait_for_quote(self,
+                       symbols_or_instruments: Union[List[Union[Instrument, str]], Instrument, str],
+                       timeout: Optional[float] = None,
+                       fall_back_to_api: Optional[bool] = False) -> List[str]:
+        """
+        Blocks until the quote book has a fresh quote for every symbol, or the timeout passes
+
+        :param symbols_or_instruments: One or more instruments or symbols
+        :param timeout: Seconds to wait at most, defaults to no limit
+        :param fall_back_to_api: Fetch the symbols still missing at the timeout with a single API request
+        :return: The symbols without a fresh quote, empty if all are quoted
+        :raises QuoterException: If a symbol is unknown
+        """
+        if not isinstance(symbols_or_instruments, list):
+            symbols_or_instruments = [symbols_or_instruments]
+        symbols = [self.__get_symbol(symbol_or_instrument) for symbol_or_instrument in symbols_or_instruments]
+        unknown = [symbol for symbol in symbols if symbol not in self.__digits]
+        if unknown:
+            raise QuoterException(f"Unknown symbols {unknown}")
+        missing = self._wait(symbols, timeout)
+        if missing and fall_back_to_api:
+            self.__fetch_from_api([symbol for symbol in missing if self.__get_api_quote(symbol) is None])
+            missing = [symbol for symbol in missing if self.__get_api_quote(symbol) is None]
+        return missing
+
+    def quote_sequence(self, symbol_or_instrument: Union[Instrument, str]) -> Optional[int]:
+        """
+        Number of updates of a symbol's quote, a cheap way to tell whether it changed
+
+        :param symbol_or_instrument: Either instrument or symbol
+        :return: The number, None if the quote is missing or stale, i.e. the getters would not use it
+        """
+        symbol = self.__get_symbol(symbol_or_instrument)
+        if self.quote_book.slot(symbol) is None:
+            self._refresh_symbols()
+        sequence = self.quote_book.sequence(symbol)
+        if not sequence or (self.__max_quote_age(symbol) is not None and self._get_quote(symbol) is None):
+            return None
+        return sequence
+
+    def get_quotes(self, symbols_or_instruments: Sequence[Union[Instrument, str]]) -> np.ndarray:
+        """
+        Fresh quotes of many symbols in one pass over the quote book. Quotes fetched from the API are not included.
+
+        :param symbols_or_instruments: Instruments or symbols
+        :return: float64 array of bid, ask, bid quantity and ask quantity rows, NaN where a quote is missing or stale
+        """
+        symbols = [symbol_or_instrument if isinstance(symbol_or_instrument, str) else self.__get_symbol(symbol_or_instrument)
+                   for symbol_or_instrument in symbols_or_instruments]
+        self._refresh_symbols()
+        quotes, updated = self.quote_book.get_many(symbols)
+        if self.max_quote_age_secs is not None or self.__max_quote_ages:
+            max_ages = np.array([self.__max_quote_age(symbol) for symbol in symbols], dtype=np.float64)
+            quotes[time() - updated > max_ages] = np.nan
+        return quotes
+
+    def liquidity_snapshot(self,
+                           symbols_or_instruments: Sequence[Union[Instrument, str]],
+                           fall_back_to_api: Optional[bool] = True) -> pd.DataFrame:
+        """
+        Top of book and liquidity of many symbols in one call. Fresh quotes are read in one pass over the quote
+        book, the others from earlier API requests, and those still missing are fetched with a single book ticker
+        request.
+
+        :param symbols_or_instruments: Instruments or symbols
+        :param fall_back_to_api: Whether to fetch the missing quotes, defaults to [True]
+        :return: DataFrame indexed by symbol with the LIQUIDITY_SNAPSHOT_COLUMNS, NaN where there is no quote
+        """
+        symbols = [self.__get_symbol(symbol_or_instrument) for symbol_or_instrument in symbols_or_instruments]
+        quotes = self.get_quotes(symbols)
+        missing = np.flatnonzero(np.isnan(quotes[:, BID]))
+        if len(missing):
+            api_quotes = [self.__get_api_quote(symbols[i]) for i in missing]
+            unfetched = [symbols[i] for i, api_quote in zip(missing, api_quotes) if api_quote is None]
+            if fall_back_to_api and unfetched:
+                self.__fetch_from_api(list(dict.fromkeys(unfetched)))
+                api_quotes = [self.__get_api_quote(symbols[i]) for i in missing]
+            for i, api_quote in zip(missing, api_quotes):
+                if api_quote is not None:
+                    quotes[i] = api_quote
+        return snapshot_frame(symbols, quotes)
+
+    def _get_quote(self, symbol: str) -> Optional[Quote]:
+        """
+        Fresh quote of the quote book
+
+        :param symbol: Symbol
+        :return: Tuple of (bid, ask, bid quantity, ask quantity), None if missing or stale
+        """
+        snapshot = self.quote_book.snapshot(symbol)
+        if snapshot is None and self.quote_book.slot(symbol) is None:
+            self._refresh_symbols()
+            snapshot = self.quote_book.snapshot(symbol)
+        if snapshot is None:
+            return None
+        max_age = self.__max_quote_age(symbol)
+        if max_age is not None and time() - snapshot[2] > max_age:
+            return None
+        return snapshot[0]
+
+    def __get_symbol(self, symbol_or_instrument: Union[Instrument, str]) -> str:
+        """
+        Helper method to extract a symbol
+
+        :param symbol_or_instrument: Either instrument or symbol
+        :return: The string representation
+        """
+        if isinstance(symbol_or_instrument, str):
+            return symbol_or_instrument
+        elif isinstance(symbol_or_instrument, Instrument):
+            return symbol_or_instrument.symbol
+        else:
+            raise QuoterException(f"Unrecognized type: {type(symbol_or_instrument)} ")
+
+    def __max_quote_age(self, symbol: str) -> Optional[float]:
+        return self.__max_quote_ages.get(symbol, self.max_quote_age_secs)
+
+    def __get_api_quote(self, symbol: str) -> Optional[Quote]:
+        """
+        Fresh quote fetched from the API
+
+        :param symbol: Symbol
+        :return: Tuple of (bid, ask, bid quantity, ask quantity), None if missing or stale
+        """
+        api_quote = self.__api_quotes.get(symbol)
+        if api_quote is None:
+            return None
+        max_age = self.__max_quote_age(symbol)
+        if max_age is not None and time() - api_quote[1] > max_age:
+            return None
+        return api_quote[0]
+
+    def __get(self, symbol_or_instrument: Union[Instrument, str], column: Column, fall_back_to_api: Optional[bool] = False) -> float:
+        """
+        Generic get for ASK, BID, ASK_QUANTITY, BID_QUANTITY, MIDPOINT, or LIQUIDITY
+
+        :param symbol_or_instrument: Symbol or instrument
+        :param column: Column
+        :param fall_back_to_api: If the quote book has no fresh quote, wait for it until the deadline and then query
+                                 the API, defaults to [False]
+        :return: The quantity or price
+        """
+        symbol = self.__get_symbol(symbol_or_instrument)
+        quote = self._get_quote(symbol)
+        if quote is None:
+            quote = self.__get_fallback(symbol, fall_back_to_api)
+        if column == Column.MIDPOINT:
+            return round((quote[0] + quote[1]) / 2, self.__digits[symbol])
+        if column == Column.LIQUIDITY:
+            return (quote[1] - quote[0]) / quote[1]
+        return quote[QUOTE_COLUMNS[column]]
+
+    def __get_fallback(self, symbol: str, fall_back_to_api: bool) -> Quote:
+        """
+        Quote of a symbol the quote book has no fresh quote for. Waits for it until the deadline, then asks the API.
+
+        :param symbol: Symbol
+        :param fall_back_to_api: Whether the caller allows it
+        :return: Tuple of (bid, ask, bid quantity, ask quantity)
+        :raises QuoterException: If the caller does not allow it, or the symbol is unknown
+        """
+        quote = self.__get_api_quote(symbol)
+        if quote is not None:
+            return quote
+        if not fall_back_to_api:
+            if symbol in self.quote_book:
+                raise QuoterException(f"Quote of {symbol} is stale")
+            raise QuoterException(f"Symbol {symbol} not present")
+        if symbol not in self.__digits:
+            raise QuoterException(f"Unknown symbol {symbol}")
+        if not self._wait([symbol], self.api_fallback_deadline_secs):
+            quote = self._get_quote(symbol)
+            if quote is not None:
+                return quote
+        self.__fetch_from_api([symbol])
+        quote = self.__get_api_quote(symbol)
+        if quote is None:
+            raise QuoterException(f"No quote for {symbol} from the API")
+        return quote
+
+    def __fetch_from_api(self, symbols: List[str]) -> None:
+        """
+        Fetches the top of the order book of the symbols with one book ticker request. The quotes are kept apart
+        from the quote book, which has a single writer.
+
+        :param symbols: Symbols
+        :return: None
+        """
+        if not symbols:
+            return
+        client = self.symphony_client.binance_client
+        if len(symbols) > BOOK_TICKER_MAX_SYMBOLS:
+            tickers = client.get_orderbook_tickers()
+        else:
+            tickers = client.get_orderbook_tickers(symbols=json.dumps(symbols, separators=(",", ":")))
+        if isinstance(tickers, dict):
+            tickers = [tickers]
+        wanted = set(symbols)
+        fetched_at = time()
+        for ticker in tickers:
+            if ticker["symbol"] in wanted:
+                self.__api_quotes[ticker["symbol"]] = ((float(ticker["bidPrice"]), float(ticker["askPrice"]),
+                                                        float(ticker["bidQty"]), float(ticker["askQty"])), fetched_at)
+        return
@@ -0,0 +1,286 @@
+from symphony.client import BinanceClient
+from symphony.config import LOG_LEVEL
+from symphony.enum import Exchange
+from symphony.exceptions import QuoterException
+from symphony.quoter.real_time.quote_book import QuoteBook, Quote, SLOT_HEADROOM
+from symphony.quoter.real_time.quote_book_quoter import QuoteBookQuoter, API_FALLBACK_DEADLINE_SECS
+from typing import List, Optional, Tuple, Final
+from time import monotonic, sleep
+import numpy as np
+import tempfile
+import pathlib
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+SHARED_QUOTES_NAME: Final[str] = "symphony_quotes"
+# Memory backed on Linux, segments elsewhere live in the temp dir and are paged by the OS
+SHARED_QUOTES_DIR: Final[str] = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+SHARED_LAYOUT_VERSION: Final[int] = 2
+# Symbols are stored as fixed width ASCII
+SHARED_SYMBOL_BYTES: Final[int] = 32
+SHARED_HEADER_BYTES: Final[int] = 64
+# How often readers waiting for a quote look at the segment again
+SHARED_POLL_SECS: Final[float] = 0.001
+
+# A shared quote segment is a file in SHARED_QUOTES_DIR, memory mapped by the publisher and every reader
+#
+#     header      version, capacity, number of symbols, generation and retired flag, int64, padded to
+#                 SHARED_HEADER_BYTES
+#     symbols     symbol of each slot, SHARED_SYMBOL_BYTES each
+#     quote book  QuoteBook arrays, see QuoteBook.nbytes
+#
+# Symbols are written before the number of symbols is raised, so readers never see a slot without its symbol.
+# A publisher replacing a segment, e.g. after a restart, counts up the generation and flags the segment it replaced
+# as retired, as does a publisher closing its segment. Readers of a retired segment map the current one again.
+
+SHARED_HEADER_DTYPE: Final[np.dtype] = np.dtype([
+    ("version", "<i8"),
+    ("capacity", "<i8"),
+    ("num_symbols", "<i8"),
+    ("generation", "<i8"),
+    ("retired", "<i8")
+])
+
+
+def shared_quotes_path(name: str) -> str:
+    """
+    :param name: Segment name
+    :return: Path of the segment
+    """
+    return str(pathlib.Path(SHARED_QUOTES_DIR, name))
+
+
+def shared_quotes_nbytes(capacity: int) -> int:
+    """
+    :param capacity: Slots
+    :return: Size of a shared quote segment of this capacity
+    """
+    return SHARED_HEADER_BYTES + capacity * SHARED_SYMBOL_BYTES + QuoteBook.nbytes(capacity)
+
+
+def map_shared_quotes(segment: np.memmap) -> Tuple[np.ndarray, np.ndarray, QuoteBook]:
+    """
+    Places the header, symbol table and quote book in a mapped segment
+
+    :param segment: The segment, as bytes
+    :return: Tuple of (header, symbols, quote book without symbols)
+    """
+    header = segment[:SHARED_HEADER_DTYPE.itemsize].view(SHARED_HEADER_DTYPE)
+    capacity = int(header["capacity"][0])
+    symbols_end = SHARED_HEADER_BYTES + capacity * SHARED_SYMBOL_BYTES
+    symbols = segment[SHARED_HEADER_BYTES:symbols_end].view(f"S{SHARED_SYMBOL_BYTES}")
+    return header, symbols, QuoteBook([], capacity, buffer=memoryview(segment[symbols_end:]))
+
+
+class SharedQuotePublisher:
+    """
+    Owns a shared quote segment and the quote book placed in it. The process ingesting quotes writes to
+    `quote_book` as usual, other processes read it with a SharedMemoryQuoter.
+    """
+
+    def __init__(self, symbols: List[str], name: Optional[str] = SHARED_QUOTES_NAME, capacity: Optional[int] = None):
+        """
+        :param symbols: Symbols to publish quotes of
+        :param name: Segment name. A segment of that name is replaced and retired, its readers move over to this one.
+        :param capacity: Slots, defaults to the number of symbols plus some headroom
+        :raises QuoterException: If a symbol is too long
+        """
+        capacity = max(capacity or 0, len(symbols) + SLOT_HEADROOM)
+        self.name: str = name
+        self.path: str = shared_quotes_path(name)
+        previous_header = self.__map_header(self.path)
+        self.generation: int = 1 if previous_header is None else int(previous_header["generation"][0]) + 1
+        # Built aside and moved in place, readers only ever map a complete segment
+        staging_path = f"{self.path}.{os.getpid()}.tmp"
+        self.segment: np.memmap = np.memmap(staging_path, dtype=np.uint8, mode="w+",
+                                            shape=(shared_quotes_nbytes(capacity),))
+        self.segment[:SHARED_HEADER_DTYPE.itemsize].view(SHARED_HEADER_DTYPE)[0] = \
+            (SHARED_LAYOUT_VERSION, capacity, 0, self.generation, 0)
+        self.__header, self.__symbols, self.quote_book = map_shared_quotes(self.segment)
+        for symbol in symbols:
+            self.add_symbol(symbol)
+        os.replace(staging_path, self.path)
+        if previous_header is not None:
+            previous_header["retired"] = 1
+
+    @staticmethod
+    def __map_header(path: str) -> Optional[np.ndarray]:
+        """
+        Maps the header of an existing segment for writing
+
+        :param path: Path of the segment
+        :return: The header, None if there is no segment of the current layout version
+        """
+        try:
+            segment = np.memmap(path, dtype=np.uint8, mode="r+")
+        except (FileNotFoundError, ValueError):
+            return None
+        if len(segment) < SHARED_HEADER_BYTES:
+            return None
+        header = segment[:SHARED_HEADER_DTYPE.itemsize].view(SHARED_HEADER_DTYPE)
+        if header["version"][0] != SHARED_LAYOUT_VERSION:
+            return None
+        return header
+
+    def add_symbol(self, symbol: str) -> int:
+        """
+        Assigns a slot to a symbol and publishes it. Only to be called from the writer.
+
+        :param symbol: Symbol
+        :return: The slot
+        :raises QuoterException: If the symbol is too long, if the segment is full
+        """
+        encoded = symbol.encode("ascii")
+        if len(encoded) > SHARED_SYMBOL_BYTES:
+            raise QuoterException(f"Symbol {symbol} is longer than {SHARED_SYMBOL_BYTES} bytes")
+        slot = self.quote_book.add_symbol(symbol)
+        if slot >= self.__header["num_symbols"][0]:
+            self.__symbols[slot] = encoded
+            self.__header["num_symbols"] = slot + 1
+        return slot
+
+    def close(self) -> None:
+        """
+        Retires and removes the segment, unless another publisher replaced it already. Attached readers raise
+        instead of serving the last quotes.
+
+        :return: None
+        """
+        if self.segment is None:
+            return
+        replaced = bool(self.__header["retired"][0])
+        self.__header["retired"] = 1
+        self.segment, self.__header, self.__symbols = None, None, None
+        if not replaced:
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+        return
+
+
+class SharedMemoryQuoter(QuoteBookQuoter):
+
+    def __init__(self,
+                 binance_client: BinanceClient,
+                 name: Optional[str] = SHARED_QUOTES_NAME,
+                 log_level: Optional[int] = LOG_LEVEL,
+                 max_quote_age_secs: Optional[float] = None,
+                 api_fallback_deadline_secs: Optional[float] = API_FALLBACK_DEADLINE_SECS):
+        """
+        Real time quotes published by a BinanceRealTimeQuoter in another process, see its `shared_memory_name`.
+        Maps the publisher's quote book read only and reads it in place, no sockets and no copies. Any number of
+        processes can attach.
+
+        :param binance_client: Binance client instance, for the instruments and API fallbacks
+        :param name: Segment name the publisher uses
+        :param log_level: Optional log level
+        :param max_quote_age_secs: Quotes older than this are stale and treated as missing, defaults to never.
+                                   Quotes of a publisher that died go stale. Can be set per symbol with
+                                   `set_max_quote_age`
+        :param api_fallback_deadline_secs: Getters falling back to the API wait this long for the publisher first
+        :raises QuoterException: If there is no segment, or it is not ready or of another layout version
+        """
+        self.symphony_client: BinanceClient = binance_client
+        self.exchange: Exchange = Exchange.BINANCE
+        self.name: str = name
+        QuoteBookQuoter.__init__(self, binance_client.get_all_instruments(), self.__map(),
+                                 max_quote_age_secs=max_quote_age_secs,
+                                 api_fallback_deadline_secs=api_fallback_deadline_secs)
+        self._refresh_symbols()
+        logger.setLevel(log_level)
+
+    def __map(self) -> QuoteBook:
+        """
+        Maps the current segment of the name
+
+        :return: Its quote book, without symbols
+        :raises QuoterException: If there is no segment, or it is of another layout version
+        """
+        try:
+            self.segment: np.memmap = np.memmap(shared_quotes_path(self.name), dtype=np.uint8, mode="r")
+        except FileNotFoundError:
+            raise QuoterException(f"No shared quotes {self.name}, is the publishing quoter running?")
+        version = int(self.segment[:SHARED_HEADER_DTYPE.itemsize].view(SHARED_HEADER_DTYPE)["version"][0])
+        if version != SHARED_LAYOUT_VERSION:
+            raise QuoterException(f"Shared quotes {self.name} have layout version {version}, "
+                                  f"expected {SHARED_LAYOUT_VERSION}")
+        self.__header, self.__symbols, quote_book = map_shared_quotes(self.segment)
+        self.__retired: np.ndarray = self.__header["retired"]
+        self.generation: int = int(self.__header["generation"][0])
+        return quote_book
+
+    def __remap(self) -> None:
+        """
+        Moves over to the segment of a restarted publisher. Its quote book starts empty.
+
+        :return: None
+        :raises QuoterException: If the publisher closed its segment and there is no other
+        """
+        generation = self.generation
+        self.quote_book = self.__map()
+        logger.info(f"Shared quotes {self.name} were replaced, moved from generation {generation} "
+                    f"to {self.generation}")
+        self._refresh_symbols()
+        return
+
+    def close(self) -> None:
+        """
+        Detaches from the segment, it is unmapped once nothing references the quote book
+
+        :return: None
+        """
+        self.quote_book, self.__header, self.__symbols, self.segment = None, None, None, None
+        self.__retired = None
+        return
+
+    def contains_all_instruments(self) -> bool:
+        """
+        Returns true if the publisher has quoted all tradeable exchange instruments
+
+        :return: True or False
+        """
+        self._refresh_symbols()
+        return self.quote_book.num_quoted() >= len(self.instruments)
+
+    def _refresh_symbols(self) -> None:
+        """
+        Maps the slots the publisher added since the last look, or the segment replacing a retired one
+        """
+        if self.__retired[0]:
+            self.__remap()
+            return
+        num_symbols = int(self.__header["num_symbols"][0])
+        for slot in range(len(self.quote_book), num_symbols):
+            self.quote_book.add_symbol(self.__symbols[slot].decode("ascii"))
+        return
+
+    def _get_quote(self, symbol: str) -> Optional[Quote]:
+        """
+        Fresh quote of the publisher, from the current segment
+
+        :param symbol: Symbol
+        :return: Tuple of (bid, ask, bid quantity, ask quantity), None if missing or stale
+        :raises QuoterException: If the publisher closed its segment
+        """
+        if self.__retired[0]:
+            self.__remap()
+        return QuoteBookQuoter._get_quote(self, symbol)
+
+    def _wait(self, symbols: List[str], timeout: Optional[float]) -> List[str]:
+        """
+        Polls the segment for fresh quotes, there is no signal across processes
+
+        :param symbols: Symbols
+        :param timeout: Seconds to wait at most, None for no limit
+        :return: The symbols still without a fresh quote
+        """
+        deadline = None if timeout is None else monotonic() + timeout
+        missing = symbols
+        while True:
+            missing = [symbol for symbol in missing if self._get_quote(symbol) is None]
+            if not missing or (deadline is not None and monotonic() >= deadline):
+                return missing
+            sleep(SHARED_POLL_SECS)
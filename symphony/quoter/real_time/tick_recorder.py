@@ -0,0 +1,302 @@
+from typing import Callable, Dict, List, Optional, Tuple, Final, Any
+from symphony.exceptions import QuoterException
+from symphony.quoter.real_time.quote_book import QuoteBook
+from symphony.config import USE_MODIN
+from collections import deque
+from time import time_ns, sleep, perf_counter
+import numpy as np
+import threading
+import pathlib
+import json
+import os
+
+if USE_MODIN:
+    import modin.pandas as pd
+else:
+    import pandas as pd
+
+TICK_RECORD_VERSION: Final[int] = 1
+TICK_META_FILE: Final[str] = "meta.json"
+TICK_RECORDS_FILE: Final[str] = "ticks.bin"
+# One fixed size record per tick. Timestamps are local receive time, UNIX ns. Slots index the symbols in meta.json
+TICK_DTYPE: Final[np.dtype] = np.dtype([
+    ("timestamp", "<i8"),
+    ("slot", "<i8"),
+    ("bid", "<f8"),
+    ("ask", "<f8"),
+    ("bid_quantity", "<f8"),
+    ("ask_quantity", "<f8")
+])
+# How often the writer thread appends pending ticks to the file
+TICK_FLUSH_SECS: Final[float] = 0.1
+# Ticks read from the memory map at a time when replaying
+REPLAY_CHUNK_TICKS: Final[int] = 65536
+
+# A tick recording is a directory holding
+#
+#     meta.json   format version, record dtype and the symbol of each slot
+#     ticks.bin   TICK_DTYPE records, appended in arrival order, no header
+#
+# Slots are the recording's own. A recorder appending to a directory keeps its symbols in place and appends the
+# symbols of its book that are missing, so recording resumes after symbols were listed or delisted.
+
+PushQuote = Callable[[str, float, float, float, float, float], Any]
+
+
+def read_tick_meta(record_dir: str) -> Optional[Dict[str, Any]]:
+    """
+    Reads the metadata of a tick recording
+
+    :param record_dir: Recording directory
+    :return: The metadata, None if there is no recording
+    :raises QuoterException: If the recording was written with another version or record layout
+    """
+    meta_path = pathlib.Path(record_dir, TICK_META_FILE)
+    if not meta_path.is_file():
+        return None
+    with open(meta_path, "r") as meta_file:
+        meta = json.load(meta_file)
+    if meta.get("version") != TICK_RECORD_VERSION or meta.get("record_size") != TICK_DTYPE.itemsize:
+        raise QuoterException(f"Unsupported tick recording {record_dir}: version {meta.get('version')}")
+    return meta
+
+
+def read_ticks(record_dir: str) -> Tuple[np.ndarray, List[str]]:
+    """
+    Memory maps a tick recording. A record cut short by a crash at the end of the file is ignored.
+
+    :param record_dir: Recording directory
+    :return: Tuple of (read only TICK_DTYPE array, symbol of each slot)
+    :raises QuoterException: If there is no recording
+    """
+    meta = read_tick_meta(record_dir)
+    if meta is None:
+        raise QuoterException(f"No tick recording in {record_dir}")
+    records_path = pathlib.Path(record_dir, TICK_RECORDS_FILE)
+    num_ticks = records_path.stat().st_size // TICK_DTYPE.itemsize if records_path.is_file() else 0
+    if not num_ticks:
+        return np.empty(0, dtype=TICK_DTYPE), meta["symbols"]
+    return np.memmap(records_path, dtype=TICK_DTYPE, mode="r", shape=(num_ticks,)), meta["symbols"]
+
+
+class TickRecorder:
+    """
+    Appends the ticks of a quote book to a tick recording. `record` only queues the tick, a background thread
+    resolves slots and writes the queued ticks in batches. Ticks of symbols the book has no slot for are dropped.
+    """
+
+    def __init__(self, record_dir: str, quote_book: QuoteBook, flush_secs: Optional[float] = TICK_FLUSH_SECS):
+        """
+        :param record_dir: Recording directory, appended to if it exists
+        :param quote_book: Quote book whose symbols are recorded
+        :param flush_secs: How often pending ticks are written
+        :raises QuoterException: If the directory holds a recording of another version
+        """
+        self.record_dir: str = record_dir
+        self.quote_book: QuoteBook = quote_book
+        self.flush_secs: float = flush_secs
+        meta = read_tick_meta(record_dir)
+        pathlib.Path(record_dir).mkdir(parents=True, exist_ok=True)
+        # Symbol of each recording slot, the recorded ones first, and the slot of each
+        self.__symbols: List[str] = list(meta["symbols"]) if meta is not None else []
+        self.__slots: Dict[str, int] = {symbol: slot for slot, symbol in enumerate(self.__symbols)}
+        self.__add_symbols(quote_book.symbols)
+        self.__num_symbols_written: int = 0
+        self.__pending: deque = deque()
+        self.__file = None
+        self.__thread: Optional[threading.Thread] = None
+        self.__stopped: threading.Event = threading.Event()
+        self.__write_lock: threading.Lock = threading.Lock()
+        self.__stats: Dict[str, int] = {
+            "recorded": 0,
+            "unknown_symbols": 0,
+            "writes": 0
+        }
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """
+        Ticks written, ticks dropped because the symbol had no slot, and batches written
+        """
+        return dict(self.__stats)
+
+    @property
+    def pending(self) -> int:
+        return len(self.__pending)
+
+    def start(self) -> None:
+        """
+        Starts the writer thread
+
+        :return: None
+        """
+        if self.__thread is not None:
+            return
+        self.__file = open(pathlib.Path(self.record_dir, TICK_RECORDS_FILE), "ab")
+        # A record cut short by a crash is dropped, the ticks appended after it would be misaligned
+        size = self.__file.tell()
+        if size % TICK_DTYPE.itemsize:
+            self.__file.truncate(size - size % TICK_DTYPE.itemsize)
+        self.__write_meta()
+        self.__stopped.clear()
+        self.__thread = threading.Thread(target=self.__run, name="TickRecorder", daemon=True)
+        self.__thread.start()
+        return
+
+    def stop(self) -> None:
+        """
+        Writes the pending ticks and stops the writer thread
+
+        :return: None
+        """
+        if self.__thread is None:
+            return
+        self.__stopped.set()
+        self.__thread.join()
+        self.__thread = None
+        self.__file.close()
+        self.__file = None
+        return
+
+    def record(self, symbol: str, bid: float, ask: float, bid_quantity: float, ask_quantity: float) -> None:
+        """
+        Queues a tick, stamped with the current time. Cheap enough to call from the websocket handler.
+
+        :param symbol: Symbol
+        :param bid: Bid
+        :param ask: Ask
+        :param bid_quantity: Bid quantity
+        :param ask_quantity: Ask quantity
+        :return: None
+        """
+        self.__pending.append((time_ns(), symbol, bid, ask, bid_quantity, ask_quantity))
+        return
+
+    def flush(self) -> int:
+        """
+        Writes the pending ticks now
+
+        :return: Number of ticks written
+        """
+        with self.__write_lock:
+            if self.__file is None:
+                return 0
+            return self.__write()
+
+    def __run(self) -> None:
+        while not self.__stopped.wait(self.flush_secs):
+            self.flush()
+        self.flush()
+        return
+
+    def __write(self) -> int:
+        """
+        Drains the queue into one batch of records
+        """
+        pending = self.__pending
+        num_pending = len(pending)
+        if not num_pending:
+            return 0
+        ticks = [pending.popleft() for _ in range(num_pending)]
+        timestamps, symbols, bids, asks, bid_quantities, ask_quantities = zip(*ticks)
+        slots = self.__slots
+        # Symbols the book added since are appended to the recording's
+        unseen = [symbol for symbol in set(symbols) if symbol not in slots and self.quote_book.slot(symbol) is not None]
+        if unseen:
+            self.__add_symbols(sorted(unseen))
+        if len(self.__symbols) > self.__num_symbols_written:
+            self.__write_meta()
+        records = np.empty(num_pending, dtype=TICK_DTYPE)
+        records["timestamp"] = timestamps
+        records["slot"] = [slots.get(symbol, -1) for symbol in symbols]
+        records["bid"], records["ask"] = bids, asks
+        records["bid_quantity"], records["ask_quantity"] = bid_quantities, ask_quantities
+        records = records[records["slot"] >= 0]
+        self.__file.write(records.tobytes())
+        self.__file.flush()
+        self.__stats["recorded"] += len(records)
+        self.__stats["unknown_symbols"] += num_pending - len(records)
+        self.__stats["writes"] += 1
+        return len(records)
+
+    def __add_symbols(self, symbols: List[str]) -> None:
+        """
+        Gives the symbols without one a recording slot
+        """
+        for symbol in symbols:
+            if symbol not in self.__slots:
+                self.__slots[symbol] = len(self.__symbols)
+                self.__symbols.append(symbol)
+        return
+
+    def __write_meta(self) -> None:
+        """
+        Writes the symbols of the recording, replacing the metadata atomically
+        """
+        symbols = list(self.__symbols)
+        meta_path = pathlib.Path(self.record_dir, TICK_META_FILE)
+        staging_path = meta_path.with_suffix(".tmp")
+        with open(staging_path, "w") as meta_file:
+            json.dump({
+                "version": TICK_RECORD_VERSION,
+                "record_size": TICK_DTYPE.itemsize,
+                "fields": list(TICK_DTYPE.names),
+                "symbols": symbols
+            }, meta_file)
+        os.replace(staging_path, meta_path)
+        self.__num_symbols_written = len(symbols)
+        return
+
+
+class TickReplayer:
+    """
+    Replays a tick recording into a quote consumer, e.g. `BinanceRealTimeQuoter.push_quote`, at the recorded
+    speed, a multiple of it, or as fast as possible
+    """
+
+    def __init__(self, record_dir: str):
+        """
+        :param record_dir: Recording directory
+        :raises QuoterException: If there is no recording
+        """
+        self.ticks, self.symbols = read_ticks(record_dir)
+
+    def __len__(self) -> int:
+        return len(self.ticks)
+
+    def replay(self,
+               push: PushQuote,
+               speed: Optional[float] = None,
+               start: Optional[pd.Timestamp] = None,
+               end: Optional[pd.Timestamp] = None,
+               chunk_ticks: Optional[int] = REPLAY_CHUNK_TICKS) -> int:
+        """
+        Calls `push(symbol, bid, ask, bid_quantity, ask_quantity, timestamp)` for each tick in recorded order,
+        timestamps in UNIX seconds
+
+        :param push: Consumer of the ticks
+        :param speed: 1.0 to replay at the recorded pace, 10.0 ten times faster, defaults to as fast as possible
+        :param start: Only ticks from this time
+        :param end: Only ticks before this time
+        :param chunk_ticks: Ticks read from the file at a time
+        :return: Number of ticks replayed
+        """
+        timestamps = self.ticks["timestamp"]
+        first = 0 if start is None else int(np.searchsorted(timestamps, start.value, side="left"))
+        last = len(self.ticks) if end is None else int(np.searchsorted(timestamps, end.value, side="left"))
+        if first >= last:
+            return 0
+        symbols = self.symbols
+        first_ns = int(timestamps[first])
+        started = perf_counter()
+        for chunk_start in range(first, last, chunk_ticks):
+            chunk = self.ticks[chunk_start:min(chunk_start + chunk_ticks, last)]
+            ticks = zip(chunk["timestamp"].tolist(), chunk["slot"].tolist(), chunk["bid"].tolist(), chunk["ask"].tolist(),
+                        chunk["bid_quantity"].tolist(), chunk["ask_quantity"].tolist())
+            for timestamp, slot, bid, ask, bid_quantity, ask_quantity in ticks:
+                if speed is not None:
+                    wait_secs = (timestamp - first_ns) / 1e9 / speed - (perf_counter() - started)
+                    if wait_secs > 0:
+                        sleep(wait_secs)
+                push(symbols[slot], bid, ask, bid_quantity, ask_quantity, timestamp / 1e9)
+        return last - first
@@ -6,6 +6,7 @@ from symphony.exceptions import RiskManagementException
 from symphony.client import ClientFactory
 from symphony.abc import RealTimeQuoter, HistoricalQuoter
 from symphony.data_classes import ConversionChain
+from symphony.quoter import DepthCache
 from collections import deque
 import itertools
 import logging
@@ -19,20 +20,27 @@ class CryptoPositionSizer:
                  quoter: Union[RealTimeQuoter, HistoricalQuoter],
                  maker_commission: Optional[float] = 0.0,
                  taker_commission: Optional[float] = 0.0,
-                 log_level: Optional[int] = LOG_LEVEL
+                 log_level: Optional[int] = LOG_LEVEL,
+                 depth_cache: Optional[DepthCache] = None
                  ):
 
-        self.quoter: RealTimeQuoter = quoter
+        self.quoter: Union[RealTimeQuoter, HistoricalQuoter] = quoter
         self.exchange: Exchange = self.quoter.exchange
-        self.exchange_client = ClientFactory.factory(self.exchange)
         if self.exchange.exchange_type != ExchangeType.CRYPTO:
             raise RiskManagementException(f"This exchange is not a CRYPTO exchange! "
                                           f"Use another position sizer. Exchange: {self.exchange.name}")
 
-        self.exchange_instruments: List[Instrument] = self.exchange_client.get_all_instruments()
+        if isinstance(self.quoter, HistoricalQuoter):
+            # Offline, the archived instruments are all there is
+            self.exchange_client = None
+            self.exchange_instruments: List[Instrument] = self.quoter.instruments
+        else:
+            self.exchange_client = ClientFactory.factory(self.exchange)
+            self.exchange_instruments: List[Instrument] = self.exchange_client.get_all_instruments()
         self.maker_commission: float = maker_commission
         self.taker_commission: float = taker_commission
-        self.conversion_chain: ConversionChain = ConversionChain(quoter)
+        self.depth_cache: Optional[DepthCache] = depth_cache
+        self.conversion_chain: ConversionChain = ConversionChain(quoter, depth_cache=depth_cache)
         logger.setLevel(log_level)
 
     @staticmethod
@@ -127,6 +135,32 @@ class CryptoPositionSizer:
 
         return round(position_size, target_instrument.digits)
 
+    def estimate_fill_price(self,
+                            target_instrument: Instrument,
+                            order_type: Market,
+                            quantity: float,
+                            fall_back_to_api: Optional[bool] = False) -> float:
+        """
+        Estimates the average price a market order fills at. Walks the local order book if a depth cache was
+        provided and its book is synced and deep enough, else the top of book price from the quoter.
+
+        :param target_instrument: The Instrument you want to trade
+        :param order_type: The order type. Either BUY or SELL
+        :param quantity: Position size in the base asset
+        :param fall_back_to_api: If you provided a RealTimeQuoter, fall back to API if no quotes have been pushed yet
+        :return: Estimated average fill price
+        :raises RiskManagementException: If order type is unknown
+        """
+        if order_type not in [Market.BUY, Market.SELL]:
+            raise RiskManagementException(f"Order type must be BUY or SELL: {order_type}")
+        if self.depth_cache is not None:
+            fill = self.depth_cache.cost_to_fill(target_instrument, quantity, order_type)
+            if fill is not None:
+                return fill[0]
+        if order_type == Market.BUY:
+            return self.quoter.get_ask(target_instrument, fall_back_to_api=fall_back_to_api)
+        return self.quoter.get_bid(target_instrument, fall_back_to_api=fall_back_to_api)
+
     def smart_margin(self,
                      instrument: Instrument,
                      price: float,
@@ -7,6 +7,7 @@ from symphony.tradingutils.currencies import Currency
 from symphony.tradingutils.lots import Lot
 from symphony.risk_management.position_sizer import PositionSizer
 from symphony.config.env import OANDA_DIR, FXCM_DIR, HISTDATA_DIR
+from symphony.utils.archive import read_csv_archived
 
 class HistoricalRatesConverter(PositionSizer):
     """HistoricalRatesConverter
@@ -45,8 +46,12 @@ class HistoricalRatesConverter(PositionSizer):
             currency_to_read = conversion_pair
         self.conversion_pair = currency_to_read
             
-        self.df = pd.read_csv(self.data_dir + currency_to_read + "/" + currency_to_read + self.timeframe.std + ".csv.gz")
-        self.df.index = pd.to_datetime(self.df["Datetime"])
+        # Converted to a memory-mapped archive on first use, so later constructions do not re-read the CSV
+        self.df = read_csv_archived(
+            self.data_dir + currency_to_read + "/" + currency_to_read + self.timeframe.std + ".csv.gz",
+            "Datetime",
+            columns=["Close"]
+        )
         
         
     def get_units(self, 
@@ -1,8 +1,9 @@
-from typing import Callable, NewType, List, Union
+from typing import Callable, NewType, List, Union, Optional
 from symphony.enum import Exchange, Timeframe
 from symphony.config import LOG_LEVEL, USE_MODIN
 from symphony.client import exchange_client
-from symphony.data_classes import PriceHistory, Instrument, filter_instruments
+from symphony.data_classes import PriceHistory, Instrument, filter_instruments, map_price_histories, \
+    price_histories_memory_usage
 from symphony.indicator_v2 import IndicatorRegistry
 from symphony.abc import ClientABC
 from symphony.indicator_v2.demark import bullish_price_flip, bearish_price_flip, td_buy_setup, td_sell_setup, \
@@ -22,6 +23,40 @@ IndicatorType = NewType('Indicator', IndicatorRegistry)
 logger = logging.getLogger(__name__)
 
 
+# Columns read by `DemarkScreener.filter`, everything else is dropped after processing
+SCREENER_COLUMNS: List[IndicatorRegistry] = [
+    IndicatorRegistry.BUY_COUNTDOWN,
+    IndicatorRegistry.SELL_COUNTDOWN,
+    IndicatorRegistry.BUY_COMBO,
+    IndicatorRegistry.SELL_COMBO,
+    IndicatorRegistry.BUY_9_13_9,
+    IndicatorRegistry.SELL_9_13_9,
+    IndicatorRegistry.PATTERN_START_INDEX
+]
+
+
+def apply_demark_indicators(price_history: PriceHistory) -> PriceHistory:
+    """
+    Applies every demark indicator the screener filters on. Module level so it can be sent to worker processes.
+
+    :param price_history: The price history
+    :return: The price history
+    """
+    bullish_price_flip(price_history)
+    bearish_price_flip(price_history)
+    td_buy_setup(price_history)
+    td_sell_setup(price_history)
+    td_buy_countdown(price_history)
+    td_sell_countdown(price_history)
+    td_buy_9_13_9(price_history)
+    td_sell_9_13_9(price_history)
+    td_buy_combo(price_history)
+    td_sell_combo(price_history)
+    td_upwave(price_history)
+    td_downwave(price_history)
+    return price_history
+
+
 class DemarkScreener:
     """
 
@@ -52,35 +87,50 @@ class DemarkScreener:
 
         self.price_histories: List[PriceHistory] = ex_client.get_multiple(instruments, self.timeframes, num_bars)
 
-    def process(self):
+    def process(self, max_workers: Optional[int] = None):
+        """
+        Applies the demark indicators to every fetched price history
+
+        :param max_workers: If set, indicators are applied in this many processes, with price histories
+            passed through shared memory. Otherwise runs in this process.
+        :return:
+        """
         start_process_time: float = perf_counter()
+        if max_workers:
+            self.price_histories = map_price_histories(apply_demark_indicators, self.price_histories,
+                                                       max_workers=max_workers)
+            self.__project()
+            end_process_time: float = perf_counter()
+            logger.debug("Total Execution time: {:10.4f}s".format(end_process_time - start_process_time))
+            return
+
         timings: List[float] = []
         price_history: PriceHistory
         for price_history in self.price_histories:
             start_time: float = perf_counter()
-
-            bullish_price_flip(price_history)
-            bearish_price_flip(price_history)
-            td_buy_setup(price_history)
-            td_sell_setup(price_history)
-            td_buy_countdown(price_history)
-            td_sell_countdown(price_history)
-            td_buy_9_13_9(price_history)
-            td_sell_9_13_9(price_history)
-            td_buy_combo(price_history)
-            td_sell_combo(price_history)
-            td_upwave(price_history)
-            td_downwave(price_history)
-
+            apply_demark_indicators(price_history)
             end_time: float = perf_counter()
             timings.append(end_time - start_time)
 
+        self.__project()
         average_time: float = sum(timings) / len(timings)
         logger.debug("Average Execution time: {:10.4f}s".format(average_time))
         end_process_time: float = perf_counter()
         logger.debug("Total Execution time: {:10.4f}s".format(end_process_time - start_process_time))
         return
 
+    def __project(self) -> None:
+        """
+        Drops the intermediate indicator columns (price flips, setups, ...) from every price history
+
+        :return: None
+        """
+        for price_history in self.price_histories:
+            price_history.register_columns(self.__class__.__name__, SCREENER_COLUMNS)
+            price_history.project()
+        logger.debug(f"Price histories: {price_histories_memory_usage(self.price_histories)} bytes")
+        return
+
     def filter(self, bar_threshold: int):
 
         def set_key(instrument: Instrument):
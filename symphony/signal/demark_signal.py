@@ -37,6 +37,7 @@ class DemarkSignal:
                  trade_signals: Optional[bool] = False,
                  price_history_seed: Optional[int] = 300,
                  bootstrap_price_history: Optional[bool] = True,
+                 local_bars: Optional[bool] = False,
                  log_level: Optional[int] = LOG_LEVEL
                  ):
         """
@@ -53,6 +54,7 @@ class DemarkSignal:
         :param trade_signals: Whether or not to live trade signals
         :param price_history_seed: Number of bars to seed the price history with
         :param bootstrap_price_history: Bootstrap the initialization by running the signaler on instantiation
+        :param local_bars: Close bars locally from the trade stream at the boundary, instead of waiting for Binance
         :param log_level: Optional log level
         """
 
@@ -76,6 +78,7 @@ class DemarkSignal:
         self.symphony_client.register_websocket_callback(self.event_handler)
         self.__incomplete_bars = incomplete_bars
         self.__price_history_seed = price_history_seed
+        self.__local_bars = local_bars
         self.demark_indicators = [
             IndicatorRegistry.BUY_SETUP,
             IndicatorRegistry.SELL_SETUP,
@@ -291,7 +294,15 @@ class DemarkSignal:
         else:
             self.timeframes[instrument.symbol].append(timeframe)
         # Start candle websocket
-        self.symphony_client.start_candle_websocket(instrument.symbol, timeframe, incomplete_bars=self.__incomplete_bars, price_history_seed=self.__price_history_seed)
+        self.symphony_client.start_candle_websocket(instrument.symbol, timeframe, incomplete_bars=self.__incomplete_bars,
+                                                    price_history_seed=self.__price_history_seed,
+                                                    local_bars=self.__local_bars)
+        # Only the signal columns and what td_stoploss reads need to be kept between bars
+        price_history: PriceHistory = self.symphony_client.price_histories[instrument.symbol][timeframe]
+        if price_history:
+            price_history.register_columns(
+                self.__class__.__name__, self.demark_indicators + [IndicatorRegistry.PATTERN_START_INDEX]
+            )
         # Start isolated margin websocket if trading margin and symbol available
         if self.trade_margin:
             if instrument.isolated_margin_allowed:
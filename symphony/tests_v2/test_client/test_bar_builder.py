@@ -0,0 +1,171 @@
+import unittest
+import sys
+from unittest.mock import patch
+from symphony.borg import Borg
+from symphony.client import BinanceClient, LocalBarBuilder
+from symphony.client.session import create_pooled_session
+from symphony.data_classes import PriceHistory, Instrument
+from symphony.enum import Timeframe, Column, Exchange
+from symphony.tests_v2.test_client.test_stream_multiplexer import StandInStreamServer, wait_until
+from symphony.tests_v2.test_client.test_kline_backfill import FakeKlines
+from symphony.config import USE_MODIN
+if USE_MODIN:
+    import modin.pandas as pd
+else:
+    import pandas as pd
+
+START = pd.Timestamp("2021-06-01 00:00:00", tz="UTC")
+START_MS = START.value // 10 ** 6
+MINUTE_MS = 60000
+# Recent, so the close timer of the client stays far off
+CLIENT_START = pd.Timestamp.now(tz="UTC").floor("1min") - pd.Timedelta(minutes=10)
+CLIENT_START_MS = CLIENT_START.value // 10 ** 6
+
+
+def kline(open_ms: int, o: float, h: float, low: float, c: float, v: float, closed: bool = True) -> dict:
+    return {"t": open_ms, "o": str(o), "h": str(h), "l": str(low), "c": str(c), "v": str(v), "x": closed}
+
+
+def bar_values(row: dict) -> tuple:
+    (timestamp, values), = row.items()
+    return timestamp, values["open"], values["high"], values["low"], values["close"], values["volume"]
+
+
+class LocalBarBuilderTest(unittest.TestCase):
+
+    def test_bars_close_on_trade_and_timer(self):
+        builder = LocalBarBuilder(close_grace_ms=100)
+        builder.add("ETHBTC", Timeframe.M1)
+        builder.add("ETHBTC", Timeframe.M5)
+        self.assertEqual(builder.on_trade("BNBBTC", 1.0, 1.0, START_MS), [])
+
+        # The first bar started before the builder did and is dropped
+        self.assertEqual(builder.on_trade("ETHBTC", 5.0, 1.0, START_MS + 30000), [])
+        self.assertEqual(builder.on_trade("ETHBTC", 10.0, 1.0, START_MS + MINUTE_MS), [])
+        for price in (12.0, 9.0, 11.0):
+            builder.on_trade("ETHBTC", price, 1.0, START_MS + MINUTE_MS + 1000)
+        self.assertEqual(builder.next_close_ms(), START_MS + 2 * MINUTE_MS + 100)
+
+        self.assertEqual(builder.close_due(START_MS + 2 * MINUTE_MS + 99), [])
+        closed = builder.close_due(START_MS + 2 * MINUTE_MS + 100)
+        self.assertEqual([(symbol, timeframe) for symbol, timeframe, _ in closed], [("ETHBTC", Timeframe.M1)])
+        self.assertEqual(bar_values(closed[0][2]), (START + pd.Timedelta(minutes=1), 10.0, 12.0, 9.0, 11.0, 4.0))
+
+        # No trades in bars 2 and 3, the next trade closes both flat at the last close
+        closed = builder.on_trade("ETHBTC", 13.0, 2.0, START_MS + 4 * MINUTE_MS + 5000)
+        self.assertEqual([bar_values(row) for _, _, row in closed], [
+            (START + pd.Timedelta(minutes=2), 11.0, 11.0, 11.0, 11.0, 0.0),
+            (START + pd.Timedelta(minutes=3), 11.0, 11.0, 11.0, 11.0, 0.0)
+        ])
+        builder.on_trade("ETHBTC", 1.0, 1.0, START_MS + 2 * MINUTE_MS)
+        self.assertEqual(builder.stats["late_trades"], 1)
+
+        # M5 skipped its partial first bar, bar 5 is its first full one
+        closed = builder.on_trade("ETHBTC", 14.0, 1.0, START_MS + 5 * MINUTE_MS)
+        self.assertEqual([timeframe for _, timeframe, _ in closed], [Timeframe.M1])
+        builder.remove("ETHBTC", Timeframe.M5)
+        self.assertEqual(builder.timeframes("ETHBTC"), [Timeframe.M1])
+        print(__name__ + "." + sys._getframe().f_code.co_name + ": Unit test passed")
+
+    def test_reconcile(self):
+        builder = LocalBarBuilder()
+        builder.add("ETHBTC", Timeframe.M1)
+        builder.on_trade("ETHBTC", 1.0, 1.0, START_MS - 1)
+        builder.on_trade("ETHBTC", 2.0, 0.1, START_MS, now_ms=0)
+        builder.on_trade("ETHBTC", 3.0, 0.2, START_MS + 1)
+        builder.on_trade("ETHBTC", 4.0, 1.0, START_MS + MINUTE_MS, now_ms=1000)
+        builder.on_trade("ETHBTC", 4.0, 1.0, START_MS + 2 * MINUTE_MS, now_ms=2000)
+
+        self.assertTrue(builder.reconcile("ETHBTC", Timeframe.M1, kline(START_MS, 2.0, 3.0, 2.0, 3.0, 0.3), 1030))
+        self.assertFalse(builder.reconcile("ETHBTC", Timeframe.M1,
+                                           kline(START_MS + MINUTE_MS, 4.0, 4.0, 4.0, 4.0, 2.0), 2700))
+        self.assertIsNone(builder.reconcile("ETHBTC", Timeframe.M1, kline(START_MS, 2.0, 3.0, 2.0, 3.0, 0.3), 1030))
+        self.assertIsNone(builder.reconcile("ETHBTC", Timeframe.M5, kline(START_MS, 2.0, 3.0, 2.0, 3.0, 0.3), 1030))
+
+        histogram = builder.latency_histogram()
+        self.assertEqual(list(histogram.keys())[0], "<0ms")
+        self.assertEqual(histogram["10-50ms"], 1)
+        self.assertEqual(histogram["500-1000ms"], 1)
+        self.assertEqual(sum(histogram.values()), 2)
+        self.assertEqual(builder.stats["reconciled"], 2)
+        self.assertEqual(builder.stats["mismatched"], 1)
+        print(__name__ + "." + sys._getframe().f_code.co_name + ": Unit test passed")
+
+
+@patch("symphony.client.binance_client.get_binance_client_timeframe", return_value="1m")
+@patch("symphony.client.binance_client.get_last_complete_bar_time", return_value=CLIENT_START + pd.Timedelta(minutes=4))
+class LocalBarsClientTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StandInStreamServer()
+        self.borg_state = patch.dict(Borg._shared_state, clear=True)
+        self.borg_state.start()
+        self.instrument = Instrument(symbol="ETHBTC", exchange=Exchange.BINANCE)
+
+    def tearDown(self):
+        self.client.stop()
+        self.borg_state.stop()
+        self.server.close()
+
+    def __trade(self, price: float, trade_ms: int) -> None:
+        self.server.push("ethbtc@aggTrade", {"e": "aggTrade", "s": "ETHBTC", "p": str(price), "q": "1.0",
+                                             "T": trade_ms})
+
+    def __kline(self, minute: int, o: float, h: float, low: float, c: float, v: float) -> None:
+        open_ms = CLIENT_START_MS + minute * MINUTE_MS
+        self.server.push("ethbtc@kline_1m", {"e": "kline", "k": kline(open_ms, o, h, low, c, v)})
+
+    def test_local_bars_with_reconciliation(self, *_):
+        fake_klines = FakeKlines()
+        fake_klines.release.set()
+        with patch("symphony.client.binance_client.BINANCE_COMBINED_STREAM_URL", self.server.url), \
+                patch.object(BinanceClient, "instruments", [self.instrument]), \
+                patch.object(BinanceClient, "get_klines", fake_klines):
+            self.client = BinanceClient()
+            self.client.session = create_pooled_session()
+            # Bars close on trades only
+            self.client.bar_builder.close_grace_ms = 10 ** 9
+            index = pd.date_range(CLIENT_START, periods=5, freq="1min", name=Column.TIMESTAMP)
+            self.client.price_histories["ETHBTC"] = {Timeframe.M1: PriceHistory(
+                instrument=self.instrument, timeframe=Timeframe.M1, price_history=pd.DataFrame(
+                    {column: [1.0] * 5 for column in (Column.OPEN, Column.HIGH, Column.LOW, Column.CLOSE,
+                                                      Column.VOLUME)}, index=index))}
+            called = []
+            self.client.start_candle_websocket(self.instrument, Timeframe.M1, price_history_seed=0, local_bars=True,
+                                               websocket_callback=lambda history: called.append(
+                                                   history.price_history.index[-1]))
+            self.assertTrue(wait_until(lambda: self.server.subscribed() == ["ethbtc@aggTrade", "ethbtc@kline_1m"]))
+            self.assertTrue(wait_until(lambda: len(fake_klines.calls) == 1 and len(called) == 1))
+
+            self.__trade(7.0, CLIENT_START_MS + 5 * MINUTE_MS + 1000)
+            self.__trade(2.0, CLIENT_START_MS + 6 * MINUTE_MS)
+            self.__kline(5, 7, 7, 7, 7, 1)
+            self.__trade(3.0, CLIENT_START_MS + 6 * MINUTE_MS + 10000)
+            self.__trade(1.0, CLIENT_START_MS + 6 * MINUTE_MS + 20000)
+            self.__trade(5.0, CLIENT_START_MS + 7 * MINUTE_MS)
+            self.assertTrue(wait_until(lambda: len(called) == 3))
+            history = self.client.price_histories["ETHBTC"][Timeframe.M1].price_history
+            self.assertEqual(history.index[-1], CLIENT_START + pd.Timedelta(minutes=6))
+            self.assertEqual(list(history.iloc[-1][[Column.OPEN, Column.HIGH, Column.LOW, Column.CLOSE,
+                                                    Column.VOLUME]]), [2.0, 3.0, 1.0, 1.0, 3.0])
+
+            # Matching kline: nothing to do. Differing kline: overwritten and the callbacks run again
+            self.__kline(6, 2, 3, 1, 1, 3)
+            self.__trade(4.0, CLIENT_START_MS + 8 * MINUTE_MS)
+            self.assertTrue(wait_until(lambda: len(called) == 4))
+            self.__kline(7, 5, 6, 5, 6, 2)
+            self.assertTrue(wait_until(lambda: len(called) == 5))
+            history = self.client.price_histories["ETHBTC"][Timeframe.M1].price_history
+            self.assertEqual(history[Column.CLOSE].iloc[-1], 6.0)
+            self.assertEqual(len(history), 8)
+            self.assertEqual(called[-2:], [CLIENT_START + pd.Timedelta(minutes=7)] * 2)
+            self.assertEqual(self.client.bar_builder.stats["reconciled"], 2)
+            self.assertEqual(self.client.bar_builder.stats["mismatched"], 1)
+
+            self.client.stop_candle_websocket(self.instrument, Timeframe.M1)
+            self.assertTrue(wait_until(lambda: self.server.subscribed() == []))
+        print(__name__ + "." + sys._getframe().f_code.co_name + ": Unit test passed")
+
+
+if __name__ == '__main__':
+    unittest.main()
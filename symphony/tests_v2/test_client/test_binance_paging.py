@@ -0,0 +1,64 @@
+import unittest
+import sys
+import threading
+from unittest.mock import patch
+from symphony.client import BinanceClient
+from symphony.enum import Timeframe, Column
+from symphony.data_classes import Instrument
+from symphony.config import USE_MODIN
+if USE_MODIN:
+    import modin.pandas as pd
+else:
+    import pandas as pd
+
+HOUR_MS = 3600000
+
+
+class FakeCCXTClient:
+    """
+    Serves fetch_ohlcv from a generated hourly series, optionally with bars missing
+    """
+
+    def __init__(self, missing=()):
+        self.missing = set(missing)
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def fetch_ohlcv(self, symbol, timeframe, since=None, limit=500):
+        with self.lock:
+            self.calls.append((since, limit))
+        return [
+            [ts, float(ts // HOUR_MS), float(ts // HOUR_MS) + 1, float(ts // HOUR_MS) - 1, float(ts // HOUR_MS), 10.0]
+            for ts in range(since, since + limit * HOUR_MS, HOUR_MS) if ts not in self.missing
+        ]
+
+
+class BinancePagingTest(unittest.TestCase):
+
+    def test_anon_get_assembles_pages(self):
+        instrument = Instrument(symbol="ETHBTC", base_asset="ETH", quote_asset="BTC")
+        start = pd.Timestamp("2021-01-01 00:00:00", tz="UTC")
+        end = pd.Timestamp("2021-02-15 03:00:00", tz="UTC")
+        missing_ts = int((start + pd.Timedelta(hours=700)).value // 10 ** 6)
+        fake_client = FakeCCXTClient(missing=[missing_ts])
+
+        with patch("symphony.client.binance_client.anon_client", fake_client):
+            ph = BinanceClient.anon_get(instrument, Timeframe.H1, start, end=end)
+
+        df = ph.price_history
+        expected_bars = int((end - start) / pd.Timedelta(hours=1)) + 1
+        # Pages are computed from the range, no page depends on the previous one
+        self.assertEqual(len(fake_client.calls), -(-expected_bars // 500))
+        self.assertEqual(sum(limit for _, limit in fake_client.calls), expected_bars)
+        # The exchange's gap is left out, everything else is in order
+        self.assertEqual(len(df), expected_bars - 1)
+        self.assertEqual(df.index[0], start)
+        self.assertEqual(df.index[-1], end)
+        self.assertTrue(df.index.is_monotonic_increasing)
+        self.assertNotIn(pd.Timestamp(missing_ts, unit="ms", tz="UTC"), df.index)
+        self.assertEqual(df[Column.OPEN].iloc[1], start.value // 10 ** 6 // HOUR_MS + 1)
+        print(__name__ + "." + sys._getframe().f_code.co_name + ": Unit test passed")
+
+
+if __name__ == '__main__':
+    unittest.main()
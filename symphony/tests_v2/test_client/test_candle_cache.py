@@ -0,0 +1,133 @@
+import unittest
+import sys
+import tempfile
+import shutil
+import os
+import numpy as np
+from unittest.mock import patch
+from symphony.client import CandleCache
+from symphony.client.candle_cache import CANDLE_CACHE_ARCHIVE, CANDLE_CACHE_COVERAGE_FILE, CANDLE_CACHE_MAX_SEGMENTS
+from symphony.utils.archive import write_archive
+from symphony.enum import Timeframe, Column
+from symphony.config import USE_MODIN
+if USE_MODIN:
+    import modin.pandas as pd
+else:
+    import pandas as pd
+
+LAST_CLOSED = pd.Timestamp("2021-06-01 12:00:00", tz="UTC")
+HOUR = pd.Timedelta(hours=1)
+
+
+class FakeExchange:
+    """
+    Hourly bars up to the open bar after LAST_CLOSED, with one bar the exchange never had
+    """
+
+    def __init__(self, missing=None):
+        self.missing = missing
+        self.calls = []
+
+    def fetch(self, start: pd.Timestamp, last: pd.Timestamp) -> pd.DataFrame:
+        self.calls.append((start, last))
+        index = pd.date_range(start, min(last, LAST_CLOSED + HOUR), freq="1H", name=Column.TIMESTAMP)
+        index = index[index != self.missing]
+        values = np.arange(len(index), dtype=np.float64) + index.hour.to_numpy()
+        return pd.DataFrame({
+            Column.OPEN: values, Column.HIGH: values + 1, Column.LOW: values - 1,
+            Column.CLOSE: values, Column.VOLUME: np.full(len(index), 10.0)
+        }, index=index)
+
+
+@patch("symphony.client.candle_cache.get_last_complete_bar_time", return_value=LAST_CLOSED)
+class CandleCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def test_only_missing_ranges_are_fetched(self, _):
+        missing_bar = LAST_CLOSED - 80 * HOUR
+        exchange = FakeExchange(missing=missing_bar)
+        cache = CandleCache(self.cache_dir)
+        start = LAST_CLOSED - 99 * HOUR
+
+        candles = cache.get("ETHBTC", Timeframe.H1, start, LAST_CLOSED, exchange.fetch)
+        self.assertEqual(exchange.calls, [(start, LAST_CLOSED)])
+        self.assertEqual(len(candles), 99)
+        self.assertEqual(candles.index[-1], LAST_CLOSED)
+
+        # Warm: nothing to fetch, not even the bar the exchange never had
+        exchange.calls.clear()
+        cached = cache.get("ETHBTC", Timeframe.H1, start, LAST_CLOSED, exchange.fetch)
+        self.assertEqual(exchange.calls, [])
+        pd.testing.assert_frame_equal(cached, candles, check_freq=False)
+
+        # Earlier start and the open bar: only the head is fetched and stored, the open bar always fetched
+        earlier = start - 50 * HOUR
+        exchange.calls.clear()
+        candles = cache.get("ETHBTC", Timeframe.H1, earlier, LAST_CLOSED + HOUR, exchange.fetch)
+        self.assertEqual(exchange.calls, [(earlier, start - HOUR), (LAST_CLOSED + HOUR, LAST_CLOSED + HOUR)])
+        self.assertEqual(len(candles), 150)
+        self.assertEqual(candles.index[-1], LAST_CLOSED + HOUR)
+        self.assertTrue(candles.index.is_monotonic_increasing)
+        self.assertNotIn(missing_bar, candles.index)
+        self.assertEqual(cache.read("ETHBTC", Timeframe.H1).index[-1], LAST_CLOSED)
+        self.assertEqual(cache.missing_ranges("ETHBTC", Timeframe.H1, earlier, LAST_CLOSED), [])
+        self.assertEqual(cache.stats["requests"], 3)
+        print(__name__ + "." + sys._getframe().f_code.co_name + ": Unit test passed")
+
+    def test_holes_between_requests(self, _):
+        exchange = FakeExchange()
+        cache = CandleCache(self.cache_dir)
+        first, second = LAST_CLOSED - 200 * HOUR, LAST_CLOSED - 50 * HOUR
+        cache.get("ETHBTC", Timeframe.H1, first, first + 9 * HOUR, exchange.fetch)
+        cache.get("ETHBTC", Timeframe.H1, second, LAST_CLOSED, exchange.fetch)
+        self.assertEqual(cache.missing_ranges("ETHBTC", Timeframe.H1, first, LAST_CLOSED),
+                         [(first + 10 * HOUR, second - HOUR)])
+
+        exchange.calls.clear()
+        candles = cache.get("ETHBTC", Timeframe.H1, first, LAST_CLOSED, exchange.fetch)
+        self.assertEqual(exchange.calls, [(first + 10 * HOUR, second - HOUR)])
+        self.assertEqual(len(candles), 201)
+        self.assertIsNone(cache.read("ETHBTC", Timeframe.H4))
+
+        cache.clear("ETHBTC")
+        self.assertIsNone(cache.read("ETHBTC", Timeframe.H1))
+        print(__name__ + "." + sys._getframe().f_code.co_name + ": Unit test passed")
+
+    def test_segments(self, _):
+        exchange = FakeExchange()
+        cache = CandleCache(self.cache_dir)
+        key_dir = os.path.join(self.cache_dir, "binance", "ETHBTC", Timeframe.H1.name)
+        first = LAST_CLOSED - 10 * HOUR * CANDLE_CACHE_MAX_SEGMENTS
+        with patch("symphony.client.candle_cache.write_archive", wraps=write_archive) as archive_writes:
+            # Each request only writes the bars it fetched
+            for i in range(CANDLE_CACHE_MAX_SEGMENTS):
+                cache.get("ETHBTC", Timeframe.H1, first + 10 * i * HOUR, first + (10 * i + 9) * HOUR, exchange.fetch)
+                self.assertEqual(len(archive_writes.call_args[0][0][0]), 10)
+            self.assertEqual(len([name for name in os.listdir(key_dir) if name.startswith(CANDLE_CACHE_ARCHIVE)]),
+                             CANDLE_CACHE_MAX_SEGMENTS)
+            candles = cache.read("ETHBTC", Timeframe.H1)
+            self.assertEqual(len(candles), 10 * CANDLE_CACHE_MAX_SEGMENTS)
+            self.assertTrue(candles.index.is_monotonic_increasing)
+
+            # Nothing is written when no bars were added
+            archive_writes.reset_mock()
+            cache.store("ETHBTC", Timeframe.H1, [(LAST_CLOSED + HOUR, LAST_CLOSED + HOUR, exchange.fetch(
+                LAST_CLOSED + HOUR, LAST_CLOSED + HOUR))])
+            archive_writes.assert_not_called()
+
+            # One segment too many compacts them into one archive
+            cache.get("ETHBTC", Timeframe.H1, first, LAST_CLOSED, exchange.fetch)
+        self.assertEqual(sorted(os.listdir(key_dir)), [CANDLE_CACHE_ARCHIVE, CANDLE_CACHE_COVERAGE_FILE])
+        compacted = cache.read("ETHBTC", Timeframe.H1)
+        self.assertEqual(len(compacted), 10 * CANDLE_CACHE_MAX_SEGMENTS + 1)
+        pd.testing.assert_frame_equal(compacted.iloc[:-1], candles, check_freq=False)
+        print(__name__ + "." + sys._getframe().f_code.co_name + ": Unit test passed")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+import sys
+import json
+import tempfile
+import shutil
+import pathlib
+import os
+from time import time, perf_counter
+from unittest.mock import patch
+from symphony.client.instrument_snapshot import instrument_snapshot_path, write_instrument_snapshot, \
+    read_instrument_snapshot, instrument_snapshot_is_stale
+from symphony.data_classes import Instrument
+from symphony.enum import Exchange
+
+
+class InstrumentSnapshotTest(unittest.TestCase):
+
+    def setUp(self):
+        self.snapshot_dir = tempfile.mkdtemp()
+        self.path = instrument_snapshot_path(self.snapshot_dir, Exchange.BINANCE, "api-key")
+
+    def tearDown(self):
+        shutil.rmtree(self.snapshot_dir)
+
+    def test_snapshot_roundtrip(self):
+        instruments = [
+            Instrument(symbol=f"A{i}BTC", digits=8, exchange=Exchange.BINANCE, is_currency=True,
+                       base_asset=f"A{i}", quote_asset="BTC", margin_allowed=bool(i % 2),
+                       isolated_margin_allowed=bool(i % 3), isolated_margin_account_created=bool(i % 5),
+                       isolated_margin_ratio=i % 10, oco_allowed=True, min_quantity=0.0001 * i,
+                       max_quantity=9000.0, step_size=0.001)
+            for i in range(2000)
+        ]
+        write_instrument_snapshot(self.path, instruments, ["XYZ"])
+        self.assertNotIn("api-key", self.path)
+
+        start = perf_counter()
+        snapshot = read_instrument_snapshot(self.path)
+        load_secs = perf_counter() - start
+        self.assertEqual(snapshot["instruments"], instruments)
+        self.assertEqual(snapshot["instruments"][7].isolated_margin_ratio, 7)
+        self.assertEqual(snapshot["instruments"][7].step_size, 0.001)
+        self.assertEqual(snapshot["non_tradeable_assets"], ["XYZ"])
+        self.assertFalse(instrument_snapshot_is_stale(snapshot))
+        self.assertTrue(instrument_snapshot_is_stale(snapshot, ttl_secs=-1))
+        self.assertLess(load_secs, 1.0)
+        print(__name__ + "." + sys._getframe().f_code.co_name + ": Unit test passed")
+
+    def test_unusable_snapshots_are_ignored(self):
+        self.assertIsNone(read_instrument_snapshot(self.path))
+        write_instrument_snapshot(self.path, [], [])
+        with open(self.path, "r") as f:
+            snapshot = json.load(f)
+        snapshot["version"] = 0
+        with open(self.path, "w") as f:
+            json.dump(snapshot, f)
+        self.assertIsNone(read_instrument_snapshot(self.path))
+        pathlib.Path(self.path).write_text("{not json")
+        self.assertIsNone(read_instrument_snapshot(self.path))
+        print(__name__ + "." + sys._getframe().f_code.co_name + ": Unit test passed")
+
+    def test_concurrent_writers(self):
+        first = [Instrument(symbol="ETHBTC", base_asset="ETH", quote_asset="BTC", exchange=Exchange.BINANCE)]
+        second = [Instrument(symbol="BNBBTC", base_asset="BNB", quote_asset="BTC", exchange=Exchange.BINANCE)]
+        dump = json.dump
+
+        def interleaved_dump(obj, fp, **kwargs):
+            # A second cold start writes its snapshot while the first is still writing
+            if obj["instruments"][0][0] == "ETHBTC":
+                write_instrument_snapshot(self.path, second)
+            dump(obj, fp, **kwargs)
+
+        with patch("symphony.client.instrument_snapshot.json.dump", side_effect=interleaved_dump):
+            write_instrument_snapshot(self.path, first)
+        self.assertEqual(read_instrument_snapshot(self.path)["instruments"], first)
+        self.assertEqual(os.listdir(self.snapshot_dir), [os.path.basename(self.path)])
+
+        with patch("symphony.client.instrument_snapshot.json.dump", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                write_instrument_snapshot(self.path, second)
+        self.assertEqual(read_instrument_snapshot(self.path)["instruments"], first)
+        self.assertEqual(os.listdir(self.snapshot_dir), [os.path.basename(self.path)])
+        print(__name__ + "." + sys._getframe().f_code.co_name + ": Unit test passed")
+
+
+if __name__ == '__main__':
+    unittest.main()
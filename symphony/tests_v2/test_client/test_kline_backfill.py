@@ -0,0 +1,120 @@
+import unittest
+import sys
+import threading
+import numpy as np
+from unittest.mock import patch
+from symphony.borg import Borg
+from symphony.client import BinanceClient
+from symphony.client.session import create_pooled_session
+from symphony.data_classes import PriceHistory, Instrument
+from symphony.enum import Timeframe, Column, Exchange
+from symphony.tests_v2.test_client.test_stream_multiplexer import StandInStreamServer, wait_until
+from symphony.config import USE_MODIN
+if USE_MODIN:
+    import modin.pandas as pd
+else:
+    import pandas as pd
+
+START = pd.Timestamp("2021-06-01 00:00:00", tz="UTC")
+MINUTE = pd.Timedelta(minutes=1)
+MINUTE_MS = 60000
+START_MS = START.value // 10 ** 6
+LAST_CLOSED = START + 10 * MINUTE
+STREAM = "ethbtc@kline_1m"
+
+
+def kline_row(open_ms: int) -> list:
+    return [open_ms, "1.0", "2.0", "0.5", "1.5", "10.0", open_ms + MINUTE_MS - 1, "15.0", 3, "5.0", "7.0", "0"]
+
+
+def kline_message(open_ms: int, closed: bool) -> dict:
+    return {"e": "kline", "s": "ETHBTC",
+            "k": {"t": open_ms, "o": "1.0", "h": "2.0", "l": "0.5", "c": "1.5", "v": "10.0", "x": closed}}
+
+
+class FakeKlines:
+    """
+    Stands in for BinanceClient.get_klines, blocks until released
+    """
+
+    def __init__(self):
+        self.calls = []
+        self.release = threading.Event()
+
+    def __call__(self, symbol, interval, start_ms, end_ms, rate_limiter, api_url=None, session=None, limit=1000):
+        self.calls.append((symbol, interval, start_ms, end_ms, limit))
+        self.release.wait(5)
+        return [kline_row(open_ms) for open_ms in range(start_ms, end_ms + 1, MINUTE_MS)]
+
+
+@patch("symphony.client.binance_client.get_binance_client_timeframe", return_value="1m")
+@patch("symphony.client.binance_client.get_last_complete_bar_time", return_value=LAST_CLOSED)
+class KlineBackfillTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StandInStreamServer()
+        self.borg_state = patch.dict(Borg._shared_state, clear=True)
+        self.borg_state.start()
+        self.instrument = Instrument(symbol="ETHBTC", exchange=Exchange.BINANCE)
+
+    def tearDown(self):
+        self.client.stop()
+        self.borg_state.stop()
+        self.server.close()
+
+    def __seed(self, num_bars: int) -> PriceHistory:
+        index = pd.date_range(START, periods=num_bars, freq="1min", name=Column.TIMESTAMP)
+        values = np.ones(num_bars)
+        return PriceHistory(instrument=self.instrument, timeframe=Timeframe.M1, price_history=pd.DataFrame({
+            Column.OPEN: values, Column.HIGH: values * 2, Column.LOW: values / 2, Column.CLOSE: values * 1.5,
+            Column.VOLUME: values * 10
+        }, index=index))
+
+    def test_gap_is_backfilled_before_live_appends(self, last_complete_bar_time, _):
+        fake_klines = FakeKlines()
+        fake_klines.release.set()
+        with patch("symphony.client.binance_client.BINANCE_COMBINED_STREAM_URL", self.server.url), \
+                patch.object(BinanceClient, "instruments", [self.instrument]), \
+                patch.object(BinanceClient, "get_klines", fake_klines):
+            self.client = BinanceClient()
+            self.client.kline_streams.reconnect_secs = 0.05
+            self.client.session = create_pooled_session()
+            self.client.price_histories["ETHBTC"] = {Timeframe.M1: self.__seed(11)}
+            price_history = self.client.price_histories["ETHBTC"][Timeframe.M1]
+            self.client.start_candle_websocket(self.instrument, Timeframe.M1, price_history_seed=0)
+            self.assertTrue(wait_until(lambda: STREAM in self.server.subscribed()))
+            # The seed's last bar may have been partial, it is fetched again on connect
+            self.assertTrue(wait_until(lambda: len(fake_klines.calls) == 1))
+            self.assertEqual(fake_klines.calls[0], ("ETHBTC", "1m", START_MS + 10 * MINUTE_MS,
+                                                    START_MS + 10 * MINUTE_MS, 1))
+
+            self.server.push(STREAM, kline_message(START_MS + 11 * MINUTE_MS, closed=True))
+            self.server.push(STREAM, kline_message(START_MS + 12 * MINUTE_MS, closed=False))
+            self.assertTrue(wait_until(lambda: len(price_history.price_history) == 12))
+
+            # Outage: bars 12 to 16 are missed, the first live message after reconnecting is bar 17
+            last_complete_bar_time.return_value = START + 16 * MINUTE
+            fake_klines.release.clear()
+            connects = self.client.kline_streams.stats["connects"]
+            self.server.drop_connections()
+            self.assertTrue(wait_until(lambda: len(fake_klines.calls) == 2))
+            self.assertEqual(fake_klines.calls[1], ("ETHBTC", "1m", START_MS + 12 * MINUTE_MS,
+                                                    START_MS + 16 * MINUTE_MS, 5))
+            self.server.push(STREAM, kline_message(START_MS + 17 * MINUTE_MS, closed=True))
+            # Held back until the backfill is in
+            self.assertFalse(wait_until(lambda: len(price_history.price_history) > 12, timeout=0.2))
+            fake_klines.release.set()
+
+            self.assertTrue(wait_until(lambda: len(price_history.price_history) == 18))
+            self.assertTrue(price_history.price_history.index.equals(
+                pd.date_range(START, periods=18, freq="1min", tz="UTC", name=Column.TIMESTAMP)))
+
+            # No gap, nothing to fetch
+            self.server.drop_connections()
+            self.assertTrue(wait_until(lambda: self.client.kline_streams.stats["connects"] > connects + 1
+                                       and STREAM in self.server.subscribed()))
+            self.assertEqual(len(fake_klines.calls), 2)
+        print(__name__ + "." + sys._getframe().f_code.co_name + ": Unit test passed")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,226 @@
+import unittest
+import sys
+import json
+import asyncio
+import threading
+import aiohttp
+import requests
+from unittest.mock import patch
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+from symphony.client.rate_limiter import WeightRateLimiter, BINANCE_USED_WEIGHT_HEADER, binance_kline_weight
+from symphony.exceptions import ClientClassException
+from symphony.enum import Timeframe
+from symphony.utils.time import get_page_ranges
+
+MINUTE_MS = 60000
+
+
+class MockBinanceHandler(BaseHTTPRequestHandler):
+    """
+    Serves /api/v3/klines with one-minute bars. The first `throttle_first` requests are answered with 429.
+    """
+    lock = threading.Lock()
+    requests_seen = 0
+    throttle_first = 0
+    used_weight = 0
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        with MockBinanceHandler.lock:
+            MockBinanceHandler.requests_seen += 1
+            throttle = MockBinanceHandler.requests_seen <= MockBinanceHandler.throttle_first
+            MockBinanceHandler.used_weight += 5
+            used_weight = MockBinanceHandler.used_weight
+        if throttle:
+            self.__respond(429, {"code": -1003, "msg": "Too many requests"},
+                           {"Retry-After": "0", BINANCE_USED_WEIGHT_HEADER: str(used_weight)})
+            return
+        if url.path != "/api/v3/klines":
+            self.__respond(404, {"code": -1, "msg": "Not found"}, {})
+            return
+        params = parse_qs(url.query)
+        start, end, limit = int(params["startTime"][0]), int(params["endTime"][0]), int(params["limit"][0])
+        klines = [
+            [open_time, "1.0", "2.0", "0.5", "1.5", "10.0", open_time + MINUTE_MS - 1, "15.0", 3, "5.0", "7.5", "0"]
+            for open_time in range(start, end + 1, MINUTE_MS)
+        ][:limit]
+        self.__respond(200, klines, {BINANCE_USED_WEIGHT_HEADER: str(used_weight)})
+
+    def __respond(self, status, body, headers):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        return
+
+
+class RateLimiterTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), MockBinanceHandler)
+        cls.api_url = f"http://127.0.0.1:{cls.server.server_address[1]}/api"
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        MockBinanceHandler.requests_seen = 0
+        MockBinanceHandler.throttle_first = 0
+        MockBinanceHandler.used_weight = 0
+
+    def test_retries_throttled_requests_and_halves_concurrency(self):
+        MockBinanceHandler.throttle_first = 2
+        limiter = WeightRateLimiter(max_concurrency=8, backoff_base_secs=0.01)
+        response = limiter.request("GET", self.api_url + "/v3/klines", 5,
+                                   params={"startTime": 0, "endTime": 2 * MINUTE_MS, "limit": 1000})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 3)
+        stats = limiter.stats
+        self.assertEqual(stats["throttled"], 2)
+        self.assertEqual(stats["retries"], 2)
+        self.assertEqual(stats["requests"], 3)
+        self.assertEqual(limiter.concurrency, 2)
+        # Used weight is read back from the headers and lowers the bucket
+        self.assertEqual(stats["used_weight"], 15)
+        self.assertLessEqual(limiter.tokens, limiter.capacity - 15 + 1)
+        print(__name__ + "." + sys._getframe().f_code.co_name + ": Unit test passed")
+
+    def test_gives_up_after_max_retries(self):
+        MockBinanceHandler.throttle_first = 10
+        limiter = WeightRateLimiter(max_retries=2, backoff_base_secs=0.01)
+        with self.assertRaises(ClientClassException):
+            limiter.request("GET", self.api_url + "/v3/klines", 5)
+        self.assertEqual(MockBinanceHandler.requests_seen, 3)
+
+        with self.assertRaises(ClientClassException):
+            limiter.request("GET", self.api_url + "/v3/unknown", 1)
+        print(__name__ + "." + sys._getframe().f_code.co_name + ": Unit test passed")
+
+    def test_failed_requests_release_their_slot(self):
+        limiter = WeightRateLimiter(max_concurrency=2, backoff_base_secs=0.01)
+        with patch.object(requests, "request", side_effect=requests.exceptions.ChunkedEncodingError("truncated")):
+            for _ in range(2):
+                with self.assertRaises(requests.exceptions.ChunkedEncodingError):
+                    limiter.request("GET", self.api_url + "/v3/klines", 1)
+
+        async def closed_session_requests():
+            session = aiohttp.ClientSession()
+            await session.close()
+            for _ in range(2):
+                with self.assertRaises(RuntimeError):
+                    await limiter.arequest(session, "GET", self.api_url + "/v3/klines", 1)
+        asyncio.run(closed_session_requests())
+
+        thread = threading.Thread(target=limiter.acquire, args=(1,), daemon=True)
+        thread.start()
+        thread.join(1)
+        self.assertFalse(thread.is_alive())
+        limiter.release()
+        print(__name__ + "." + sys._getframe().f_code.co_name + ": Unit test passed")
+
+    def test_concurrency_recovers_and_bucket_blocks(self):
+        limiter = WeightRateLimiter(weight_limit=60, safety_margin=1.0, max_concurrency=4)
+        limiter.release(throttled=True)
+        self.assertEqual(limiter.concurrency, 2)
+        self.assertEqual(limiter.tokens // 1, 0)
+        # Refill rate is one weight per second
+        thread = threading.Thread(target=limiter.acquire, args=(1,))
+        thread.start()
+        thread.join(0.2)
+        self.assertTrue(thread.is_alive())
+        thread.join(2)
+        self.assertFalse(thread.is_alive())
+        for _ in range(4):
+            limiter.release()
+        self.assertEqual(limiter.concurrency, 3)
+        print(__name__ + "." + sys._getframe().f_code.co_name + ": Unit test passed")
+
+    def test_get_klines_pages(self):
+        from symphony.client.binance_client import BinanceClient
+        limiter = WeightRateLimiter()
+        start, num_bars, limit = 1609459200000, 2500, 1000
+        klines = BinanceClient.get_klines("ETHBTC", "1m", start, start + (num_bars - 1) * MINUTE_MS, limiter,
+                                          api_url=self.api_url, limit=limit)
+        self.assertEqual(len(klines), num_bars)
+        open_times = [kline[0] for kline in klines]
+        self.assertEqual(open_times, list(range(start, start + num_bars * MINUTE_MS, MINUTE_MS)))
+        self.assertEqual(limiter.stats["requests"], 3)
+        self.assertEqual(limiter.stats["weight"], 3 * binance_kline_weight(limit))
+        print(__name__ + "." + sys._getframe().f_code.co_name + ": Unit test passed")
+
+    def test_page_ranges(self):
+        start, hour_ms = 1609459200000, 60 * MINUTE_MS
+        pages = get_page_ranges(start, start + 2499 * hour_ms, Timeframe.H1, 1000)
+        self.assertEqual(pages, [
+            (start, start + 999 * hour_ms),
+            (start + 1000 * hour_ms, start + 1999 * hour_ms),
+            (start + 2000 * hour_ms, start + 2499 * hour_ms)
+        ])
+        self.assertEqual(get_page_ranges(start, start, Timeframe.H1, 1000), [(start, start)])
+        print(__name__ + "." + sys._getframe().f_code.co_name + ": Unit test passed")
+
+    def test_aget_klines_fetches_pages_concurrently(self):
+        from symphony.client.binance_client import BinanceClient
+        MockBinanceHandler.throttle_first = 1
+        limiter = WeightRateLimiter(backoff_base_secs=0.01)
+        start, num_bars, limit = 1609459200000, 2500, 500
+
+        async def fetch():
+            async with aiohttp.ClientSession() as session:
+                return await BinanceClient.aget_klines(session, "ETHBTC", Timeframe.M1, start,
+                                                       start + (num_bars - 1) * MINUTE_MS, limiter,
+                                                       api_url=self.api_url, limit=limit)
+
+        with patch("symphony.client.binance_client.get_binance_client_timeframe", return_value="1m"):
+            klines = asyncio.run(fetch())
+        open_times = [kline[0] for kline in klines]
+        self.assertEqual(open_times, list(range(start, start + num_bars * MINUTE_MS, MINUTE_MS)))
+        # 5 pages plus one throttled retry
+        self.assertEqual(limiter.stats["requests"], 6)
+        self.assertEqual(limiter.stats["throttled"], 1)
+        print(__name__ + "." + sys._getframe().f_code.co_name + ": Unit test passed")
+
+
+    def test_aget_klines_cancels_pages_on_failure(self):
+        from symphony.client.binance_client import BinanceClient
+        limiter = WeightRateLimiter(max_concurrency=4)
+        cancelled = []
+
+        async def arequest(session, method, url, weight, params=None):
+            if params["startTime"] == start:
+                raise ClientClassException("Page failed")
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(params["startTime"])
+                raise
+
+        async def fetch():
+            async with aiohttp.ClientSession() as session:
+                with self.assertRaises(ClientClassException):
+                    await BinanceClient.aget_klines(session, "ETHBTC", Timeframe.M1, start,
+                                                    start + 1999 * MINUTE_MS, limiter, api_url=self.api_url,
+                                                    limit=500)
+                # The other pages are done before the session closes
+                self.assertEqual(len(cancelled), 3)
+
+        start = 1609459200000
+        with patch("symphony.client.binance_client.get_binance_client_timeframe", return_value="1m"), \
+                patch.object(limiter, "arequest", side_effect=arequest):
+            asyncio.run(fetch())
+        print(__name__ + "." + sys._getframe().f_code.co_name + ": Unit test passed")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+import sys
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from symphony.client.session import create_pooled_session, mount_pool, get_pool_size, connection_stats
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        payload = b"{}"
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        return
+
+
+class SessionTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+        cls.url = f"http://127.0.0.1:{cls.server.server_address[1]}/api/v3/ping"
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def test_connections_are_reused(self):
+        session = create_pooled_session(4)
+        self.assertEqual(get_pool_size(session), 4)
+        for _ in range(5):
+            session.get(self.url).json()
+        stats = connection_stats(session)
+        self.assertEqual(stats["hosts"], 1)
+        self.assertEqual(stats["requests"], 5)
+        self.assertEqual(stats["connections_opened"], 1)
+        self.assertEqual(stats["reused"], 4)
+        self.assertEqual(stats["idle"], 1)
+
+        mount_pool(session, 16)
+        self.assertEqual(get_pool_size(session), 16)
+        self.assertEqual(connection_stats(session)["requests"], 0)
+        session.close()
+        print(__name__ + "." + sys._getframe().f_code.co_name + ": Unit test passed")
+
+
+if __name__ == '__main__':
+    unittest.main()
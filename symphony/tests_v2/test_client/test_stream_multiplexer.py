@@ -0,0 +1,153 @@
+import unittest
+import sys
+import json
+import asyncio
+import threading
+from time import monotonic, sleep
+from websockets.asyncio.server import serve
+from symphony.client import CombinedStreamMultiplexer
+from symphony.client.stream_multiplexer import binance_kline_stream
+
+
+def wait_until(predicate, timeout: float = 5.0) -> bool:
+    deadline = monotonic() + timeout
+    while monotonic() < deadline:
+        if predicate():
+            return True
+        sleep(0.01)
+    return predicate()
+
+
+class StandInStreamServer:
+    """
+    Local stand-in of the Binance combined stream endpoint
+    """
+
+    def __init__(self):
+        self.subscriptions = {}
+        self.control = []
+        self.loop = asyncio.new_event_loop()
+        started = threading.Event()
+        self.thread = threading.Thread(target=self.__run, args=(started,), daemon=True)
+        self.thread.start()
+        started.wait(5)
+
+    def __run(self, started: threading.Event) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.server = self.loop.run_until_complete(self.__serve())
+        self.url = f"ws://127.0.0.1:{self.server.sockets[0].getsockname()[1]}/stream"
+        started.set()
+        self.loop.run_forever()
+
+    async def __serve(self):
+        return await serve(self.__handle, "127.0.0.1", 0)
+
+    async def __handle(self, connection) -> None:
+        self.subscriptions[connection] = set()
+        try:
+            async for raw in connection:
+                message = json.loads(raw)
+                self.control.append(message)
+                if message["method"] == "SUBSCRIBE":
+                    self.subscriptions[connection].update(message["params"])
+                elif message["method"] == "UNSUBSCRIBE":
+                    self.subscriptions[connection].difference_update(message["params"])
+                await connection.send(json.dumps({"result": None, "id": message["id"]}))
+        finally:
+            del self.subscriptions[connection]
+
+    def subscribed(self) -> list:
+        return sorted(stream for streams in list(self.subscriptions.values()) for stream in streams)
+
+    def push(self, stream: str, data: dict) -> None:
+        async def send():
+            for connection, streams in list(self.subscriptions.items()):
+                if stream in streams:
+                    await connection.send(json.dumps({"stream": stream, "data": data}))
+        asyncio.run_coroutine_threadsafe(send(), self.loop).result(5)
+
+    def drop_connections(self) -> None:
+        async def close():
+            for connection in list(self.subscriptions.keys()):
+                await connection.close()
+        asyncio.run_coroutine_threadsafe(close(), self.loop).result(5)
+
+    def close(self) -> None:
+        async def shutdown():
+            self.server.close()
+            await self.server.wait_closed()
+        asyncio.run_coroutine_threadsafe(shutdown(), self.loop).result(5)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(5)
+
+
+class StreamMultiplexerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StandInStreamServer()
+        self.multiplexer = CombinedStreamMultiplexer(self.server.url, max_streams_per_connection=2,
+                                                     reconnect_secs=0.05)
+        self.received = []
+
+    def tearDown(self):
+        self.multiplexer.stop()
+        self.server.close()
+
+    def __handler(self, name: str):
+        return lambda data: self.received.append((name, data["k"]["t"]))
+
+    def test_dispatch_and_sharding(self):
+        streams = [binance_kline_stream(symbol, "1m") for symbol in ("ETHBTC", "BNBBTC", "XRPBTC")]
+        self.assertEqual(streams[0], "ethbtc@kline_1m")
+        # Subscribed before start, sent on connect
+        self.multiplexer.subscribe(streams[0], self.__handler("eth"))
+        self.multiplexer.start()
+        self.multiplexer.subscribe(streams[1], self.__handler("bnb"))
+        self.multiplexer.subscribe(streams[2], self.__handler("xrp"))
+        self.assertTrue(wait_until(lambda: self.server.subscribed() == sorted(streams)))
+        self.assertEqual(len(self.server.subscriptions), 2)
+        self.assertEqual(self.multiplexer.stats["connections"], 2)
+
+        for i, stream in enumerate(streams):
+            self.server.push(stream, {"e": "kline", "k": {"t": i}})
+        self.server.push("ltcbtc@kline_1m", {"k": {"t": -1}})
+        self.assertTrue(wait_until(lambda: len(self.received) == 3))
+        self.assertEqual(sorted(self.received), [("bnb", 1), ("eth", 0), ("xrp", 2)])
+
+        # Replacing a handler sends nothing
+        num_control = len(self.server.control)
+        self.multiplexer.subscribe(streams[0], self.__handler("eth2"))
+        self.server.push(streams[0], {"k": {"t": 3}})
+        self.assertTrue(wait_until(lambda: ("eth2", 3) in self.received))
+        self.assertEqual(len(self.server.control), num_control)
+
+        self.multiplexer.unsubscribe(streams[1])
+        self.assertTrue(wait_until(lambda: self.server.subscribed() == sorted([streams[0], streams[2]])))
+        self.assertEqual(sorted(self.multiplexer.streams), sorted([streams[0], streams[2]]))
+        print(__name__ + "." + sys._getframe().f_code.co_name + ": Unit test passed")
+
+    def test_resubscribe_on_reconnect(self):
+        streams = [binance_kline_stream(symbol, "5m") for symbol in ("ETHBTC", "BNBBTC", "XRPBTC")]
+        self.multiplexer.start()
+        for stream in streams:
+            self.multiplexer.subscribe(stream, self.__handler(stream))
+        self.assertTrue(wait_until(lambda: self.server.subscribed() == sorted(streams)))
+        connects = self.multiplexer.stats["connects"]
+
+        self.server.drop_connections()
+        self.assertTrue(wait_until(lambda: self.multiplexer.stats["connects"] >= connects + 2
+                                   and self.server.subscribed() == sorted(streams)))
+        self.server.push(streams[2], {"k": {"t": 7}})
+        self.assertTrue(wait_until(lambda: (streams[2], 7) in self.received))
+
+        # A failing handler does not drop the connection
+        self.multiplexer.subscribe(streams[0], lambda data: 1 / 0)
+        self.server.push(streams[0], {"k": {"t": 8}})
+        self.server.push(streams[1], {"k": {"t": 9}})
+        self.assertTrue(wait_until(lambda: (streams[1], 9) in self.received))
+        self.assertEqual(self.multiplexer.stats["handler_errors"], 1)
+        print(__name__ + "." + sys._getframe().f_code.co_name + ": Unit test passed")
+
+
+if __name__ == '__main__':
+    unittest.main()
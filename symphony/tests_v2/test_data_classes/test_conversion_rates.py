@@ -0,0 +1,142 @@
+import unittest
+import sys
+import random
+from time import perf_counter
+from unittest.mock import patch
+from symphony.borg import Borg
+from symphony.client import BinanceClient
+from symphony.data_classes import ConversionChain, Instrument
+from symphony.enum import Exchange, Market
+from symphony.quoter import BinanceRealTimeQuoter
+
+PRICES = {
+    "BTCEUR": 40000.0,
+    "ETHEUR": 2500.0,
+    "ETHBTC": 0.0625,
+    "QLCBTC": 0.000001,
+    "QLCETH": 0.000016,
+    "BNBETH": 0.2,
+    "XRPBNB": 0.002
+}
+
+
+def make_instrument(symbol: str) -> Instrument:
+    return Instrument(symbol=symbol, digits=8, base_asset=symbol[:3], quote_asset=symbol[3:], exchange=Exchange.BINANCE)
+
+
+class ConversionRatesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.borg_state = patch.dict(Borg._shared_state, clear=True)
+        self.borg_state.start()
+        self.instruments = [make_instrument(symbol) for symbol in PRICES.keys()]
+        self.all_instruments = patch.object(BinanceClient, "get_all_instruments", return_value=self.instruments)
+        self.all_instruments.start()
+        self.quoter = BinanceRealTimeQuoter(BinanceClient())
+        for symbol, price in PRICES.items():
+            self.quoter.push_quote(symbol, price * 0.999, price * 1.001, 1.0, 1.0)
+
+    def tearDown(self):
+        self.all_instruments.stop()
+        self.borg_state.stop()
+
+    def test_rate_cache(self):
+        conversion_chain = ConversionChain(self.quoter)
+        with patch.object(self.quoter, "get_quotes", wraps=self.quoter.get_quotes) as get_quotes:
+            rate = conversion_chain.convert("XRP", "EUR")
+            self.assertEqual(get_quotes.call_count, 1)
+            self.assertEqual(conversion_chain.convert("XRP", "EUR", amount=2.0), 2 * rate)
+            self.assertEqual(get_quotes.call_count, 1)
+
+            # A new quote on the chain invalidates the rate, one elsewhere does not
+            self.quoter.push_quote("QLCBTC", 0.000001, 0.000001, 1.0, 1.0)
+            conversion_chain.convert("XRP", "EUR")
+            self.assertEqual(get_quotes.call_count, 1)
+            self.quoter.push_quote("BNBETH", 0.3, 0.3, 1.0, 1.0)
+            self.assertAlmostEqual(conversion_chain.convert("XRP", "EUR"), 0.002 * 0.3 * 2500.0, delta=0.01)
+            self.assertEqual(get_quotes.call_count, 2)
+
+            # Direct pairs are cached too, per order type
+            conversion_chain.convert("EUR", "BTC", order_type=Market.BUY)
+            conversion_chain.convert("EUR", "BTC", order_type=Market.BUY)
+            self.assertEqual(get_quotes.call_count, 3)
+
+            # QLC sells for EUR through BTC or ETH, picking by liquidity is cached apart from taking the first
+            first_rate = conversion_chain.convert("QLC", "EUR")
+            conversion_chain.highest_liquidity_chain = True
+            liquid_rate = conversion_chain.convert("QLC", "EUR")
+            self.assertEqual(get_quotes.call_count, 5)
+            self.assertEqual(conversion_chain.convert("QLC", "EUR"), liquid_rate)
+            conversion_chain.highest_liquidity_chain = False
+            self.assertEqual(conversion_chain.convert("QLC", "EUR"), first_rate)
+            self.assertEqual(get_quotes.call_count, 5)
+
+        # Stale quotes are never served from the cache
+        self.quoter.set_max_quote_age("XRPBNB", 0.0)
+        self.assertIsNone(self.quoter.quote_sequence("XRPBNB"))
+        self.assertIsNotNone(self.quoter.quote_sequence("BNBETH"))
+        print(__name__ + "." + sys._getframe().f_code.co_name + ": Unit test passed")
+
+    def test_conversion_rates(self):
+        conversion_chain = ConversionChain(self.quoter)
+        for order_type in [None, Market.BUY, Market.SELL]:
+            rates = conversion_chain.conversion_rates("EUR", order_type=order_type)
+            self.assertEqual(rates["EUR"], 1.0)
+            for asset in ["BTC", "ETH", "QLC", "BNB", "XRP"]:
+                self.assertAlmostEqual(rates[asset], conversion_chain.convert(asset, "EUR", order_type=order_type),
+                                       delta=rates[asset] * 1e-6)
+        # QLC reaches BNB by buys only through ETH, EUR by selling
+        rates = conversion_chain.conversion_rates("BNB")
+        self.assertAlmostEqual(rates["QLC"], conversion_chain.convert("QLC", "BNB"), delta=1e-9)
+        self.assertAlmostEqual(rates["EUR"], conversion_chain.convert("EUR", "BNB"), delta=1e-9)
+
+        balances = {"EUR": 100.0, "BTC": 0.5, "XRP": 1000.0, "QLC": 0.0}
+        expected = sum(conversion_chain.convert(asset, "EUR", amount=amount) for asset, amount in balances.items())
+        self.assertAlmostEqual(conversion_chain.value_in(balances, "EUR"), expected, delta=1e-6)
+
+        # Assets missing a quote are converted one by one
+        self.quoter.set_max_quote_age("XRPBNB", 0.0)
+        self.assertTrue(conversion_chain.conversion_rates("EUR").isna()["XRP"])
+        with patch.object(conversion_chain, "convert", return_value=1.0) as convert:
+            self.assertAlmostEqual(conversion_chain.value_in(balances, "EUR"), expected - 1000.0 * 0.002 * 0.2 * 2500.0 + 1.0,
+                                   delta=1.0)
+            convert.assert_called_once()
+        print(__name__ + "." + sys._getframe().f_code.co_name + ": Unit test passed")
+
+    def test_benchmark(self):
+        random.seed(7)
+        quote_assets = ["BTC", "ETH", "BNB", "USD"]
+        base_assets = [f"A{i:02d}" for i in range(300)]
+        instruments = [Instrument(symbol=base + quote, digits=8, base_asset=base, quote_asset=quote,
+                                  exchange=Exchange.BINANCE)
+                       for base in base_assets for quote in random.sample(quote_assets, 2)]
+        instruments += [make_instrument(symbol) for symbol in ["BTCUSD", "ETHUSD", "BNBUSD", "ETHBTC", "BNBBTC"]]
+        Borg._shared_state.clear()
+        with patch.object(BinanceClient, "get_all_instruments", return_value=instruments):
+            quoter = BinanceRealTimeQuoter(BinanceClient())
+        for instrument in instruments:
+            price = random.uniform(1.0, 2.0)
+            quoter.push_quote(instrument.symbol, price, price * 1.001, 1.0, 1.0)
+        balances = {asset: random.uniform(0.0, 10.0) for asset in base_assets[:100]}
+
+        conversion_chain = ConversionChain(quoter)
+        start_time = perf_counter()
+        per_asset = sum(conversion_chain.convert(asset, "USD", amount=amount) for asset, amount in balances.items())
+        per_asset_secs = perf_counter() - start_time
+        start_time = perf_counter()
+        cached = sum(conversion_chain.convert(asset, "USD", amount=amount) for asset, amount in balances.items())
+        cached_secs = perf_counter() - start_time
+        conversion_chain.value_in(balances, "USD")
+        start_time = perf_counter()
+        value = conversion_chain.value_in(balances, "USD")
+        value_in_secs = perf_counter() - start_time
+
+        self.assertAlmostEqual(per_asset, cached)
+        self.assertAlmostEqual(value, per_asset, delta=per_asset * 1e-9)
+        print(f"ConversionChain: {len(balances)} assets valued in {per_asset_secs * 1000:.2f} ms converting each, "
+              f"{cached_secs * 1000:.2f} ms from the rate cache, {value_in_secs * 1000:.2f} ms with value_in")
+        print(__name__ + "." + sys._getframe().f_code.co_name + ": Unit test passed")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,13 @@
 import unittest
 import sys
 import logging
-from symphony.data_classes import PriceHistory
+import gc
+import os
+import numpy as np
+import pandas as pd
+from symphony.data_classes import PriceHistory, price_histories_memory_usage, copy_price_history
+from symphony.enum import Column
+from symphony.indicator_v2 import IndicatorRegistry
 
 
 class PriceHistoryTest(unittest.TestCase):
@@ -10,6 +16,84 @@ class PriceHistoryTest(unittest.TestCase):
         ph = PriceHistory()
         print(__name__ + "." + sys._getframe(  ).f_code.co_name + ": Unit test passed")
 
+    def test_price_history_from_numpy_candles(self):
+        num_bars = 500
+        candles = np.zeros((num_bars, 6))
+        candles[:, 0] = 1609459200000 + np.arange(num_bars) * 3600000
+        candles[:, 1:] = np.random.rand(num_bars, 5)
+
+        ph = PriceHistory.from_numpy_candles(candles[:240])
+        df = ph.price_history
+        self.assertEqual(len(df), 240)
+        self.assertTrue(np.shares_memory(df[Column.CLOSE].values, candles))
+        self.assertEqual(df[Column.CLOSE].iloc[-1], candles[239, 2])
+        self.assertEqual(df.index[0], df[Column.TIMESTAMP].iloc[0])
+
+        # Growing and sliding windows reuse the cached timestamps
+        ph.extend_numpy_candles(candles[:241])
+        self.assertEqual(len(ph.price_history), 241)
+        sliding = PriceHistory.from_numpy_candles(candles[1:241])
+        self.assertEqual(sliding.price_history.index[0], ph.price_history.index[1])
+        print(__name__ + "." + sys._getframe(  ).f_code.co_name + ": Unit test passed")
+
+    def test_price_history_projection(self):
+        index = pd.date_range("2021-01-01", periods=100, freq="H", tz="UTC")
+        df = pd.DataFrame(np.random.rand(100, 5), index=index,
+                          columns=[Column.OPEN, Column.HIGH, Column.LOW, Column.CLOSE, Column.VOLUME])
+        df[IndicatorRegistry.BULLISH_PRICE_FLIP.value] = np.zeros(100)
+        df[IndicatorRegistry.BUY_SETUP.value] = np.ones(100)
+        df[IndicatorRegistry.SELL_SETUP.value] = np.ones(100)
+        ph = PriceHistory(price_history=df)
+        full_size = ph.memory_usage()
+
+        # Nothing registered, nothing dropped
+        self.assertIsNone(ph.projection)
+        self.assertEqual(ph.project(), [])
+
+        ph.register_columns("Consumer1", [IndicatorRegistry.BUY_SETUP])
+        ph.register_columns("Consumer2", [IndicatorRegistry.SELL_SETUP.value])
+        dropped = ph.project(spill=True)
+        self.assertEqual(dropped, [IndicatorRegistry.BULLISH_PRICE_FLIP.value])
+        self.assertLess(ph.memory_usage(), full_size)
+
+        ph.restore_columns()
+        self.assertIn(IndicatorRegistry.BULLISH_PRICE_FLIP.value, ph.price_history.columns)
+        self.assertEqual(ph.price_history[IndicatorRegistry.BULLISH_PRICE_FLIP.value].sum(), 0)
+
+        ph.deregister_columns("Consumer2")
+        self.assertCountEqual(ph.project(), [IndicatorRegistry.BULLISH_PRICE_FLIP.value, IndicatorRegistry.SELL_SETUP.value])
+        self.assertEqual(price_histories_memory_usage([ph, ph]), 2 * ph.memory_usage())
+        print(__name__ + "." + sys._getframe(  ).f_code.co_name + ": Unit test passed")
+
+    def test_spill_and_restore(self):
+        df = pd.DataFrame({"A": np.full(10, 1.0), "B": np.full(10, 2.0), "C": np.full(10, 3.0)},
+                          index=pd.date_range("2021-01-01", periods=10, freq="H", tz="UTC"))
+        ph = PriceHistory(price_history=df)
+        ph.drop_columns(["A"], spill=True)
+        ph.drop_columns(["B"], spill=True)
+        ph.restore_columns(["A"])
+        # Spilled while B still is, C gets a file of its own
+        ph.drop_columns(["C"], spill=True)
+        copy = copy_price_history(ph)
+        ph.restore_columns(["B"])
+        self.assertEqual(ph.price_history["B"].sum(), 20.0)
+
+        spill_dir = ph._PriceHistory__spill_dir
+        self.assertTrue(os.path.isdir(spill_dir))
+        ph.restore_columns()
+        self.assertEqual(ph.price_history["C"].sum(), 30.0)
+        self.assertFalse(os.path.exists(spill_dir))
+
+        # The copy restores from its own files, and removes them when it goes
+        copy_spill_dir = copy._PriceHistory__spill_dir
+        self.assertNotEqual(copy_spill_dir, spill_dir)
+        self.assertEqual(copy.restore_columns(["B"]), ["B"])
+        self.assertEqual(copy.price_history["B"].sum(), 20.0)
+        del copy
+        gc.collect()
+        self.assertFalse(os.path.exists(copy_spill_dir))
+        print(__name__ + "." + sys._getframe(  ).f_code.co_name + ": Unit test passed")
+
 
 if __name__ == "__main__":
     logging.basicConfig(stream=sys.stdout)
@@ -0,0 +1,69 @@
+import unittest
+import sys
+import logging
+import numpy as np
+import pandas as pd
+from symphony.data_classes import PriceHistory, Instrument, SharedPriceHistory, map_price_histories
+from symphony.enum import Column, Timeframe
+
+
+def add_indicators(price_history: PriceHistory) -> PriceHistory:
+    df = price_history.price_history
+    df["sma"] = df[Column.CLOSE].rolling(3).mean()
+    df["up"] = (df[Column.CLOSE] > df[Column.OPEN]).astype(int)
+    df["direction"] = np.where(df["up"] == 1, "UP", "DOWN")
+    return price_history
+
+
+class SharedPriceHistoryTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        index = pd.date_range("2021-01-01", periods=500, freq="H", tz="UTC")
+        df = pd.DataFrame(np.random.rand(500, 5), index=index,
+                          columns=[Column.OPEN, Column.HIGH, Column.LOW, Column.CLOSE, Column.VOLUME])
+        df[Column.TIMESTAMP] = index
+        self.price_history = PriceHistory(instrument=Instrument(symbol="ETHBTC"), timeframe=Timeframe.H1,
+                                          price_history=df)
+
+    def test_shared_price_history(self):
+        shared = SharedPriceHistory.create(self.price_history)
+        try:
+            view = shared.price_history
+            self.assertTrue(view.price_history.equals(self.price_history.price_history))
+            self.assertEqual(view.instrument.symbol, "ETHBTC")
+
+            # Worker side: attach, add columns, write back
+            attached = SharedPriceHistory.attach(shared.descriptor)
+            worker_view = attached.price_history
+            add_indicators(worker_view)
+            written = attached.write_back(worker_view)
+            self.assertTrue({"sma", "up", "direction"}.issubset(written))
+            # Float columns still viewing the segment are not copied
+            self.assertNotIn(Column.OPEN, written)
+            worker_view.price_history[Column.CLOSE] *= 2
+            self.assertIn(Column.CLOSE, attached.write_back(worker_view))
+            del worker_view
+            attached.close()
+
+            result = shared.to_price_history().price_history
+            self.assertTrue(np.allclose(result[Column.CLOSE], self.price_history.price_history[Column.CLOSE] * 2))
+            self.assertEqual(result["up"].dtype, np.int64)
+            self.assertEqual(set(result["direction"]), {"UP", "DOWN"})
+            del view
+        finally:
+            shared.close()
+            shared.unlink()
+        print(__name__ + "." + sys._getframe(  ).f_code.co_name + ": Unit test passed")
+
+    def test_map_price_histories(self):
+        results = map_price_histories(add_indicators, [self.price_history, self.price_history], max_workers=2)
+        self.assertEqual(len(results), 2)
+        expected = add_indicators(PriceHistory(price_history=self.price_history.price_history.copy())).price_history
+        for result in results:
+            self.assertTrue(result.price_history.equals(expected))
+        print(__name__ + "." + sys._getframe(  ).f_code.co_name + ": Unit test passed")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(stream=sys.stdout)
+    unittest.main()
@@ -0,0 +1,110 @@
+import unittest
+import sys
+import os
+import numpy as np
+from time import perf_counter
+from symphony.parser import BinanceParser, CCXTParser
+from symphony.parser.binance_parser import BINANCE_KLINE_COLUMNS
+from symphony.enum import Column
+from symphony.config import USE_MODIN
+if USE_MODIN:
+    import modin.pandas as pd
+else:
+    import pandas as pd
+
+START_MS = 1609459200000
+MINUTE_MS = 60000
+
+
+def binance_payload(num_rows: int) -> list:
+    return [
+        [START_MS + i * MINUTE_MS, f"{1 + i % 7 / 8:.8f}", "2.50000000", "0.50000000", f"{1 + i % 5 / 4:.8f}",
+         "1000.12340000", START_MS + i * MINUTE_MS + MINUTE_MS - 1, "1500.10000000", 100 + i % 3, "500.00000000",
+         "700.00000000", "0"]
+        for i in range(num_rows)
+    ]
+
+
+def ccxt_payload(num_rows: int) -> list:
+    return [[START_MS + i * MINUTE_MS, 1.0 + i % 7, 2.5, 0.5, 1.5, 1000.1234] for i in range(num_rows)]
+
+
+def reference_binance_parse(payload: list, columns_to_keep: list) -> pd.DataFrame:
+    """
+    The previous object-DataFrame implementation
+    """
+    df = pd.DataFrame(payload, columns=BINANCE_KLINE_COLUMNS)
+    df[Column.TIMESTAMP] = pd.to_datetime(df["timestamp"], unit='ms', utc=True)
+    df["closetime"] = pd.to_datetime(df["closetime"], unit='ms', utc=True)
+    df = df.set_index(Column.TIMESTAMP)
+    df[[Column.OPEN, Column.HIGH, Column.LOW, Column.CLOSE, Column.VOLUME]] = \
+        df[[Column.OPEN, Column.HIGH, Column.LOW, Column.CLOSE, Column.VOLUME]].apply(pd.to_numeric)
+    return df.drop(list(set(BINANCE_KLINE_COLUMNS) - set(columns_to_keep)), axis=1)
+
+
+class KlineParsersTest(unittest.TestCase):
+
+    def test_binance_parse_matches_reference(self):
+        payload = binance_payload(1000)
+        df = BinanceParser.parse(payload)
+        pd.testing.assert_frame_equal(df, reference_binance_parse(payload, list(df.columns) + ["timestamp"]))
+        self.assertEqual(df.index.name, Column.TIMESTAMP)
+        self.assertEqual(str(df.index.tz), "UTC")
+        self.assertTrue(all(dtype == np.float64 for dtype in df.dtypes))
+
+        df = BinanceParser.parse(payload, columns_to_keep=["timestamp", "close", "closetime", "num_trades"])
+        self.assertEqual(list(df.columns), ["close", "closetime", "num_trades"])
+        self.assertEqual(df["num_trades"].dtype, np.int64)
+        self.assertEqual(df["closetime"].iloc[0], pd.Timestamp(START_MS + MINUTE_MS - 1, unit="ms", tz="UTC"))
+
+        self.assertEqual(len(BinanceParser.parse([])), 0)
+        print(__name__ + "." + sys._getframe().f_code.co_name + ": Unit test passed")
+
+    def test_ccxt_parse(self):
+        payload = ccxt_payload(1000)
+        payload[3][5] = None
+        df = CCXTParser.parse(payload)
+        self.assertEqual(list(df.columns), [Column.OPEN, Column.HIGH, Column.LOW, Column.CLOSE, Column.VOLUME])
+        self.assertEqual(df.index[1], pd.Timestamp(START_MS + MINUTE_MS, unit="ms", tz="UTC"))
+        self.assertTrue(np.isnan(df[Column.VOLUME].iloc[3]))
+        pd.testing.assert_frame_equal(CCXTParser.parse(np.array(ccxt_payload(10))), CCXTParser.parse(ccxt_payload(10)))
+        print(__name__ + "." + sys._getframe().f_code.co_name + ": Unit test passed")
+
+    def test_websocket_message(self):
+        msg = {"k": {"t": START_MS, "o": "1.0", "h": "2.0", "l": "0.5", "c": "1.5", "v": "10.0", "x": False}}
+        first = BinanceParser.parse_websocket_message(msg)
+        second = BinanceParser.parse_websocket_message(msg)
+        timestamp = pd.Timestamp(START_MS, unit="ms", tz="UTC")
+        self.assertEqual(first[timestamp]["close"], 1.5)
+        self.assertIs(next(iter(first)), next(iter(second)))
+        print(__name__ + "." + sys._getframe().f_code.co_name + ": Unit test passed")
+
+    def __benchmark(self, num_rows: int) -> None:
+        payload = binance_payload(num_rows)
+        start_time = perf_counter()
+        BinanceParser.parse(payload)
+        parse_secs = perf_counter() - start_time
+        start_time = perf_counter()
+        reference_binance_parse(payload, ["timestamp", "open", "high", "low", "close", "volume"])
+        reference_secs = perf_counter() - start_time
+        print(f"BinanceParser.parse {num_rows} rows: {num_rows / parse_secs:,.0f} rows/s, "
+              f"previously {num_rows / reference_secs:,.0f} rows/s")
+
+        payload = ccxt_payload(num_rows)
+        start_time = perf_counter()
+        CCXTParser.parse(payload)
+        parse_secs = perf_counter() - start_time
+        print(f"CCXTParser.parse {num_rows} rows: {num_rows / parse_secs:,.0f} rows/s")
+
+    def test_benchmark_1k(self):
+        self.__benchmark(1000)
+        print(__name__ + "." + sys._getframe().f_code.co_name + ": Unit test passed")
+
+    @unittest.skipUnless(os.environ.get("SYMPHONY_BENCHMARKS"), "Set SYMPHONY_BENCHMARKS to run")
+    def test_benchmark_1m(self):
+        self.__benchmark(1000000)
+        print(__name__ + "." + sys._getframe().f_code.co_name + ": Unit test passed")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import unittest
+import sys
+import shutil
+import tempfile
+import pathlib
+import numpy as np
+import pandas as pd
+from time import perf_counter
+from symphony.data_classes import Instrument, ConversionChain
+from symphony.enum import Column, Exchange, Market
+from symphony.exceptions import QuoterException
+from symphony.quoter import ArchiveHistoricalQuoter
+from symphony.risk_management import CryptoPositionSizer
+from symphony.utils.archive import write_archive
+
+START = pd.Timestamp("2021-06-01 00:00:00", tz="UTC")
+MINUTE = pd.Timedelta(minutes=1)
+NUM_BARS = 60
+PRICES = {
+    "ETHBTC": 0.05 + np.arange(NUM_BARS) * 0.0001,
+    "BTCUSDT": 30000.0 + np.arange(NUM_BARS),
+    "BNBBTC": np.full(NUM_BARS, 0.01)
+}
+INSTRUMENTS = [
+    Instrument(symbol="ETHBTC", digits=6, base_asset="ETH", quote_asset="BTC", exchange=Exchange.BINANCE),
+    Instrument(symbol="BTCUSDT", digits=2, base_asset="BTC", quote_asset="USDT", exchange=Exchange.BINANCE),
+    Instrument(symbol="BNBBTC", digits=7, base_asset="BNB", quote_asset="BTC", exchange=Exchange.BINANCE),
+    Instrument(symbol="XRPBTC", digits=8, base_asset="XRP", quote_asset="BTC", exchange=Exchange.BINANCE)
+]
+
+
+class ArchiveHistoricalQuoterTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.dir = tempfile.mkdtemp()
+        index = pd.date_range(START, periods=NUM_BARS, freq="1min", name=Column.TIMESTAMP)
+        for symbol, closes in PRICES.items():
+            write_archive([pd.DataFrame({Column.OPEN: closes, Column.CLOSE: closes}, index=index)],
+                          str(pathlib.Path(self.dir, symbol + ".archive")))
+        self.quoter = ArchiveHistoricalQuoter.from_directory(INSTRUMENTS, self.dir, spreads={"ETHBTC": 0.002})
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.dir)
+
+    def test_as_of_quotes(self):
+        self.assertEqual([instrument.symbol for instrument in self.quoter.instruments], list(PRICES.keys()))
+        # At the open of bar 5, bar 4 is the last closed one
+        self.assertEqual(self.quoter.get_midpoint("ETHBTC", timestamp=START + 5 * MINUTE), 0.0504)
+        self.assertEqual(self.quoter.get_midpoint("ETHBTC", timestamp=START + 5 * MINUTE - pd.Timedelta(1)), 0.0503)
+        self.assertAlmostEqual(self.quoter.get_bid("ETHBTC", timestamp=START + 5 * MINUTE), 0.0504 * 0.999)
+        self.assertAlmostEqual(self.quoter.get_ask(INSTRUMENTS[0], timestamp=START + 5 * MINUTE), 0.0504 * 1.001)
+        self.assertAlmostEqual(self.quoter.get_liquidity("ETHBTC", timestamp=START + 5 * MINUTE), 0.002 / 1.001)
+        self.assertEqual(self.quoter.get_price("BTCUSDT", Market.BUY, timestamp=pd.Timestamp("2022-01-01")),
+                         30000.0 + NUM_BARS - 1)
+
+        with self.assertRaises(QuoterException):
+            self.quoter.get_bid("ETHBTC")
+        self.quoter.set_timestamp(START + 10 * MINUTE)
+        self.assertEqual(self.quoter.get_bid("BTCUSDT"), 30009.0)
+        with self.assertRaises(QuoterException):
+            self.quoter.get_bid("ETHBTC", timestamp=START + MINUTE - pd.Timedelta(1))
+        with self.assertRaises(QuoterException):
+            self.quoter.get_bid("XRPBTC")
+
+        stale = ArchiveHistoricalQuoter.from_directory(INSTRUMENTS, self.dir, max_age=pd.Timedelta(minutes=5))
+        self.assertEqual(stale.get_midpoint("BNBBTC", timestamp=START + (NUM_BARS + 5) * MINUTE), 0.01)
+        with self.assertRaises(QuoterException):
+            stale.get_midpoint("BNBBTC", timestamp=START + (NUM_BARS + 6) * MINUTE)
+        print(__name__ + "." + sys._getframe().f_code.co_name + ": Unit test passed")
+
+    def test_batch_queries(self):
+        rng = np.random.default_rng(7)
+        num_queries = 1_000_000
+        symbols = rng.choice(list(PRICES.keys()), num_queries)
+        timestamps = START.value + rng.integers(0, (NUM_BARS + 2) * 60 * 10 ** 9, num_queries)
+        start_time = perf_counter()
+        quotes = self.quoter.get_prices(symbols, timestamps)
+        batch_secs = perf_counter() - start_time
+        print(f"ArchiveHistoricalQuoter: {num_queries:,} as-of queries in {batch_secs * 1000:.0f} ms")
+
+        bars = (timestamps - START.value) // (60 * 10 ** 9) - 1
+        expected = np.array([PRICES[symbol][min(bar, NUM_BARS - 1)] if bar >= 0 else np.nan
+                             for symbol, bar in zip(symbols, bars)])
+        np.testing.assert_array_equal(quotes, expected)
+        bids = self.quoter.get_prices(["ETHBTC", "BNBBTC"], [START + 3 * MINUTE] * 2, column=Column.BID)
+        np.testing.assert_allclose(bids, [0.0502 * 0.999, 0.01])
+        with self.assertRaises(QuoterException):
+            self.quoter.get_prices(["ETHBTC"], [START, START])
+        print(__name__ + "." + sys._getframe().f_code.co_name + ": Unit test passed")
+
+    def test_offline_conversion_and_sizing(self):
+        self.quoter.set_timestamp(START + 10 * MINUTE)
+        conversion_chain = ConversionChain(self.quoter)
+        self.assertAlmostEqual(conversion_chain.convert("ETH", "BTC", amount=2.0), 2 * 0.0509)
+        self.assertAlmostEqual(conversion_chain.convert("USDT", "BTC", amount=30009.0), 1.0)
+
+        sizer = CryptoPositionSizer(self.quoter)
+        self.assertIsNone(sizer.exchange_client)
+        position_size = sizer.calculate_position_size(INSTRUMENTS[0], Market.BUY, entry_price=0.0509,
+                                                      stop_loss=0.0499, account_size=1.0,
+                                                      account_denomination="BTC", risk_perc=0.02)
+        self.assertAlmostEqual(position_size, round(0.02 / 0.0509 / (0.001 / 0.0509), 6))
+        print(__name__ + "." + sys._getframe().f_code.co_name + ": Unit test passed")
+
+
+if __name__ == '__main__':
+    unittest.main()
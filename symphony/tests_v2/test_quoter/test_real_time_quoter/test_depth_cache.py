@@ -0,0 +1,126 @@
+import unittest
+import sys
+from time import perf_counter
+from unittest.mock import patch
+from symphony.borg import Borg
+from symphony.client import BinanceClient, CombinedStreamMultiplexer
+from symphony.client.stream_multiplexer import binance_depth_stream
+from symphony.data_classes import Instrument
+from symphony.enum import Exchange, Market
+from symphony.exceptions import QuoterException
+from symphony.quoter import DepthCache
+from symphony.quoter.real_time.depth_cache import DepthBook
+from symphony.tests_v2.test_client.test_stream_multiplexer import StandInStreamServer, wait_until
+
+SNAPSHOT = {
+    "lastUpdateId": 100,
+    "bids": [["0.0500", "1.0"], ["0.0499", "2.0"], ["0.0498", "5.0"]],
+    "asks": [["0.0501", "1.0"], ["0.0502", "2.0"], ["0.0503", "5.0"]]
+}
+
+
+def depth_update(first_id: int, final_id: int, bids: list = (), asks: list = ()) -> dict:
+    return {"e": "depthUpdate", "s": "ETHBTC", "U": first_id, "u": final_id,
+            "b": [[str(price), str(quantity)] for price, quantity in bids],
+            "a": [[str(price), str(quantity)] for price, quantity in asks]}
+
+
+class DepthCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.borg_state = patch.dict(Borg._shared_state, clear=True)
+        self.borg_state.start()
+        instruments = [Instrument(symbol="ETHBTC", digits=6, exchange=Exchange.BINANCE)]
+        with patch.object(BinanceClient, "instruments", instruments):
+            self.client = BinanceClient()
+        self.order_book = patch.object(self.client.binance_client, "get_order_book", create=True,
+                                       return_value=SNAPSHOT)
+        self.get_order_book = self.order_book.start()
+        self.server = StandInStreamServer()
+        self.depth_cache = DepthCache(self.client, levels=3, multiplexer=CombinedStreamMultiplexer(self.server.url))
+        self.stream = binance_depth_stream("ETHBTC")
+
+    def tearDown(self):
+        self.depth_cache.multiplexer.stop()
+        self.depth_cache.stop()
+        self.server.close()
+        self.order_book.stop()
+        self.borg_state.stop()
+
+    def test_sync_and_resync(self):
+        self.depth_cache.watch(Instrument(symbol="ETHBTC", exchange=Exchange.BINANCE))
+        self.depth_cache.start()
+        self.assertTrue(wait_until(lambda: self.server.subscribed() == ["ethbtc@depth@100ms"]))
+        self.assertFalse(self.depth_cache.is_synced("ETHBTC"))
+        self.assertIsNone(self.depth_cache.best_bid_ask("ETHBTC"))
+
+        # The first event is older than the snapshot, the second straddles it
+        self.server.push(self.stream, depth_update(95, 99, bids=[(0.0510, 9.0)]))
+        self.server.push(self.stream, depth_update(99, 102, bids=[(0.0500, 0.0)], asks=[(0.0501, 3.0)]))
+        self.assertTrue(self.depth_cache.wait_synced(["ETHBTC"], timeout=5))
+        self.get_order_book.assert_called_once_with(symbol="ETHBTC", limit=3)
+        self.assertEqual(self.depth_cache.best_bid_ask("ETHBTC"), (0.0499, 0.0501))
+
+        # Events were missed, the book resyncs from a new snapshot
+        self.get_order_book.return_value = dict(SNAPSHOT, lastUpdateId=110)
+        self.server.push(self.stream, depth_update(105, 111, asks=[(0.0501, 0.0)]))
+        self.assertTrue(wait_until(lambda: self.depth_cache.stats["snapshots"] == 2))
+        self.assertTrue(self.depth_cache.wait_synced(["ETHBTC"], timeout=5))
+        self.assertEqual(self.depth_cache.best_bid_ask("ETHBTC"), (0.0500, 0.0502))
+        self.assertEqual(self.depth_cache.stats["resyncs"], 1)
+
+        self.depth_cache.unwatch("ETHBTC")
+        self.assertTrue(wait_until(lambda: self.server.subscribed() == []))
+        self.assertFalse(self.depth_cache.is_synced("ETHBTC"))
+        print(__name__ + "." + sys._getframe().f_code.co_name + ": Unit test passed")
+
+    def test_cost_to_fill(self):
+        book = DepthBook(levels=3)
+        book.apply_snapshot(SNAPSHOT)
+        self.assertEqual(book.cost_to_fill(1.0, Market.BUY), (0.0501, 0.0501))
+        average_price, cost = book.cost_to_fill(2.5, Market.BUY)
+        self.assertAlmostEqual(cost, 0.0501 + 1.5 * 0.0502)
+        self.assertAlmostEqual(average_price, cost / 2.5)
+        average_price, cost = book.cost_to_fill(8.0, Market.SELL)
+        self.assertAlmostEqual(cost, 0.0500 + 2 * 0.0499 + 5 * 0.0498)
+        self.assertIsNone(book.cost_to_fill(8.5, Market.SELL))
+
+        # Cached levels are rebuilt after an update
+        self.assertTrue(book.apply(depth_update(101, 101, asks=[(0.0501, 0.0)])))
+        self.assertEqual(book.cost_to_fill(1.0, Market.BUY), (0.0502, 0.0502))
+        self.assertFalse(book.apply(depth_update(103, 104)))
+        # Levels beyond twice the depth are pruned
+        self.assertTrue(book.apply(depth_update(102, 102, bids=[(0.04 + i * 0.0001, 1.0) for i in range(5)])))
+        self.assertEqual(len(book.bids), 3)
+
+        with self.assertRaises(QuoterException):
+            self.depth_cache.cost_to_fill("ETHBTC", 1.0, Market.LIMIT)
+        self.assertIsNone(self.depth_cache.cost_to_fill("ETHBTC", 1.0, Market.BUY))
+        self.assertIsNone(self.depth_cache.get_liquidity("ETHBTC", 1.0))
+        print(__name__ + "." + sys._getframe().f_code.co_name + ": Unit test passed")
+
+    def test_benchmark(self):
+        book = DepthBook(levels=1000)
+        book.apply_snapshot({
+            "lastUpdateId": 1,
+            "bids": [[str(1.0 - i * 1e-4), "1.0"] for i in range(1000)],
+            "asks": [[str(1.0 + (i + 1) * 1e-4), "1.0"] for i in range(1000)]
+        })
+        num_queries = 100000
+        start_time = perf_counter()
+        for i in range(num_queries):
+            book.cost_to_fill(float(i % 900 + 1), Market.BUY)
+        query_secs = perf_counter() - start_time
+        num_updates = 10000
+        start_time = perf_counter()
+        for i in range(num_updates):
+            book.apply(depth_update(i + 2, i + 2, bids=[(1.0 - (i % 1000) * 1e-4, 2.0)]))
+            book.cost_to_fill(10.0, Market.SELL)
+        update_secs = perf_counter() - start_time
+        print(f"DepthBook: cost to fill {query_secs / num_queries * 1e6:.2f} µs/query on a 1000 level book, "
+              f"{update_secs / num_updates * 1e6:.2f} µs per update and query")
+        print(__name__ + "." + sys._getframe().f_code.co_name + ": Unit test passed")
+
+
+if __name__ == '__main__':
+    unittest.main()
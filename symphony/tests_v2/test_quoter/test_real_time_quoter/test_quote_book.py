@@ -0,0 +1,129 @@
+import unittest
+import sys
+import threading
+from time import perf_counter
+from unittest.mock import patch
+from symphony.borg import Borg
+from symphony.client import BinanceClient
+from symphony.data_classes import Instrument
+from symphony.enum import Column, Exchange
+from symphony.exceptions import QuoterException
+from symphony.quoter import BinanceRealTimeQuoter
+from symphony.quoter.real_time.quote_book import QuoteBook, BID, ASK, ASK_QUANTITY
+
+
+class QuoteBookTest(unittest.TestCase):
+
+    def test_update_and_read(self):
+        book = QuoteBook(["ETHBTC", "BNBBTC"], capacity=2)
+        self.assertEqual(len(book), 2)
+        self.assertNotIn("ETHBTC", book)
+        self.assertIsNone(book.get("ETHBTC", BID))
+        self.assertIsNone(book.snapshot("ETHBTC"))
+
+        self.assertTrue(book.update("ETHBTC", 0.05, 0.051, 10.0, 12.0, timestamp=100.0))
+        self.assertFalse(book.update("LTCBTC", 1.0, 2.0, 1.0, 1.0))
+        self.assertIn("ETHBTC", book)
+        self.assertEqual(book.get("ETHBTC", ASK), 0.051)
+        self.assertIsInstance(book.get("ETHBTC", ASK_QUANTITY), float)
+        self.assertEqual(book.snapshot("ETHBTC"), ((0.05, 0.051, 10.0, 12.0), 1, 100.0))
+        book.update("ETHBTC", 0.049, 0.05, 1.0, 2.0)
+        self.assertEqual(book.sequence("ETHBTC"), 2)
+        self.assertEqual(book.num_quoted(), 1)
+
+        # Listed later, the arrays grow and keep their quotes
+        for i in range(200):
+            book.add_symbol(f"NEW{i}BTC")
+        book.update("NEW199BTC", 1.0, 1.1, 1.0, 1.0)
+        self.assertEqual(book.slot("NEW199BTC"), 201)
+        self.assertEqual(book.get("ETHBTC", BID), 0.049)
+        self.assertEqual(book.get("NEW199BTC", ASK), 1.1)
+        self.assertEqual(book.num_quoted(), 2)
+        print(__name__ + "." + sys._getframe().f_code.co_name + ": Unit test passed")
+
+    def test_snapshots_are_consistent(self):
+        book = QuoteBook(["ETHBTC"])
+        book.update("ETHBTC", 0.0, 1.0, 0.0, 1.0)
+        done = threading.Event()
+
+        def write():
+            i = 0
+            while not done.is_set():
+                i += 1
+                book.update("ETHBTC", float(i), i + 1.0, float(i), i + 1.0)
+
+        writer = threading.Thread(target=write)
+        writer.start()
+        try:
+            for _ in range(20000):
+                (bid, ask, bid_quantity, ask_quantity), _, _ = book.snapshot("ETHBTC")
+                self.assertEqual(ask - bid, 1.0)
+                self.assertEqual((bid, ask), (bid_quantity, ask_quantity))
+        finally:
+            done.set()
+            writer.join()
+        print(__name__ + "." + sys._getframe().f_code.co_name + ": Unit test passed")
+
+    def test_benchmark(self):
+        symbols = [f"SYM{i}BTC" for i in range(2000)]
+        book = QuoteBook(symbols)
+        num_updates = 100000
+        start_time = perf_counter()
+        for i in range(num_updates):
+            book.update(symbols[i % 2000], 1.0, 1.1, 2.0, 3.0)
+        update_secs = perf_counter() - start_time
+        start_time = perf_counter()
+        for i in range(num_updates):
+            book.get(symbols[i % 2000], BID)
+        get_secs = perf_counter() - start_time
+        print(f"QuoteBook: {num_updates / update_secs:,.0f} updates/s, "
+              f"get {get_secs / num_updates * 1e6:.2f} µs")
+        print(__name__ + "." + sys._getframe().f_code.co_name + ": Unit test passed")
+
+
+class BinanceRealTimeQuoterBookTest(unittest.TestCase):
+
+    def setUp(self):
+        self.borg_state = patch.dict(Borg._shared_state, clear=True)
+        self.borg_state.start()
+
+    def tearDown(self):
+        self.borg_state.stop()
+
+    def test_book_ticker_to_getters(self):
+        instruments = [Instrument(symbol="ETHBTC", digits=6, exchange=Exchange.BINANCE),
+                       Instrument(symbol="BNBBTC", digits=7, exchange=Exchange.BINANCE)]
+        with patch.object(BinanceClient, "get_all_instruments", return_value=instruments):
+            quoter = BinanceRealTimeQuoter(BinanceClient())
+        handle = quoter._BinanceRealTimeQuoter__handle_incoming_book_ticker
+        handle({"u": 1, "s": "ETHBTC", "b": "0.05000000", "B": "10.5", "a": "0.05100000", "A": "3.0"})
+        handle({"u": 2, "s": "LTCBTC", "b": "0.1", "B": "1", "a": "0.2", "A": "1"})
+        with self.assertRaises(QuoterException):
+            handle({"result": None, "id": 1})
+
+        self.assertEqual(quoter.get_bid("ETHBTC"), 0.05)
+        self.assertEqual(quoter.get_ask(instruments[0]), 0.051)
+        self.assertEqual(quoter.get_bid_quantity("ETHBTC"), 10.5)
+        self.assertEqual(quoter.get_ask_quantity("ETHBTC"), 3.0)
+        self.assertEqual(quoter.get_midpoint("ETHBTC"), 0.0505)
+        self.assertAlmostEqual(quoter.get_liquidity("ETHBTC"), 0.001 / 0.051)
+        self.assertEqual(quoter.quotes, {"ETHBTC": {Column.BID: 0.05, Column.ASK: 0.051, Column.BID_QUANTITY: 10.5,
+                                                    Column.ASK_QUANTITY: 3.0}})
+        self.assertFalse(quoter.contains_all_instruments())
+        with self.assertRaises(QuoterException):
+            quoter.get_bid("BNBBTC")
+        with self.assertRaises(QuoterException):
+            quoter.get_bid("LTCBTC", fall_back_to_api=True)
+
+        quoter.api_fallback_deadline_secs = 0
+        with patch.object(quoter.client, "get_orderbook_tickers", create=True, return_value=[
+                {"symbol": "BNBBTC", "bidPrice": "0.01", "bidQty": "5", "askPrice": "0.011", "askQty": "6"}
+        ]) as get_orderbook_tickers:
+            self.assertEqual(quoter.get_ask("BNBBTC", fall_back_to_api=True), 0.011)
+            self.assertEqual(quoter.get_midpoint("BNBBTC", fall_back_to_api=True), 0.0105)
+            self.assertEqual(get_orderbook_tickers.call_count, 1)
+        print(__name__ + "." + sys._getframe().f_code.co_name + ": Unit test passed")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,158 @@
+import unittest
+import sys
+import os
+import multiprocessing
+from time import perf_counter
+from unittest.mock import patch
+from symphony.borg import Borg
+from symphony.client import BinanceClient
+from symphony.data_classes import Instrument
+from symphony.enum import Column, Exchange, Market
+from symphony.exceptions import QuoterException
+from symphony.quoter import BinanceRealTimeQuoter, SharedMemoryQuoter, SharedQuotePublisher
+
+SYMBOLS = ["ETHBTC", "BNBBTC", "LTCBTC"]
+
+
+def book_ticker(symbol: str, bid: float) -> dict:
+    return {"u": 1, "s": symbol, "b": str(bid), "B": "1.0", "a": str(bid + 1), "A": "2.0"}
+
+
+def read_while_published(name: str, client: BinanceClient, results: multiprocessing.Queue) -> None:
+    """
+    Reader process: reads ETHBTC until the writer publishes a bid of -1, counting torn quotes
+    """
+    reader = SharedMemoryQuoter(client, name=name)
+    results.put("attached")
+    reads, torn, bid = 0, 0, 0.0
+    while bid != -1.0:
+        snapshot = reader.quote_book.snapshot("ETHBTC")
+        if snapshot is None:
+            continue
+        bid, ask, bid_quantity, ask_quantity = snapshot[0]
+        torn += ask != bid + 1 or bid_quantity != bid or ask_quantity != bid
+        reads += 1
+    results.put((reads, torn))
+    reader.close()
+
+
+class SharedMemoryQuoterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.borg_state = patch.dict(Borg._shared_state, clear=True)
+        self.borg_state.start()
+        self.instruments = [Instrument(symbol=symbol, digits=6, exchange=Exchange.BINANCE) for symbol in SYMBOLS]
+        self.all_instruments = patch.object(BinanceClient, "get_all_instruments", return_value=self.instruments)
+        self.all_instruments.start()
+        self.client = BinanceClient()
+        self.name = f"symphony_test_{os.getpid()}"
+
+    def tearDown(self):
+        self.all_instruments.stop()
+        self.borg_state.stop()
+
+    def test_publish_and_read(self):
+        with self.assertRaises(QuoterException):
+            SharedMemoryQuoter(self.client, name=self.name)
+        quoter = BinanceRealTimeQuoter(self.client, shared_memory_name=self.name)
+        handle = quoter._BinanceRealTimeQuoter__handle_incoming_book_ticker
+        reader = SharedMemoryQuoter(self.client, name=self.name)
+        self.assertEqual(reader.quote_book.symbols, SYMBOLS)
+        with self.assertRaises(QuoterException):
+            reader.get_bid("ETHBTC")
+        self.assertEqual(reader.wait_for_quote("ETHBTC", timeout=0.01), ["ETHBTC"])
+
+        handle(book_ticker("ETHBTC", 0.05))
+        handle(book_ticker("BNBBTC", 0.01))
+        self.assertEqual(reader.wait_for_quote(["ETHBTC", "BNBBTC"], timeout=1), [])
+        self.assertEqual(reader.get_bid("ETHBTC"), 0.05)
+        self.assertEqual(reader.get_price(self.instruments[0], Market.BUY), 1.05)
+        self.assertEqual(reader.get_ask_quantity("BNBBTC"), 2.0)
+        self.assertEqual(reader.get_midpoint("ETHBTC"), 0.55)
+        self.assertEqual(reader.quotes, quoter.quotes)
+        self.assertEqual(reader.quotes["BNBBTC"][Column.BID], 0.01)
+        self.assertFalse(reader.contains_all_instruments())
+
+        # Symbols the publisher adds later are picked up by readers
+        quoter.shared_quotes.add_symbol("XRPBTC")
+        quoter.push_quote("XRPBTC", 0.00002, 0.00003, 1.0, 1.0)
+        self.assertEqual(reader.get_ask("XRPBTC"), 0.00003)
+        quotes = reader.get_quotes(["XRPBTC", "LTCBTC", "ETHBTC"])
+        self.assertEqual(quotes[0, 1], 0.00003)
+        self.assertTrue(all(quotes[1] != quotes[1]))
+        self.assertEqual(reader.quote_sequence("ETHBTC"), quoter.quote_sequence("ETHBTC"))
+        self.assertIsNone(reader.quote_sequence("LTCBTC"))
+        snapshot = reader.liquidity_snapshot(["XRPBTC", "LTCBTC"], fall_back_to_api=False)
+        self.assertAlmostEqual(snapshot.at["XRPBTC", Column.LIQUIDITY], 1 / 3)
+        self.assertTrue(snapshot.loc["LTCBTC"].isna().all())
+        with self.assertRaises(QuoterException):
+            reader.wait_for_quote("DOGEBTC", timeout=0)
+
+        stale = SharedMemoryQuoter(self.client, name=self.name, max_quote_age_secs=0.0)
+        with self.assertRaises(QuoterException):
+            stale.get_bid("ETHBTC")
+        stale.set_max_quote_age("ETHBTC", 60.0)
+        self.assertEqual(stale.get_bid("ETHBTC"), 0.05)
+        self.assertIsNone(stale.quote_sequence("BNBBTC"))
+        stale.close()
+        reader.close()
+        quoter.shared_quotes.close()
+        self.assertEqual(reader.quote_book, None)
+        with self.assertRaises(QuoterException):
+            SharedMemoryQuoter(self.client, name=self.name)
+        print(__name__ + "." + sys._getframe().f_code.co_name + ": Unit test passed")
+
+    def test_publisher_restart(self):
+        publisher = SharedQuotePublisher(SYMBOLS, name=self.name)
+        publisher.quote_book.update("ETHBTC", 0.05, 0.06, 1.0, 1.0)
+        reader = SharedMemoryQuoter(self.client, name=self.name)
+        self.assertEqual(reader.get_bid("ETHBTC"), 0.05)
+
+        # The old publisher died without closing, a new one replaces its segment
+        restarted = SharedQuotePublisher(["BNBBTC", "ETHBTC"], name=self.name)
+        self.assertEqual(restarted.generation, publisher.generation + 1)
+        with self.assertRaises(QuoterException):
+            reader.get_bid("ETHBTC")
+        self.assertEqual(reader.generation, restarted.generation)
+        restarted.quote_book.update("ETHBTC", 0.07, 0.08, 1.0, 1.0)
+        self.assertEqual(reader.get_bid("ETHBTC"), 0.07)
+        self.assertEqual(reader.get_quotes(["ETHBTC"])[0, 0], 0.07)
+
+        # Closing the replaced publisher leaves the new segment alone
+        publisher.close()
+        self.assertEqual(SharedMemoryQuoter(self.client, name=self.name).get_bid("ETHBTC"), 0.07)
+        restarted.close()
+        with self.assertRaises(QuoterException):
+            reader.get_bid("ETHBTC")
+        reader.close()
+        print(__name__ + "." + sys._getframe().f_code.co_name + ": Unit test passed")
+
+    def test_reader_process(self):
+        publisher = SharedQuotePublisher(SYMBOLS, name=self.name)
+        publisher.quote_book.update("ETHBTC", 0.0, 1.0, 0.0, 0.0)
+        context = multiprocessing.get_context("fork")
+        results = context.Queue()
+        reader = context.Process(target=read_while_published, args=(self.name, self.client, results))
+        reader.start()
+        self.assertEqual(results.get(timeout=10), "attached")
+
+        num_updates = 200000
+        start_time = perf_counter()
+        for i in range(num_updates):
+            publisher.quote_book.update("ETHBTC", float(i), i + 1.0, float(i), float(i))
+        write_secs = perf_counter() - start_time
+        publisher.quote_book.update("ETHBTC", -1.0, 0.0, -1.0, -1.0)
+        reads, torn = results.get(timeout=10)
+        reader.join(10)
+        publisher.close()
+
+        self.assertEqual(reader.exitcode, 0)
+        self.assertEqual(torn, 0)
+        self.assertGreater(reads, 0)
+        print(f"SharedMemoryQuoter: {write_secs / num_updates * 1e6:.2f} µs per published update, "
+              f"{reads:,} consistent reads in another process meanwhile")
+        print(__name__ + "." + sys._getframe().f_code.co_name + ": Unit test passed")
+
+
+if __name__ == '__main__':
+    unittest.main()
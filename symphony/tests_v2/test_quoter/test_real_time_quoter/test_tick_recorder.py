@@ -0,0 +1,169 @@
+import unittest
+import sys
+import json
+import pathlib
+import tempfile
+import numpy as np
+from time import perf_counter, monotonic
+from unittest.mock import patch
+from symphony.borg import Borg
+from symphony.client import BinanceClient
+from symphony.data_classes import Instrument
+from symphony.enum import Exchange
+from symphony.quoter import BinanceRealTimeQuoter, QuoteBook, TickRecorder, TickReplayer
+from symphony.quoter.real_time.tick_recorder import read_ticks, TICK_DTYPE, TICK_RECORDS_FILE, TICK_META_FILE, \
+    TICK_RECORD_VERSION
+from symphony.config import USE_MODIN
+if USE_MODIN:
+    import modin.pandas as pd
+else:
+    import pandas as pd
+
+SYMBOLS = ["ETHBTC", "BNBBTC", "LTCBTC"]
+
+
+def book_ticker(symbol: str, bid: float) -> dict:
+    return {"u": 1, "s": symbol, "b": str(bid), "B": "1.0", "a": str(bid + 1), "A": "2.0"}
+
+
+def write_recording(record_dir: str, symbols: list, num_ticks: int, span_secs: float) -> None:
+    """
+    Synthetic recording of ticks spread evenly over the symbols and time span
+    """
+    records = np.empty(num_ticks, dtype=TICK_DTYPE)
+    records["timestamp"] = 1_600_000_000 * 10 ** 9 + np.linspace(0, span_secs * 1e9, num_ticks).astype(np.int64)
+    records["slot"] = np.arange(num_ticks) % len(symbols)
+    records["bid"] = np.arange(num_ticks, dtype=np.float64)
+    records["ask"] = records["bid"] + 1
+    records["bid_quantity"], records["ask_quantity"] = 1.0, 2.0
+    pathlib.Path(record_dir).mkdir(parents=True, exist_ok=True)
+    records.tofile(pathlib.Path(record_dir, TICK_RECORDS_FILE))
+    with open(pathlib.Path(record_dir, TICK_META_FILE), "w") as meta_file:
+        json.dump({"version": TICK_RECORD_VERSION, "record_size": TICK_DTYPE.itemsize,
+                   "fields": list(TICK_DTYPE.names), "symbols": symbols}, meta_file)
+
+
+class TickRecorderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.borg_state = patch.dict(Borg._shared_state, clear=True)
+        self.borg_state.start()
+        self.record_dir = tempfile.TemporaryDirectory()
+        self.instruments = [Instrument(symbol=symbol, digits=6, exchange=Exchange.BINANCE) for symbol in SYMBOLS]
+
+    def tearDown(self):
+        self.borg_state.stop()
+        self.record_dir.cleanup()
+
+    def __quoter(self, **kwargs) -> BinanceRealTimeQuoter:
+        with patch.object(BinanceClient, "get_all_instruments", return_value=self.instruments):
+            return BinanceRealTimeQuoter(BinanceClient(), **kwargs)
+
+    def test_record_and_replay(self):
+        quoter = self.__quoter(tick_record_dir=self.record_dir.name)
+        handle = quoter._BinanceRealTimeQuoter__handle_incoming_book_ticker
+        for i, symbol in enumerate(["ETHBTC", "BNBBTC", "XRPBTC", "ETHBTC", "LTCBTC"]):
+            handle(book_ticker(symbol, float(i)))
+        quoter.tick_recorder.stop()
+        self.assertEqual(quoter.tick_recorder.stats["recorded"], 4)
+        self.assertEqual(quoter.tick_recorder.stats["unknown_symbols"], 1)
+
+        ticks, symbols = read_ticks(self.record_dir.name)
+        self.assertIsInstance(ticks, np.memmap)
+        self.assertEqual(symbols, SYMBOLS)
+        self.assertEqual(ticks["slot"].tolist(), [0, 1, 0, 2])
+        self.assertEqual(ticks["bid"].tolist(), [0.0, 1.0, 3.0, 4.0])
+        self.assertTrue(np.all(np.diff(ticks["timestamp"]) >= 0))
+
+        # Appending to the recording, a crash left half a record at the end
+        with open(pathlib.Path(self.record_dir.name, TICK_RECORDS_FILE), "ab") as records_file:
+            records_file.write(b"\x00" * 10)
+        self.assertEqual(len(read_ticks(self.record_dir.name)[0]), 4)
+
+        # Replayed into a fresh quoter, it ends up with the same quotes
+        replayed = self.__quoter()
+        replayer = TickReplayer(self.record_dir.name)
+        self.assertEqual(replayer.replay(replayed.push_quote), 4)
+        self.assertEqual(replayed.quotes, quoter.quotes)
+        self.assertEqual(replayed.get_bid("ETHBTC"), 3.0)
+        self.assertEqual(replayed.quote_book.sequence("ETHBTC"), 2)
+
+        start = pd.Timestamp(int(ticks["timestamp"][1]), unit="ns", tz="UTC")
+        pushed = []
+        self.assertEqual(replayer.replay(lambda *tick: pushed.append(tick), start=start), 3)
+        self.assertEqual([tick[0] for tick in pushed], ["BNBBTC", "ETHBTC", "LTCBTC"])
+        self.assertEqual(pushed[0][-1], ticks["timestamp"][1] / 1e9)
+        self.assertEqual(replayer.replay(lambda *tick: None, start=start, end=start), 0)
+        print(__name__ + "." + sys._getframe().f_code.co_name + ": Unit test passed")
+
+    def test_resume_with_other_symbols(self):
+        write_recording(self.record_dir.name, SYMBOLS, 3, span_secs=0.0)
+        # ETHBTC was delisted and XRPBTC listed since, DOGEBTC is listed while recording
+        book = QuoteBook(["BNBBTC", "XRPBTC", "LTCBTC"])
+        recorder = TickRecorder(self.record_dir.name, book)
+        recorder.start()
+        book.add_symbol("DOGEBTC")
+        for i, symbol in enumerate(["XRPBTC", "BNBBTC", "DOGEBTC", "ADABTC"]):
+            recorder.record(symbol, float(i), float(i + 1), 1.0, 2.0)
+        recorder.stop()
+        self.assertEqual(recorder.stats["unknown_symbols"], 1)
+
+        ticks, symbols = read_ticks(self.record_dir.name)
+        self.assertEqual(symbols, SYMBOLS + ["XRPBTC", "DOGEBTC"])
+        self.assertEqual(ticks["slot"].tolist(), [0, 1, 2, 3, 1, 4])
+        pushed = []
+        TickReplayer(self.record_dir.name).replay(lambda *tick: pushed.append(tick[0]))
+        self.assertEqual(pushed, SYMBOLS + ["XRPBTC", "BNBBTC", "DOGEBTC"])
+        print(__name__ + "." + sys._getframe().f_code.co_name + ": Unit test passed")
+
+    def test_resume_after_partial_record(self):
+        write_recording(self.record_dir.name, SYMBOLS, 3, span_secs=0.0)
+        # A crash left half a record at the end
+        with open(pathlib.Path(self.record_dir.name, TICK_RECORDS_FILE), "ab") as records_file:
+            records_file.write(b"\x01" * (TICK_DTYPE.itemsize // 2))
+        recorder = TickRecorder(self.record_dir.name, QuoteBook(SYMBOLS))
+        recorder.start()
+        recorder.record("LTCBTC", 5.0, 6.0, 1.0, 2.0)
+        recorder.stop()
+
+        ticks, symbols = read_ticks(self.record_dir.name)
+        self.assertEqual(ticks["slot"].tolist(), [0, 1, 2, 2])
+        self.assertEqual(ticks["bid"].tolist(), [0.0, 1.0, 2.0, 5.0])
+        print(__name__ + "." + sys._getframe().f_code.co_name + ": Unit test passed")
+
+    def test_replay_speed(self):
+        write_recording(self.record_dir.name, SYMBOLS, 100, span_secs=0.4)
+        replayer = TickReplayer(self.record_dir.name)
+        start_time = monotonic()
+        replayer.replay(lambda *tick: None, speed=2.0)
+        self.assertGreaterEqual(monotonic() - start_time, 0.2)
+        start_time = monotonic()
+        replayer.replay(lambda *tick: None)
+        self.assertLess(monotonic() - start_time, 0.2)
+        print(__name__ + "." + sys._getframe().f_code.co_name + ": Unit test passed")
+
+    def test_benchmark(self):
+        symbols = [f"SYM{i}BTC" for i in range(2000)]
+        book = QuoteBook(symbols)
+        recorder = TickRecorder(self.record_dir.name, book, flush_secs=0.01)
+        recorder.start()
+        num_ticks = 200000
+        start_time = perf_counter()
+        for i in range(num_ticks):
+            recorder.record(symbols[i % 2000], 1.0, 1.1, 2.0, 3.0)
+        record_secs = perf_counter() - start_time
+        recorder.stop()
+        self.assertEqual(recorder.stats["recorded"], num_ticks)
+
+        replayer = TickReplayer(self.record_dir.name)
+        start_time = perf_counter()
+        replayer.replay(lambda symbol, bid, ask, bid_quantity, ask_quantity, timestamp:
+                        book.update(symbol, bid, ask, bid_quantity, ask_quantity, timestamp))
+        replay_secs = perf_counter() - start_time
+        print(f"TickRecorder: record {record_secs / num_ticks * 1e6:.2f} µs/tick, "
+              f"replay {num_ticks / replay_secs:,.0f} ticks/s into a QuoteBook")
+        print(__name__ + "." + sys._getframe().f_code.co_name + ": Unit test passed")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+import unittest
+import sys
+import threading
+from time import sleep, monotonic
+from unittest.mock import patch
+from symphony.borg import Borg
+from symphony.client import BinanceClient
+from symphony.data_classes import Instrument
+from symphony.enum import Column, Exchange
+from symphony.exceptions import QuoterException
+from symphony.quoter import BinanceRealTimeQuoter
+
+
+def book_ticker(symbol: str, bid: float) -> dict:
+    return {"u": 1, "s": symbol, "b": str(bid), "B": "1.0", "a": str(bid + 1), "A": "2.0"}
+
+
+def api_ticker(symbol: str, bid: float) -> dict:
+    return {"symbol": symbol, "bidPrice": str(bid), "bidQty": "1.0", "askPrice": str(bid + 1), "askQty": "2.0"}
+
+
+class WaitForQuoteTest(unittest.TestCase):
+
+    def setUp(self):
+        self.borg_state = patch.dict(Borg._shared_state, clear=True)
+        self.borg_state.start()
+        instruments = [Instrument(symbol=symbol, digits=6, exchange=Exchange.BINANCE)
+                       for symbol in ("ETHBTC", "BNBBTC", "LTCBTC")]
+        with patch.object(BinanceClient, "get_all_instruments", return_value=instruments):
+            self.quoter = BinanceRealTimeQuoter(BinanceClient(), api_fallback_deadline_secs=0.5)
+        self.handle = self.quoter._BinanceRealTimeQuoter__handle_incoming_book_ticker
+        self.tickers = patch.object(self.quoter.client, "get_orderbook_tickers", create=True)
+        self.get_orderbook_tickers = self.tickers.start()
+
+    def tearDown(self):
+        self.tickers.stop()
+        self.borg_state.stop()
+
+    def __push_later(self, delay: float, *messages: dict) -> threading.Thread:
+        def push():
+            sleep(delay)
+            for message in messages:
+                self.handle(message)
+        pusher = threading.Thread(target=push)
+        pusher.start()
+        return pusher
+
+    def test_wait_wakes_on_websocket(self):
+        self.assertEqual(self.quoter.wait_for_quote(["ETHBTC", "BNBBTC"], timeout=0), ["ETHBTC", "BNBBTC"])
+        pusher = self.__push_later(0.05, book_ticker("ETHBTC", 1.0), book_ticker("BNBBTC", 2.0))
+        start_time = monotonic()
+        self.assertEqual(self.quoter.wait_for_quote(["ETHBTC", "BNBBTC"], timeout=5), [])
+        self.assertLess(monotonic() - start_time, 1)
+        pusher.join()
+
+        self.assertEqual(self.quoter.wait_for_quote("LTCBTC", timeout=0.05), ["LTCBTC"])
+        with self.assertRaises(QuoterException):
+            self.quoter.wait_for_quote("XRPBTC", timeout=0)
+        self.get_orderbook_tickers.assert_not_called()
+        print(__name__ + "." + sys._getframe().f_code.co_name + ": Unit test passed")
+
+    def test_getter_waits_before_falling_back(self):
+        pusher = self.__push_later(0.05, book_ticker("ETHBTC", 1.0))
+        self.assertEqual(self.quoter.get_bid("ETHBTC", fall_back_to_api=True), 1.0)
+        pusher.join()
+        self.get_orderbook_tickers.assert_not_called()
+
+        # Past the deadline the API is asked
+        self.get_orderbook_tickers.return_value = [api_ticker("BNBBTC", 3.0)]
+        start_time = monotonic()
+        self.assertEqual(self.quoter.get_ask("BNBBTC", fall_back_to_api=True), 4.0)
+        self.assertGreaterEqual(monotonic() - start_time, 0.5)
+        self.get_orderbook_tickers.assert_called_once_with(symbols='["BNBBTC"]')
+        print(__name__ + "." + sys._getframe().f_code.co_name + ": Unit test passed")
+
+    def test_missing_symbols_are_fetched_in_one_request(self):
+        self.handle(book_ticker("ETHBTC", 1.0))
+        self.get_orderbook_tickers.return_value = [api_ticker("BNBBTC", 3.0), api_ticker("LTCBTC", 5.0)]
+        self.assertEqual(self.quoter.wait_for_quote(["ETHBTC", "BNBBTC", "LTCBTC"], timeout=0.05,
+                                                    fall_back_to_api=True), [])
+        self.get_orderbook_tickers.assert_called_once_with(symbols='["BNBBTC","LTCBTC"]')
+        self.assertEqual(self.quoter.get_bid("LTCBTC"), 5.0)
+        self.assertEqual(self.quoter.get_liquidity("BNBBTC"), 0.25)
+        self.assertEqual(self.get_orderbook_tickers.call_count, 1)
+        print(__name__ + "." + sys._getframe().f_code.co_name + ": Unit test passed")
+
+    def test_liquidity_snapshot(self):
+        self.handle(book_ticker("ETHBTC", 1.0))
+        self.get_orderbook_tickers.return_value = [api_ticker("BNBBTC", 3.0)]
+        # The websocket is not waited for, the missing symbols are fetched at once
+        start_time = monotonic()
+        snapshot = self.quoter.liquidity_snapshot(["ETHBTC", "BNBBTC", "LTCBTC"])
+        self.assertLess(monotonic() - start_time, 0.5)
+        self.get_orderbook_tickers.assert_called_once_with(symbols='["BNBBTC","LTCBTC"]')
+        self.assertEqual(list(snapshot.index), ["ETHBTC", "BNBBTC", "LTCBTC"])
+        self.assertEqual(snapshot.at["ETHBTC", Column.LIQUIDITY], 0.5)
+        self.assertEqual(snapshot.at["BNBBTC", Column.ASK], 4.0)
+        self.assertEqual(snapshot.at["BNBBTC", Column.ASK_QUANTITY], 2.0)
+        self.assertTrue(snapshot.loc["LTCBTC"].isna().all())
+
+        # Quotes fetched earlier are reused
+        snapshot = self.quoter.liquidity_snapshot(["BNBBTC", "LTCBTC"], fall_back_to_api=False)
+        self.assertEqual(snapshot.at["BNBBTC", Column.LIQUIDITY], 0.25)
+        self.assertTrue(snapshot.loc["LTCBTC"].isna().all())
+        self.assertEqual(self.get_orderbook_tickers.call_count, 1)
+        print(__name__ + "." + sys._getframe().f_code.co_name + ": Unit test passed")
+
+    def test_stale_quotes(self):
+        self.handle(book_ticker("ETHBTC", 1.0))
+        self.quoter.set_max_quote_age("ETHBTC", 0.05)
+        self.assertEqual(self.quoter.get_bid("ETHBTC"), 1.0)
+        sleep(0.1)
+        with self.assertRaises(QuoterException):
+            self.quoter.get_bid("ETHBTC")
+        pusher = self.__push_later(0.05, book_ticker("ETHBTC", 2.0))
+        self.assertEqual(self.quoter.wait_for_quote("ETHBTC", timeout=5), [])
+        pusher.join()
+        self.assertEqual(self.quoter.get_bid("ETHBTC"), 2.0)
+
+        self.quoter.set_max_quote_age("ETHBTC", None)
+        sleep(0.1)
+        self.assertEqual(self.quoter.get_bid("ETHBTC"), 2.0)
+        print(__name__ + "." + sys._getframe().f_code.co_name + ": Unit test passed")
+
+
+if __name__ == '__main__':
+    unittest.main()
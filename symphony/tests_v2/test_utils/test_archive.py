@@ -0,0 +1,86 @@
+import unittest
+import sys
+import logging
+import tempfile
+import shutil
+import json
+import os
+import numpy as np
+import pandas as pd
+from symphony.utils.archive import read_csv_archived, read_archive, ingest_json, write_archive, archive_exists
+from symphony.exceptions import DataArchiverException
+
+
+class ArchiveTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.dir)
+
+    def test_csv_archive(self):
+        num_bars = 10_001
+        index = pd.date_range("2020-01-01", periods=num_bars, freq="min")
+        df = pd.DataFrame({
+            "Datetime": index.strftime("%Y-%m-%d %H:%M:%S"),
+            "Open": np.random.rand(num_bars),
+            "Close": np.random.rand(num_bars)
+        })
+        filename = os.path.join(self.dir, "EURUSD.csv.gz")
+        df.to_csv(filename, index=False)
+
+        archived = read_csv_archived(filename, "Datetime", chunksize=1000)
+        self.assertTrue(archive_exists(filename + ".archive"))
+        self.assertEqual(len(archived), num_bars)
+        self.assertEqual(archived.index[-1], index[-1])
+        self.assertTrue(np.allclose(archived["Close"].values, df["Close"].values))
+
+        window = read_archive(filename + ".archive", columns=["Close"], start=index[100], end=index[199])
+        self.assertEqual(list(window.columns), ["Close"])
+        self.assertEqual(len(window), 100)
+        self.assertAlmostEqual(window["Close"].iloc[0], df["Close"].iloc[100])
+        print(__name__ + "." + sys._getframe(  ).f_code.co_name + ": Unit test passed")
+
+    def test_json_archive(self):
+        candles = [{"candle": {"timestamp": 1577836800 + 60 * i, "open": i, "high": i + 1, "low": i - 1,
+                               "close": i, "volume": 1}} for i in range(2500)]
+        filename = os.path.join(self.dir, "EUR_USD.json")
+        with open(filename, "w") as f:
+            json.dump({"instrument": "EUR_USD", "price_history": candles}, f)
+
+        archived = read_archive(ingest_json(filename, chunksize=1000))
+        self.assertEqual(len(archived), 2500)
+        self.assertEqual(archived["close"].iloc[-1], 2499)
+        self.assertEqual(archived.index[1], pd.Timestamp("2020-01-01 00:01:00"))
+        print(__name__ + "." + sys._getframe(  ).f_code.co_name + ": Unit test passed")
+
+    def test_unordered_chunks(self):
+        index = pd.date_range("2020-01-01", periods=10, freq="min")
+        chunk = pd.DataFrame({"close": np.arange(10.0)}, index=index)
+        with self.assertRaises(DataArchiverException):
+            write_archive([chunk.iloc[5:], chunk.iloc[:5]], os.path.join(self.dir, "unordered"))
+        self.assertEqual(os.listdir(self.dir), [])
+        print(__name__ + "." + sys._getframe(  ).f_code.co_name + ": Unit test passed")
+
+    def test_concurrent_writers(self):
+        index = pd.date_range("2020-01-01", periods=10, freq="min")
+        archive_dir = os.path.join(self.dir, "candles")
+        write_archive([pd.DataFrame({"close": np.zeros(10)}, index=index)], archive_dir)
+
+        def interleaved_chunks():
+            yield pd.DataFrame({"close": np.arange(5.0)}, index=index[:5])
+            # A second writer archives the same directory while the first is halfway through
+            write_archive([pd.DataFrame({"close": np.ones(10)}, index=index)], archive_dir)
+            self.assertEqual(read_archive(archive_dir)["close"].sum(), 10.0)
+            yield pd.DataFrame({"close": np.arange(5.0, 10.0)}, index=index[5:])
+
+        self.assertEqual(write_archive(interleaved_chunks(), archive_dir), 10)
+        self.assertEqual(list(read_archive(archive_dir)["close"]), list(np.arange(10.0)))
+        self.assertEqual(os.listdir(self.dir), ["candles"])
+        print(__name__ + "." + sys._getframe(  ).f_code.co_name + ": Unit test passed")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(stream=sys.stdout)
+    unittest.main()
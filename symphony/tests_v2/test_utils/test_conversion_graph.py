@@ -0,0 +1,119 @@
+import unittest
+import sys
+import random
+from time import perf_counter
+from symphony.data_classes import Instrument, ConversionChain
+from symphony.enum import Market
+from symphony.utils.graph import ConversionGraph, get_conversion_graph, build_graph, find_shortest_path, \
+    find_shortest_paths, bidirectional_conversion_chain
+
+PRICES = {
+    "BTCEUR": 40000.0,
+    "ETHEUR": 2500.0,
+    "ETHBTC": 0.0625,
+    "QLCBTC": 0.000001,
+    "QLCETH": 0.000016,
+    "BNBETH": 0.2,
+    "XRPBNB": 0.002
+}
+
+
+def make_instruments(prices: dict) -> list:
+    instruments = []
+    for symbol in prices.keys():
+        base_asset = symbol[:3]
+        instruments.append(Instrument(symbol=symbol, digits=8, base_asset=base_asset, quote_asset=symbol[3:]))
+    return instruments
+
+
+class MidpointQuoter:
+    """
+    Quotes fixed midpoints
+    """
+
+    def __init__(self, prices: dict):
+        self.prices = prices
+        self.instruments = make_instruments(prices)
+
+    def get_midpoint(self, symbol: str, fall_back_to_api: bool = False) -> float:
+        return self.prices[symbol]
+
+
+class ConversionGraphTest(unittest.TestCase):
+
+    def setUp(self):
+        self.instruments = make_instruments(PRICES)
+        self.conversion_graph = ConversionGraph(self.instruments)
+
+    def test_shortest_paths(self):
+        graph = build_graph(self.instruments)
+        self.assertEqual(find_shortest_path(graph, "EUR", "QLC"), ["EUR", "BTC", "QLC"])
+        self.assertEqual(find_shortest_paths(graph, "EUR", "QLC"), [["EUR", "BTC", "QLC"], ["EUR", "ETH", "QLC"]])
+        self.assertEqual(find_shortest_path(graph, "QLC", "EUR"), None)
+        self.assertEqual(find_shortest_paths(graph, "EUR", "EUR"), [["EUR"]])
+
+        self.assertEqual(self.conversion_graph.shortest_path("EUR", "QLC", buy_only=True), ["EUR", "BTC", "QLC"])
+        self.assertEqual(self.conversion_graph.shortest_paths("EUR", "QLC", buy_only=True),
+                         [["EUR", "BTC", "QLC"], ["EUR", "ETH", "QLC"]])
+        self.assertEqual(self.conversion_graph.hops("EUR", "XRP", buy_only=True), 3)
+        self.assertIsNone(self.conversion_graph.shortest_path("XRP", "EUR", buy_only=True))
+        self.assertEqual(self.conversion_graph.shortest_path("XRP", "EUR"), ["XRP", "BNB", "ETH", "EUR"])
+        self.assertEqual(self.conversion_graph.conversion_chain(["XRP", "BNB", "ETH", "EUR"]),
+                         (["XRPBNB", "BNBETH", "ETHEUR"], [Market.SELL, Market.SELL, Market.SELL]))
+        self.assertEqual(self.conversion_graph.shortest_path("QLC", "BNB"), ["QLC", "ETH", "BNB"])
+        self.assertEqual(self.conversion_graph.edge("ETH", "BTC"), ("ETHBTC", Market.SELL))
+        self.assertIsNone(self.conversion_graph.shortest_path("EUR", "DOGE"))
+
+        # Every caller with the same instruments shares one graph and its tables
+        self.assertIs(get_conversion_graph(make_instruments(PRICES)), get_conversion_graph(self.instruments))
+        self.assertIsNot(get_conversion_graph(self.instruments[:-1]), get_conversion_graph(self.instruments))
+        print(__name__ + "." + sys._getframe().f_code.co_name + ": Unit test passed")
+
+    def test_bidirectional_chain_around_base_asset(self):
+        # The shortest path from EUR to USDT passes through ADA, the base asset of the target ADAUSDT
+        pairs = [("ADA", "EUR"), ("USDT", "ADA"), ("BTC", "EUR"), ("ETH", "BTC"), ("USDT", "ETH"), ("ADA", "USDT")]
+        instruments = [Instrument(symbol=base + quote, base_asset=base, quote_asset=quote) for base, quote in pairs]
+        graph = build_graph(instruments)
+        self.assertEqual(find_shortest_paths(graph, "EUR", "USDT"), [["EUR", "ADA", "USDT"]])
+        self.assertEqual(find_shortest_paths(graph, "EUR", "USDT", exclude={"ADA"}),
+                         [["EUR", "BTC", "ETH", "USDT"]])
+        self.assertEqual(bidirectional_conversion_chain(graph, "EUR", instruments[-1]),
+                         [["BTCEUR", "ETHBTC", "USDTETH", "ADAUSDT"]])
+        print(__name__ + "." + sys._getframe().f_code.co_name + ": Unit test passed")
+
+    def test_convert(self):
+        conversion_chain = ConversionChain(MidpointQuoter(PRICES))
+        self.assertAlmostEqual(conversion_chain.convert("EUR", "QLC", amount=40000.0), 1 / 0.000001)
+        # Sells only: XRP -> BNB -> ETH -> EUR
+        self.assertAlmostEqual(conversion_chain.convert("XRP", "EUR", amount=10.0), 10 * 0.002 * 0.2 * 2500.0)
+        # Mixed: sell QLC for ETH, buy BNB with it
+        self.assertAlmostEqual(conversion_chain.convert("QLC", "BNB", amount=1e6), 1e6 * 0.000016 / 0.2)
+        print(__name__ + "." + sys._getframe().f_code.co_name + ": Unit test passed")
+
+    def test_benchmark(self):
+        random.seed(3)
+        quote_assets = [f"Q{i}" for i in range(8)]
+        base_assets = [f"B{i}" for i in range(400)]
+        instruments = [Instrument(symbol=base + quote, base_asset=base, quote_asset=quote)
+                       for base in base_assets for quote in random.sample(quote_assets, 3)]
+        instruments += [Instrument(symbol=quote_assets[i] + quote_assets[i - 1], base_asset=quote_assets[i],
+                                   quote_asset=quote_assets[i - 1]) for i in range(1, len(quote_assets))]
+        graph = build_graph(instruments)
+        conversion_graph = ConversionGraph(instruments)
+        start_time = perf_counter()
+        conversion_graph.precompute()
+        precompute_secs = perf_counter() - start_time
+        pairs = [(random.choice(base_assets), random.choice(base_assets)) for _ in range(10000)]
+        start_time = perf_counter()
+        for start, end in pairs:
+            self.assertIsNotNone(conversion_graph.shortest_path(start, end))
+        query_secs = perf_counter() - start_time
+        self.assertEqual(conversion_graph.shortest_path("Q0", "B7", buy_only=True),
+                         find_shortest_path(graph, "Q0", "B7"))
+        print(f"ConversionGraph: {len(instruments)} instruments, all pairs tables in {precompute_secs * 1000:.0f} ms, "
+              f"{query_secs / len(pairs) * 1e6:.1f} µs per shortest path")
+        print(__name__ + "." + sys._getframe().f_code.co_name + ": Unit test passed")
+
+
+if __name__ == '__main__':
+    unittest.main()
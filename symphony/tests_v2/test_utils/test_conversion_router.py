@@ -0,0 +1,168 @@
+import unittest
+import sys
+import random
+import numpy as np
+from time import perf_counter
+from unittest.mock import patch
+from symphony.borg import Borg
+from symphony.client import BinanceClient
+from symphony.data_classes import ConversionChain, Instrument
+from symphony.enum import Exchange, Market
+from symphony.quoter import BinanceRealTimeQuoter
+from symphony.utils.routing import ConversionRouter, TAKER_COMMISSION
+
+# Bid and ask of each symbol. XRP is cheaper to reach through ETH, whose XRP pair has the tighter spread.
+QUOTES = {
+    "BTCEUR": (40000.0, 40010.0),
+    "ETHEUR": (2500.0, 2501.0),
+    "ETHBTC": (0.0625, 0.06251),
+    "XRPBTC": (0.00001, 0.0000105),
+    "XRPETH": (0.00016, 0.0001601),
+    "BNBBTC": (0.01, 0.01001)
+}
+
+
+def make_instrument(symbol: str) -> Instrument:
+    return Instrument(symbol=symbol, digits=8, base_asset=symbol[:3], quote_asset=symbol[3:], exchange=Exchange.BINANCE)
+
+
+def quote_arrays(router: ConversionRouter, quotes: dict) -> tuple:
+    bids = np.array([quotes[symbol][0] if symbol in quotes else np.nan for symbol in router.symbols])
+    asks = np.array([quotes[symbol][1] if symbol in quotes else np.nan for symbol in router.symbols])
+    return bids, asks
+
+
+class ConversionRouterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.instruments = [make_instrument(symbol) for symbol in QUOTES.keys()]
+        self.router = ConversionRouter(self.instruments)
+        self.weights = self.router.edge_weights(*quote_arrays(self.router, QUOTES))
+
+    def test_route(self):
+        route = self.router.route("EUR", "XRP", self.weights)
+        self.assertEqual(route.path, ["EUR", "ETH", "XRP"])
+        self.assertEqual(route.conversion_chain, ["ETHEUR", "XRPETH"])
+        self.assertEqual(route.execution_chain, [Market.BUY, Market.BUY])
+        self.assertAlmostEqual(route.rate, (1 - TAKER_COMMISSION) ** 2 / (2501.0 * 0.0001601))
+
+        # Sells have negative weights
+        route = self.router.route("BNB", "EUR", self.weights)
+        self.assertEqual(route.conversion_chain, ["BNBBTC", "BTCEUR"])
+        self.assertEqual(route.execution_chain, [Market.SELL, Market.SELL])
+        self.assertAlmostEqual(route.rate, 0.01 * 40000.0 * (1 - TAKER_COMMISSION) ** 2)
+
+        self.assertEqual(self.router.route("EUR", "XRP", self.weights, excluded=["ETH"]).path, ["EUR", "BTC", "XRP"])
+        self.assertIsNone(self.router.route("EUR", "XRP", self.weights, max_hops=1))
+        self.assertIsNone(self.router.route("EUR", "DOGE", self.weights))
+        self.assertEqual(self.router.route("EUR", "EUR", self.weights).conversion_chain, [])
+
+        # Unquoted symbols are routed around
+        unquoted = dict(QUOTES)
+        del unquoted["XRPETH"]
+        weights = self.router.edge_weights(*quote_arrays(self.router, unquoted))
+        self.assertEqual(self.router.route("EUR", "XRP", weights).path, ["EUR", "BTC", "XRP"])
+        print(__name__ + "." + sys._getframe().f_code.co_name + ": Unit test passed")
+
+    def test_route_with_depth(self):
+        def fill_price(symbol: str, quantity: float, order_side: Market) -> float:
+            self.assertEqual(symbol, "XRPETH")
+            if order_side == Market.SELL:
+                return 0.00016
+            # A thin book: the top level holds 1000 XRP, the rest is far off
+            return 0.0001601 if quantity <= 1000 else 0.0002
+
+        small = self.router.route("EUR", "XRP", self.weights, amount=10.0, fill_price=fill_price, fill_symbols=["XRPETH"])
+        self.assertEqual(small.path, ["EUR", "ETH", "XRP"])
+        large = self.router.route("EUR", "XRP", self.weights, amount=1000.0, fill_price=fill_price, fill_symbols=["XRPETH"])
+        self.assertEqual(large.path, ["EUR", "BTC", "XRP"])
+        print(__name__ + "." + sys._getframe().f_code.co_name + ": Unit test passed")
+
+    def test_set_chain(self):
+        with patch.dict(Borg._shared_state, clear=True), \
+                patch.object(BinanceClient, "get_all_instruments", return_value=self.instruments):
+            quoter = BinanceRealTimeQuoter(BinanceClient())
+            for symbol, (bid, ask) in QUOTES.items():
+                quoter.push_quote(symbol, bid, ask, 1.0, 1.0)
+            conversion_chain = ConversionChain(quoter)
+            target = self.instruments[4]
+            self.assertEqual(conversion_chain.set_chain(target, start_asset="EUR"), ["ETHEUR", "XRPETH"])
+            self.assertEqual(conversion_chain.execution_chain, [Market.BUY, Market.BUY])
+            self.assertEqual(conversion_chain.set_chain(self.instruments[3], start_asset="EUR"), ["BTCEUR", "XRPBTC"])
+            self.assertEqual(conversion_chain.set_chain(self.instruments[2], start_asset="BTC"), ["ETHBTC"])
+            # Routes never pass through the asset being bought
+            self.assertEqual(conversion_chain.set_chain(self.instruments[5], start_asset="ETH"), ["ETHBTC", "BNBBTC"])
+        print(__name__ + "." + sys._getframe().f_code.co_name + ": Unit test passed")
+
+    def test_crossed_quotes(self):
+        # ETHBTC bids above the cross rate of ETHUSDT and BTCUSDT, BTCUSDT bids above its own ask
+        crossed = {
+            "BTCUSDT": (40100.0, 40000.0),
+            "ETHUSDT": (2000.0, 2000.1),
+            "ETHBTC": (0.06, 0.0601),
+            "BNBUSDT": (300.0, 300.1),
+            "XRPBNB": (0.002, 0.00201)
+        }
+        instruments = [make_instrument(symbol) for symbol in crossed.keys()]
+        router = ConversionRouter(instruments)
+        weights = router.edge_weights(*quote_arrays(router, crossed))
+        # The cheapest walks trade round USDT before buying BNB
+        self.assertIsNone(router.route("USDT", "BNB", weights))
+        self.assertIsNone(router.route("USDT", "BNB", weights, max_hops=3))
+
+        with patch.dict(Borg._shared_state, clear=True), \
+                patch.object(BinanceClient, "get_all_instruments", return_value=instruments):
+            quoter = BinanceRealTimeQuoter(BinanceClient())
+            for symbol, (bid, ask) in crossed.items():
+                quoter.push_quote(symbol, bid, ask, 1.0, 1.0)
+            conversion_chain = ConversionChain(quoter)
+            self.assertIsNone(conversion_chain.cheapest_route("USDT", "BNB"))
+            # Falls back to the shortest chain
+            self.assertEqual(conversion_chain.set_chain(instruments[-1], start_asset="USDT"), ["BNBUSDT", "XRPBNB"])
+        print(__name__ + "." + sys._getframe().f_code.co_name + ": Unit test passed")
+
+    def test_set_chain_one_request(self):
+        with patch.dict(Borg._shared_state, clear=True), \
+                patch.object(BinanceClient, "get_all_instruments", return_value=self.instruments):
+            quoter = BinanceRealTimeQuoter(BinanceClient())
+            unquoted = ["XRPETH", "BNBBTC"]
+            for symbol, (bid, ask) in QUOTES.items():
+                if symbol not in unquoted:
+                    quoter.push_quote(symbol, bid, ask, 1.0, 1.0)
+            api_tickers = [{"symbol": symbol, "bidPrice": str(QUOTES[symbol][0]), "bidQty": "1.0",
+                            "askPrice": str(QUOTES[symbol][1]), "askQty": "1.0"} for symbol in unquoted]
+            with patch.object(quoter.client, "get_orderbook_tickers", create=True,
+                              return_value=api_tickers) as get_orderbook_tickers:
+                conversion_chain = ConversionChain(quoter, highest_liquidity_chain=True)
+                # The target instrument and the route are picked from one snapshot
+                self.assertEqual(conversion_chain.set_chain("XRP", start_asset="EUR"), ["ETHEUR", "XRPETH"])
+                get_orderbook_tickers.assert_called_once_with(symbols='["XRPETH","BNBBTC"]')
+                self.assertAlmostEqual(conversion_chain.convert("BNB", "EUR"), 0.010005 * 40005.0, delta=1e-6)
+                self.assertEqual(get_orderbook_tickers.call_count, 1)
+        print(__name__ + "." + sys._getframe().f_code.co_name + ": Unit test passed")
+
+    def test_benchmark(self):
+        random.seed(11)
+        quote_assets = ["USDT", "BTC", "ETH", "BNB", "BUSD", "EUR", "TRY", "FDUSD"]
+        base_assets = [f"A{i:03d}" for i in range(400)]
+        instruments = [Instrument(symbol=base + quote, base_asset=base, quote_asset=quote)
+                       for base in base_assets for quote in random.sample(quote_assets, 5)]
+        instruments += [Instrument(symbol=base + "USDT", base_asset=base, quote_asset="USDT")
+                        for base in quote_assets[1:]]
+        router = ConversionRouter(instruments)
+        mids = np.exp(np.random.default_rng(11).normal(size=len(instruments)))
+        bids, asks = mids * 0.999, mids * 1.001
+        num_routes = 1000
+        start_time = perf_counter()
+        for i in range(num_routes):
+            weights = router.edge_weights(bids, asks)
+            route = router.route(base_assets[i % 400], base_assets[(i * 7 + 1) % 400], weights)
+            self.assertLessEqual(len(route.conversion_chain), router.max_hops)
+        route_secs = (perf_counter() - start_time) / num_routes
+        print(f"ConversionRouter: {len(instruments)} instruments, {len(router.assets)} assets, "
+              f"{route_secs * 1e6:.0f} µs per route including edge weights")
+        print(__name__ + "." + sys._getframe().f_code.co_name + ": Unit test passed")
+
+
+if __name__ == '__main__':
+    unittest.main()
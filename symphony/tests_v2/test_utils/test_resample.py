@@ -0,0 +1,66 @@
+import unittest
+import sys
+import logging
+import numpy as np
+from symphony.data_classes import PriceHistory, Instrument
+from symphony.enum import Timeframe, Column
+from symphony.utils.resample import resample_price_history, resample_price_histories, finest_timeframe
+from symphony.exceptions import UtilityClassException
+from symphony.config import USE_MODIN
+
+if USE_MODIN:
+    import modin.pandas as pd
+else:
+    import pandas as pd
+
+
+def dummy_hourly_price_history(start: str, num_bars: int) -> PriceHistory:
+    index = pd.date_range(start, periods=num_bars, freq="1h", tz="UTC")
+    closes = np.arange(num_bars, dtype=np.float64) + 100.0
+    df = pd.DataFrame({
+        Column.OPEN: closes - 0.5,
+        Column.HIGH: closes + 1.0,
+        Column.LOW: closes - 1.0,
+        Column.CLOSE: closes,
+        Column.VOLUME: np.ones(num_bars)
+    }, index=index)
+    return PriceHistory(instrument=Instrument(symbol="ETHBTC"), timeframe=Timeframe.H1, price_history=df)
+
+
+class UtilsResampleTest(unittest.TestCase):
+
+    def test_resample_h1_to_h4(self):
+        # Starts mid H4 bar and ends mid H4 bar
+        ph = dummy_hourly_price_history("2021-01-01 02:00:00", 28)
+        h4 = resample_price_history(ph, Timeframe.H4)
+        df = h4.price_history
+        self.assertEqual(h4.timeframe, Timeframe.H4)
+        self.assertEqual(df.index[0], pd.Timestamp("2021-01-01 04:00:00", tz="UTC"))
+        self.assertEqual(df.index[-1], pd.Timestamp("2021-01-02 00:00:00", tz="UTC"))
+        first = ph.price_history.loc["2021-01-01 04:00:00":"2021-01-01 07:00:00"]
+        self.assertEqual(df[Column.OPEN].iloc[0], first[Column.OPEN].iloc[0])
+        self.assertEqual(df[Column.HIGH].iloc[0], first[Column.HIGH].max())
+        self.assertEqual(df[Column.LOW].iloc[0], first[Column.LOW].min())
+        self.assertEqual(df[Column.CLOSE].iloc[0], first[Column.CLOSE].iloc[-1])
+        self.assertEqual(df[Column.VOLUME].iloc[0], 4.0)
+
+        h4_incomplete = resample_price_history(ph, Timeframe.H4, incomplete_bar=True)
+        self.assertEqual(len(h4_incomplete.price_history), len(df) + 1)
+        print(__name__ + "." + sys._getframe().f_code.co_name + ": Unit test passed")
+
+    def test_resample_multiple(self):
+        ph = dummy_hourly_price_history("2021-01-01 00:00:00", 72)
+        h1, h4, d1 = resample_price_histories(ph, [Timeframe.H1, Timeframe.H4, Timeframe.D1])
+        self.assertIs(h1, ph)
+        self.assertEqual(len(h4.price_history), 18)
+        self.assertEqual(len(d1.price_history), 3)
+        self.assertEqual(finest_timeframe([Timeframe.H4, Timeframe.H1]), Timeframe.H1)
+        with self.assertRaises(UtilityClassException):
+            resample_price_history(h4, Timeframe.H1)
+        print(__name__ + "." + sys._getframe().f_code.co_name + ": Unit test passed")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(stream=sys.stdout)
+    logging.getLogger("UtilsResampleTest.test_resample_h1_to_h4").setLevel(logging.DEBUG)
+    unittest.main()
@@ -6,6 +6,7 @@ from .candle_exception import CandleError
 from .candle_parser import PriceHistoryParser
 from symphony.schema import SchemaKit
 from pandas import DataFrame
+from symphony.utils.archive import ingest_json, ARCHIVE_CHUNK_SIZE
 
 
 class CandlesConverter():
@@ -45,6 +46,27 @@ class CandlesConverter():
             raise CandleError(__name__ + ": Could not locate file with name: " + str(filename))
         return
     
+    @staticmethod
+    def price_history_to_archive(filename: str, archive_dir: str = None, chunksize: int = ARCHIVE_CHUNK_SIZE) -> str:
+        """
+        Streams the candles of a json price history file into a columnar archive, without loading the
+        whole file. Read the result with symphony.utils.archive.read_archive.
+
+        Args:
+            filename (str): The location of the raw price history
+            archive_dir (str, optional): Where to write the archive, defaults to next to the file
+            chunksize (int, optional): Candles held in memory at a time
+
+        Returns:
+            str:The archive directory
+
+        Raises:
+            CandleError: If the file could not be located
+        """
+        if not os.path.exists(filename):
+            raise CandleError(__name__ + ": Could not locate file with name: " + str(filename))
+        return ingest_json(filename, archive_dir=archive_dir, chunksize=chunksize)
+
     @staticmethod
     def price_history_to_csv(price_history: dict, file_path: str, datetime_format: str = None) -> None:
         """
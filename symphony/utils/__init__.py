@@ -1,11 +1,15 @@
 from .time import get_last_complete_bar_time, round_to_minute, round_to_timeframe, to_unix_time, \
-    get_timestamp_of_num_bars_back, get_current_bar_open_time, get_timestamp_of_num_bars_forward, chunk_times, standardize_index, get_num_bars_timestamp_to_present, get_num_bars_timestamp_to_timestamp
+    get_timestamp_of_num_bars_back, get_current_bar_open_time, get_timestamp_of_num_bars_forward, chunk_times, standardize_index, get_num_bars_timestamp_to_present, get_num_bars_timestamp_to_timestamp, \
+    get_page_ranges
 
 from .logging import get_log_header, glh
-from .graph import build_graph, find_path, find_all_paths, find_shortest_path, filter_conversion_chain, \
-    shortest_conversion_chains
+from .graph import build_graph, find_path, find_all_paths, find_shortest_path, find_shortest_paths, filter_conversion_chain, \
+    shortest_conversion_chains, ConversionGraph, get_conversion_graph
+from .routing import ConversionRouter, ConversionRoute, get_conversion_router
 
 from .proxies import start_proxies, stop_proxies, get_proxy_objects, get_ip
 from .orders import order_from_binance_api, order_from_binance_websocket, order_from_cctx, order_model_from_order, insert_or_update_order
 from .instruments import filter_instruments, get_instrument, get_symbol
+from .resample import resample_price_history, resample_price_histories, finest_timeframe, can_resample
+from .archive import write_archive, read_archive, ingest_csv, ingest_json, read_csv_archived, archive_exists
 from .aws import get_s3_resource, get_s3_path, s3_file_exists, upload_dataframe_to_s3, get_dataframe_from_s3
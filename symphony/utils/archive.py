@@ -0,0 +1,473 @@
+from typing import List, Dict, Optional, Iterable, Iterator, Union, Any, Final, TextIO
+from symphony.exceptions import DataArchiverException
+from symphony.config import USE_MODIN
+import numpy as np
+import pathlib
+import shutil
+import json
+import tempfile
+import errno
+import gzip
+import re
+import os
+
+if USE_MODIN:
+    import modin.pandas as pd
+else:
+    import pandas as pd
+
+# Rows per chunk when streaming a source file
+ARCHIVE_CHUNK_SIZE: Final[int] = 500_000
+# Characters read at a time when streaming JSON
+JSON_READ_SIZE: Final[int] = 1 << 20
+
+ARCHIVE_META_FILE: Final[str] = "meta.json"
+ARCHIVE_INDEX_FILE: Final[str] = "index.npy"
+ARCHIVE_VALUES_FILE: Final[str] = "values.npy"
+ARCHIVE_SUFFIX: Final[str] = ".archive"
+
+# Columnar candle archive. An archive is a directory holding
+#
+#     meta.json   column names, number of rows, index name and timezone
+#     index.npy   int64 UTC nanosecond timestamps, shape (num_rows,)
+#     values.npy  float64 values, one row per column, shape (num_columns, num_rows)
+#
+# Archives are written once from a stream of chunks, so the source never has to fit in memory, and read back
+# as memory-mapped DataFrames.
+
+
+def archive_exists(archive_dir: str) -> bool:
+    """
+    Checks if a complete archive exists at a path
+
+    :param archive_dir: Archive directory
+    :return: True or False
+    """
+    return pathlib.Path(archive_dir, ARCHIVE_META_FILE).is_file()
+
+
+def default_archive_dir(filename: str) -> str:
+    """
+    Archive directory used for a source file if none is given, i.e. next to the source file
+
+    :param filename: Source file
+    :return: Archive directory
+    """
+    return str(pathlib.Path(filename).resolve()) + ARCHIVE_SUFFIX
+
+
+def write_archive(chunks: Iterable[pd.DataFrame], archive_dir: str) -> int:
+    """
+    Writes a stream of DataFrame chunks to an archive. Only one chunk is held in memory at a time. Chunks
+    must have a DatetimeIndex, the same columns, and be in chronological order. Values are stored as float64.
+
+    :param chunks: Iterable of DataFrames
+    :param archive_dir: Archive directory, replaced if it exists
+    :return: Number of rows written
+    :raises DataArchiverException: If chunks are not in order, or their columns differ
+    """
+    archive_path = pathlib.Path(archive_dir)
+    archive_path.parent.mkdir(parents=True, exist_ok=True)
+    # Each writer stages in a directory of its own, so concurrent writers of one archive never touch each other's files
+    staging_path = pathlib.Path(tempfile.mkdtemp(prefix=archive_path.name + ".", suffix=".tmp",
+                                                 dir=archive_path.parent))
+    try:
+        num_rows = __write_staging(chunks, staging_path)
+    except BaseException:
+        shutil.rmtree(staging_path, ignore_errors=True)
+        raise
+    __swap_in(staging_path, archive_path)
+    return num_rows
+
+
+def __swap_in(staging_path: pathlib.Path, archive_path: pathlib.Path) -> None:
+    """
+    Moves a staged archive into place. An existing archive is renamed out of the way first and removed afterwards,
+    so readers only miss the archive between two renames. If another writer puts its archive in place meanwhile,
+    that one is moved aside too and the last writer wins.
+
+    :param staging_path: Staged archive directory
+    :param archive_path: Archive directory
+    :return: None
+    """
+    retired_paths = []
+    while True:
+        try:
+            os.rename(staging_path, archive_path)
+            break
+        except OSError as e:
+            if e.errno not in (errno.ENOTEMPTY, errno.EEXIST):
+                shutil.rmtree(staging_path, ignore_errors=True)
+                raise
+        # rename replaces the empty directory made by mkdtemp
+        retired_path = tempfile.mkdtemp(prefix=archive_path.name + ".", suffix=".old", dir=archive_path.parent)
+        retired_paths.append(retired_path)
+        try:
+            os.rename(archive_path, retired_path)
+        except FileNotFoundError:
+            pass
+    for retired_path in retired_paths:
+        shutil.rmtree(retired_path, ignore_errors=True)
+
+
+def __write_staging(chunks: Iterable[pd.DataFrame], staging_path: pathlib.Path) -> int:
+    """
+    Writes a stream of DataFrame chunks to an archive in a staging directory
+
+    :param chunks: Iterable of DataFrames
+    :param staging_path: Empty staging directory
+    :return: Number of rows written
+    :raises DataArchiverException: If chunks are not in order, or their columns differ
+    """
+
+    columns: Optional[List[str]] = None
+    column_files = []
+    index_file = None
+    index_name, index_tz = None, None
+    last_timestamp: Optional[int] = None
+    num_rows = 0
+    try:
+        # Pass 1: append each column to its own raw file
+        for chunk in chunks:
+            if not isinstance(chunk.index, pd.DatetimeIndex):
+                raise DataArchiverException(f"Chunks must have a DatetimeIndex, got {type(chunk.index)}")
+            if columns is None:
+                columns = [str(column) for column in chunk.columns]
+                column_files = [open(staging_path / f"{i}.raw", "wb") for i in range(len(columns))]
+                index_file = open(staging_path / "index.raw", "wb")
+                index_name = chunk.index.name
+                index_tz = str(chunk.index.tz) if chunk.index.tz is not None else None
+            elif [str(column) for column in chunk.columns] != columns:
+                raise DataArchiverException(f"Chunk columns {list(chunk.columns)} do not match {columns}")
+            if not len(chunk):
+                continue
+
+            timestamps = (chunk.index.tz_convert("UTC") if chunk.index.tz is not None else chunk.index).asi8
+            if (last_timestamp is not None and timestamps[0] < last_timestamp) or \
+                    np.any(timestamps[1:] < timestamps[:-1]):
+                raise DataArchiverException(f"Chunks must be in chronological order, at row {num_rows}")
+            last_timestamp = timestamps[-1]
+
+            index_file.write(timestamps.astype(np.int64).tobytes())
+            for i, column in enumerate(chunk.columns):
+                column_files[i].write(chunk[column].to_numpy(dtype=np.float64).tobytes())
+            num_rows += len(chunk)
+    finally:
+        for file in column_files + ([index_file] if index_file else []):
+            file.close()
+
+    if columns is None:
+        raise DataArchiverException(f"No data to archive")
+
+    # Pass 2: lay the columns out next to each other in one file, a chunk at a time
+    index = np.lib.format.open_memmap(staging_path / ARCHIVE_INDEX_FILE, mode="w+", dtype=np.int64,
+                                      shape=(num_rows,))
+    values = np.lib.format.open_memmap(staging_path / ARCHIVE_VALUES_FILE, mode="w+", dtype=np.float64,
+                                       shape=(len(columns), num_rows))
+    sources = [(index, staging_path / "index.raw", np.int64)] + \
+              [(values[i], staging_path / f"{i}.raw", np.float64) for i in range(len(columns))]
+    for target, raw_path, dtype in sources:
+        if num_rows:
+            raw = np.memmap(raw_path, mode="r", dtype=dtype, shape=(num_rows,))
+            for start in range(0, num_rows, ARCHIVE_CHUNK_SIZE):
+                target[start:start + ARCHIVE_CHUNK_SIZE] = raw[start:start + ARCHIVE_CHUNK_SIZE]
+            del raw
+        os.remove(raw_path)
+    index.flush()
+    values.flush()
+    del index, values
+
+    with open(staging_path / ARCHIVE_META_FILE, "w") as f:
+        json.dump({
+            "columns": columns,
+            "num_rows": num_rows,
+            "index_name": index_name,
+            "index_tz": index_tz
+        }, f)
+    return num_rows
+
+
+def read_archive_meta(archive_dir: str) -> Dict[str, Any]:
+    """
+    Reads the metadata of an archive
+
+    :param archive_dir: Archive directory
+    :return: Metadata
+    :raises DataArchiverException: If there is no archive
+    """
+    if not archive_exists(archive_dir):
+        raise DataArchiverException(f"No archive at {archive_dir}")
+    with open(pathlib.Path(archive_dir, ARCHIVE_META_FILE), "r") as f:
+        return json.load(f)
+
+
+def read_archive(archive_dir: str,
+                 columns: Optional[List[str]] = None,
+                 start: Optional[pd.Timestamp] = None,
+                 end: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+    """
+    Reads an archive as a memory-mapped DataFrame. Pages are only read from disk when touched, so
+    selecting a time range of a multi-GB archive is cheap. The mapping is copy-on-write; changes are
+    not written back to the archive.
+
+    :param archive_dir: Archive directory
+    :param columns: Only read these columns, defaults to all
+    :param start: Optional first timestamp, inclusive
+    :param end: Optional last timestamp, inclusive
+    :return: The DataFrame
+    :raises DataArchiverException: If there is no archive, or a column is not in the archive
+    """
+    meta = read_archive_meta(archive_dir)
+    index = np.load(pathlib.Path(archive_dir, ARCHIVE_INDEX_FILE), mmap_mode="r")
+    values = np.load(pathlib.Path(archive_dir, ARCHIVE_VALUES_FILE), mmap_mode="c")
+
+    def to_utc_nanos(timestamp: pd.Timestamp) -> int:
+        timestamp = pd.Timestamp(timestamp)
+        if timestamp.tz is None and meta["index_tz"]:
+            timestamp = timestamp.tz_localize(meta["index_tz"])
+        return (timestamp.tz_convert("UTC") if timestamp.tz is not None else timestamp).value
+
+    first = int(np.searchsorted(index, to_utc_nanos(start), side="left")) if start is not None else 0
+    last = int(np.searchsorted(index, to_utc_nanos(end), side="right")) if end is not None else len(index)
+
+    if columns is None:
+        columns = meta["columns"]
+        block = values[:, first:last]
+    else:
+        missing = [column for column in columns if column not in meta["columns"]]
+        if missing:
+            raise DataArchiverException(f"Columns {missing} not in archive {archive_dir}")
+        positions = [meta["columns"].index(column) for column in columns]
+        block = values[positions[0]:positions[0] + 1, first:last] if len(positions) == 1 \
+            else values[positions, first:last]
+
+    datetime_index = pd.DatetimeIndex(np.asarray(index[first:last]).view("datetime64[ns]"), name=meta["index_name"])
+    if meta["index_tz"]:
+        datetime_index = datetime_index.tz_localize("UTC").tz_convert(meta["index_tz"])
+    return pd.DataFrame(block.T, index=datetime_index, columns=columns, copy=False)
+
+
+def iter_csv_chunks(filename: str,
+                    datetime_column: str,
+                    unit: Optional[str] = None,
+                    datetime_format: Optional[str] = None,
+                    dtypes: Optional[Dict[str, Any]] = None,
+                    index_name: Optional[str] = None,
+                    chunksize: Optional[int] = ARCHIVE_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """
+    Streams a (possibly compressed) CSV file in chunks indexed by time. Every column other than the
+    datetime column is read as float64 unless `dtypes` says otherwise.
+
+    :param filename: CSV file
+    :param datetime_column: Column holding dates or UNIX timestamps
+    :param unit: Unit of UNIX timestamps, e.g. 's' or 'ms'. None if the column holds date strings
+    :param datetime_format: Optional strftime format of date strings, speeds up parsing
+    :param dtypes: Optional dtypes by column
+    :param index_name: Name of the index, defaults to `datetime_column`
+    :param chunksize: Rows per chunk
+    :return: Iterator of DataFrames
+    :raises DataArchiverException: If the file or the datetime column do not exist
+    """
+    if not pathlib.Path(filename).is_file():
+        raise DataArchiverException(f"Cannot find file with path {filename}")
+    header = pd.read_csv(filename, nrows=0).columns
+    if datetime_column not in header:
+        raise DataArchiverException(f"Column {datetime_column} not in {filename}, columns: {list(header)}")
+    column_dtypes = {column: np.float64 for column in header if column != datetime_column}
+    if dtypes:
+        column_dtypes.update(dtypes)
+
+    for chunk in pd.read_csv(filename, chunksize=chunksize, dtype=column_dtypes):
+        if unit:
+            timestamps = pd.to_datetime(chunk[datetime_column].to_numpy(dtype=np.float64), unit=unit)
+        else:
+            timestamps = pd.to_datetime(chunk[datetime_column], format=datetime_format)
+        chunk = chunk.drop(columns=[datetime_column])
+        chunk.index = pd.DatetimeIndex(timestamps, name=index_name if index_name else datetime_column)
+        yield chunk
+
+
+def __open_text(filename: str) -> TextIO:
+    return gzip.open(filename, "rt") if filename.endswith(".gz") else open(filename, "r")
+
+
+def iter_json_records(filename: str, key: Optional[str] = "price_history") -> Iterator[Any]:
+    """
+    Streams the elements of a JSON array without loading the whole file. The array is either the value of
+    `key` (e.g. legacy {"price_history": [...]} files) or, if `key` is None, the top level of the file.
+    JSON lines files (.jsonl) are read a line at a time.
+
+    :param filename: JSON file, optionally gzipped
+    :param key: Key of the array
+    :return: Iterator of decoded elements
+    :raises DataArchiverException: If the file does not exist or the array could not be found
+    """
+    if not pathlib.Path(filename).is_file():
+        raise DataArchiverException(f"Cannot find file with path {filename}")
+
+    with __open_text(filename) as f:
+        if ".jsonl" in filename:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+            return
+
+        decoder = json.JSONDecoder()
+        start_pattern = re.compile(r'"%s"\s*:\s*\[' % re.escape(key) if key else r'\[')
+        buffer = ""
+        position = None
+        while position is None:
+            data = f.read(JSON_READ_SIZE)
+            if not data:
+                raise DataArchiverException(f"Could not find array {key} in {filename}")
+            buffer += data
+            if match := start_pattern.search(buffer):
+                position = match.end()
+            else:
+                # Keep enough to match a key split across reads
+                buffer = buffer[-(len(key) + 64 if key else 1):]
+
+        eof = False
+        while True:
+            while position < len(buffer) and buffer[position] in " \t\r\n,":
+                position += 1
+            if position < len(buffer) and buffer[position] == "]":
+                return
+            try:
+                if position >= len(buffer):
+                    raise ValueError("Buffer exhausted")
+                element, end = decoder.raw_decode(buffer, position)
+            except ValueError:
+                if eof:
+                    raise DataArchiverException(f"Unexpected end of array {key} in {filename}")
+                data = f.read(JSON_READ_SIZE)
+                eof = not data
+                buffer = buffer[position:] + data
+                position = 0
+                continue
+            # An element ending exactly at the end of the buffer (e.g. a number) may be truncated
+            if end == len(buffer) and not eof:
+                data = f.read(JSON_READ_SIZE)
+                eof = not data
+                buffer = buffer[position:] + data
+                position = 0
+                continue
+            yield element
+            position = end
+
+
+def __candle_record(record: Union[Dict, List]) -> List:
+    """
+    Normalises a legacy JSON candle to [timestamp, open, high, low, close, volume]. Handles standard
+    ({"candle": {...}}), merged trading view ({"v": [...]}) and flat candles.
+    """
+    if isinstance(record, list):
+        return record[:6]
+    if "v" in record:
+        return record["v"][:6]
+    candle = record["candle"] if "candle" in record else record
+    return [candle.get("timestamp"), candle.get("open"), candle.get("high"), candle.get("low"),
+            candle.get("close"), candle.get("volume", np.nan)]
+
+
+def iter_json_candle_chunks(filename: str,
+                            key: Optional[str] = "price_history",
+                            unit: Optional[str] = "s",
+                            index_name: Optional[str] = "timestamp",
+                            chunksize: Optional[int] = ARCHIVE_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """
+    Streams a JSON candle file in OHLCV chunks indexed by time
+
+    :param filename: JSON file
+    :param key: Key of the candle array, see `iter_json_records`
+    :param unit: Unit of the UNIX timestamps
+    :param index_name: Name of the index
+    :param chunksize: Rows per chunk
+    :return: Iterator of DataFrames
+    """
+    columns = ["open", "high", "low", "close", "volume"]
+
+    def to_chunk(rows: List[List]) -> pd.DataFrame:
+        array = np.array(rows, dtype=np.float64)
+        index = pd.DatetimeIndex(pd.to_datetime(array[:, 0].astype(np.int64), unit=unit), name=index_name)
+        return pd.DataFrame(array[:, 1:], index=index, columns=columns, copy=False)
+
+    rows: List[List] = []
+    for record in iter_json_records(filename, key=key):
+        rows.append(__candle_record(record))
+        if len(rows) >= chunksize:
+            yield to_chunk(rows)
+            rows = []
+    if rows:
+        yield to_chunk(rows)
+
+
+def __archive_is_current(filename: str, archive_dir: str) -> bool:
+    return archive_exists(archive_dir) and \
+        os.path.getmtime(pathlib.Path(archive_dir, ARCHIVE_META_FILE)) >= os.path.getmtime(filename)
+
+
+def ingest_csv(filename: str,
+               datetime_column: str,
+               archive_dir: Optional[str] = None,
+               overwrite: Optional[bool] = False,
+               **kwargs) -> str:
+    """
+    Converts a CSV candle file to an archive with bounded memory. Skipped if an archive newer than the
+    file already exists.
+
+    :param filename: CSV file
+    :param datetime_column: Column holding dates or UNIX timestamps
+    :param archive_dir: Archive directory, defaults to next to the file
+    :param overwrite: Convert even if the archive is up to date
+    :param kwargs: Passed to `iter_csv_chunks`
+    :return: The archive directory
+    """
+    archive_dir = archive_dir if archive_dir else default_archive_dir(filename)
+    if overwrite or not __archive_is_current(filename, archive_dir):
+        write_archive(iter_csv_chunks(filename, datetime_column, **kwargs), archive_dir)
+    return archive_dir
+
+
+def ingest_json(filename: str,
+                archive_dir: Optional[str] = None,
+                overwrite: Optional[bool] = False,
+                **kwargs) -> str:
+    """
+    Converts a JSON candle file to an archive with bounded memory. Skipped if an archive newer than the
+    file already exists.
+
+    :param filename: JSON file
+    :param archive_dir: Archive directory, defaults to next to the file
+    :param overwrite: Convert even if the archive is up to date
+    :param kwargs: Passed to `iter_json_candle_chunks`
+    :return: The archive directory
+    """
+    archive_dir = archive_dir if archive_dir else default_archive_dir(filename)
+    if overwrite or not __archive_is_current(filename, archive_dir):
+        write_archive(iter_json_candle_chunks(filename, **kwargs), archive_dir)
+    return archive_dir
+
+
+def read_csv_archived(filename: str,
+                      datetime_column: str,
+                      archive_dir: Optional[str] = None,
+                      columns: Optional[List[str]] = None,
+                      start: Optional[pd.Timestamp] = None,
+                      end: Optional[pd.Timestamp] = None,
+                      **kwargs) -> pd.DataFrame:
+    """
+    Reads a CSV candle file through its archive. The first call converts the file, later calls are
+    memory-mapped reads.
+
+    :param filename: CSV file
+    :param datetime_column: Column holding dates or UNIX timestamps
+    :param archive_dir: Archive directory, defaults to next to the file
+    :param columns: Only read these columns
+    :param start: Optional first timestamp, inclusive
+    :param end: Optional last timestamp, inclusive
+    :param kwargs: Passed to `iter_csv_chunks`
+    :return: The DataFrame
+    """
+    archive_dir = ingest_csv(filename, datetime_column, archive_dir=archive_dir, **kwargs)
+    return read_archive(archive_dir, columns=columns, start=start, end=end)
@@ -1,10 +1,14 @@
-from typing import List, Dict, NewType, Union
+from typing import List, Dict, NewType, Union, Optional, Tuple, Set
 from symphony.data_classes import Instrument, filter_instruments
 from symphony.exceptions import UtilityClassException
 from symphony.enum import Market, StableCoin
+from collections import deque
+from functools import lru_cache
 
 CurrencyConversionGraph = NewType("CurrencyConversionGraph", Dict[str, List[str]])
 ConversionChainType = NewType("ConversionChain", List[str])
+# Symbol linking two assets and the order side that converts the first into the second
+ConversionEdge = Tuple[str, Market]
 
 
 # https://www.python.org/doc/essays/graphs/
@@ -79,29 +83,258 @@ def find_all_paths(graph: CurrencyConversionGraph, start: str, end: str, path: L
     return paths
 
 
-def find_shortest_path(graph: CurrencyConversionGraph, start: str, end: str, path: List = []) -> List[str]:
+def find_shortest_path(graph: CurrencyConversionGraph, start: str, end: str) -> List[str]:
     """
-    Finds the shortest path to a given base currency from a given quote currency
+    Finds the shortest path to a given base currency from a given quote currency. Breadth first, ties go to the
+    path that comes first in the order of the graph.
 
     :param graph: The conversion graph
     :param start: Start key (as quote)
     :param end: End key (as base)
-    :param path: Used in recursion
-    :return: The path
+    :return: The path, None if there is none
     """
-    path = path + [start]
     if start == end:
+        return [start]
+    parents: Dict[str, str] = {start: None}
+    queue = deque([start])
+    while queue:
+        node = queue.popleft()
+        for neighbour in graph.get(node, []):
+            if neighbour in parents:
+                continue
+            parents[neighbour] = node
+            if neighbour == end:
+                path = [end]
+                while parents[path[-1]] is not None:
+                    path.append(parents[path[-1]])
+                return path[::-1]
+            queue.append(neighbour)
+    return None
+
+
+def find_shortest_paths(graph: CurrencyConversionGraph, start: str, end: str,
+                        exclude: Optional[Set[str]] = None) -> List[List[str]]:
+    """
+    Finds every shortest path to a given base currency from a given quote currency, in the order of the graph
+
+    :param graph: The conversion graph
+    :param start: Start key (as quote)
+    :param end: End key (as base)
+    :param exclude: Assets the paths must not pass through
+    :return: The paths, empty if there are none
+    """
+    exclude = exclude or set()
+    hops: Dict[str, int] = {start: 0}
+    queue = deque([start])
+    while queue and end not in hops:
+        node = queue.popleft()
+        for neighbour in graph.get(node, []):
+            if neighbour not in hops and neighbour not in exclude:
+                hops[neighbour] = hops[node] + 1
+                queue.append(neighbour)
+    if end not in hops:
+        return []
+    # Assets on some shortest path, walking back from the end
+    on_path = {end}
+    for hop in range(hops[end] - 1, -1, -1):
+        on_path.update(node for node, node_hops in hops.items()
+                       if node_hops == hop and any(neighbour in on_path and hops.get(neighbour) == hop + 1
+                                                   for neighbour in graph.get(node, [])))
+    paths: List[List[str]] = []
+    stack: List[List[str]] = [[start]]
+    while stack:
+        path = stack.pop()
+        if path[-1] == end:
+            paths.append(path)
+            continue
+        next_hops = hops[path[-1]] + 1
+        for neighbour in reversed(graph.get(path[-1], [])):
+            if neighbour in on_path and hops.get(neighbour) == next_hops:
+                stack.append(path + [neighbour])
+    return paths
+
+
+class ConversionGraph:
+    """
+    Assets linked by the instruments trading them, in both directions. Buying an instrument converts its quote
+    asset into its base asset, selling converts back.
+
+    Shortest hop counts and next hops towards a target asset are found with one breadth first search and cached,
+    after that any shortest path to the target is read off in O(path length). Paths can be restricted to buys,
+    as `find_shortest_path` does. The graph is immutable, get it with `get_conversion_graph` to share it while
+    the instruments stay the same.
+    """
+
+    def __init__(self, instruments: List[Instrument]):
+        """
+        :param instruments: List of instruments
+        :raises UtilityClassException: If there are too few instruments
+        """
+        if len(instruments) <= 1:
+            raise UtilityClassException(f"List of instruments too small to create graph")
+        # Asset to neighbouring assets and the edge to each, in instrument order
+        self.__edges: Dict[str, Dict[str, ConversionEdge]] = {}
+        for instrument in instruments:
+            self.__edges.setdefault(instrument.quote_asset, {}).setdefault(
+                instrument.base_asset, (instrument.symbol, Market.BUY))
+            self.__edges.setdefault(instrument.base_asset, {}).setdefault(
+                instrument.quote_asset, (instrument.symbol, Market.SELL))
+        # Target and whether buys only, to (hops to the target, next asset towards it) of every asset reaching it
+        self.__tables: Dict[Tuple[str, bool], Tuple[Dict[str, int], Dict[str, str]]] = {}
+
+    def __contains__(self, asset: str) -> bool:
+        return asset in self.__edges
+
+    @property
+    def assets(self) -> List[str]:
+        return list(self.__edges.keys())
+
+    def edge(self, start: str, end: str) -> Optional[ConversionEdge]:
+        """
+        :param start: Asset converted
+        :param end: Asset converted into
+        :return: Tuple of (symbol, order side) converting start into end directly, None if no instrument does
+        """
+        return self.__edges.get(start, {}).get(end)
+
+    def hops(self, start: str, end: str, buy_only: Optional[bool] = False) -> Optional[int]:
+        """
+        :param start: Start asset
+        :param end: Target asset
+        :param buy_only: Only convert by buying
+        :return: Number of conversions on the shortest path, None if end cannot be reached
+        """
+        return self.__table(end, buy_only)[0].get(start)
+
+    def shortest_path(self, start: str, end: str, buy_only: Optional[bool] = False) -> Optional[List[str]]:
+        """
+        Shortest path, following the cached next hops. Ties go to the first instrument listed.
+
+        :param start: Start asset
+        :param end: Target asset
+        :param buy_only: Only convert by buying
+        :return: The assets along the path, None if end cannot be reached
+        """
+        hops, next_hops = self.__table(end, buy_only)
+        if start not in hops:
+            return None
+        path = [start]
+        while path[-1] != end:
+            path.append(next_hops[path[-1]])
         return path
-    if start not in graph.keys():
-        return None
-    shortest = None
-    for node in graph[start]:
-        if node not in path:
-            newpath = find_shortest_path(graph, node, end, path)
-            if newpath:
-                if not shortest or len(newpath) < len(shortest):
-                    shortest = newpath
-    return shortest
+
+    def shortest_paths(self, start: str, end: str, buy_only: Optional[bool] = False) -> List[List[str]]:
+        """
+        Every shortest path, in the order of `shortest_path` first
+
+        :param start: Start asset
+        :param end: Target asset
+        :param buy_only: Only convert by buying
+        :return: The paths, empty if end cannot be reached
+        """
+        hops = self.__table(end, buy_only)[0]
+        if start not in hops:
+            return []
+        paths: List[List[str]] = []
+        stack: List[List[str]] = [[start]]
+        while stack:
+            path = stack.pop()
+            if path[-1] == end:
+                paths.append(path)
+                continue
+            remaining = hops[path[-1]] - 1
+            for neighbour in reversed(list(self.__neighbours(path[-1], buy_only))):
+                if hops.get(neighbour) == remaining:
+                    stack.append(path + [neighbour])
+        return paths
+
+    def shortest_path_tree(self, end: str, buy_only: Optional[bool] = False) -> Tuple[Dict[str, int], Dict[str, str]]:
+        """
+        The cached tables of a target, every shortest path to it at once. The tables are shared, do not modify them.
+
+        :param end: Target asset
+        :param buy_only: Only convert by buying
+        :return: Tuple of (hops to end of every asset reaching it, next asset towards end), both in breadth first order
+        """
+        return self.__table(end, buy_only)
+
+    def conversion_chain(self, path: List[str]) -> Tuple[ConversionChainType, List[Market]]:
+        """
+        Symbols and order sides that walk a path
+
+        :param path: Assets along the path
+        :return: Tuple of (conversion chain, execution chain)
+        :raises UtilityClassException: If two consecutive assets are not linked
+        """
+        chain: ConversionChainType = []
+        execution_chain: List[Market] = []
+        for start, end in zip(path, path[1:]):
+            edge = self.edge(start, end)
+            if edge is None:
+                raise UtilityClassException(f"No instrument converts {start} into {end}")
+            chain.append(edge[0])
+            execution_chain.append(edge[1])
+        return chain, execution_chain
+
+    def precompute(self, buy_only: Optional[bool] = False) -> None:
+        """
+        Fills the tables of every target, i.e. all pairs shortest paths
+
+        :param buy_only: Tables of paths restricted to buys
+        :return: None
+        """
+        for asset in self.__edges:
+            self.__table(asset, buy_only)
+        return
+
+    def __neighbours(self, asset: str, buy_only: bool):
+        edges = self.__edges.get(asset, {})
+        if not buy_only:
+            return edges.keys()
+        return (neighbour for neighbour, (symbol, side) in edges.items() if side == Market.BUY)
+
+    def __table(self, end: str, buy_only: bool) -> Tuple[Dict[str, int], Dict[str, str]]:
+        """
+        Hops to `end` of every asset reaching it, and the neighbour to go to next. The search runs backwards from
+        `end`; next hops are then picked in instrument order, as a forward search would.
+        """
+        table = self.__tables.get((end, buy_only))
+        if table is not None:
+            return table
+        hops: Dict[str, int] = {end: 0}
+        queue = deque([end])
+        while queue:
+            asset = queue.popleft()
+            for neighbour, (symbol, side) in self.__edges.get(asset, {}).items():
+                # The edge back from the neighbour is the opposite order side
+                if neighbour not in hops and (not buy_only or side == Market.SELL):
+                    hops[neighbour] = hops[asset] + 1
+                    queue.append(neighbour)
+        next_hops: Dict[str, str] = {}
+        for asset, asset_hops in hops.items():
+            if asset_hops:
+                next_hops[asset] = next(neighbour for neighbour in self.__neighbours(asset, buy_only)
+                                        if hops.get(neighbour) == asset_hops - 1)
+        self.__tables[(end, buy_only)] = (hops, next_hops)
+        return hops, next_hops
+
+
+@lru_cache(maxsize=4)
+def __cached_conversion_graph(universe: Tuple[Tuple[str, str, str], ...]) -> ConversionGraph:
+    return ConversionGraph([Instrument(symbol=symbol, base_asset=base_asset, quote_asset=quote_asset)
+                            for symbol, base_asset, quote_asset in universe])
+
+
+def get_conversion_graph(instruments: List[Instrument]) -> ConversionGraph:
+    """
+    Conversion graph of the instruments, shared with every caller passing the same instruments so its path
+    tables are only computed once. A changed instrument universe gets a new graph.
+
+    :param instruments: List of instruments
+    :return: The conversion graph
+    """
+    return __cached_conversion_graph(tuple((instrument.symbol, instrument.base_asset, instrument.quote_asset)
+                                           for instrument in instruments))
 
 
 def path_to_conversion_chain(path: List[str]) -> ConversionChainType:
@@ -176,14 +409,10 @@ def bidirectional_conversion_chain(graph: CurrencyConversionGraph, start: str,
     if start == end_instrument.base_asset or start == end_instrument.quote_asset:
         return [[end_instrument.symbol]]
 
-    if paths := find_all_paths(graph, start, end_instrument.base_asset):
-        conversion_chains = [path_to_conversion_chain(path) for path in paths]
-        try:
-            return filter_conversion_chain(conversion_chains, end_instrument.symbol)
-        except UtilityClassException:
-            pass
-        except Exception as e:
-            raise e
+    # Chains through the target instrument are the paths to its quote asset, plus buying it. Paths through its
+    # base asset are left out, longer ones are taken when all the shortest go through it.
+    if paths := find_shortest_paths(graph, start, end_instrument.quote_asset, exclude={end_instrument.base_asset}):
+        return [path_to_conversion_chain(path + [end_instrument.base_asset]) for path in paths]
 
     chains = []
     # Basic circumstance. Start is a base currency instead of counter
@@ -0,0 +1,110 @@
+from symphony.data_classes import PriceHistory
+from symphony.enum import Timeframe, Column
+from symphony.exceptions import UtilityClassException
+from symphony.utils.time import round_to_timeframe
+from typing import List, Optional, Union
+from symphony.config import USE_MODIN
+import numpy as np
+
+if USE_MODIN:
+    import modin.pandas as pd
+else:
+    import pandas as pd
+
+
+def can_resample(source_timeframe: Timeframe, target_timeframe: Timeframe) -> bool:
+    """
+    Returns true if bars of `target_timeframe` can be built from bars of `source_timeframe`
+
+    :param source_timeframe: The finer timeframe
+    :param target_timeframe: The coarser timeframe
+    :return: True or False
+    """
+    return target_timeframe.value >= source_timeframe.value and target_timeframe.value % source_timeframe.value == 0
+
+
+def finest_timeframe(timeframes: Union[Timeframe, List[Timeframe]]) -> Timeframe:
+    """
+    Returns the finest timeframe of a list, checking every other timeframe can be derived from it
+
+    :param timeframes: Single or list of timeframes
+    :return: The finest timeframe
+    :raises UtilityClassException: If a timeframe cannot be derived from the finest one
+    """
+    if isinstance(timeframes, Timeframe):
+        return timeframes
+    finest = min(timeframes, key=lambda timeframe: timeframe.value)
+    for timeframe in timeframes:
+        if not can_resample(finest, timeframe):
+            raise UtilityClassException(f"Cannot derive {timeframe} from {finest}")
+    return finest
+
+
+def resample_price_history(price_history: PriceHistory,
+                           timeframe: Timeframe,
+                           incomplete_bar: Optional[bool] = False) -> PriceHistory:
+    """
+    Derives bars of a coarser timeframe (e.g. H4, D1) from a finer one (e.g. H1). Bars are aligned to UTC
+    the same way Binance aligns them (see `round_to_timeframe`). A leading bar whose first sub-bar is missing
+    is always dropped, as its open would be wrong. The trailing bar is dropped unless it is complete or
+    `incomplete_bar` is set.
+
+    :param price_history: Source price history, must have OHLCV columns
+    :param timeframe: Target timeframe
+    :param incomplete_bar: Keep the trailing bar even if it is not complete yet, defaults to [False]
+    :return: New PriceHistory with OHLCV columns only
+    :raises UtilityClassException: If the target timeframe cannot be derived from the source timeframe
+    """
+    source_timeframe: Timeframe = price_history.timeframe
+    if not isinstance(source_timeframe, Timeframe):
+        raise UtilityClassException(f"Price history has no timeframe to resample from")
+    if not can_resample(source_timeframe, timeframe):
+        raise UtilityClassException(f"Cannot derive {timeframe} from {source_timeframe}")
+
+    df = price_history.price_history
+    if source_timeframe == timeframe or not len(df):
+        resampled = df[[Column.OPEN, Column.HIGH, Column.LOW, Column.CLOSE, Column.VOLUME]].copy()
+        return PriceHistory(instrument=price_history.instrument, timeframe=timeframe, price_history=resampled)
+
+    bar_times: pd.DatetimeIndex = round_to_timeframe(df.index, timeframe)
+    bar_keys = bar_times.asi8
+    starts = np.flatnonzero(np.r_[True, bar_keys[1:] != bar_keys[:-1]])
+    ends = np.r_[starts[1:], len(bar_keys)] - 1
+
+    resampled = pd.DataFrame({
+        Column.OPEN: df[Column.OPEN].to_numpy()[starts],
+        Column.HIGH: np.maximum.reduceat(df[Column.HIGH].to_numpy(), starts),
+        Column.LOW: np.minimum.reduceat(df[Column.LOW].to_numpy(), starts),
+        Column.CLOSE: df[Column.CLOSE].to_numpy()[ends],
+        Column.VOLUME: np.add.reduceat(df[Column.VOLUME].to_numpy(), starts),
+    }, index=bar_times[starts])
+    resampled.index.name = df.index.name
+
+    source_delta = pd.Timedelta(minutes=source_timeframe.value)
+    target_delta = pd.Timedelta(minutes=timeframe.value)
+    if df.index[0] != bar_times[0]:
+        resampled = resampled.iloc[1:]
+    if len(resampled) and not incomplete_bar and df.index[-1] + source_delta != bar_times[-1] + target_delta:
+        resampled = resampled.iloc[:-1]
+
+    return PriceHistory(instrument=price_history.instrument, timeframe=timeframe, price_history=resampled)
+
+
+def resample_price_histories(price_history: PriceHistory,
+                             timeframes: Union[Timeframe, List[Timeframe]],
+                             incomplete_bar: Optional[bool] = False) -> List[PriceHistory]:
+    """
+    Derives several timeframes from one price history. The source timeframe itself is returned as-is if requested.
+
+    :param price_history: Source price history
+    :param timeframes: Single or list of target timeframes
+    :param incomplete_bar: Keep trailing incomplete bars, defaults to [False]
+    :return: List of PriceHistory objects, in the order of `timeframes`
+    """
+    if isinstance(timeframes, Timeframe):
+        timeframes = [timeframes]
+    return [
+        price_history if timeframe == price_history.timeframe
+        else resample_price_history(price_history, timeframe, incomplete_bar=incomplete_bar)
+        for timeframe in timeframes
+    ]
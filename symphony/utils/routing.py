@@ -0,0 +1,234 @@
+from typing import List, Dict, Optional, Tuple, Callable, Final
+from symphony.data_classes import Instrument
+from symphony.exceptions import UtilityClassException
+from symphony.enum import Market
+from symphony.utils.graph import ConversionChainType
+from dataclasses import dataclass
+from functools import lru_cache
+import numpy as np
+
+# Binance spot taker commission without discounts
+TAKER_COMMISSION: Final[float] = 0.001
+# Longest route searched, in conversions
+MAX_ROUTE_HOPS: Final[int] = 4
+
+# Average price of filling a quantity of the base asset of a symbol on an order side, None if it cannot be filled
+FillPriceFunction = Callable[[str, float, Market], Optional[float]]
+
+
+@dataclass
+class ConversionRoute:
+    """
+    Cheapest conversion found by a ConversionRouter
+    """
+    path: List[str]
+    conversion_chain: ConversionChainType
+    execution_chain: List[Market]
+    rate: float
+
+
+class ConversionRouter:
+    """
+    Finds the conversion with the best effective rate, spread and commission included. Each edge is weighted by
+    -log(rate), so the cheapest route is the shortest path. Weights can be negative, e.g. selling BTC for USDT, so
+    the search is a Bellman-Ford over the edge arrays, one vectorized relaxation per hop, bounded by `max_hops`.
+    Crossed quotes, e.g. stale ones, make negative cycles, and the cheapest walk would then trade round them. Such
+    walks are not routes: a walk passing through an asset twice is rejected.
+    """
+
+    def __init__(self, instruments: List[Instrument], max_hops: Optional[int] = MAX_ROUTE_HOPS):
+        """
+        :param instruments: List of instruments
+        :param max_hops: Longest route searched
+        :raises UtilityClassException: If there are too few instruments
+        """
+        if len(instruments) <= 1:
+            raise UtilityClassException(f"List of instruments too small to route")
+        self.symbols: List[str] = [instrument.symbol for instrument in instruments]
+        self.__symbol_index: Dict[str, int] = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.max_hops: int = max_hops
+        self.assets: List[str] = list(dict.fromkeys(asset for instrument in instruments
+                                                    for asset in [instrument.quote_asset, instrument.base_asset]))
+        self.__asset_index: Dict[str, int] = {asset: i for i, asset in enumerate(self.assets)}
+        quote_assets = np.array([self.__asset_index[instrument.quote_asset] for instrument in instruments], dtype=np.int64)
+        base_assets = np.array([self.__asset_index[instrument.base_asset] for instrument in instruments], dtype=np.int64)
+        # Buying converts the quote asset into the base asset, selling back. Sorted by the asset converted into.
+        sources = np.concatenate([quote_assets, base_assets])
+        targets = np.concatenate([base_assets, quote_assets])
+        order = np.argsort(targets, kind="stable")
+        self.__sources: np.ndarray = sources[order]
+        self.__targets: np.ndarray = targets[order]
+        self.__edge_symbols: np.ndarray = np.concatenate([np.arange(len(instruments))] * 2)[order]
+        self.__edge_buys: np.ndarray = np.concatenate([np.ones(len(instruments), dtype=bool),
+                                                       np.zeros(len(instruments), dtype=bool)])[order]
+        # Edges into asset i are __target_starts[i]:__target_stops[i]
+        self.__target_starts: np.ndarray = np.searchsorted(self.__targets, np.arange(len(self.assets)), side="left")
+        self.__target_stops: np.ndarray = np.searchsorted(self.__targets, np.arange(len(self.assets)), side="right")
+
+    def __contains__(self, asset: str) -> bool:
+        return asset in self.__asset_index
+
+    def edge_weights(self,
+                     bids: np.ndarray,
+                     asks: np.ndarray,
+                     commission: Optional[float] = TAKER_COMMISSION) -> np.ndarray:
+        """
+        -log of the effective rate of every edge: buys pay the ask, sells get the bid, both pay commission
+
+        :param bids: Bid of each symbol, in the order of `symbols`, NaN where unquoted
+        :param asks: Ask of each symbol
+        :param commission: Commission rate of each fill
+        :return: Weight of each edge, infinite where the symbol is unquoted
+        """
+        symbol_bids = bids[self.__edge_symbols]
+        symbol_asks = asks[self.__edge_symbols]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rates = np.where(self.__edge_buys, (1 - commission) / symbol_asks, symbol_bids * (1 - commission))
+            weights = -np.log(rates)
+        weights[~(rates > 0)] = np.inf
+        return weights
+
+    def route(self,
+              start: str,
+              end: str,
+              weights: np.ndarray,
+              amount: Optional[float] = None,
+              fill_price: Optional[FillPriceFunction] = None,
+              fill_symbols: Optional[List[str]] = None,
+              excluded: Optional[List[str]] = None,
+              commission: Optional[float] = TAKER_COMMISSION,
+              max_hops: Optional[int] = None) -> Optional[ConversionRoute]:
+        """
+        Cheapest route from start to end. With an amount and a fill price function, e.g. from a DepthCache, the
+        edges of the symbols it can price are weighted by the average price of filling what reaches them along the
+        top of book routes, and the search is run again.
+
+        :param start: Asset converted
+        :param end: Asset converted into
+        :param weights: Edge weights from `edge_weights`
+        :param amount: Amount of the start asset
+        :param fill_price: Average fill price of a symbol, quantity and order side, None if it cannot tell
+        :param fill_symbols: Symbols the fill price function can price
+        :param excluded: Assets the route must not pass through
+        :param commission: Commission rate of each fill, for the repriced edges
+        :param max_hops: Longest route searched, defaults to the router's
+        :return: The route, None if end cannot be reached within max_hops or the cheapest walk passes through an
+                 asset twice
+        """
+        if start not in self.__asset_index or end not in self.__asset_index:
+            return None
+        if excluded:
+            blocked = np.zeros(len(self.assets), dtype=bool)
+            blocked[[self.__asset_index[asset] for asset in excluded if asset in self.__asset_index]] = True
+            weights = np.where(blocked[self.__sources] | blocked[self.__targets], np.inf, weights)
+        max_hops = max_hops if max_hops is not None else self.max_hops
+        distances = self.__search(self.__asset_index[start], weights, max_hops)
+        if amount and fill_price is not None and fill_symbols:
+            weights = self.__reprice(weights, distances[-1], amount, fill_price, fill_symbols, commission)
+            distances = self.__search(self.__asset_index[start], weights, max_hops)
+        return self.__route(self.__asset_index[start], self.__asset_index[end], weights, distances)
+
+    def __search(self, start: int, weights: np.ndarray, max_hops: int) -> List[np.ndarray]:
+        """
+        Bellman-Ford, each round allowing one more hop
+
+        :param start: Index of the start asset
+        :param weights: Edge weights
+        :param max_hops: Rounds at most
+        :return: Distance of every asset from the start after each round
+        """
+        distances = np.full(len(self.assets), np.inf)
+        distances[start] = 0.0
+        all_distances: List[np.ndarray] = [distances]
+        for _ in range(max_hops):
+            # Every asset has edges in, so the minimum of each group is the best candidate of each asset
+            new_distances = np.minimum(distances, np.minimum.reduceat(distances[self.__sources] + weights,
+                                                                      self.__target_starts))
+            if np.array_equal(new_distances, distances):
+                break
+            all_distances.append(new_distances)
+            distances = new_distances
+        return all_distances
+
+    def __reprice(self,
+                  weights: np.ndarray,
+                  distances: np.ndarray,
+                  amount: float,
+                  fill_price: FillPriceFunction,
+                  fill_symbols: List[str],
+                  commission: float) -> np.ndarray:
+        """
+        Weights of the edges out of reached assets at the average price of filling what reaches them
+
+        :param weights: Top of book edge weights
+        :param distances: Top of book distances from the start
+        :param amount: Amount of the start asset
+        :param fill_price: Average fill price of a symbol, quantity and order side
+        :param fill_symbols: Symbols the fill price function can price
+        :param commission: Commission rate of each fill
+        :return: The new weights
+        """
+        weights = weights.copy()
+        priced = np.isin(self.__edge_symbols, [self.__symbol_index[symbol] for symbol in fill_symbols
+                                               if symbol in self.__symbol_index])
+        for edge in np.flatnonzero(priced & np.isfinite(distances[self.__sources]) & np.isfinite(weights)):
+            # Amount of the source asset reaching the edge, and the base quantity it fills
+            reaching = amount * np.exp(-distances[self.__sources[edge]])
+            if self.__edge_buys[edge]:
+                ask = (1 - commission) / np.exp(-weights[edge])
+                price = fill_price(self.symbols[self.__edge_symbols[edge]], reaching / ask, Market.BUY)
+                rate = (1 - commission) / price if price else None
+            else:
+                price = fill_price(self.symbols[self.__edge_symbols[edge]], reaching, Market.SELL)
+                rate = price * (1 - commission) if price else None
+            if rate is not None:
+                weights[edge] = -np.log(rate) if rate > 0 else np.inf
+        return weights
+
+    def __route(self, start: int, end: int, weights: np.ndarray, distances: List[np.ndarray]) -> Optional[ConversionRoute]:
+        """
+        Walks back from end, one round at a time, to an edge into the asset that gave its distance in that round.
+        The sums are recomputed exactly as the search did, so they compare equal. A walk round a negative cycle
+        passes through some asset twice, the start included, and is no route.
+        """
+        if not np.isfinite(distances[-1][end]):
+            return None
+        edges: List[int] = []
+        asset = end
+        for hop in range(len(distances) - 1, 0, -1):
+            if distances[hop][asset] == distances[hop - 1][asset]:
+                continue
+            in_edges = np.arange(self.__target_starts[asset], self.__target_stops[asset])
+            sums = distances[hop - 1][self.__sources[in_edges]] + weights[in_edges]
+            edge = int(in_edges[np.flatnonzero(sums == distances[hop][asset])[0]])
+            edges.append(edge)
+            asset = int(self.__sources[edge])
+        if asset != start:
+            raise UtilityClassException(f"Route to {self.assets[end]} does not start at {self.assets[start]}")
+        edges.reverse()
+        path = [self.assets[start]] + [self.assets[self.__targets[edge]] for edge in edges]
+        if len(set(path)) < len(path):
+            return None
+        return ConversionRoute(
+            path=path,
+            conversion_chain=[self.symbols[self.__edge_symbols[edge]] for edge in edges],
+            execution_chain=[Market.BUY if self.__edge_buys[edge] else Market.SELL for edge in edges],
+            rate=float(np.exp(-distances[-1][end]))
+        )
+
+
+@lru_cache(maxsize=4)
+def __cached_conversion_router(universe: Tuple[Tuple[str, str, str], ...]) -> ConversionRouter:
+    return ConversionRouter([Instrument(symbol=symbol, base_asset=base_asset, quote_asset=quote_asset)
+                             for symbol, base_asset, quote_asset in universe])
+
+
+def get_conversion_router(instruments: List[Instrument]) -> ConversionRouter:
+    """
+    Conversion router of the instruments, shared with every caller passing the same instruments
+
+    :param instruments: List of instruments
+    :return: The conversion router
+    """
+    return __cached_conversion_router(tuple((instrument.symbol, instrument.base_asset, instrument.quote_asset)
+                                            for instrument in instruments))
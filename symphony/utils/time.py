@@ -10,25 +10,25 @@ import pytz
 # TODO: Must do more complicated bar calculations for equities
 
 
-def round_to_minute(timestamp: pd.Timestamp, minutes: int = 1) -> pd.Timestamp:
+def round_to_minute(timestamp: Union[pd.Timestamp, pd.DatetimeIndex], minutes: int = 1) -> Union[pd.Timestamp, pd.DatetimeIndex]:
     """
     Rounds a timestamp at an arbitrary time by flooring it to the nearest past minute granularity
 
-    :param timestamp: (`pd.Timestamp`) Pandas timestamp
+    :param timestamp: (`pd.Timestamp`, `pd.DatetimeIndex`) Pandas timestamp or index of timestamps
     :param minutes: (`int`) Number of minutes to round to
-    :return: (`pd.Timestamp`) The rounded timestamp
+    :return: (`pd.Timestamp`, `pd.DatetimeIndex`) The rounded timestamp(s)
     """
 
     return timestamp.floor(f'{minutes}min')
 
 
-def round_to_timeframe(timestamp: pd.Timestamp, timeframe: Timeframe) -> pd.Timestamp:
+def round_to_timeframe(timestamp: Union[pd.Timestamp, pd.DatetimeIndex], timeframe: Timeframe) -> Union[pd.Timestamp, pd.DatetimeIndex]:
     """
     Rounds a timestamp at an arbitrary time to the nearest Timeframe.TIMEFRAME granularity
 
-    :param timestamp: Pandas timestamp
+    :param timestamp: Pandas timestamp, or an index of timestamps
     :param timeframe: Timeframe
-    :return: Timestamp
+    :return: Timestamp, or index of timestamps
     :raises UtilityClassException: If the supplied timeframe is not recognized
     """
     if not isinstance(timeframe, Timeframe):
@@ -220,6 +220,25 @@ def chunk_times(
     return chunks
 
 
+def get_page_ranges(start_ms: int, end_ms: int, timeframe: Timeframe, page_size: int) -> List[Tuple[int, int]]:
+    """
+    Splits the bars from `start_ms` to `end_ms` into pages of `page_size` bars, e.g. for paged API calls.
+    Page boundaries only depend on the range, so all pages can be requested at once.
+
+    :param start_ms: Open time of the first bar, UNIX ms
+    :param end_ms: Open time of the last bar, UNIX ms, inclusive
+    :param timeframe: Timeframe of the bars
+    :param page_size: Max bars per page
+    :return: A list of tuples [(page_start_ms, page_end_ms), ...], both inclusive
+    """
+    bar_ms: int = timeframe.value * 60 * 1000
+    page_ms: int = bar_ms * page_size
+    return [
+        (page_start, min(page_start + page_ms - bar_ms, end_ms))
+        for page_start in range(start_ms, end_ms + 1, page_ms)
+    ]
+
+
 def standardize_index(price_history: PriceHistory, index: Union[int, pd.Timestamp]) -> int:
     """
     Pass in an index, either integer or datetime, and get normalized integer index in response